@@ -0,0 +1,35 @@
+"""
+Benchmarks
+Outils hors ligne (non déployés) pour mesurer les handlers sans infrastructure Azure
+
+À l'import, le package ajoute functions/ au sys.path (comme
+function_app.py) et fixe les variables d'environnement de connexion sur
+des valeurs factices (OFFLINE_ENVIRONMENT), avant que shared.config ne
+soit chargé: des identifiants réels du poste ne sont jamais utilisés.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "functions"))
+
+ACCOUNT_NAME = "benchaccount"
+SHAREPOINT_SITE_URL = "https://contoso.sharepoint.com/sites/bench"
+DATAVERSE_URL = "https://bench.crm4.dynamics.com"
+AAD_HOST = "login.microsoftonline.com"
+
+OFFLINE_ENVIRONMENT = {
+    "AZURE_STORAGE_CONNECTION_STRING": (
+        f"DefaultEndpointsProtocol=https;AccountName={ACCOUNT_NAME};"
+        "AccountKey=YmVuY2htYXJrLWtleQ==;EndpointSuffix=core.windows.net"
+    ),
+    "BLOB_STORAGE_CONNECTION_STRING": "",
+    "SHAREPOINT_SITE_URL": SHAREPOINT_SITE_URL,
+    "DATAVERSE_URL": DATAVERSE_URL,
+    "DATAVERSE_TENANT_ID": "00000000-0000-0000-0000-000000000000",
+    "DATAVERSE_CLIENT_ID": "00000000-0000-0000-0000-000000000001",
+    "DATAVERSE_CLIENT_SECRET": "offline-secret",
+    "BLOB_INDEX_BACKEND": "none"
+}
+os.environ.update(OFFLINE_ENVIRONMENT)
@@ -0,0 +1,744 @@
+"""
+Offline Backends
+Stand-ins locaux de Blob Storage, SharePoint, Dataverse et Azure AD, avec comptage des appels sortants
+
+- InMemoryBlobService remplace le BlobServiceClient du BlobStorageClient
+  partagé: chaque appel du SDK qui ferait un aller-retour HTTP (upload,
+  download, HEAD, delete, page de listing...) est compté comme un appel
+  "storage". Les blobs restent sous les seuils d'envoi en une requête du
+  SDK (32 MB en lecture, 64 MB en écriture): une opération = un appel.
+- FakeHttpBackend intercepte la librairie requests (HTTPAdapter.send,
+  utilisé aussi par azure-identity) et répond pour SharePoint, Dataverse
+  (OData en mémoire) et Azure AD (jetons). Tout autre hôte est refusé:
+  aucun appel ne sort de la machine.
+- offline_backends() installe le tout et remet à zéro les singletons des
+  clients partagés (blob, cache de listing, SharePoint).
+"""
+
+import bisect
+import io
+import json
+import operator
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http import HTTPStatus
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import azure.functions as func
+import requests
+from requests.structures import CaseInsensitiveDict
+from azure.core import MatchConditions
+from azure.core.exceptions import AzureError, ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+from azure.core.paging import ItemPaged
+from azure.storage.blob import BlobPrefix, BlobProperties, ContentSettings, FilteredBlob
+
+from . import ACCOUNT_NAME, AAD_HOST, DATAVERSE_URL, SHAREPOINT_SITE_URL
+from shared import blob_client, listing_cache
+from shared.sharepoint_client import SharePointClient
+
+# Réponse de conversion PDF de SharePoint (le contenu n'est pas vérifié par les handlers)
+FAKE_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+LIST_PAGE_SIZE = 5000
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+_TAG_OPERATORS = {
+    "=": operator.eq, "<>": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge
+}
+_TAG_CONDITION = re.compile(r"\"([^\"]+)\"\s*(=|<>|<=|>=|<|>)\s*'([^']*)'")
+
+
+class CallLog:
+    """Thread-safe count of outbound calls per (service, operation)"""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, service: str, operation: str) -> None:
+        with self._lock:
+            self._counts[(service, operation)] += 1
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self._counts)
+
+    def since(self, snapshot: Counter) -> Counter:
+        """Calls made since snapshot was taken"""
+        return self.snapshot() - snapshot
+
+    @staticmethod
+    def per_service(counts: Counter) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for (service, _), count in counts.items():
+            totals[service] = totals.get(service, 0) + count
+        return totals
+
+
+def _tags_match(expression: str, tags: Dict[str, str]) -> bool:
+    """Evaluate a blob index tag expression ("key" op 'value' [AND ...])"""
+    for clause in re.split(r"\s+AND\s+", expression.strip(), flags=re.IGNORECASE):
+        match = _TAG_CONDITION.fullmatch(clause.strip())
+        if match is None:
+            raise ValueError(f"Unsupported tag expression: {expression}")
+        key, op, value = match.groups()
+        if key not in tags or not _TAG_OPERATORS[op](tags[key], value):
+            return False
+    return True
+
+
+def _delete_condition_met(
+    stored: "_StoredBlob",
+    if_tags_match_condition: Optional[str],
+    if_unmodified_since: Optional[datetime]
+) -> bool:
+    """Whether the conditional headers of a delete allow it (False = 412)"""
+    if if_tags_match_condition and not _tags_match(if_tags_match_condition, stored.tags):
+        return False
+    return if_unmodified_since is None or stored.last_modified <= if_unmodified_since
+
+
+class _StoredBlob:
+    """Content and properties of one in-memory blob"""
+
+    def __init__(
+        self,
+        data: bytes,
+        content_type: Optional[str] = None,
+        tags: Optional[Dict[str, str]] = None,
+        metadata: Optional[Dict[str, str]] = None
+    ):
+        self.data = bytes(data)
+        self.content_type = content_type
+        self.tags = dict(tags or {})
+        self.metadata = dict(metadata or {})
+        self.touch()
+
+    def touch(self) -> None:
+        self.etag = f"\"0x{uuid.uuid4().hex[:16].upper()}\""
+        self.last_modified = datetime.now(timezone.utc)
+
+    def properties(self, container_name: str, blob_name: str, include_metadata: bool = True) -> BlobProperties:
+        properties = BlobProperties(**{
+            "name": blob_name,
+            "Content-Length": len(self.data),
+            "ETag": self.etag,
+            "Last-Modified": self.last_modified,
+            "metadata": dict(self.metadata) if include_metadata else None,
+            "x-ms-copy-status": "success",
+            "x-ms-tag-count": len(self.tags) or None
+        })
+        properties.container = container_name
+        properties.content_settings = ContentSettings(content_type=self.content_type)
+        properties.tags = dict(self.tags)
+        return properties
+
+
+class _FakeDownloader:
+    """Subset of StorageStreamDownloader used by the shared clients"""
+
+    def __init__(self, stored: _StoredBlob, container_name: str, blob_name: str):
+        self._data = stored.data
+        self.name = blob_name
+        self.container = container_name
+        self.size = len(stored.data)
+        self.properties = stored.properties(container_name, blob_name)
+
+    def readall(self) -> bytes:
+        return self._data
+
+    def chunks(self) -> Iterator[bytes]:
+        for start in range(0, self.size, DOWNLOAD_CHUNK_SIZE):
+            yield self._data[start:start + DOWNLOAD_CHUNK_SIZE]
+
+
+class _FakeBlobClient:
+    """Subset of azure.storage.blob.BlobClient backed by InMemoryBlobService"""
+
+    def __init__(self, service: "InMemoryBlobService", container_name: str, blob_name: str):
+        self._service = service
+        self.container_name = container_name
+        self.blob_name = blob_name
+        self.url = f"{service.url}/{container_name}/{quote(blob_name)}"
+
+    def _stored(self) -> _StoredBlob:
+        stored = self._service.blobs.get((self.container_name, self.blob_name))
+        if stored is None:
+            raise ResourceNotFoundError(message=f"The specified blob does not exist: {self.blob_name}")
+        return stored
+
+    def upload_blob(
+        self,
+        data,
+        overwrite: bool = False,
+        tags: Optional[Dict[str, str]] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        content_settings: Optional[ContentSettings] = None,
+        etag: Optional[str] = None,
+        match_condition: Optional[MatchConditions] = None,
+        **kwargs
+    ) -> Dict:
+        self._service.call("upload_blob")
+        payload = data.read() if hasattr(data, "read") else data
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        key = (self.container_name, self.blob_name)
+        with self._service.lock:
+            # overwrite=False is sent as If-None-Match: * by the SDK
+            if not overwrite and key in self._service.blobs:
+                raise ResourceExistsError(message=f"The specified blob already exists: {self.blob_name}")
+            if match_condition == MatchConditions.IfNotModified:
+                current = self._service.blobs.get(key)
+                if current is None or current.etag != etag:
+                    raise ResourceModifiedError(message="The condition specified using HTTP conditional header(s) is not met.")
+            stored = _StoredBlob(payload, content_settings.content_type if content_settings else None, tags, metadata)
+            self._service.blobs[key] = stored
+        return {"etag": stored.etag, "last_modified": stored.last_modified}
+
+    def download_blob(self, **kwargs) -> _FakeDownloader:
+        self._service.call("download_blob")
+        return _FakeDownloader(self._stored(), self.container_name, self.blob_name)
+
+    def exists(self, **kwargs) -> bool:
+        self._service.call("get_blob_properties")
+        return (self.container_name, self.blob_name) in self._service.blobs
+
+    def get_blob_properties(self, **kwargs) -> BlobProperties:
+        self._service.call("get_blob_properties")
+        return self._stored().properties(self.container_name, self.blob_name)
+
+    def set_blob_metadata(
+        self,
+        metadata: Optional[Dict[str, str]] = None,
+        etag: Optional[str] = None,
+        match_condition: Optional[MatchConditions] = None,
+        **kwargs
+    ) -> Dict:
+        self._service.call("set_blob_metadata")
+        with self._service.lock:
+            stored = self._stored()
+            if match_condition == MatchConditions.IfNotModified and etag != stored.etag:
+                raise ResourceModifiedError(message="The condition specified using HTTP conditional header(s) is not met.")
+            stored.metadata = dict(metadata or {})
+            stored.touch()
+        return {"etag": stored.etag, "last_modified": stored.last_modified}
+
+    def delete_blob(
+        self,
+        if_tags_match_condition: Optional[str] = None,
+        if_unmodified_since: Optional[datetime] = None,
+        **kwargs
+    ) -> None:
+        self._service.call("delete_blob")
+        with self._service.lock:
+            stored = self._stored()
+            if not _delete_condition_met(stored, if_tags_match_condition, if_unmodified_since):
+                raise ResourceModifiedError(message="The condition specified using HTTP conditional header(s) is not met.")
+            del self._service.blobs[(self.container_name, self.blob_name)]
+
+    def start_copy_from_url(self, source_url: str, **kwargs) -> Dict:
+        self._service.call("start_copy_from_url")
+        source_path = source_url.split("?")[0]
+        if not source_path.startswith(self._service.url + "/"):
+            raise AzureError(f"Copy source outside of the offline account: {source_path}")
+        container_name, _, blob_name = unquote(source_path[len(self._service.url) + 1:]).partition("/")
+        with self._service.lock:
+            source = self._service.blobs.get((container_name, blob_name))
+            if source is None:
+                raise ResourceNotFoundError(message=f"The specified blob does not exist: {blob_name}")
+            stored = _StoredBlob(source.data, source.content_type, metadata=source.metadata)
+            self._service.blobs[(self.container_name, self.blob_name)] = stored
+        return {"copy_status": "success", "copy_id": str(uuid.uuid4()), "etag": stored.etag, "last_modified": stored.last_modified}
+
+    def abort_copy(self, copy_id: str, **kwargs) -> None:
+        self._service.call("abort_copy")
+
+    def stage_block(self, block_id: str, data: bytes, **kwargs) -> None:
+        self._service.call("stage_block")
+        with self._service.lock:
+            self._service.uncommitted.setdefault((self.container_name, self.blob_name), {})[block_id] = bytes(data)
+
+    def commit_block_list(
+        self,
+        block_list: List,
+        content_settings: Optional[ContentSettings] = None,
+        tags: Optional[Dict[str, str]] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        **kwargs
+    ) -> Dict:
+        self._service.call("commit_block_list")
+        key = (self.container_name, self.blob_name)
+        with self._service.lock:
+            blocks = self._service.uncommitted.pop(key, {})
+            try:
+                data = b"".join(blocks[block.id] for block in block_list)
+            except KeyError as e:
+                raise AzureError(f"The specified block list is invalid (unknown block {e})")
+            stored = _StoredBlob(data, content_settings.content_type if content_settings else None, tags, metadata)
+            self._service.blobs[key] = stored
+        return {"etag": stored.etag, "last_modified": stored.last_modified}
+
+
+class _FakeContainerClient:
+    """Subset of azure.storage.blob.ContainerClient backed by InMemoryBlobService"""
+
+    def __init__(self, service: "InMemoryBlobService", container_name: str):
+        self._service = service
+        self.container_name = container_name
+
+    def get_blob_client(self, blob: str) -> _FakeBlobClient:
+        return _FakeBlobClient(self._service, self.container_name, blob)
+
+    def create_container(self, **kwargs) -> None:
+        self._service.call("create_container")
+        with self._service.lock:
+            if self.container_name in self._service.containers:
+                raise ResourceExistsError(message=f"The specified container already exists: {self.container_name}")
+            self._service.containers.add(self.container_name)
+
+    def upload_blob(self, name: str, data, overwrite: bool = False, **kwargs) -> _FakeBlobClient:
+        blob = self.get_blob_client(name)
+        blob.upload_blob(data, overwrite=overwrite, **kwargs)
+        return blob
+
+    def _blobs(self, prefix: Optional[str]) -> List[Tuple[str, _StoredBlob]]:
+        with self._service.lock:
+            return sorted(
+                (name, stored) for (container, name), stored in self._service.blobs.items()
+                if container == self.container_name and name.startswith(prefix or "")
+            )
+
+    def list_blobs(
+        self,
+        name_starts_with: Optional[str] = None,
+        include: Optional[List[str]] = None,
+        results_per_page: Optional[int] = None,
+        **kwargs
+    ) -> ItemPaged:
+        include_metadata = "metadata" in (include or [])
+        entries = [
+            stored.properties(self.container_name, name, include_metadata)
+            for name, stored in self._blobs(name_starts_with)
+        ]
+        return self._service.paged("list_blobs", entries, results_per_page)
+
+    def walk_blobs(
+        self,
+        name_starts_with: Optional[str] = None,
+        include: Optional[List[str]] = None,
+        delimiter: str = "/",
+        results_per_page: Optional[int] = None,
+        **kwargs
+    ) -> ItemPaged:
+        include_metadata = "metadata" in (include or [])
+        prefix = name_starts_with or ""
+        entries: Dict[str, object] = {}
+        for name, stored in self._blobs(prefix):
+            folder, separator, _ = name[len(prefix):].partition(delimiter)
+            if separator:
+                subfolder = prefix + folder + delimiter
+                entries.setdefault(subfolder, BlobPrefix(None, prefix=subfolder, name=subfolder, delimiter=delimiter))
+            else:
+                entries[name] = stored.properties(self.container_name, name, include_metadata)
+        return self._service.paged("walk_blobs", [entries[key] for key in sorted(entries)], results_per_page)
+
+    def find_blobs_by_tags(self, filter_expression: str, results_per_page: Optional[int] = None, **kwargs) -> ItemPaged:
+        entries = [
+            FilteredBlob(name=name, container_name=self.container_name, tags=dict(stored.tags))
+            for name, stored in self._blobs(None)
+            if _tags_match(filter_expression, stored.tags)
+        ]
+        return self._service.paged("find_blobs_by_tags", entries, results_per_page)
+
+    def delete_blobs(
+        self,
+        *blob_names: str,
+        if_tags_match_condition: Optional[str] = None,
+        if_unmodified_since: Optional[datetime] = None,
+        **kwargs
+    ) -> Iterator:
+        self._service.call("delete_blobs")
+        responses = []
+        with self._service.lock:
+            for name in blob_names:
+                stored = self._service.blobs.get((self.container_name, name))
+                if stored is None:
+                    status = 404
+                elif not _delete_condition_met(stored, if_tags_match_condition, if_unmodified_since):
+                    status = 412
+                else:
+                    del self._service.blobs[(self.container_name, name)]
+                    status = 202
+                responses.append(SimpleNamespace(status_code=status))
+        return iter(responses)
+
+
+class InMemoryBlobService:
+    """
+    Drop-in replacement of BlobServiceClient for BlobStorageClient
+
+    Every SDK call that would be an HTTP round trip is recorded in the
+    CallLog as ("storage", SDK method name), after the configured latency.
+    """
+
+    def __init__(self, calls: CallLog, latency_seconds: float = 0.0):
+        self.calls = calls
+        self.latency_seconds = latency_seconds
+        self.account_name = ACCOUNT_NAME
+        self.url = f"https://{ACCOUNT_NAME}.blob.core.windows.net"
+        self.lock = threading.RLock()
+        self.blobs: Dict[Tuple[str, str], _StoredBlob] = {}
+        self.uncommitted: Dict[Tuple[str, str], Dict[str, bytes]] = {}
+        self.containers = set()
+
+    def call(self, operation: str) -> None:
+        self.calls.record("storage", operation)
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def paged(self, operation: str, entries: List, results_per_page: Optional[int]) -> ItemPaged:
+        """
+        Page entries like the service: one call per page
+
+        Entries are sorted by name; like the service NextMarker, the
+        continuation token is the name of the first entry of the next page,
+        so a listing resumed after deletes neither skips nor repeats entries.
+        """
+        page_size = results_per_page or LIST_PAGE_SIZE
+        names = [entry.name for entry in entries]
+
+        def get_next(continuation_token: Optional[str]) -> int:
+            self.call(operation)
+            return bisect.bisect_left(names, continuation_token) if continuation_token else 0
+
+        def extract_data(start: int):
+            end = start + page_size
+            return (names[end] if end < len(entries) else None), iter(entries[start:end])
+
+        return ItemPaged(get_next, extract_data)
+
+    def get_blob_client(self, container: str, blob: str) -> _FakeBlobClient:
+        return _FakeBlobClient(self, container, blob)
+
+    def get_container_client(self, container: str) -> _FakeContainerClient:
+        return _FakeContainerClient(self, container)
+
+    # Accès directs (non comptés) pour préparer un scénario et vérifier son résultat
+
+    def put(
+        self,
+        container_name: str,
+        blob_name: str,
+        data: bytes,
+        content_type: Optional[str] = None,
+        tags: Optional[Dict[str, str]] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        last_modified: Optional[datetime] = None
+    ) -> None:
+        stored = _StoredBlob(data, content_type, tags, metadata)
+        if last_modified is not None:
+            stored.last_modified = last_modified
+        with self.lock:
+            self.blobs[(container_name, blob_name)] = stored
+
+    def get(self, container_name: str, blob_name: str) -> Optional[bytes]:
+        stored = self.blobs.get((container_name, blob_name))
+        return stored.data if stored is not None else None
+
+    def names(self, container_name: str, prefix: str = "") -> List[str]:
+        return sorted(name for container, name in self.blobs if container == container_name and name.startswith(prefix))
+
+
+class FakeHttpBackend:
+    """
+    Answers the requests library for SharePoint, Dataverse and Azure AD
+
+    Installed by patching requests.adapters.HTTPAdapter.send. Each request
+    is recorded in the CallLog as (service, operation) after the latency
+    configured for its service; requests to any other host raise
+    ConnectionError.
+
+    - SharePoint: Files/add, Folders/add, download.aspx (returns FAKE_PDF),
+      file and folder deletes, $batch, folder listings
+    - Dataverse: OData entity sets in memory (GET / POST / PATCH / DELETE;
+      $top is applied, $filter and $orderby are ignored)
+    - Azure AD: instance discovery, OpenID configuration, client credential tokens
+    """
+
+    def __init__(self, calls: CallLog, latency_seconds: Optional[Dict[str, float]] = None):
+        self.calls = calls
+        self.latency_seconds = latency_seconds or {}
+        self.lock = threading.Lock()
+        self.sharepoint_files: Dict[str, bytes] = {}
+        self.sharepoint_folders = set()
+        self.dataverse_tables: Dict[str, Dict[str, Dict]] = {}
+        self._sharepoint_host = urlsplit(SHAREPOINT_SITE_URL).netloc
+        self._sharepoint_site_path = urlsplit(SHAREPOINT_SITE_URL).path
+        self._dataverse_host = urlsplit(DATAVERSE_URL).netloc
+        self._original_send = None
+
+    def install(self) -> "FakeHttpBackend":
+        backend = self
+        self._original_send = requests.adapters.HTTPAdapter.send
+
+        def send(adapter, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+            return backend.handle(request)
+
+        requests.adapters.HTTPAdapter.send = send
+        return self
+
+    def uninstall(self) -> None:
+        if self._original_send is not None:
+            requests.adapters.HTTPAdapter.send = self._original_send
+            self._original_send = None
+
+    def handle(self, request: requests.PreparedRequest) -> requests.Response:
+        url = urlsplit(request.url)
+        if url.netloc == self._sharepoint_host:
+            service, responder = "sharepoint", self._sharepoint
+        elif url.netloc == self._dataverse_host:
+            service, responder = "dataverse", self._dataverse
+        elif url.netloc == AAD_HOST:
+            service, responder = "aad", self._aad
+        else:
+            raise requests.exceptions.ConnectionError(f"Outbound request blocked by the offline backend: {url.netloc}")
+
+        operation, status, body, headers = responder(request, unquote(url.path), parse_qs(url.query))
+        self.calls.record(service, operation)
+        if self.latency_seconds.get(service):
+            time.sleep(self.latency_seconds[service])
+        return self._response(request, status, body, headers)
+
+    @staticmethod
+    def _response(request, status: int, body, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+            headers = {"Content-Type": "application/json", **(headers or {})}
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = HTTPStatus(status).phrase
+        response.headers = CaseInsensitiveDict({"Content-Length": str(len(body)), **(headers or {})})
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    # SharePoint
+
+    def _sharepoint(self, request, path: str, query: Dict[str, List[str]]):
+        method_override = (request.headers.get("X-HTTP-Method") or "").upper()
+
+        if path.endswith("/_api/$batch"):
+            deletes = re.findall(r"^DELETE .*GetFileByServerRelativeUrl\('(.*)'\) HTTP/1\.1", request.body.decode("utf-8"), re.MULTILINE)
+            lines = []
+            with self.lock:
+                for url in deletes:
+                    found = self.sharepoint_files.pop(url.replace("''", "'"), None) is not None
+                    lines.append("HTTP/1.1 200 OK" if found else "HTTP/1.1 404 Not Found")
+            return "batch", 200, "\r\n".join(lines) + "\r\n", {"Content-Type": "multipart/mixed"}
+
+        match = re.search(r"GetFolderByServerRelativeUrl\('(.*?)'\)/Files/add\(url='(.*?)',overwrite=true\)$", path)
+        if match:
+            folder, name = (value.replace("''", "'") for value in match.groups())
+            server_relative_url = f"{self._sharepoint_site_path}/{folder}/{name}"
+            with self.lock:
+                self.sharepoint_files[server_relative_url] = request.body or b""
+            return "upload", 200, {"d": {"Name": name, "ServerRelativeUrl": server_relative_url}}, None
+
+        match = re.search(r"GetFolderByServerRelativeUrl\('(.*?)'\)/Folders/add\(url='(.*?)'\)$", path)
+        if match:
+            folder_path = "/".join(value.replace("''", "'") for value in match.groups())
+            with self.lock:
+                self.sharepoint_folders.add(folder_path)
+            return "add_folder", 200, {"d": {"ServerRelativeUrl": f"{self._sharepoint_site_path}/{folder_path}"}}, None
+
+        if path.endswith("/_layouts/15/download.aspx"):
+            source = query.get("SourceUrl", [""])[0]
+            if source not in self.sharepoint_files:
+                return "download_pdf", 404, {"error": "File not found"}, None
+            return "download_pdf", 200, FAKE_PDF, {"Content-Type": "application/pdf"}
+
+        match = re.search(r"GetFileByServerRelativeUrl\('(.*)'\)$", path)
+        if match and method_override == "DELETE":
+            with self.lock:
+                found = self.sharepoint_files.pop(match.group(1).replace("''", "'"), None) is not None
+            return "delete", 200 if found else 404, b"", None
+
+        match = re.search(r"GetFolderByServerRelativeUrl\('(.*)'\)(/Folders|/Files)?$", path)
+        if match and method_override == "DELETE":
+            with self.lock:
+                self.sharepoint_folders.discard(match.group(1).replace("''", "'"))
+            return "delete_folder", 200, b"", None
+        if match and request.method == "GET":
+            return "list_folder", 200, {"d": {"results": []}}, None
+
+        return "unknown", 404, {"error": f"Unsupported SharePoint request: {request.method} {path}"}, None
+
+    # Dataverse
+
+    def _dataverse(self, request, path: str, query: Dict[str, List[str]]):
+        match = re.fullmatch(r"/api/data/v9\.2/(\w+)(?:\(([^)]+)\))?", path)
+        if match is None:
+            return "unknown", 404, {"error": {"message": f"Unsupported Dataverse request: {path}"}}, None
+
+        entity_set, record_id = match.groups()
+        with self.lock:
+            table = self.dataverse_tables.setdefault(entity_set, {})
+
+            if request.method == "GET" and record_id is None:
+                records = list(table.values())
+                if "$top" in query:
+                    records = records[:int(query["$top"][0])]
+                return "query", 200, {"value": records}, None
+
+            if request.method == "POST" and record_id is None:
+                record_id = str(uuid.uuid4())
+                table[record_id] = {**json.loads(request.body or b"{}"), "id": record_id}
+                return "create", 201, table[record_id], {"OData-EntityId": f"{DATAVERSE_URL}{path}({record_id})"}
+
+            if record_id not in table:
+                return request.method.lower(), 404, {"error": {"message": f"Record not found: {record_id}"}}, None
+            if request.method == "GET":
+                return "get", 200, table[record_id], None
+            if request.method == "PATCH":
+                table[record_id].update(json.loads(request.body or b"{}"))
+                return "update", 204, b"", None
+            if request.method == "DELETE":
+                del table[record_id]
+                return "delete", 204, b"", None
+
+        return "unknown", 405, {"error": {"message": f"Unsupported method: {request.method}"}}, None
+
+    # Azure AD
+
+    def _aad(self, request, path: str, query: Dict[str, List[str]]):
+        tenant = path.strip("/").split("/")[0]
+        authority = f"https://{AAD_HOST}/{tenant}"
+
+        if path.endswith("/discovery/instance"):
+            return "discovery", 200, {
+                "tenant_discovery_endpoint": f"{authority}/v2.0/.well-known/openid-configuration",
+                "api-version": "1.1",
+                "metadata": [{"preferred_network": AAD_HOST, "preferred_cache": AAD_HOST, "aliases": [AAD_HOST]}]
+            }, None
+        if path.endswith("/.well-known/openid-configuration"):
+            return "openid_configuration", 200, {
+                "issuer": f"{authority}/v2.0",
+                "authorization_endpoint": f"{authority}/oauth2/v2.0/authorize",
+                "token_endpoint": f"{authority}/oauth2/v2.0/token"
+            }, None
+        if path.endswith("/oauth2/v2.0/token"):
+            return "token", 200, {
+                "token_type": "Bearer",
+                "expires_in": 3599,
+                "ext_expires_in": 3599,
+                "access_token": f"offline-{uuid.uuid4().hex}"
+            }, None
+
+        return "unknown", 404, {"error": "invalid_request"}, None
+
+
+def http_request(
+    method: str,
+    route: str,
+    body: Optional[Dict] = None,
+    params: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> func.HttpRequest:
+    """Build the HttpRequest the Functions host would pass for /api/{route}"""
+    return func.HttpRequest(
+        method=method,
+        url=f"http://localhost:7071/api/{route}",
+        headers={"Content-Type": "application/json", **(headers or {})},
+        params=params or {},
+        body=json.dumps(body).encode("utf-8") if body is not None else b""
+    )
+
+
+class OfflineBackends:
+    """Installed stand-ins and their shared call log"""
+
+    def __init__(self, calls: CallLog, blob_service: InMemoryBlobService, http: FakeHttpBackend):
+        self.calls = calls
+        self.blob_service = blob_service
+        self.http = http
+
+    def flush_deferred(self) -> None:
+        """Run the work deferred off the request path (SharePoint temp file deletes)"""
+        client = SharePointClient._instance
+        if client is not None:
+            with client._delete_lock:
+                timer = client._delete_timer
+            if timer is not None:
+                timer.cancel()
+            client.flush_pending_deletes()
+
+
+@contextmanager
+def overridden(overrides: Dict[object, Dict[str, object]]) -> Iterator[None]:
+    """Replace module attributes ({module: {name: value}}) for the duration of the block"""
+    saved = {(module, name): getattr(module, name) for module, values in overrides.items() for name in values}
+    try:
+        for module, values in overrides.items():
+            for name, value in values.items():
+                setattr(module, name, value)
+        yield
+    finally:
+        for (module, name), value in saved.items():
+            setattr(module, name, value)
+
+
+@contextmanager
+def offline_backends(
+    storage_latency_seconds: float = 0.0,
+    http_latency_seconds: Optional[Dict[str, float]] = None
+) -> Iterator[OfflineBackends]:
+    """
+    Install the offline stand-ins behind the shared clients
+
+    The blob client, listing cache and SharePoint client singletons are
+    recreated (cold instance caches); the Azure AD helper is kept, so
+    tokens behave like on a warm instance after the first scenario.
+
+    Args:
+        storage_latency_seconds: Delay added to every storage call
+        http_latency_seconds: Delay per HTTP service ("sharepoint", "dataverse", "aad")
+    """
+    calls = CallLog()
+    blob_service = InMemoryBlobService(calls, storage_latency_seconds)
+    http = FakeHttpBackend(calls, http_latency_seconds).install()
+
+    client = blob_client.BlobStorageClient()
+    client.blob_service_client = blob_service
+    blob_client._blob_client_instance = client
+    listing_cache._listing_cache_instance = None
+    SharePointClient._instance = None
+
+    backends = OfflineBackends(calls, blob_service, http)
+    try:
+        yield backends
+    finally:
+        backends.flush_deferred()
+        http.uninstall()
+        blob_client._blob_client_instance = None
+        listing_cache._listing_cache_instance = None
+        SharePointClient._instance = None
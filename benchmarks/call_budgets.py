@@ -0,0 +1,349 @@
+"""
+Call Budgets
+Nombre d'appels sortants (Blob Storage, SharePoint, Dataverse) par invocation d'endpoint, comparé à un budget déclaré
+
+Chaque scénario exécute un handler avec ses middlewares (instrument_handler)
+contre les stand-ins de backends.py, et compte les allers-retours faits
+pendant l'invocation. Un appel de plus que le budget (ou un statut HTTP
+inattendu) fait échouer le script: un aller-retour ajouté par mégarde se
+voit avant le déploiement. Les appels Azure AD (jetons) sont affichés mais
+hors budget: ils dépendent du cache de jetons de l'instance.
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.call_budgets
+    python -m benchmarks.call_budgets --scenario prepare_template --verbose
+    python -m benchmarks.call_budgets --json call_budgets.json
+"""
+
+import argparse
+import io
+import json
+import logging
+import sys
+from typing import Callable, Dict, List, Optional
+
+import azure.functions as func
+from docx import Document
+
+from .backends import CallLog, InMemoryBlobService, http_request, offline_backends, overridden
+from .documents import add_service_table, build_proposal_template
+
+from DocumentProcessor.clean_quote import clean_quote
+from DocumentProcessor.delete_template import delete_template
+from DocumentProcessor.get_sas_url import get_sas_url
+from DocumentProcessor.get_sas_urls import get_sas_urls
+from DocumentProcessor.get_upload_url import get_upload_url
+from DocumentProcessor.list_templates import list_general_templates
+from DocumentProcessor.list_user_documents import list_created_documents
+from DocumentProcessor.list_user_templates import list_user_templates
+from ProposalGenerator.add_offer_line import add_offer_line
+from ProposalGenerator.delete_offer_line import delete_offer_line
+from ProposalGenerator.generate_final import generate_final_proposal
+from ProposalGenerator.prepare_template import prepare_template
+from ProposalGenerator.set_customer_info import set_customer_info
+from shared import pdf_converter
+from shared.config import CONTAINER_DOCUMENTS, CONTAINER_TEMPLATES, get_template_path, get_user_file_path
+from shared.middleware import instrument_handler
+
+BUDGETED_SERVICES = ("storage", "sharepoint", "dataverse")
+
+USER = "Bench User"
+TEMPLATE = "template_standard.docx"
+CUSTOMER_SUCCESS = {"name": "Jean Dupont", "tel": "06 12 34 56 78", "email": "jean.dupont@example.com"}
+OFFER = {
+    "crb02_offrebecloud1": "Microsoft 365 Apps for Business",
+    "crb02_description": "Pack Bureautique installable et online",
+    "crb02_prixht": 10.0,
+    "crb02_service": "480810003",
+    "quantity": 3
+}
+
+
+class Scenario:
+    """One endpoint invocation and its declared call budget"""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[func.HttpRequest], func.HttpResponse],
+        method: str,
+        route: str,
+        budget: Dict[str, int],
+        body: Optional[Dict] = None,
+        params: Optional[Dict[str, str]] = None,
+        seed: Optional[Callable[[InMemoryBlobService], None]] = None,
+        warmup: bool = False,
+        expected_status: int = 200,
+        overrides: Optional[Dict[object, Dict[str, object]]] = None
+    ):
+        """
+        Args:
+            name: Scenario name (filter of --scenario)
+            handler: HTTP handler, wrapped with instrument_handler when run
+            method, route, body, params: The request
+            budget: Maximum calls per service during the invocation (missing service = 0)
+            seed: Fills the blob store before the run (not counted)
+            warmup: Run the request once before measuring (steady-state instance caches)
+            expected_status: HTTP status the request must return
+            overrides: Module attributes replaced during the run ({module: {name: value}})
+        """
+        self.name = name
+        self.handler = handler
+        self.method = method
+        self.route = route
+        self.budget = budget
+        self.body = body
+        self.params = params or {}
+        self.seed = seed
+        self.warmup = warmup
+        self.expected_status = expected_status
+        self.overrides = overrides or {}
+
+    def request(self) -> func.HttpRequest:
+        return http_request(self.method, self.route, self.body, self.params)
+
+
+# Jeux de données
+
+
+def seed_template(store: InMemoryBlobService) -> None:
+    store.put(CONTAINER_TEMPLATES, get_template_path(TEMPLATE), build_proposal_template())
+
+
+def seed_working_file(store: InMemoryBlobService) -> None:
+    """General template, plus a prepared working file with one service cloud line"""
+    seed_template(store)
+    doc = Document(io.BytesIO(build_proposal_template()))
+    add_service_table(doc, "Service cloud", [(OFFER["crb02_offrebecloud1"], OFFER["crb02_description"], 3, 10.0)])
+    output = io.BytesIO()
+    doc.save(output)
+    store.put(CONTAINER_TEMPLATES, get_user_file_path(USER, "temp_working.docx"), output.getvalue())
+    store.put(CONTAINER_TEMPLATES, get_user_file_path(USER, ".keep"), b"")
+
+
+def seed_documents(store: InMemoryBlobService) -> None:
+    """Working file and three generated proposals"""
+    seed_working_file(store)
+    for stamp in ("20251020_0830", "20251021_0915", "20251022_1400"):
+        store.put(CONTAINER_DOCUMENTS, get_user_file_path(USER, f"proposition_{stamp}.docx"), b"docx")
+        store.put(CONTAINER_DOCUMENTS, get_user_file_path(USER, f"proposition_{stamp}.pdf"), b"pdf")
+
+
+WORKING_FILE = get_user_file_path(USER, "temp_working.docx")
+PROPOSALS = [get_user_file_path(USER, f"proposition_{stamp}.pdf") for stamp in ("20251020_0830", "20251021_0915", "20251022_1400")]
+
+SCENARIOS: List[Scenario] = [
+    # Workflow du bot
+    Scenario(
+        "prepare_template/new_user", prepare_template, "POST", "proposal/prepare-template",
+        budget={"storage": 3},  # template download, working file upload, conditional .keep create
+        body={"template_name": TEMPLATE, "customer_success": CUSTOMER_SUCCESS, "user_folder": USER},
+        seed=seed_template
+    ),
+    Scenario(
+        "prepare_template/existing_user", prepare_template, "POST", "proposal/prepare-template",
+        budget={"storage": 3},  # .keep create refused by If-None-Match: * (409), no existence check
+        body={"template_name": TEMPLATE, "customer_success": CUSTOMER_SUCCESS, "user_folder": USER},
+        seed=seed_working_file
+    ),
+    Scenario(
+        "set_customer_info", set_customer_info, "POST", "proposal/set-customer-info",
+        budget={"storage": 2},
+        body={"user_folder": USER, "customer_success": CUSTOMER_SUCCESS},
+        seed=seed_working_file
+    ),
+    Scenario(
+        "add_offer_line", add_offer_line, "POST", "proposal/add-offer-line",
+        budget={"storage": 2},
+        body={"user_folder": USER, "offer": OFFER},
+        seed=seed_working_file
+    ),
+    Scenario(
+        "delete_offer_line", delete_offer_line, "DELETE", "proposal/delete-offer-line",
+        budget={"storage": 2},
+        body={"user_folder": USER, "crb02_service": OFFER["crb02_service"], "offer_name": OFFER["crb02_offrebecloud1"]},
+        seed=seed_working_file
+    ),
+    Scenario(
+        "generate_final/sharepoint_pdf", generate_final_proposal, "POST", "proposal/generate",
+        # copy, Word download, PDF staged block + commit; SharePoint upload, PDF download,
+        # at most one shard folder creation (temp file deletes are deferred off the request)
+        budget={"storage": 4, "sharepoint": 3},
+        body={"user_folder": USER, "proposal_name": "Client XYZ"},
+        seed=seed_working_file,
+        warmup=True,
+        overrides={pdf_converter: {"PDF_RENDERER": "sharepoint"}}
+    ),
+    Scenario(
+        "generate_final/direct_pdf", generate_final_proposal, "POST", "proposal/generate",
+        budget={"storage": 3},  # copy, Word download, PDF upload
+        body={"user_folder": USER, "proposal_name": "Client XYZ"},
+        seed=seed_working_file,
+        overrides={pdf_converter: {"PDF_RENDERER": "auto"}}
+    ),
+    Scenario(
+        "clean_quote", clean_quote, "POST", "document/clean-quote",
+        budget={"storage": 2},
+        body={"blob_path": WORKING_FILE, "user_folder": USER},
+        seed=seed_working_file
+    ),
+
+    # Documents et URL
+    Scenario(
+        "delete_template/existing", delete_template, "DELETE", "document/delete",
+        budget={"storage": 1},  # the delete itself reports a missing file (404)
+        body={"file_path": WORKING_FILE},
+        seed=seed_working_file
+    ),
+    Scenario(
+        "delete_template/missing", delete_template, "DELETE", "document/delete",
+        budget={"storage": 1},
+        body={"file_path": get_user_file_path(USER, "missing.docx")},
+        seed=seed_working_file,
+        expected_status=404
+    ),
+    Scenario(
+        "get_sas_url/checked", get_sas_url, "POST", "document/get-sas-url",
+        budget={"storage": 1},  # one HEAD; signing is local
+        body={"file_path": WORKING_FILE},
+        seed=seed_working_file
+    ),
+    Scenario(
+        "get_sas_url/missing", get_sas_url, "POST", "document/get-sas-url",
+        budget={"storage": 1},
+        body={"file_path": get_user_file_path(USER, "missing.docx")},
+        seed=seed_working_file,
+        expected_status=404
+    ),
+    Scenario(
+        "get_sas_url/unchecked", get_sas_url, "POST", "document/get-sas-url",
+        budget={},
+        body={"file_path": WORKING_FILE, "check_exists": False},
+        seed=seed_working_file
+    ),
+    Scenario(
+        "get_sas_urls/unchecked", get_sas_urls, "POST", "document/get-sas-urls",
+        budget={},
+        body={"file_paths": PROPOSALS, "container": CONTAINER_DOCUMENTS},
+        seed=seed_documents
+    ),
+    Scenario(
+        "get_sas_urls/checked", get_sas_urls, "POST", "document/get-sas-urls",
+        budget={"storage": len(PROPOSALS)},  # one HEAD per file, in parallel
+        body={"file_paths": PROPOSALS, "container": CONTAINER_DOCUMENTS, "check_exists": True},
+        seed=seed_documents
+    ),
+    Scenario(
+        "get_upload_url", get_upload_url, "POST", "document/get-upload-url",
+        budget={},
+        body={"user_folder": USER, "file_name": "devis.docx", "file_size": 40000}
+    ),
+
+    # Listings
+    Scenario(
+        "list_general/cold", list_general_templates, "GET", "template/list-general",
+        budget={"storage": 1},
+        seed=seed_template
+    ),
+    Scenario(
+        "list_general/cached", list_general_templates, "GET", "template/list-general",
+        budget={},
+        seed=seed_template,
+        warmup=True
+    ),
+    Scenario(
+        "list_user_templates", list_user_templates, "GET", "template/list-user",
+        budget={"storage": 1},
+        params={"user_folder": USER},
+        seed=seed_working_file
+    ),
+    Scenario(
+        "list_created_documents", list_created_documents, "GET", "document/list-created",
+        budget={"storage": 1},
+        params={"user_folder": USER},
+        seed=seed_documents
+    )
+]
+
+
+def run_scenario(scenario: Scenario) -> Dict:
+    """
+    Run one scenario on fresh backends
+
+    Returns:
+        Dict with status, calls per service and per operation, budget and violations
+    """
+    handler = instrument_handler(scenario.handler)
+
+    with overridden(scenario.overrides), offline_backends() as backends:
+        if scenario.seed:
+            scenario.seed(backends.blob_service)
+        if scenario.warmup:
+            handler(scenario.request())
+            backends.flush_deferred()
+
+        before = backends.calls.snapshot()
+        response = handler(scenario.request())
+        calls = backends.calls.since(before)
+
+    per_service = CallLog.per_service(calls)
+    violations = []
+    if response.status_code != scenario.expected_status:
+        violations.append(f"status {response.status_code} != {scenario.expected_status}")
+    for service in BUDGETED_SERVICES:
+        used, allowed = per_service.get(service, 0), scenario.budget.get(service, 0)
+        if used > allowed:
+            violations.append(f"{service}: {used} calls > budget {allowed}")
+
+    return {
+        "scenario": scenario.name,
+        "status": response.status_code,
+        "calls": per_service,
+        "budget": {service: scenario.budget.get(service, 0) for service in BUDGETED_SERVICES},
+        "operations": {f"{service}.{operation}": count for (service, operation), count in sorted(calls.items())},
+        "violations": violations
+    }
+
+
+def _print_table(results: List[Dict], verbose: bool) -> None:
+    header = f"{'scenario':<34} {'status':>6}  " + "  ".join(f"{service:>10}" for service in BUDGETED_SERVICES) + f"  {'aad':>4}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        cells = "  ".join(
+            f"{result['calls'].get(service, 0):>4} / {result['budget'][service]:<3}" for service in BUDGETED_SERVICES
+        )
+        flag = "  FAIL" if result["violations"] else ""
+        print(f"{result['scenario']:<34} {result['status']:>6}  {cells}  {result['calls'].get('aad', 0):>4}{flag}")
+        if verbose:
+            for operation, count in result["operations"].items():
+                print(f"    {operation}: {count}")
+        for violation in result["violations"]:
+            print(f"    ! {violation}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check outbound calls per endpoint invocation against declared budgets")
+    parser.add_argument("--scenario", help="Only run scenarios whose name contains this text")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show calls per operation and handler logs")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or args.scenario in s.name]
+    results = [run_scenario(scenario) for scenario in scenarios]
+    _print_table(results, args.verbose)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+    failed = [result["scenario"] for result in results if result["violations"]]
+    print(f"\n{len(results) - len(failed)}/{len(results)} scenarios within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
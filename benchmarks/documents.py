@@ -0,0 +1,177 @@
+"""
+Documents
+Documents Word synthétiques pour les scénarios hors ligne
+"""
+
+import io
+from typing import Iterable, Tuple
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_BREAK
+from docx.shared import Cm
+from PIL import Image
+
+from shared.config import SERVICE_CODE_TO_NAME
+
+FILLER_TEXT = (
+    "Notre offre couvre le déploiement, l'administration et le support des services "
+    "cloud de votre entreprise, avec un interlocuteur dédié et un suivi mensuel."
+)
+
+
+def build_proposal_template(service_codes: Iterable[str] = ()) -> bytes:
+    """
+    Build a general template like the ones stored under general/
+
+    Customer success placeholders ({{CS_NAME}}, {{CS_TEL}}, {{CS_EMAIL}})
+    in paragraphs and in a contact table, then one empty service table
+    (header + "Total HT" row) per service code, as add_offer_line expects.
+
+    Args:
+        service_codes: Services whose table already exists in the template
+
+    Returns:
+        DOCX content
+    """
+    doc = Document()
+    doc.add_heading("Proposition commerciale", level=1)
+    doc.add_paragraph("Votre interlocuteur: {{CS_NAME}}")
+    doc.add_paragraph("Téléphone: {{CS_TEL}} - Email: {{CS_EMAIL}}")
+
+    contact = doc.add_table(rows=2, cols=3)
+    for cell, text in zip(contact.rows[0].cells, ("Nom", "Téléphone", "Email")):
+        cell.text = text
+    for cell, text in zip(contact.rows[1].cells, ("{{CS_NAME}}", "{{CS_TEL}}", "{{CS_EMAIL}}")):
+        cell.text = text
+
+    for code in service_codes:
+        add_service_table(doc, SERVICE_CODE_TO_NAME[code])
+
+    output = io.BytesIO()
+    doc.save(output)
+    return output.getvalue()
+
+
+def add_service_table(doc: Document, service_name: str, rows: Iterable[Tuple[str, str, int, float]] = ()) -> None:
+    """
+    Append a service title and its table (header, offer rows, "Total HT" row)
+
+    Args:
+        doc: Document to extend
+        service_name: Table title (e.g. "Service cloud")
+        rows: (designation, description, quantity, unit price) per offer line
+    """
+    doc.add_paragraph(service_name)
+    rows = list(rows)
+    table = doc.add_table(rows=len(rows) + 2, cols=5)
+
+    for cell, text in zip(table.rows[0].cells, ("Désignation", "Description", "Qté", "Prix unitaire", "Prix total")):
+        cell.text = text
+
+    total = 0.0
+    for row, (designation, description, quantity, unit_price) in zip(table.rows[1:], rows):
+        values = (designation, description, str(quantity), f"{unit_price:.2f} €", f"{quantity * unit_price:.2f} €")
+        for cell, text in zip(row.cells, values):
+            cell.text = text
+        total += quantity * unit_price
+
+    total_cells = table.rows[-1].cells
+    total_cells[0].merge(total_cells[3]).text = "Total HT"
+    total_cells[4].text = f"{total:.2f} €"
+    doc.add_paragraph()
+
+
+def build_corpus_document(
+    paragraphs: int = 20,
+    tables: int = 3,
+    rows: int = 10,
+    merged_cells: int = 0,
+    images: int = 0
+) -> bytes:
+    """
+    Build a synthetic proposal of parameterized size
+
+    Layout: heading and customer success placeholders, `paragraphs` filler
+    paragraphs (one in ten carries a placeholder), `images` distinct PNG
+    pictures, then `tables` service tables of `rows` offer lines each. The
+    last three tables are the service tables add_offer_line looks for
+    ("Supports" last: worst case of the title search), the others are
+    "Annexe" tables. In each table, the first `merged_cells` offer lines
+    have their designation and description cells merged.
+
+    Returns:
+        DOCX content
+    """
+    doc = Document()
+    doc.add_heading("Proposition commerciale", level=1)
+    doc.add_paragraph("Votre interlocuteur: {{CS_NAME}}")
+    doc.add_paragraph("Téléphone: {{CS_TEL}} - Email: {{CS_EMAIL}}")
+
+    for index in range(paragraphs):
+        text = f"{index + 1}. {FILLER_TEXT}"
+        doc.add_paragraph(text + (" Contact: {{CS_NAME}}" if index % 10 == 9 else ""))
+
+    for index in range(images):
+        picture = io.BytesIO()
+        # Couleur distincte par image: python-docx dédoublonne les images identiques
+        Image.new("RGB", (64, 48), ((index * 37) % 256, (index * 91) % 256, 160)).save(picture, format="PNG")
+        picture.seek(0)
+        doc.add_picture(picture, width=Cm(4))
+
+    service_names = list(SERVICE_CODE_TO_NAME.values())[-tables:] if tables else []
+    titles = [f"Annexe {index + 1}" for index in range(tables - len(service_names))] + service_names
+    for title in titles:
+        add_service_table(doc, title, [
+            (f"Offre {line:04d}", FILLER_TEXT[:60], 1 + line % 10, 5.0 + (line % 20) * 2.5)
+            for line in range(rows)
+        ])
+        table = doc.tables[-1]
+        for row in table.rows[1:1 + min(merged_cells, rows)]:
+            cells = row.cells
+            text = f"{cells[0].text} - {cells[1].text}"
+            merged = cells[0].merge(cells[1])
+            merged.text = text
+
+    output = io.BytesIO()
+    doc.save(output)
+    return output.getvalue()
+
+
+def build_rendering_template(first_page_header: bool = True) -> bytes:
+    """
+    Build a two-page proposal exercising the direct PDF renderer
+
+    Page 1: centered logo (inline 4 x 3 cm PNG), heading, text; page 2 (after
+    a page break): a service table. The default header/footer reads
+    "Proposition commerciale" / "Confidentiel"; with first_page_header the
+    first page has its own ("Couverture" / "Page de garde").
+
+    Returns:
+        DOCX content
+    """
+    doc = Document()
+    section = doc.sections[0]
+    section.header.paragraphs[0].text = "Proposition commerciale"
+    section.footer.paragraphs[0].text = "Confidentiel"
+    if first_page_header:
+        section.different_first_page_header_footer = True
+        section.first_page_header.paragraphs[0].text = "Couverture"
+        section.first_page_footer.paragraphs[0].text = "Page de garde"
+
+    logo = io.BytesIO()
+    Image.new("RGB", (80, 60), (79, 129, 189)).save(logo, format="PNG")
+    logo.seek(0)
+    doc.add_picture(logo, width=Cm(4), height=Cm(3))
+    doc.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    doc.add_heading("Proposition commerciale", level=1)
+    doc.add_paragraph(FILLER_TEXT)
+    doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+
+    add_service_table(doc, SERVICE_CODE_TO_NAME[next(iter(SERVICE_CODE_TO_NAME))], [
+        ("Offre 0001", FILLER_TEXT[:60], 2, 12.5)
+    ])
+
+    output = io.BytesIO()
+    doc.save(output)
+    return output.getvalue()
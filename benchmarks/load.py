@@ -0,0 +1,406 @@
+"""
+Load Generator
+K utilisateurs simultanés rejouant les sessions du bot Copilot Studio (WORKFLOWS.md), avec temps de réflexion
+
+Chaque utilisateur simulé enchaîne des sessions:
+- Workflow 1 (template): list-general, prepare-template, set-customer-info
+  (une fois sur deux), N × add-offer-line, parfois un delete-offer-line,
+  generate, parfois list-created
+- Workflow 2 (ancien devis, --old-quote-ratio): list-user, clean-quote de
+  son ancien_devis.docx, puis les mêmes étapes à partir des offres
+
+Avant generate, le temp_working.docx est relu: une offre ajoutée (et non
+supprimée) par la session qui n'y figure plus est une mise à jour perdue
+(écritures concurrentes sur le même fichier de travail: plusieurs
+sessions sur un même dossier avec --folders < --users, ou ajouts envoyés
+en parallèle avec --parallel-adds).
+
+Cibles:
+- en processus (défaut): handlers réels + instrument_handler sur un pool
+  de threads, contre les stand-ins de backends.py (latences configurables),
+  comme un worker Python de l'hôte Functions
+- --base-url: hôte Functions local (func start) déjà configuré sur ses
+  propres backends (Azurite...); le template général doit y exister
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.load --users 20 --sessions 3
+    python -m benchmarks.load --users 10 --folders 3 --parallel-adds --json load.json
+    python -m benchmarks.load --base-url http://localhost:7071 --function-key <key> --think-scale 1
+"""
+
+import argparse
+import io
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import requests
+from docx import Document
+
+from .backends import InMemoryBlobService, http_request, offline_backends
+from .call_budgets import CUSTOMER_SUCCESS, TEMPLATE, seed_template
+from .documents import add_service_table, build_proposal_template
+from .workflow import offer
+
+from DocumentProcessor.clean_quote import clean_quote
+from DocumentProcessor.delete_template import delete_template
+from DocumentProcessor.get_sas_url import get_sas_url
+from DocumentProcessor.get_sas_urls import get_sas_urls
+from DocumentProcessor.get_upload_url import get_upload_url
+from DocumentProcessor.list_templates import list_general_templates
+from DocumentProcessor.list_user_documents import list_created_documents
+from DocumentProcessor.list_user_templates import list_user_templates
+from ProposalGenerator.add_offer_line import add_offer_line
+from ProposalGenerator.delete_offer_line import delete_offer_line
+from ProposalGenerator.generate_final import generate_final_proposal
+from ProposalGenerator.prepare_template import prepare_template
+from ProposalGenerator.set_customer_info import set_customer_info
+from shared.config import CONTAINER_TEMPLATES, get_user_file_path
+from shared.middleware import instrument_handler
+
+# Temps de réflexion moyens (secondes) avant chaque appel, tirés selon une loi exponentielle
+THINK_TIMES = {
+    "template/list-general": 5.0,
+    "template/list-user": 5.0,
+    "proposal/prepare-template": 20.0,
+    "document/clean-quote": 15.0,
+    "proposal/set-customer-info": 15.0,
+    "proposal/add-offer-line": 8.0,
+    "proposal/delete-offer-line": 10.0,
+    "proposal/generate": 10.0,
+    "document/list-created": 5.0
+}
+
+ROUTES: Dict[Tuple[str, str], Callable] = {
+    ("GET", "template/list-general"): list_general_templates,
+    ("GET", "template/list-user"): list_user_templates,
+    ("GET", "document/list-created"): list_created_documents,
+    ("POST", "document/clean-quote"): clean_quote,
+    ("POST", "document/get-sas-url"): get_sas_url,
+    ("POST", "document/get-sas-urls"): get_sas_urls,
+    ("POST", "document/get-upload-url"): get_upload_url,
+    ("DELETE", "document/delete"): delete_template,
+    ("POST", "proposal/prepare-template"): prepare_template,
+    ("POST", "proposal/set-customer-info"): set_customer_info,
+    ("POST", "proposal/add-offer-line"): add_offer_line,
+    ("DELETE", "proposal/delete-offer-line"): delete_offer_line,
+    ("POST", "proposal/generate"): generate_final_proposal
+}
+
+OLD_QUOTE = "ancien_devis.docx"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def offer_names(docx_bytes: bytes) -> Set[str]:
+    """Designations of the offer lines in every table of a working document"""
+    doc = Document(io.BytesIO(docx_bytes))
+    names = set()
+    for table in doc.tables:
+        for row in table.rows[1:-1]:
+            names.add(row.cells[0].text.strip())
+    return names
+
+
+def build_old_quote(user_folder: str) -> bytes:
+    """Previous proposal of a user: one filled service cloud table"""
+    doc = Document(io.BytesIO(build_proposal_template()))
+    add_service_table(doc, "Service cloud", [(f"Ancienne offre {user_folder}", "Reprise", 2, 12.5)])
+    output = io.BytesIO()
+    doc.save(output)
+    return output.getvalue()
+
+
+class Recorder:
+    """Thread-safe latencies and outcomes per endpoint, plus lost updates"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.lost_updates: List[Dict] = []
+        self.sessions = 0
+        self.failed_sessions = 0
+
+    def request(self, endpoint: str, elapsed_ms: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(elapsed_ms)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def session(self, completed: bool, lost: Optional[Dict] = None) -> None:
+        with self._lock:
+            self.sessions += 1
+            if not completed:
+                self.failed_sessions += 1
+            if lost:
+                self.lost_updates.append(lost)
+
+
+class InProcessTarget:
+    """Handlers called in this process against the offline stand-ins"""
+
+    def __init__(self, blob_service: InMemoryBlobService):
+        self.blob_service = blob_service
+        self._handlers = {key: instrument_handler(handler) for key, handler in ROUTES.items()}
+
+    def call(self, method: str, route: str, body: Optional[Dict] = None, params: Optional[Dict] = None) -> Tuple[int, Dict]:
+        response = self._handlers[(method, route)](http_request(method, route, body, params))
+        try:
+            return response.status_code, json.loads(response.get_body() or b"{}")
+        except ValueError:
+            return response.status_code, {}
+
+    def seed_user(self, user_folder: str) -> None:
+        self.blob_service.put(CONTAINER_TEMPLATES, get_user_file_path(user_folder, OLD_QUOTE), build_old_quote(user_folder))
+
+    def working_file(self, user_folder: str) -> Optional[bytes]:
+        return self.blob_service.get(CONTAINER_TEMPLATES, get_user_file_path(user_folder, "temp_working.docx"))
+
+
+class HttpTarget:
+    """A running Functions host (func start), reached over HTTP"""
+
+    def __init__(self, base_url: str, function_key: Optional[str], timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+        if function_key:
+            self._session.headers["x-functions-key"] = function_key
+
+    def call(self, method: str, route: str, body: Optional[Dict] = None, params: Optional[Dict] = None) -> Tuple[int, Dict]:
+        response = self._session.request(
+            method, f"{self.base_url}/api/{route}", json=body, params=params, timeout=self.timeout
+        )
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, {}
+
+    def seed_user(self, user_folder: str) -> None:
+        """Upload the old quote like the Copilot connector: upload SAS URL, then PUT"""
+        data = build_old_quote(user_folder)
+        status, body = self.call("POST", "document/get-upload-url", {
+            "user_folder": user_folder, "file_name": OLD_QUOTE, "file_size": len(data)
+        })
+        if status != 200:
+            raise RuntimeError(f"get-upload-url returned {status}: {body}")
+        requests.put(body["upload_url"], data=data, headers=body["headers"], timeout=self.timeout).raise_for_status()
+
+    def working_file(self, user_folder: str) -> Optional[bytes]:
+        status, body = self.call("POST", "document/get-sas-url", {
+            "file_path": get_user_file_path(user_folder, "temp_working.docx"), "check_exists": False
+        })
+        if status != 200:
+            return None
+        response = requests.get(body["sas_url"], timeout=self.timeout)
+        return response.content if response.status_code == 200 else None
+
+
+class SimulatedUser:
+    """One sales user driving bot sessions one after the other"""
+
+    def __init__(self, index: int, user_folder: str, target, recorder: Recorder, args: argparse.Namespace):
+        self.index = index
+        self.user_folder = user_folder
+        self.target = target
+        self.recorder = recorder
+        self.args = args
+        self.rng = random.Random(args.seed * 100003 + index)
+
+    def think(self, route: str) -> None:
+        if self.args.think_scale:
+            time.sleep(self.rng.expovariate(1 / THINK_TIMES[route]) * self.args.think_scale)
+
+    def step(self, method: str, route: str, body: Optional[Dict] = None, params: Optional[Dict] = None, think: bool = True) -> bool:
+        if think:
+            self.think(route)
+        started = time.perf_counter()
+        try:
+            status, _ = self.target.call(method, route, body, params)
+        except Exception:
+            status = 0
+        ok = status == 200
+        self.recorder.request(route, (time.perf_counter() - started) * 1000, ok)
+        return ok
+
+    def run(self) -> None:
+        for session in range(self.args.sessions):
+            self.run_session(session)
+
+    def run_session(self, session: int) -> None:
+        user = {"user_folder": self.user_folder}
+
+        if self.rng.random() < self.args.old_quote_ratio:
+            started = (
+                self.step("GET", "template/list-user", params=user)
+                and self.step("POST", "document/clean-quote", {
+                    "blob_path": get_user_file_path(self.user_folder, OLD_QUOTE), **user
+                })
+            )
+        else:
+            started = (
+                self.step("GET", "template/list-general")
+                and self.step("POST", "proposal/prepare-template", {
+                    "template_name": self.args.template, "customer_success": CUSTOMER_SUCCESS, **user
+                })
+            )
+            if started and self.rng.random() < 0.5:
+                started = self.step("POST", "proposal/set-customer-info", {"customer_success": CUSTOMER_SUCCESS, **user})
+        if not started:
+            self.recorder.session(completed=False)
+            return
+
+        # Noms uniques par session: une ligne absente du fichier de travail est une mise à jour perdue
+        offers = []
+        for line in range(self.rng.randint(1, self.args.max_lines)):
+            line_offer = offer(self.rng.randrange(1000))
+            line_offer["crb02_offrebecloud1"] = f"U{self.index:03d} S{session:02d} L{line:02d} {line_offer['crb02_offrebecloud1']}"
+            offers.append(line_offer)
+
+        if self.args.parallel_adds:
+            self.think("proposal/add-offer-line")
+            with ThreadPoolExecutor(max_workers=len(offers)) as pool:
+                added = list(pool.map(
+                    lambda line_offer: self.step("POST", "proposal/add-offer-line", {"offer": line_offer, **user}, think=False),
+                    offers
+                ))
+        else:
+            added = [self.step("POST", "proposal/add-offer-line", {"offer": line_offer, **user}) for line_offer in offers]
+        expected = {line_offer["crb02_offrebecloud1"] for line_offer, ok in zip(offers, added) if ok}
+
+        if expected and self.rng.random() < 0.15:
+            removed = offers[[line_offer["crb02_offrebecloud1"] for line_offer in offers].index(sorted(expected)[0])]
+            if self.step("DELETE", "proposal/delete-offer-line", {
+                "crb02_service": removed["crb02_service"], "offer_name": removed["crb02_offrebecloud1"], **user
+            }):
+                expected.discard(removed["crb02_offrebecloud1"])
+
+        working = self.target.working_file(self.user_folder)
+        missing = sorted(expected - offer_names(working)) if working is not None else sorted(expected)
+        lost = {"user": self.index, "user_folder": self.user_folder, "session": session, "missing": missing} if missing else None
+
+        completed = self.step("POST", "proposal/generate", {"proposal_name": f"Client {self.index:03d}-{session:02d}", **user})
+        if completed and self.rng.random() < 0.3:
+            self.step("GET", "document/list-created", params=user)
+        self.recorder.session(completed=completed, lost=lost)
+
+
+def summarize(recorder: Recorder, wall_seconds: float) -> Dict:
+    """Throughput, latency percentiles and error rate per endpoint"""
+    endpoints = {}
+    for endpoint in sorted(recorder.latencies):
+        values = sorted(recorder.latencies[endpoint])
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "errors": recorder.errors.get(endpoint, 0),
+            "error_rate": round(recorder.errors.get(endpoint, 0) / len(values), 4),
+            "p50_ms": round(percentile(values, 0.50), 2),
+            "p95_ms": round(percentile(values, 0.95), 2),
+            "p99_ms": round(percentile(values, 0.99), 2),
+            "max_ms": round(values[-1], 2)
+        }
+    total_requests = sum(entry["requests"] for entry in endpoints.values())
+    total_errors = sum(entry["errors"] for entry in endpoints.values())
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "requests": total_requests,
+        "throughput_rps": round(total_requests / wall_seconds, 2) if wall_seconds else 0.0,
+        "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "sessions": recorder.sessions,
+        "failed_sessions": recorder.failed_sessions,
+        "lost_update_sessions": len(recorder.lost_updates),
+        "lost_lines": sum(len(lost["missing"]) for lost in recorder.lost_updates),
+        "endpoints": endpoints,
+        "lost_updates": recorder.lost_updates
+    }
+
+
+def _print_summary(summary: Dict) -> None:
+    header = f"{'endpoint':<30} {'requests':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, entry in summary["endpoints"].items():
+        print(
+            f"{endpoint:<30} {entry['requests']:>8} {entry['errors']:>7} {entry['p50_ms']:>9.1f}"
+            f" {entry['p95_ms']:>9.1f} {entry['p99_ms']:>9.1f} {entry['max_ms']:>9.1f}"
+        )
+    print(
+        f"\n{summary['requests']} requests in {summary['wall_seconds']:.1f} s: {summary['throughput_rps']:.1f} req/s, "
+        f"error rate {summary['error_rate'] * 100:.2f}%"
+    )
+    print(
+        f"{summary['sessions']} sessions ({summary['failed_sessions']} failed), "
+        f"lost updates: {summary['lost_lines']} line(s) in {summary['lost_update_sessions']} session(s)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent Copilot bot sessions against the handlers")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated users (K)")
+    parser.add_argument("--sessions", type=int, default=2, help="Sessions per user, one after the other")
+    parser.add_argument("--folders", type=int, help="Distinct user folders (default: one per user)")
+    parser.add_argument("--max-lines", type=int, default=8, help="Offer lines per session, drawn in 1..max")
+    parser.add_argument("--old-quote-ratio", type=float, default=0.3, help="Share of sessions starting from an old quote")
+    parser.add_argument("--parallel-adds", action="store_true", help="Send the offer lines of a session concurrently")
+    parser.add_argument("--think-scale", type=float, default=0.02, help="Multiplier of the think times (1 = real pace, 0 = none)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (sessions are reproducible per user)")
+    parser.add_argument("--template", default=TEMPLATE, help="General template used by workflow 1")
+    parser.add_argument("--storage-latency-ms", type=float, default=10.0, help="In-process: latency of every storage call")
+    parser.add_argument("--sharepoint-latency-ms", type=float, default=200.0, help="In-process: latency of every SharePoint call")
+    parser.add_argument("--base-url", help="Target a running Functions host instead of the in-process handlers")
+    parser.add_argument("--function-key", help="Function key sent as x-functions-key (--base-url)")
+    parser.add_argument("--json", dest="json_path", help="Write the summary to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show handler logs")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    folders = [f"Load User {index:03d}" for index in range(args.folders or args.users)]
+    recorder = Recorder()
+
+    def run(target) -> float:
+        for folder in folders:
+            target.seed_user(folder)
+        users = [SimulatedUser(index, folders[index % len(folders)], target, recorder, args) for index in range(args.users)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            for future in [pool.submit(user.run) for user in users]:
+                future.result()
+        return time.perf_counter() - started
+
+    if args.base_url:
+        wall_seconds = run(HttpTarget(args.base_url, args.function_key))
+    else:
+        http_latency = {"sharepoint": args.sharepoint_latency_ms / 1000}
+        with offline_backends(args.storage_latency_ms / 1000, http_latency) as backends:
+            seed_template(backends.blob_service)
+            wall_seconds = run(InProcessTarget(backends.blob_service))
+
+    summary = summarize(recorder, wall_seconds)
+    _print_summary(summary)
+    for lost in summary["lost_updates"][:10]:
+        print(f"    ! {lost['user_folder']} session {lost['session']} (user {lost['user']}): lost {', '.join(lost['missing'])}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as output:
+            json.dump({"configuration": vars(args), **summary}, output, indent=2)
+
+    return 1 if summary["lost_update_sessions"] or summary["error_rate"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+Microbenchmarks
+Courbes de passage à l'échelle des chemins chauds python-docx sur un corpus synthétique
+
+Chaque microbenchmark fait varier un paramètre du corpus
+(documents.build_corpus_document: paragraphes, tableaux, lignes, cellules
+fusionnées, images) à partir d'un document de base, et mesure la fonction
+sur un document fraîchement parsé à chaque répétition (parsing hors
+mesure, sauf pour docx_parse). La meilleure répétition est retenue.
+
+Pour chaque courbe, l'exposant de croissance est estimé entre les deux
+plus grandes tailles (pente log-log: ~1 linéaire, ~2 quadratique). Un
+exposant au-dessus du maximum déclaré fait échouer le script: une
+régression de complexité se voit sans comparer des millisecondes entre
+machines.
+
+Les versions de python-docx et reportlab doivent être celles de
+requirements.txt (voir pins.py).
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.microbench
+    python -m benchmarks.microbench --benchmark find_table_by_title --report scaling.md
+    python -m benchmarks.microbench --quick --json microbench.json
+"""
+
+import argparse
+import io
+import json
+import logging
+import math
+import statistics
+import sys
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from docx import Document
+
+from . import documents
+from .pins import installed_versions, pin_mismatches
+
+from DocumentProcessor.clean_quote import empty_table_rows
+from DocumentProcessor.extract_content import (
+    extract_document_structure,
+    extract_paragraphs_from_document,
+    extract_tables_from_document
+)
+from ProposalGenerator.add_offer_line import find_table_by_title, update_table_total
+from ProposalGenerator.prepare_template import replace_customer_success_placeholders
+from ProposalGenerator.set_customer_info import replace_customer_placeholders
+
+CUSTOMER_SUCCESS = {"name": "Jean Dupont", "tel": "06 12 34 56 78", "email": "jean.dupont@example.com"}
+BASE_DOCUMENT = {"paragraphs": 20, "tables": 3, "rows": 10, "merged_cells": 0, "images": 0}
+
+
+class Microbenchmark:
+    """One function measured along one or more corpus axes"""
+
+    def __init__(
+        self,
+        name: str,
+        function: Callable,
+        axes: Dict[str, List[int]],
+        max_exponent: float,
+        base: Optional[Dict[str, int]] = None,
+        parsed: bool = True
+    ):
+        """
+        Args:
+            name: Benchmark name (filter of --benchmark)
+            function: Called with the parsed Document (or the DOCX bytes when parsed is False)
+            axes: Corpus parameter -> sizes, increasing (one curve per axis)
+            max_exponent: Highest growth exponent accepted on any axis
+            base: Corpus parameters overriding BASE_DOCUMENT for this benchmark
+            parsed: Whether the function takes a parsed Document
+        """
+        self.name = name
+        self.function = function
+        self.axes = axes
+        self.max_exponent = max_exponent
+        self.base = {**BASE_DOCUMENT, **(base or {})}
+        self.parsed = parsed
+
+
+def _extract_content(doc: Document) -> None:
+    """What the extract-content handler does after parsing"""
+    extract_paragraphs_from_document(doc)
+    extract_tables_from_document(doc)
+    extract_document_structure(doc)
+
+
+BENCHMARKS: List[Microbenchmark] = [
+    Microbenchmark(
+        "find_table_by_title",
+        lambda doc: find_table_by_title(doc, "Supports"),
+        axes={"paragraphs": [10, 100, 1000, 4000], "tables": [3, 10, 30, 100]},
+        max_exponent=1.5
+    ),
+    Microbenchmark(
+        "update_table_total",
+        lambda doc: update_table_total(doc.tables[-1]),
+        axes={"rows": [10, 100, 500, 2000]},
+        max_exponent=1.5
+    ),
+    Microbenchmark(
+        "empty_table_rows",
+        empty_table_rows,
+        axes={"rows": [10, 100, 500, 2000], "tables": [3, 10, 30, 100], "merged_cells": [1, 10, 50, 100]},
+        max_exponent=1.5,
+        base={"rows": 100}
+    ),
+    Microbenchmark(
+        "placeholders/prepare_template",
+        lambda doc: replace_customer_success_placeholders(doc, CUSTOMER_SUCCESS),
+        axes={"paragraphs": [10, 100, 1000, 4000], "rows": [10, 100, 500, 2000]},
+        max_exponent=1.5
+    ),
+    Microbenchmark(
+        "placeholders/set_customer_info",
+        lambda doc: replace_customer_placeholders(doc, CUSTOMER_SUCCESS),
+        axes={"paragraphs": [10, 100, 1000, 4000], "rows": [10, 100, 500, 2000]},
+        max_exponent=1.5
+    ),
+    Microbenchmark(
+        "extract_content",
+        _extract_content,
+        axes={"paragraphs": [10, 100, 1000, 4000], "tables": [3, 10, 30, 100], "rows": [10, 100, 500, 2000]},
+        max_exponent=1.5
+    ),
+    Microbenchmark(
+        "docx_parse",
+        lambda data: Document(io.BytesIO(data)),
+        axes={"paragraphs": [10, 100, 1000, 4000], "rows": [10, 100, 500, 2000], "images": [1, 10, 50, 200]},
+        max_exponent=1.5,
+        parsed=False
+    )
+]
+
+
+@lru_cache(maxsize=None)
+def corpus_document(paragraphs: int, tables: int, rows: int, merged_cells: int, images: int) -> bytes:
+    """Synthetic document for these parameters (built once per run)"""
+    return documents.build_corpus_document(paragraphs, tables, rows, merged_cells, images)
+
+
+def measure(benchmark: Microbenchmark, parameters: Dict[str, int], repeat: int) -> Dict[str, float]:
+    """
+    Time the benchmark on one corpus document
+
+    Returns:
+        Best and median duration in milliseconds
+    """
+    data = corpus_document(**parameters)
+    durations = []
+    for _ in range(repeat):
+        argument = Document(io.BytesIO(data)) if benchmark.parsed else data
+        started = time.perf_counter()
+        benchmark.function(argument)
+        durations.append((time.perf_counter() - started) * 1000)
+    return {"best_ms": round(min(durations), 4), "median_ms": round(statistics.median(durations), 4)}
+
+
+def growth_exponent(points: List[Dict]) -> Optional[float]:
+    """Log-log slope between the two largest sizes (1 = linear, 2 = quadratic)"""
+    if len(points) < 2:
+        return None
+    small, large = points[-2], points[-1]
+    if small["best_ms"] <= 0 or large["best_ms"] <= 0:
+        return None
+    return round(math.log(large["best_ms"] / small["best_ms"]) / math.log(large["size"] / small["size"]), 2)
+
+
+def run_benchmark(benchmark: Microbenchmark, repeat: int, quick: bool) -> Dict:
+    """
+    Measure every curve of one benchmark
+
+    Returns:
+        Dict with, per axis, the measured points and the growth exponent
+    """
+    curves = {}
+    for axis, sizes in benchmark.axes.items():
+        if quick:
+            sizes = sizes[:-1]
+        points = []
+        for size in sizes:
+            parameters = {**benchmark.base, axis: size}
+            if axis == "rows":
+                parameters["merged_cells"] = min(parameters["merged_cells"], size)
+            points.append({"size": size, **measure(benchmark, parameters, repeat)})
+        curves[axis] = {"points": points, "exponent": growth_exponent(points)}
+
+    violations = [
+        f"{axis}: exponent {curve['exponent']} > {benchmark.max_exponent}"
+        for axis, curve in curves.items()
+        if curve["exponent"] is not None and curve["exponent"] > benchmark.max_exponent
+    ]
+    return {
+        "benchmark": benchmark.name,
+        "base": benchmark.base,
+        "max_exponent": benchmark.max_exponent,
+        "curves": curves,
+        "violations": violations
+    }
+
+
+def render_report(results: List[Dict]) -> str:
+    """Markdown report: one table per curve, then the exponents"""
+    lines = ["# Microbenchmarks - passage à l'échelle", ""]
+    for result in results:
+        base = ", ".join(f"{key}={value}" for key, value in result["base"].items())
+        lines += [f"## {result['benchmark']}", "", f"Document de base: {base}", ""]
+        for axis, curve in result["curves"].items():
+            lines += [f"| {axis} | best (ms) | median (ms) | ms / unit |", "|---:|---:|---:|---:|"]
+            for point in curve["points"]:
+                lines.append(
+                    f"| {point['size']} | {point['best_ms']:.3f} | {point['median_ms']:.3f} | {point['best_ms'] / point['size']:.4f} |"
+                )
+            flag = " **> max**" if curve["exponent"] is not None and curve["exponent"] > result["max_exponent"] else ""
+            lines += ["", f"Exposant ({axis}): {curve['exponent']} (max {result['max_exponent']}){flag}", ""]
+    return "\n".join(lines)
+
+
+def _print_summary(results: List[Dict]) -> None:
+    header = f"{'benchmark':<32} {'axis':<14} {'largest':>8} {'best ms':>10} {'exponent':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        for axis, curve in result["curves"].items():
+            largest = curve["points"][-1]
+            flag = "  FAIL" if curve["exponent"] is not None and curve["exponent"] > result["max_exponent"] else ""
+            print(
+                f"{result['benchmark']:<32} {axis:<14} {largest['size']:>8} {largest['best_ms']:>10.3f}"
+                f" {str(curve['exponent']):>9}{flag}"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Scaling curves of the python-docx hot paths on a synthetic corpus")
+    parser.add_argument("--benchmark", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per point (the best is kept)")
+    parser.add_argument("--quick", action="store_true", help="Skip the largest size of each curve")
+    parser.add_argument("--report", help="Write the Markdown report to this file")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+    parser.add_argument("--ignore-pins", action="store_true", help="Run even if python-docx/reportlab differ from requirements.txt")
+    args = parser.parse_args(argv)
+
+    mismatches = pin_mismatches()
+    for mismatch in mismatches:
+        print(f"Version mismatch: {mismatch}", file=sys.stderr)
+    if mismatches and not args.ignore_pins:
+        return 2
+
+    # Les fonctions mesurées journalisent à chaque appel
+    logging.disable(logging.CRITICAL)
+
+    benchmarks = [b for b in BENCHMARKS if not args.benchmark or args.benchmark in b.name]
+    results = [run_benchmark(benchmark, args.repeat, args.quick) for benchmark in benchmarks]
+    _print_summary(results)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as output:
+            output.write(render_report(results) + "\n")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as output:
+            json.dump({"packages": installed_versions(), "results": results}, output, indent=2)
+
+    failed = [result for result in results if result["violations"]]
+    for result in failed:
+        for violation in result["violations"]:
+            print(f"    ! {result['benchmark']} {violation}")
+    print(f"\n{len(results) - len(failed)}/{len(results)} benchmarks within their growth exponent")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Pins
+Versions des dépendances mesurées, comparées aux versions épinglées de requirements.txt
+
+Les courbes de passage à l'échelle et la référence du workflow dépendent
+de la version de python-docx (row.cells est linéaire en 1.2, quadratique
+en 1.1) et de reportlab: mesurées avec d'autres versions que celles
+déployées, elles ne disent rien de la production. Les scripts refusent
+de s'exécuter (code 2) quand une version installée diffère de la version
+épinglée, sauf avec --ignore-pins.
+"""
+
+import os
+import re
+from importlib import metadata
+from typing import Dict, List
+
+from . import REPO_ROOT
+
+REQUIREMENTS = os.path.join(REPO_ROOT, "requirements.txt")
+
+# Dépendances dont la version change les mesures
+MEASURED_PACKAGES = ("python-docx", "reportlab")
+
+_PIN = re.compile(r"^\s*([A-Za-z0-9_.\-]+)\s*==\s*([^\s#;]+)")
+
+
+def pinned_versions() -> Dict[str, str]:
+    """Versions of MEASURED_PACKAGES pinned (==) in requirements.txt"""
+    pins = {}
+    with open(REQUIREMENTS, encoding="utf-8") as requirements:
+        for line in requirements:
+            match = _PIN.match(line)
+            if match and match.group(1).lower() in MEASURED_PACKAGES:
+                pins[match.group(1).lower()] = match.group(2)
+    return pins
+
+
+def installed_versions() -> Dict[str, str]:
+    """Installed versions of MEASURED_PACKAGES (None when not installed)"""
+    versions = {}
+    for package in MEASURED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def pin_mismatches() -> List[str]:
+    """One message per measured package whose installed version differs from its pin"""
+    pins = pinned_versions()
+    return [
+        f"{package} {version} installed, requirements.txt pins {pins[package]}"
+        for package, version in installed_versions().items()
+        if package in pins and version != pins[package]
+    ]
@@ -0,0 +1,304 @@
+"""
+Trace Replay
+Rejoue les séquences de requêtes enregistrées (shared/trace_recorder.py) à leur rythme d'origine ou accéléré
+
+Les traces (JSON Lines, container de diagnostic sous traces/{date}/) sont
+regroupées par session; chaque session est rejouée dans son propre thread,
+chaque requête partant à son décalage d'origine divisé par --speed
+(1 = rythme réel, 10 = dix fois plus vite, 0 = sans attente). Les corps
+sont reconstruits depuis leur forme: valeurs conservées telles quelles,
+dossiers "Replay u-...", chaînes de même longueur dérivées de leur
+référence (une offre ajoutée puis supprimée garde le même nom), nombres
+non conservés remplacés par une valeur fixe.
+
+Cibles: handlers en processus contre les stand-ins (défaut, latences
+configurables: comparer des configurations de cache ou de moteur) ou hôte
+Functions local (--base-url). En processus, les templates et fichiers
+référencés par les traces sont créés avant le rejeu; avec --base-url ils
+doivent exister dans le stockage de l'hôte.
+
+Le rapport compare par route les latences enregistrées et rejouées
+(p50/p95), compte les statuts différents de l'original, le retard pris sur
+le calendrier, et les lectures d'un blob dont l'ETag ne correspond pas à
+la dernière écriture enregistrée (trace incomplète: échantillonnage,
+écriture hors API).
+
+Usage (depuis la racine du dépôt):
+    az storage blob download-batch -s diagnostics --pattern "traces/2025-10-21/*" -d ./traces
+    python -m benchmarks.replay ./traces/traces/2025-10-21
+    python -m benchmarks.replay ./traces --speed 20 --storage-latency-ms 15 --json replay.json
+    python -m benchmarks.replay ./traces --speed 0 --base-url http://localhost:7071 --function-key <key>
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from .backends import FAKE_PDF, offline_backends
+from .documents import build_proposal_template
+from .load import ROUTES, HttpTarget, InProcessTarget, build_old_quote, percentile
+
+from shared.config import CONTAINER_TEMPLATES, PATH_TEMPLATES_GENERAL, get_template_path
+from shared.trace_recorder import TRACE_FORMAT_VERSION
+
+REPLAY_FOLDER_PREFIX = "Replay "
+# Valeurs des nombres non conservés (prix...)
+NUMBER_VALUES = {"int": 1, "float": 10.0}
+MAX_SESSION_THREADS = 256
+
+
+def load_events(paths: Iterable[str]) -> List[Dict]:
+    """Read trace events from .jsonl files and directories (recursively), ordered by timestamp"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.endswith(".jsonl"))
+        else:
+            files.append(path)
+
+    events = []
+    for file_path in sorted(files):
+        with open(file_path, encoding="utf-8") as source:
+            for line in source:
+                if line.strip():
+                    event = json.loads(line)
+                    if event.get("v") == TRACE_FORMAT_VERSION:
+                        events.append(event)
+    return sorted(events, key=lambda event: event["ts"])
+
+
+def replay_path(path: str) -> str:
+    """Blob path of the replay for a sanitized path (general/ templates unchanged)"""
+    folder, separator, name = path.partition("/")
+    if folder == PATH_TEMPLATES_GENERAL:
+        return path
+    return f"{REPLAY_FOLDER_PREFIX}{folder}{separator}{name}"
+
+
+def materialize(value_shape: Any) -> Any:
+    """Rebuild a JSON value from its recorded shape (see trace_recorder.shape)"""
+    if value_shape is None:
+        return None
+    if "object" in value_shape:
+        return {name: materialize(item) for name, item in value_shape["object"].items()}
+    if "list" in value_shape:
+        return [materialize(item) for item in value_shape["list"]]
+    if "value" in value_shape:
+        return value_shape["value"]
+    if "number" in value_shape:
+        return NUMBER_VALUES.get(value_shape["number"], 1)
+    if "folder" in value_shape:
+        return f"{REPLAY_FOLDER_PREFIX}{value_shape['folder']}"
+    if "path" in value_shape:
+        return replay_path(value_shape["path"])
+    length, reference = value_shape["str"], value_shape["ref"]
+    return (reference * (length // len(reference) + 1))[:length]
+
+
+def _referenced_files(events: List[Dict]) -> Dict[str, str]:
+    """Blob paths (templates container) the replayed requests expect to exist -> kind"""
+    files: Dict[str, str] = {}
+    for event in events:
+        body = materialize(event.get("body")) or {}
+        if not isinstance(body, dict):
+            continue
+        if body.get("template_name"):
+            files[get_template_path(body["template_name"])] = "template"
+        paths = body.get("file_paths") or []
+        for path in [body.get("file_path"), body.get("blob_path"), *paths]:
+            if isinstance(path, str) and "/" in path and not path.startswith(f"{PATH_TEMPLATES_GENERAL}/"):
+                files.setdefault(path, "document")
+    return files
+
+
+def etag_breaks(events: List[Dict]) -> int:
+    """Recorded reads whose ETag is not the one of the last recorded write of that blob"""
+    last_written: Dict[tuple, Optional[str]] = {}
+    breaks = 0
+    for event in events:
+        for blob in event.get("blobs", []):
+            key = (blob["container"], blob["blob"])
+            if blob["access"] == "read":
+                if key in last_written and last_written[key] and blob["etag"] != last_written[key]:
+                    breaks += 1
+            elif blob["access"] == "write":
+                last_written[key] = blob["etag"]
+            else:
+                last_written.pop(key, None)
+    return breaks
+
+
+class ReplayResults:
+    """Thread-safe outcome of the replayed requests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.recorded: Dict[str, List[float]] = defaultdict(list)
+        self.replayed: Dict[str, List[float]] = defaultdict(list)
+        self.status_mismatches: Dict[str, int] = defaultdict(int)
+        self.unsupported: Dict[str, int] = defaultdict(int)
+        self.max_lag_ms = 0.0
+
+    def add(self, route: str, recorded_ms: float, replayed_ms: float, matched: bool, lag_ms: float) -> None:
+        with self._lock:
+            self.recorded[route].append(recorded_ms)
+            self.replayed[route].append(replayed_ms)
+            if not matched:
+                self.status_mismatches[route] += 1
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def skip(self, route: str) -> None:
+        with self._lock:
+            self.unsupported[route] += 1
+
+
+def replay_session(target, events: List[Dict], origin: float, started: float, speed: float, results: ReplayResults) -> None:
+    """Send the requests of one session at their (scaled) original offsets"""
+    for event in events:
+        if speed:
+            due = started + (event["ts"] - origin) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            lag_ms = max(0.0, (time.perf_counter() - due) * 1000)
+        else:
+            lag_ms = 0.0
+
+        if isinstance(target, InProcessTarget) and (event["method"], event["route"]) not in ROUTES:
+            results.skip(event["route"])
+            continue
+
+        params = materialize(event.get("params")) or {}
+        call_started = time.perf_counter()
+        try:
+            status, _ = target.call(
+                event["method"], event["route"], materialize(event.get("body")),
+                {name: str(value) for name, value in params.items()}
+            )
+        except Exception:
+            status = 0
+        results.add(event["route"], event["duration_ms"], (time.perf_counter() - call_started) * 1000, status == event["status"], lag_ms)
+
+
+def summarize(results: ReplayResults, events: List[Dict], sessions: int, wall_seconds: float, speed: float) -> Dict:
+    routes = {}
+    for route in sorted(results.replayed):
+        recorded, replayed = sorted(results.recorded[route]), sorted(results.replayed[route])
+        routes[route] = {
+            "requests": len(replayed),
+            "status_mismatches": results.status_mismatches.get(route, 0),
+            "recorded_p50_ms": round(percentile(recorded, 0.50), 2),
+            "recorded_p95_ms": round(percentile(recorded, 0.95), 2),
+            "replayed_p50_ms": round(percentile(replayed, 0.50), 2),
+            "replayed_p95_ms": round(percentile(replayed, 0.95), 2)
+        }
+    return {
+        "events": len(events),
+        "sessions": sessions,
+        "speed": speed,
+        "recorded_span_seconds": round(events[-1]["ts"] - events[0]["ts"], 3) if events else 0.0,
+        "wall_seconds": round(wall_seconds, 3),
+        "max_lag_ms": round(results.max_lag_ms, 1),
+        "status_mismatches": sum(results.status_mismatches.values()),
+        "unsupported_routes": dict(results.unsupported),
+        "recorded_etag_breaks": etag_breaks(events),
+        "routes": routes
+    }
+
+
+def _print_summary(summary: Dict) -> None:
+    header = f"{'route':<30} {'requests':>8} {'mismatch':>8} {'rec p50':>9} {'rep p50':>9} {'rec p95':>9} {'rep p95':>9}"
+    print(header)
+    print("-" * len(header))
+    for route, entry in summary["routes"].items():
+        print(
+            f"{route:<30} {entry['requests']:>8} {entry['status_mismatches']:>8} {entry['recorded_p50_ms']:>9.1f}"
+            f" {entry['replayed_p50_ms']:>9.1f} {entry['recorded_p95_ms']:>9.1f} {entry['replayed_p95_ms']:>9.1f}"
+        )
+    print(
+        f"\n{summary['events']} requests in {summary['sessions']} sessions: recorded over {summary['recorded_span_seconds']:.1f} s, "
+        f"replayed in {summary['wall_seconds']:.1f} s (speed {summary['speed']:g}, max lag {summary['max_lag_ms']:.0f} ms)"
+    )
+    print(f"Status different from the recording: {summary['status_mismatches']}")
+    if summary["unsupported_routes"]:
+        print(f"Not replayed (route unknown to the in-process target): {summary['unsupported_routes']}")
+    if summary["recorded_etag_breaks"]:
+        print(f"Recorded reads not matching the last recorded write: {summary['recorded_etag_breaks']} (incomplete trace)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded request traces against a backend configuration")
+    parser.add_argument("paths", nargs="+", help="Trace files (.jsonl) or directories")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time scale (1 = original pace, 0 = no waits)")
+    parser.add_argument("--max-sessions", type=int, help="Only replay the first sessions (by first request)")
+    parser.add_argument("--storage-latency-ms", type=float, default=10.0, help="In-process: latency of every storage call")
+    parser.add_argument("--sharepoint-latency-ms", type=float, default=200.0, help="In-process: latency of every SharePoint call")
+    parser.add_argument("--base-url", help="Target a running Functions host instead of the in-process handlers")
+    parser.add_argument("--function-key", help="Function key sent as x-functions-key (--base-url)")
+    parser.add_argument("--json", dest="json_path", help="Write the summary to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show handler logs")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    events = load_events(args.paths)
+    if not events:
+        print("No trace events found", file=sys.stderr)
+        return 1
+
+    sessions: Dict[str, List[Dict]] = defaultdict(list)
+    for event in events:
+        sessions[event["session"]].append(event)
+    if args.max_sessions:
+        sessions = dict(list(sessions.items())[:args.max_sessions])
+        events = sorted((event for session in sessions.values() for event in session), key=lambda event: event["ts"])
+
+    results = ReplayResults()
+
+    def run(target) -> float:
+        origin = events[0]["ts"]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(len(sessions), MAX_SESSION_THREADS)) as pool:
+            futures = [
+                pool.submit(replay_session, target, session_events, origin, started, args.speed, results)
+                for session_events in sessions.values()
+            ]
+            for future in futures:
+                future.result()
+        return time.perf_counter() - started
+
+    if args.base_url:
+        wall_seconds = run(HttpTarget(args.base_url, args.function_key))
+    else:
+        http_latency = {"sharepoint": args.sharepoint_latency_ms / 1000}
+        with offline_backends(args.storage_latency_ms / 1000, http_latency) as backends:
+            for path, kind in _referenced_files(events).items():
+                if kind == "template":
+                    data = build_proposal_template()
+                elif path.endswith(".pdf"):
+                    data = FAKE_PDF
+                else:
+                    data = build_old_quote(path.split("/")[0])
+                backends.blob_service.put(CONTAINER_TEMPLATES, path, data)
+            wall_seconds = run(InProcessTarget(backends.blob_service))
+
+    summary = summarize(results, events, len(sessions), wall_seconds, args.speed)
+    _print_summary(summary)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as output:
+            json.dump({"configuration": vars(args), **summary}, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+Workflow Benchmark
+Latence de bout en bout du workflow du bot (prepare-template, set-customer-info, N × add-offer-line, generate), hors ligne
+
+Les vrais handlers (avec instrument_handler) sont exécutés contre les
+stand-ins de backends.py: Blob Storage en mémoire, SharePoint (conversion
+PDF) et Dataverse factices, chacun avec une latence configurable par
+appel. Pour chaque nombre de lignes N, le workflow complet est rejoué
+--repeat fois sur des backends neufs; la médiane de chaque étape est
+retenue.
+
+Les résultats (JSON) peuvent être enregistrés comme référence
+(--update-baseline) puis comparés aux exécutions suivantes: une étape plus
+lente que la référence au-delà de --tolerance (et d'un plancher de bruit
+en millisecondes), ou un appel sortant de plus, fait échouer le script.
+Une référence n'a de sens que sur la machine et avec la configuration
+(latences, renderer) qui l'ont produite: une configuration différente est
+refusée, de même que des versions de python-docx / reportlab différentes
+(celles de requirements.txt sont exigées, voir pins.py).
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.workflow --lines 1 10 50
+    python -m benchmarks.workflow --json workflow.json
+    python -m benchmarks.workflow --update-baseline
+    python -m benchmarks.workflow --storage-latency-ms 15 --sharepoint-latency-ms 800 --baseline none
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from .backends import CallLog, http_request, offline_backends, overridden
+from .call_budgets import CUSTOMER_SUCCESS, TEMPLATE, USER, seed_template
+from .pins import installed_versions, pin_mismatches
+
+from ProposalGenerator.add_offer_line import add_offer_line
+from ProposalGenerator.generate_final import generate_final_proposal
+from ProposalGenerator.prepare_template import prepare_template
+from ProposalGenerator.set_customer_info import set_customer_info
+from shared import pdf_converter
+from shared.config import CONTAINER_DOCUMENTS, PDF_RENDERER, SERVICE_CODE_TO_NAME, get_user_file_path
+from shared.middleware import instrument_handler
+
+DEFAULT_LINES = [1, 10, 50, 100, 250, 500]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "workflow.json")
+RESULTS_VERSION = 1
+
+STEPS = ("prepare_template", "set_customer_info", "add_offer_line_total", "generate", "total")
+CALL_SERVICES = ("storage", "sharepoint", "dataverse")
+
+_PREPARE = instrument_handler(prepare_template)
+_SET_CUSTOMER_INFO = instrument_handler(set_customer_info)
+_ADD_OFFER_LINE = instrument_handler(add_offer_line)
+_GENERATE = instrument_handler(generate_final_proposal)
+
+
+class WorkflowError(Exception):
+    """A workflow step returned an unexpected HTTP status"""
+
+
+def offer(index: int) -> Dict:
+    """Offer line #index as sent by the bot (services used in turn)"""
+    service_codes = sorted(SERVICE_CODE_TO_NAME)
+    return {
+        "crb02_offrebecloud1": f"Offre {index:03d}",
+        "crb02_description": f"Description de l'offre {index:03d} - licence mensuelle par utilisateur",
+        "crb02_prixht": 5.0 + (index % 20) * 2.5,
+        "crb02_service": service_codes[index % len(service_codes)],
+        "quantity": 1 + index % 10
+    }
+
+
+def _timed_call(handler, method: str, route: str, body: Dict) -> float:
+    """Invoke a handler, return its duration in milliseconds"""
+    started = time.perf_counter()
+    response = handler(http_request(method, route, body))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if response.status_code != 200:
+        raise WorkflowError(f"{route} returned {response.status_code}: {response.get_body()[:300]!r}")
+    return elapsed_ms
+
+
+def run_workflow(lines: int, storage_latency_seconds: float, http_latency_seconds: Dict[str, float]) -> Dict:
+    """
+    Run the bot workflow once, with `lines` offer lines, on fresh backends
+
+    Returns:
+        Dict with the duration of each step (ms) and the outbound calls per service
+    """
+    with offline_backends(storage_latency_seconds, http_latency_seconds) as backends:
+        seed_template(backends.blob_service)
+
+        add_durations: List[float] = []
+        timings = {
+            "prepare_template": _timed_call(_PREPARE, "POST", "proposal/prepare-template", {
+                "template_name": TEMPLATE, "customer_success": CUSTOMER_SUCCESS, "user_folder": USER
+            }),
+            "set_customer_info": _timed_call(_SET_CUSTOMER_INFO, "POST", "proposal/set-customer-info", {
+                "user_folder": USER, "customer_success": CUSTOMER_SUCCESS
+            })
+        }
+        for index in range(lines):
+            add_durations.append(_timed_call(_ADD_OFFER_LINE, "POST", "proposal/add-offer-line", {
+                "user_folder": USER, "offer": offer(index)
+            }))
+        timings["generate"] = _timed_call(_GENERATE, "POST", "proposal/generate", {
+            "user_folder": USER, "proposal_name": "Client XYZ"
+        })
+
+        if not any(name.endswith(".pdf") for name in backends.blob_service.names(CONTAINER_DOCUMENTS, get_user_file_path(USER, ""))):
+            raise WorkflowError("generate returned 200 but no PDF was stored")
+
+        calls = CallLog.per_service(backends.calls.snapshot())
+
+    timings["add_offer_line_total"] = sum(add_durations)
+    timings["add_offer_line_mean"] = statistics.mean(add_durations) if add_durations else 0.0
+    timings["add_offer_line_last"] = add_durations[-1] if add_durations else 0.0
+    timings["total"] = timings["prepare_template"] + timings["set_customer_info"] + timings["add_offer_line_total"] + timings["generate"]
+    return {"timings_ms": timings, "calls": {service: calls.get(service, 0) for service in CALL_SERVICES}}
+
+
+def run_benchmark(
+    line_counts: List[int],
+    repeat: int,
+    storage_latency_seconds: float,
+    http_latency_seconds: Dict[str, float],
+    renderer: str
+) -> List[Dict]:
+    """
+    Run the workflow `repeat` times per line count, after one warm-up run
+
+    Returns:
+        One entry per line count: median duration of each step (ms), calls per service
+    """
+    results = []
+    with overridden({pdf_converter: {"PDF_RENDERER": renderer}}):
+        # Unmeasured run: lazy imports, Azure AD token, python-docx templates
+        run_workflow(1, storage_latency_seconds, http_latency_seconds)
+        for lines in line_counts:
+            runs = [run_workflow(lines, storage_latency_seconds, http_latency_seconds) for _ in range(repeat)]
+            results.append({
+                "lines": lines,
+                "timings_ms": {
+                    step: round(statistics.median(run["timings_ms"][step] for run in runs), 3)
+                    for step in runs[0]["timings_ms"]
+                },
+                "calls": runs[0]["calls"]
+            })
+    return results
+
+
+def compare_to_baseline(results: List[Dict], baseline: List[Dict], tolerance: float, noise_floor_ms: float) -> List[str]:
+    """
+    List the regressions of results against a baseline run
+
+    A step regresses when it is slower than the baseline by more than
+    `tolerance` (relative) and by more than `noise_floor_ms`; a service
+    regresses as soon as it receives one more call. Line counts missing
+    from the baseline are not compared.
+    """
+    baseline_by_lines = {entry["lines"]: entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        reference = baseline_by_lines.get(entry["lines"])
+        if reference is None:
+            continue
+        for step in STEPS:
+            current, previous = entry["timings_ms"][step], reference["timings_ms"].get(step)
+            if previous is not None and current > previous * (1 + tolerance) and current - previous > noise_floor_ms:
+                regressions.append(
+                    f"N={entry['lines']} {step}: {current:.1f} ms vs {previous:.1f} ms baseline (+{(current / previous - 1) * 100:.0f}%)"
+                )
+        for service in CALL_SERVICES:
+            current, previous = entry["calls"][service], reference["calls"].get(service, 0)
+            if current > previous:
+                regressions.append(f"N={entry['lines']} {service}: {current} calls vs {previous} baseline")
+    return regressions
+
+
+def _print_table(results: List[Dict], baseline: Optional[List[Dict]]) -> None:
+    baseline_by_lines = {entry["lines"]: entry for entry in baseline or []}
+    header = f"{'lines':>5}  " + "  ".join(f"{step:>20}" for step in STEPS) + f"  {'add (last)':>11}  {'storage':>7}  {'sharepoint':>10}"
+    print(header)
+    print("-" * len(header))
+    for entry in results:
+        reference = baseline_by_lines.get(entry["lines"])
+        cells = []
+        for step in STEPS:
+            value = entry["timings_ms"][step]
+            delta = ""
+            if reference and reference["timings_ms"].get(step):
+                delta = f" ({(value / reference['timings_ms'][step] - 1) * 100:+.0f}%)"
+            cells.append(f"{value:>12.1f}{delta:>8}")
+        print(
+            f"{entry['lines']:>5}  " + "  ".join(cells)
+            + f"  {entry['timings_ms']['add_offer_line_last']:>11.1f}"
+            + f"  {entry['calls']['storage']:>7}  {entry['calls']['sharepoint']:>10}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the end-to-end bot workflow against offline stand-ins")
+    parser.add_argument("--lines", type=int, nargs="+", default=DEFAULT_LINES, help="Offer line counts to measure")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per line count (the median is kept)")
+    parser.add_argument("--storage-latency-ms", type=float, default=0.0, help="Latency added to every storage call")
+    parser.add_argument("--sharepoint-latency-ms", type=float, default=0.0, help="Latency added to every SharePoint call")
+    parser.add_argument("--dataverse-latency-ms", type=float, default=0.0, help="Latency added to every Dataverse call")
+    parser.add_argument("--renderer", choices=("sharepoint", "auto"), default=PDF_RENDERER, help="PDF_RENDERER used by generate")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with ('none' to skip)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per step")
+    parser.add_argument("--noise-floor-ms", type=float, default=5.0, help="Slowdowns below this are never regressions")
+    parser.add_argument("--verbose", action="store_true", help="Show handler logs")
+    parser.add_argument("--ignore-pins", action="store_true", help="Run even if python-docx/reportlab differ from requirements.txt")
+    args = parser.parse_args(argv)
+
+    mismatches = pin_mismatches()
+    for mismatch in mismatches:
+        print(f"Version mismatch: {mismatch}", file=sys.stderr)
+    if mismatches and not args.ignore_pins:
+        return 2
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    configuration = {
+        "storage_latency_ms": args.storage_latency_ms,
+        "sharepoint_latency_ms": args.sharepoint_latency_ms,
+        "dataverse_latency_ms": args.dataverse_latency_ms,
+        "renderer": args.renderer
+    }
+    http_latency_seconds = {"sharepoint": args.sharepoint_latency_ms / 1000, "dataverse": args.dataverse_latency_ms / 1000}
+
+    try:
+        results = run_benchmark(
+            sorted(set(args.lines)), args.repeat, args.storage_latency_ms / 1000, http_latency_seconds, args.renderer
+        )
+    except WorkflowError as e:
+        print(f"Workflow failed: {e}", file=sys.stderr)
+        return 1
+
+    report = {
+        "version": RESULTS_VERSION,
+        "configuration": configuration,
+        "repeat": args.repeat,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "packages": installed_versions()
+        },
+        "results": results
+    }
+
+    baseline = None
+    if args.baseline != "none" and not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as source:
+            baseline = json.load(source)
+        if baseline.get("version") != RESULTS_VERSION or baseline.get("configuration") != configuration:
+            print(f"Baseline {args.baseline} was recorded with another configuration: {baseline.get('configuration')}", file=sys.stderr)
+            _print_table(results, None)
+            return 2
+        baseline_packages = baseline.get("environment", {}).get("packages")
+        if baseline_packages != report["environment"]["packages"]:
+            print(f"Baseline {args.baseline} was recorded with other package versions: {baseline_packages}", file=sys.stderr)
+            _print_table(results, None)
+            return 2
+
+    _print_table(results, baseline["results"] if baseline else None)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+            output.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        return 0
+
+    regressions = compare_to_baseline(results, baseline["results"], args.tolerance, args.noise_floor_ms)
+    for regression in regressions:
+        print(f"    ! {regression}")
+    print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,16 +13,25 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'functions'))
 
 from DocumentProcessor.clean_quote import clean_quote
 from DocumentProcessor.delete_template import delete_template
-from DocumentProcessor.cleanup_expired import cleanup_expired
+from DocumentProcessor.cleanup_expired import cleanup_expired, cleanup_expired_timer
 from DocumentProcessor.get_sas_url import get_sas_url
+from DocumentProcessor.get_sas_urls import get_sas_urls
+from DocumentProcessor.get_upload_url import get_upload_url
 from DocumentProcessor.list_templates import list_general_templates
 from DocumentProcessor.list_user_templates import list_user_templates
 from DocumentProcessor.list_user_documents import list_created_documents
+from DocumentProcessor.sweep_conversions import sweep_temp_conversions
+from DocumentProcessor.reconcile_index import reconcile_index_timer
+from DocumentProcessor.analyze_template import analyze_template_blob
+from DocumentProcessor.export_metrics import export_metrics
 from ProposalGenerator.prepare_template import prepare_template
 from ProposalGenerator.add_offer_line import add_offer_line
 from ProposalGenerator.delete_offer_line import delete_offer_line
 from ProposalGenerator.set_customer_info import set_customer_info
 from ProposalGenerator.generate_final import generate_final_proposal
+from ProposalGenerator.regenerate_pdfs import regenerate_pdfs
+from shared.middleware import instrument_handler
+from shared.tracing import configure_tracing
 
 # Create function app instance
 app = func.FunctionApp()
@@ -30,12 +39,16 @@ app = func.FunctionApp()
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+# Configure tracing (TRACING_EXPORTER, disabled by default)
+configure_tracing()
+
 
 # ============================================================================
 # DOCUMENT PROCESSING ENDPOINTS
 # ============================================================================
 
 @app.route(route="document/clean-quote", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def clean_quote_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     Clean old quote - Empty tables only
@@ -44,6 +57,7 @@ def clean_quote_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 
 
 @app.route(route="document/delete", methods=["DELETE"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def delete_template_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     Delete a template or document from blob storage
@@ -52,6 +66,7 @@ def delete_template_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 
 
 @app.route(route="document/cleanup-expired", methods=["DELETE"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def cleanup_expired_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     Cleanup expired documents (older than 24h by default)
@@ -60,6 +75,7 @@ def cleanup_expired_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 
 
 @app.route(route="document/get-sas-url", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def get_sas_url_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     Generate SAS URL for downloading a document (expires in 24h by default)
@@ -67,7 +83,26 @@ def get_sas_url_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     return get_sas_url(req)
 
 
+@app.route(route="document/get-sas-urls", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
+def get_sas_urls_endpoint(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Generate SAS URLs for many documents in one call (no existence check by default)
+    """
+    return get_sas_urls(req)
+
+
+@app.route(route="document/get-upload-url", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
+def get_upload_url_endpoint(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Generate a short-lived write-only SAS URL to upload a file directly to the user folder
+    """
+    return get_upload_url(req)
+
+
 @app.route(route="template/list-general", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def list_general_templates_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     List all available general templates (in general/ folder)
@@ -76,6 +111,7 @@ def list_general_templates_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 
 
 @app.route(route="template/list-user", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def list_user_templates_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     List user's personal templates (working files in word-templates)
@@ -84,6 +120,7 @@ def list_user_templates_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 
 
 @app.route(route="document/list-created", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def list_created_documents_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     List user's created documents (final files in word-documents)
@@ -96,6 +133,7 @@ def list_created_documents_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 # ============================================================================
 
 @app.route(route="proposal/prepare-template", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def prepare_template_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     Prepare template - creates temp_working.docx from general template
@@ -104,6 +142,7 @@ def prepare_template_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 
 
 @app.route(route="proposal/set-customer-info", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def set_customer_info_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     Set customer success info (name, tel, email) in working document
@@ -112,6 +151,7 @@ def set_customer_info_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 
 
 @app.route(route="proposal/add-offer-line", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def add_offer_line_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     Add a single offer line to the working document
@@ -121,6 +161,7 @@ def add_offer_line_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 
 
 @app.route(route="proposal/delete-offer-line", methods=["DELETE"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def delete_offer_line_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     Delete a single offer line from the working document
@@ -130,9 +171,77 @@ def delete_offer_line_endpoint(req: func.HttpRequest) -> func.HttpResponse:
 
 
 @app.route(route="proposal/generate", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
 def generate_proposal_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """
     Generate final proposal (Word + PDF) from temp_working.docx
     Returns SAS URLs with 24h expiration
     """
     return generate_final_proposal(req)
+
+
+@app.route(route="proposal/regenerate-pdfs", methods=["POST", "GET"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_handler
+def regenerate_pdfs_endpoint(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Bulk PDF regeneration for documents in word-documents (resumable job)
+    POST starts or resumes a job, GET returns its progress
+    """
+    return regenerate_pdfs(req)
+
+
+# ============================================================================
+# MONITORING ENDPOINTS
+# ============================================================================
+
+@app.route(route="metrics", methods=["GET"], auth_level=func.AuthLevel.ADMIN)
+def metrics_endpoint(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Latency histograms and counters of this instance (Prometheus text format, ?format=json)
+    """
+    return export_metrics(req)
+
+
+# ============================================================================
+# SCHEDULED JOBS
+# ============================================================================
+
+@app.timer_trigger(schedule="0 */30 * * * *", arg_name="timer", run_on_startup=False)
+def sweep_temp_conversions_job(timer: func.TimerRequest) -> None:
+    """
+    Remove orphaned temporary files from the SharePoint conversion library
+    """
+    sweep_temp_conversions(timer)
+
+
+@app.timer_trigger(schedule="0 */15 * * * *", arg_name="timer", run_on_startup=False)
+def cleanup_expired_job(timer: func.TimerRequest) -> None:
+    """
+    Incremental cleanup of expired documents (time-budgeted, resumes from checkpoint)
+    """
+    cleanup_expired_timer(timer)
+
+
+@app.timer_trigger(schedule="0 0 3 * * *", arg_name="timer", run_on_startup=False)
+def reconcile_index_job(timer: func.TimerRequest) -> None:
+    """
+    Repair drift between the blob metadata index and Blob Storage (daily)
+    """
+    reconcile_index_timer(timer)
+
+
+# ============================================================================
+# BLOB TRIGGERS
+# ============================================================================
+
+@app.blob_trigger(
+    arg_name="blob",
+    path="%BLOB_CONTAINER_TEMPLATES%/general/{name}",
+    connection="AZURE_STORAGE_CONNECTION_STRING"
+)
+def analyze_template_job(blob: func.InputStream) -> None:
+    """
+    Precompute placeholders and tables of a general template into its blob metadata
+    """
+    analyze_template_blob(blob)
+
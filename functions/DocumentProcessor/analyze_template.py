@@ -0,0 +1,63 @@
+"""
+Analyze Template - Précalcule les métadonnées d'un template général (blob trigger)
+"""
+
+import hashlib
+import logging
+import os
+import azure.functions as func
+from azure.core.exceptions import ResourceNotFoundError
+
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from shared.blob_client import get_blob_client
+from shared.logger import setup_logger
+from shared.template_analyzer import analyze_template, is_analysis_current, to_blob_metadata
+
+logger = setup_logger(__name__)
+
+
+def analyze_template_blob(blob: func.InputStream) -> None:
+    """
+    Analyse un template de general/ et stocke le résultat dans ses métadonnées
+
+    Déclenché à chaque création / modification d'un template. Les
+    placeholders, le nombre de tableaux et les tableaux de service sont
+    calculés une fois par version du contenu (hash SHA-256 stocké avec
+    l'analyse): la mise à jour des métadonnées elle-même ne relance pas
+    d'analyse.
+    """
+    container_name, _, blob_name = blob.name.partition("/")
+
+    if not blob_name.lower().endswith(".docx"):
+        return
+
+    try:
+        data = blob.read()
+        blob_client = get_blob_client()
+        metadata, etag = blob_client.get_blob_metadata(container_name, blob_name)
+
+        if is_analysis_current(metadata, hashlib.sha256(data).hexdigest()):
+            logger.info(f"Template metadata already up to date: {blob_name}")
+            return
+
+        analysis = analyze_template(data)
+
+        # Only update the version that was analyzed; a newer upload triggers its own analysis
+        blob_client.set_blob_metadata(
+            container_name,
+            blob_name,
+            {**metadata, **to_blob_metadata(analysis)},
+            etag=etag
+        )
+
+        logger.info(
+            f"Analyzed template {blob_name}: {len(analysis['placeholders'])} placeholders, "
+            f"{analysis['table_count']} tables, service tables: {analysis['service_tables']}"
+        )
+
+    except ResourceNotFoundError:
+        logger.warning(f"Template deleted before analysis: {blob_name}")
+    except Exception as e:
+        # Not re-raised: an unreadable template would be retried until poisoned
+        logger.error(f"Error analyzing template {blob_name}: {str(e)}", exc_info=True)
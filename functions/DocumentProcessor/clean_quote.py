@@ -15,9 +15,11 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
+from shared.docx_tables import table_rows
 from shared.validators import validate_required_fields
 from shared.logger import setup_logger
-from shared.config import CONTAINER_TEMPLATES, get_user_file_path
+from shared.timing import stage, mark_stage
+from shared.config import CONTAINER_TEMPLATES, get_user_file_path, get_expiry_tags
 
 logger = setup_logger(__name__)
 
@@ -37,10 +39,12 @@ def empty_table_rows(doc: Document) -> int:
     for table in doc.tables:
         # Garder le header (première ligne)
         # Vider toutes les autres lignes
-        if len(table.rows) > 1:
+        # row.cells reparcourt tout le tableau à chaque accès (python-docx 1.1): une seule lecture des cellules
+        rows = table_rows(table)
+        if len(rows) > 1:
             # Commencer à l'index 1 pour garder le header
-            for row_idx in range(len(table.rows) - 1, 0, -1):  # Parcourir à l'envers pour éviter problèmes d'index
-                for cell in table.rows[row_idx].cells:
+            for row in reversed(rows[1:]):  # Parcourir à l'envers pour éviter problèmes d'index
+                for cell in row.cells:
                     cell.text = ""  # Vider la cellule
                 rows_emptied += 1
 
@@ -124,15 +128,19 @@ def clean_quote(req: func.HttpRequest) -> func.HttpResponse:
             )
 
         # Charger le document Word
-        doc = Document(io.BytesIO(file_bytes))
+        with stage("docx_parse"):
+            doc = Document(io.BytesIO(file_bytes))
         tables_count = len(doc.tables)
 
         # Vider les tableaux
         rows_emptied = empty_table_rows(doc)
 
+        mark_stage("docx_mutate")
+
         # Sauvegarder le document nettoyé
-        output_bytes_io = io.BytesIO()
-        doc.save(output_bytes_io)
+        with stage("docx_save"):
+            output_bytes_io = io.BytesIO()
+            doc.save(output_bytes_io)
         output_bytes = output_bytes_io.getvalue()
 
         # Upload vers Blob Storage comme fichier de travail
@@ -142,7 +150,8 @@ def clean_quote(req: func.HttpRequest) -> func.HttpResponse:
             container_name=container_name,
             blob_name=working_file_path,
             data=output_bytes,
-            overwrite=True
+            overwrite=True,
+            tags=get_expiry_tags()
         )
 
         logger.info(f"Working file saved to: {working_file_path}")
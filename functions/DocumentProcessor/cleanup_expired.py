@@ -5,26 +5,358 @@ Cleanup Expired Documents - Supprime les documents de plus de 24h
 import json
 import logging
 import os
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta, timezone
 import azure.functions as func
+from azure.core.exceptions import ResourceNotFoundError
 
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
+from shared.blob_index import make_index_entry
 from shared.logger import setup_logger
-from shared.config import CONTAINER_TEMPLATES
+from shared.config import CONTAINER_TEMPLATES, CONTAINER_DOCUMENTS, EXPIRY_TAG, WORKING_FILE_TTL_HOURS, get_expiry_bucket
 
 logger = setup_logger(__name__)
 
+# Nettoyage incrémental (timer): budget de temps par exécution et taille de page
+CLEANUP_TIME_BUDGET_SECONDS = int(os.environ.get("CLEANUP_TIME_BUDGET_SECONDS", 120))
+CLEANUP_PAGE_SIZE = int(os.environ.get("CLEANUP_PAGE_SIZE", 500))
+# Intervalle minimal entre deux passes de scan complètes (les fichiers
+# tagués sont supprimés à chaque exécution par la passe des tags)
+CLEANUP_SCAN_INTERVAL_HOURS = float(os.environ.get("CLEANUP_SCAN_INTERVAL_HOURS", 24))
+
+# Checkpoint du nettoyage incrémental (container word-documents, hors du
+# container nettoyé pour ne jamais se supprimer lui-même)
+CHECKPOINT_PATH = "_jobs/cleanup-expired/checkpoint.json"
+
+
+def get_expiry_threshold(max_age_hours: int) -> str:
+    """
+    Return the expiry bucket of working files older than max_age_hours
+
+    Working files are tagged at write time with expires_at = write time +
+    WORKING_FILE_TTL_HOURS (rounded up to the hour), so a file written
+    before now - max_age_hours has expires_at <= now - max_age_hours + TTL.
+
+    Args:
+        max_age_hours: Maximum age in hours
+
+    Returns:
+        Expiry bucket (see config.get_expiry_bucket)
+    """
+    threshold = datetime.now(timezone.utc).timestamp() + (WORKING_FILE_TTL_HOURS - max_age_hours) * 3600
+    return get_expiry_bucket(threshold)
+
+
+def get_expiry_condition(max_age_hours: int) -> str:
+    """
+    Build the blob tag filter selecting working files older than max_age_hours
+
+    Args:
+        max_age_hours: Maximum age in hours
+
+    Returns:
+        Tag filter expression (usable for queries and conditional deletes)
+    """
+    return f"\"{EXPIRY_TAG}\" <= '{get_expiry_threshold(max_age_hours)}'"
+
+
+def delete_index_entries(
+    blob_client,
+    container_name: str,
+    entries: List[Dict],
+    tags_condition: str,
+    cutoff_time: datetime
+) -> Dict[str, bool]:
+    """
+    Delete the blobs of expired index entries
+
+    The index can be stale (files rewritten outside the API, e.g. SAS
+    uploads or Power Automate, are only reindexed by reconciliation), so
+    every delete is conditional: tagged files on the tag condition,
+    untagged files on not having been modified since cutoff_time. Files
+    kept because they were rewritten (or already deleted) get their index
+    entry refreshed, so they do not come back at the head of the next query.
+
+    Returns:
+        Dict mapping each blob name to True (deleted) or False
+    """
+    tagged = [entry['name'] for entry in entries if entry['expires_at']]
+    untagged = [entry['name'] for entry in entries if not entry['expires_at']]
+
+    results = blob_client.delete_blobs_batch(container_name, tagged, if_tags_match_condition=tags_condition)
+    results.update(blob_client.delete_blobs_batch(container_name, untagged, if_unmodified_since=cutoff_time))
+
+    for entry in entries:
+        if not results.get(entry['name']):
+            _refresh_index_entry(blob_client, container_name, entry)
+    return results
+
+
+def _refresh_index_entry(blob_client, container_name: str, entry: Dict) -> None:
+    """Re-index a blob whose entry turned out stale (failures are left to reconciliation)"""
+    blob_name = entry['name']
+    try:
+        blob_client.index.remove_entry(entry)
+        # Listing by exact name returns the tags with the properties (one call)
+        for blob in blob_client.list_blobs_with_metadata(container_name, name_starts_with=blob_name, include_tags=True):
+            if blob['name'] == blob_name:
+                fresh = make_index_entry(container_name, blob_name, blob['size'], blob['last_modified'], blob['tags'])
+                if fresh is not None:
+                    blob_client.index.upsert(fresh)
+    except Exception as e:
+        logger.warning(f"Failed to refresh index entry of {blob_name}: {str(e)}")
+
+
+def select_expired(blobs: List[Dict], cutoff_time: datetime) -> List[str]:
+    """
+    Return the names of user files last modified before cutoff_time
+
+    Args:
+        blobs: Blobs as returned by list_blobs_with_metadata / list_blobs_page
+        cutoff_time: Files modified before this time are expired
+
+    Returns:
+        Names of expired blobs (general/ templates excluded)
+    """
+    expired_files = []
+    for blob in blobs:
+        # Check if blob is older than cutoff time
+        blob_age = blob['last_modified']
+
+        # Make cutoff_time offset-aware if it isn't already
+        if blob_age.tzinfo is None:
+            blob_age = blob_age.replace(tzinfo=timezone.utc)
+
+        if blob_age < cutoff_time:
+            # Skip general templates (only delete user files)
+            if blob['name'].startswith('general/'):
+                continue
+
+            expired_files.append(blob['name'])
+
+    return expired_files
+
+
+def find_expired_by_scan(
+    blob_client,
+    container_name: str,
+    user_folder: Optional[str],
+    cutoff_time: datetime
+) -> List[str]:
+    """
+    List the container and return user files last modified before cutoff_time
+
+    Args:
+        blob_client: Blob Storage client
+        container_name: Name of the container
+        user_folder: Only scan this folder if set
+        cutoff_time: Files modified before this time are expired
+
+    Returns:
+        Names of expired blobs (general/ templates excluded)
+    """
+    name_prefix = user_folder if user_folder else None
+    blobs = blob_client.list_blobs_with_metadata(container_name, name_starts_with=name_prefix)
+    return select_expired(blobs, cutoff_time)
+
+
+def _load_checkpoint(blob_client) -> Dict:
+    """Load the incremental cleanup checkpoint (empty state if none)"""
+    try:
+        return json.loads(blob_client.download_blob(CONTAINER_DOCUMENTS, CHECKPOINT_PATH))
+    except ResourceNotFoundError:
+        return {"continuation_token": None, "pass_started_at": None, "pass_totals": {"scanned": 0, "deleted": 0}}
+
+
+def _save_checkpoint(blob_client, checkpoint: Dict) -> None:
+    """Persist the incremental cleanup checkpoint"""
+    checkpoint["updated_at"] = datetime.now(timezone.utc).isoformat()
+    blob_client.upload_blob(CONTAINER_DOCUMENTS, CHECKPOINT_PATH, json.dumps(checkpoint).encode("utf-8"), overwrite=True)
+
+
+def run_incremental_cleanup(
+    blob_client,
+    max_age_hours: int = 24,
+    time_budget_seconds: float = CLEANUP_TIME_BUDGET_SECONDS,
+    page_size: int = CLEANUP_PAGE_SIZE,
+    scan_interval_hours: float = CLEANUP_SCAN_INTERVAL_HOURS
+) -> Dict:
+    """
+    Delete expired files within a time budget, resuming from a checkpoint
+
+    With the metadata index enabled, expired files (tagged or not) are
+    selected by indexed queries instead of the two passes below.
+
+    1. Tag pass: deletes tagged working files found by the blob index
+       (bounded pages, re-queried until empty or out of time)
+    2. Scan pass: continues the container listing from the saved
+       continuation token, one page at a time, for untagged files; the
+       token is saved after each page so the next run resumes there.
+       A new pass starts only scan_interval_hours after the previous one
+       completed: between passes, runs only do the tag pass
+
+    Args:
+        blob_client: Blob Storage client
+        max_age_hours: Maximum age in hours
+        time_budget_seconds: Stop starting new pages after this delay
+        page_size: Blobs per listing / tag query page
+        scan_interval_hours: Minimum delay between two complete scan passes
+
+    Returns:
+        Metrics: files_scanned, files_deleted, files_remaining, scan_complete...
+    """
+    started = time.monotonic()
+    deadline = started + time_budget_seconds
+    container_name = CONTAINER_TEMPLATES
+    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+
+    metrics = {
+        "files_scanned": 0,
+        "files_deleted": 0,
+        "files_remaining": 0,
+        "tag_pass_complete": False,
+        "scan_complete": False,
+        "scan_skipped": False
+    }
+
+    condition = get_expiry_condition(max_age_hours)
+
+    if blob_client.index is not None:
+        # Metadata index: one indexed query covers tagged and untagged files
+        expiry_bucket = get_expiry_threshold(max_age_hours)
+        while time.monotonic() < deadline:
+            entries = blob_client.index.find_expired(container_name, expiry_bucket, cutoff_time, limit=page_size)
+            if not entries:
+                metrics["tag_pass_complete"] = True
+                metrics["scan_complete"] = True
+                break
+
+            results = delete_index_entries(blob_client, container_name, entries, condition, cutoff_time)
+            deleted = sum(1 for ok in results.values() if ok)
+            metrics["files_scanned"] += len(entries)
+            metrics["files_deleted"] += deleted
+
+            if deleted == 0:
+                metrics["files_remaining"] += len(entries)
+                break
+
+        return _log_metrics(metrics, started, None)
+
+    # 1. Tag pass
+    while time.monotonic() < deadline:
+        candidates = [
+            blob['name'] for blob in blob_client.find_blobs_by_tags(container_name, condition, max_results=page_size)
+            if not blob['name'].startswith('general/')
+        ]
+        if not candidates:
+            metrics["tag_pass_complete"] = True
+            break
+
+        results = blob_client.delete_blobs_batch(container_name, candidates, if_tags_match_condition=condition)
+        deleted = sum(1 for ok in results.values() if ok)
+        metrics["files_scanned"] += len(candidates)
+        metrics["files_deleted"] += deleted
+
+        if deleted == 0:
+            # Only undeletable matches left: stop instead of re-querying them
+            metrics["files_remaining"] += len(candidates)
+            break
+
+    # 2. Scan pass (untagged files), resumed from the checkpoint
+    checkpoint = _load_checkpoint(blob_client)
+    if not checkpoint.get("pass_started_at"):
+        last_completed = checkpoint.get("last_pass_completed_at")
+        if last_completed and datetime.now(timezone.utc) - datetime.fromisoformat(last_completed) < timedelta(hours=scan_interval_hours):
+            # Previous pass too recent: do not relist the container yet
+            metrics["scan_skipped"] = True
+            return _log_metrics(metrics, started, None)
+        checkpoint["pass_started_at"] = datetime.now(timezone.utc).isoformat()
+
+    while time.monotonic() < deadline:
+        blobs, next_token = blob_client.list_blobs_page(
+            container_name,
+            continuation_token=checkpoint.get("continuation_token"),
+            page_size=page_size
+        )
+        expired_files = select_expired(blobs, cutoff_time)
+        # Files rewritten since the page was listed (e.g. temp_working.docx) are kept
+        results = blob_client.delete_blobs_batch(container_name, expired_files, if_unmodified_since=cutoff_time)
+        deleted = sum(1 for ok in results.values() if ok)
+
+        metrics["files_scanned"] += len(blobs)
+        metrics["files_deleted"] += deleted
+        metrics["files_remaining"] += len(expired_files) - deleted
+        checkpoint["pass_totals"]["scanned"] += len(blobs)
+        checkpoint["pass_totals"]["deleted"] += deleted
+        checkpoint["continuation_token"] = next_token
+
+        if next_token is None:
+            # Full pass done: the next run starts a new pass from the beginning
+            metrics["scan_complete"] = True
+            logger.info(f"Cleanup scan pass complete: {checkpoint['pass_totals']}")
+            checkpoint["last_pass_completed_at"] = datetime.now(timezone.utc).isoformat()
+            checkpoint["last_pass_totals"] = checkpoint["pass_totals"]
+            checkpoint["pass_started_at"] = None
+            checkpoint["pass_totals"] = {"scanned": 0, "deleted": 0}
+            _save_checkpoint(blob_client, checkpoint)
+            break
+
+        _save_checkpoint(blob_client, checkpoint)
+
+    return _log_metrics(metrics, started, checkpoint.get("continuation_token"))
+
+
+def _log_metrics(metrics: Dict, started: float, continuation_token: Optional[str]) -> Dict:
+    """Complete and log the incremental cleanup metrics"""
+    metrics["elapsed_seconds"] = round(time.monotonic() - started, 2)
+    metrics["continuation_token_saved"] = continuation_token is not None
+
+    # Métriques structurées (customDimensions dans Application Insights)
+    logger.info(f"Cleanup metrics: {json.dumps(metrics)}", extra={"custom_dimensions": metrics})
+    return metrics
+
+
+def cleanup_expired_timer(timer: func.TimerRequest) -> None:
+    """
+    Nettoyage incrémental planifié (timer trigger)
+
+    Chaque exécution supprime les fichiers tagués expirés, puis traite une
+    tranche du container dans la limite de CLEANUP_TIME_BUDGET_SECONDS et
+    reprend la suivante au checkpoint sauvegardé dans
+    word-documents/_jobs/cleanup-expired/. Une nouvelle passe de scan ne
+    démarre que CLEANUP_SCAN_INTERVAL_HOURS (défaut 24) après la fin de la
+    précédente.
+    """
+    if timer.past_due:
+        logger.warning("Incremental cleanup is running late")
+
+    try:
+        run_incremental_cleanup(get_blob_client())
+    except Exception as e:
+        logger.error(f"Error in incremental cleanup: {str(e)}", exc_info=True)
+
 
 def cleanup_expired(req: func.HttpRequest) -> func.HttpResponse:
     """
     Supprime les documents temporaires de plus de 24h
 
+    Trois modes:
+    - "scan" (défaut): liste le container et compare last_modified; voit
+      tous les fichiers, avec ou sans tag d'expiration (ex: anciens devis
+      déposés par Power Automate)
+    - "index": requête indexée sur expires_at / last_modified, fichiers
+      avec ou sans tag (nécessite BLOB_INDEX_BACKEND)
+    - "tags": interroge l'index des blob tags (expires_at) et ne voit que
+      les fichiers de travail expirés; le coût est proportionnel à ce qu'il
+      faut supprimer, pas à la taille du container
+
     Query parameters:
     - user_folder (optional): Si spécifié, nettoie uniquement ce dossier
     - max_age_hours (optional): Âge maximum en heures (défaut: 24h)
+    - mode (optional): "scan" (défaut), "index" ou "tags"
 
     Response:
     {
@@ -40,40 +372,64 @@ def cleanup_expired(req: func.HttpRequest) -> func.HttpResponse:
         user_folder = req.params.get('user_folder')
         max_age_hours = int(req.params.get('max_age_hours', 24))
 
-        logger.info(f"Cleanup: user_folder={user_folder}, max_age_hours={max_age_hours}")
-
         # Initialize Blob client
         blob_client = get_blob_client()
         container_name = CONTAINER_TEMPLATES
 
-        # Calculate cutoff time
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+        mode = req.params.get('mode', 'scan')
+
+        if mode not in ('index', 'tags', 'scan'):
+            return func.HttpResponse(
+                json.dumps({"error": "mode must be 'index', 'tags' or 'scan'"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+        if mode == 'index' and blob_client.index is None:
+            return func.HttpResponse(
+                json.dumps({"error": "mode 'index' requires BLOB_INDEX_BACKEND to be configured"}),
+                status_code=400,
+                mimetype="application/json"
+            )
 
-        # List blobs with metadata
-        name_prefix = user_folder if user_folder else None
-        blobs = blob_client.list_blobs_with_metadata(container_name, name_starts_with=name_prefix)
+        logger.info(f"Cleanup: user_folder={user_folder}, max_age_hours={max_age_hours}, mode={mode}")
 
-        deleted_files = []
-        for blob in blobs:
-            # Check if blob is older than cutoff time
-            blob_age = blob['last_modified']
+        # Calculate cutoff time
+        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
 
-            # Make cutoff_time offset-aware if it isn't already
-            if blob_age.tzinfo is None:
-                blob_age = blob_age.replace(tzinfo=timezone.utc)
+        if mode == "index":
+            tags_condition = get_expiry_condition(max_age_hours)
+            entries = [
+                entry for entry in blob_client.index.find_expired(container_name, get_expiry_threshold(max_age_hours), cutoff_time)
+                if not user_folder or entry['user_folder'] == user_folder.rstrip('/')
+            ]
+            expired_files = [entry['name'] for entry in entries]
+        elif mode == "scan":
+            expired_files = find_expired_by_scan(blob_client, container_name, user_folder, cutoff_time)
+        else:
+            tags_condition = get_expiry_condition(max_age_hours)
+            expired_files = [
+                blob['name'] for blob in blob_client.find_blobs_by_tags(container_name, tags_condition)
+                if not blob['name'].startswith('general/')
+                and (not user_folder or blob['name'].startswith(user_folder.rstrip('/') + '/'))
+            ]
 
-            if blob_age < cutoff_time:
-                # Skip general templates (only delete user files)
-                if blob['name'].startswith('general/'):
-                    continue
+        # Delete expired blobs in batches (256 per request)
+        # (files rewritten since the query or listing no longer match and are kept)
+        if mode == "index":
+            results = delete_index_entries(blob_client, container_name, entries, tags_condition, cutoff_time)
+        elif mode == "scan":
+            results = blob_client.delete_blobs_batch(container_name, expired_files, if_unmodified_since=cutoff_time)
+        else:
+            results = blob_client.delete_blobs_batch(
+                container_name,
+                expired_files,
+                if_tags_match_condition=tags_condition
+            )
 
-                # Delete the blob
-                try:
-                    blob_client.delete_blob(container_name, blob['name'])
-                    deleted_files.append(blob['name'])
-                    logger.info(f"Deleted expired file: {blob['name']} (age: {blob_age})")
-                except Exception as e:
-                    logger.error(f"Failed to delete {blob['name']}: {str(e)}")
+        deleted_files = [name for name in expired_files if results.get(name)]
+        failed_files = [name for name in expired_files if not results.get(name)]
+        for name in failed_files:
+            logger.error(f"Failed to delete {name}")
 
         logger.info(f"Cleanup complete: {len(deleted_files)} files deleted")
 
@@ -82,8 +438,10 @@ def cleanup_expired(req: func.HttpRequest) -> func.HttpResponse:
             "success": True,
             "deleted_count": len(deleted_files),
             "deleted_files": deleted_files,
+            "failed_count": len(failed_files),
             "cutoff_time": cutoff_time.isoformat(),
-            "max_age_hours": max_age_hours
+            "max_age_hours": max_age_hours,
+            "mode": mode
         }
 
         return func.HttpResponse(
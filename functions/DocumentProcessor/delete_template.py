@@ -64,8 +64,8 @@ def delete_template(req: func.HttpRequest) -> func.HttpResponse:
         blob_client = get_blob_client()
         container_name = CONTAINER_TEMPLATES
 
-        # Check if file exists
-        if not blob_client.blob_exists(container_name, file_path):
+        # Delete the file (a missing file is reported by the delete itself, no existence check)
+        if not blob_client.delete_blob(container_name, file_path):
             return func.HttpResponse(
                 json.dumps({
                     "error": "File not found",
@@ -75,9 +75,6 @@ def delete_template(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json"
             )
 
-        # Delete the file
-        blob_client.delete_blob(container_name, file_path)
-
         logger.info(f"File deleted successfully: {file_path}")
 
         # Return success response
@@ -0,0 +1,63 @@
+"""
+Export Metrics - Expose les histogrammes de latence et compteurs de l'instance
+"""
+
+import json
+import logging
+import os
+import azure.functions as func
+
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from shared.logger import setup_logger
+from shared.metrics import get_metrics
+from shared.config import METRICS_ENABLED
+
+logger = setup_logger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def export_metrics(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Retourne les métriques de l'instance (route admin)
+
+    Les valeurs sont cumulées depuis le démarrage de l'instance qui répond:
+    avec plusieurs instances, chaque scrape voit une seule instance
+    (WEBSITE_INSTANCE_ID renvoyé dans l'en-tête X-Instance-Id).
+
+    Query params:
+        format: "prometheus" (défaut, format texte 0.0.4) ou "json"
+                (p50/p95/p99 par série et taux de hit des caches)
+    """
+    if not METRICS_ENABLED:
+        return func.HttpResponse(
+            json.dumps({"error": "Metrics are disabled (METRICS_ENABLED=false)"}),
+            status_code=404,
+            mimetype="application/json"
+        )
+
+    output_format = req.params.get("format", "prometheus").lower()
+    headers = {"X-Instance-Id": os.environ.get("WEBSITE_INSTANCE_ID", "local"), "Cache-Control": "no-store"}
+    registry = get_metrics()
+
+    if output_format == "json":
+        return func.HttpResponse(
+            json.dumps(registry.snapshot()),
+            status_code=200,
+            mimetype="application/json",
+            headers=headers
+        )
+
+    if output_format != "prometheus":
+        return func.HttpResponse(
+            json.dumps({"error": "format must be 'prometheus' or 'json'"}),
+            status_code=400,
+            mimetype="application/json"
+        )
+
+    return func.HttpResponse(
+        registry.render_prometheus(),
+        status_code=200,
+        headers={**headers, "Content-Type": PROMETHEUS_CONTENT_TYPE}
+    )
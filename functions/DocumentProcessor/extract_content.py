@@ -15,6 +15,7 @@ from docx.text.paragraph import Paragraph
 import sys
 sys.path.append('..')
 from shared.blob_client import get_blob_client
+from shared.docx_tables import table_rows
 from shared.validators import validate_required_fields, ValidationError
 from shared.logger import setup_logger
 
@@ -42,13 +43,15 @@ def extract_tables_from_document(doc: Document) -> List[Dict[str, Any]]:
             }
 
             # First row is usually headers
-            if table.rows:
-                first_row = table.rows[0]
+            # (row.cells walks the whole table on each access with python-docx 1.1: one pass)
+            rows = table_rows(table)
+            if rows:
+                first_row = rows[0]
                 headers = [cell.text.strip() for cell in first_row.cells]
                 table_dict["headers"] = headers
 
                 # Extract data rows
-                for row in table.rows[1:]:
+                for row in rows[1:]:
                     row_data = [cell.text.strip() for cell in row.cells]
                     table_dict["rows"].append(row_data)
 
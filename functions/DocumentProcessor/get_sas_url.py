@@ -7,11 +7,12 @@ import logging
 import os
 from typing import Dict
 import azure.functions as func
+from azure.core.exceptions import ResourceNotFoundError
 
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
-from shared.validators import validate_required_fields
+from shared.validators import ValidationError, parse_boolean, validate_required_fields
 from shared.logger import setup_logger
 from shared.config import CONTAINER_TEMPLATES, CONTAINER_DOCUMENTS
 
@@ -30,7 +31,8 @@ def get_sas_url(req: func.HttpRequest) -> func.HttpResponse:
         "file_path": "Eric FER/temp_working.docx",
         "container": "word-templates",  // optional, default: word-templates
         "expiry_hours": 24,  // optional, default: 24
-        "permissions": "r"   // optional, default: "r" (read-only)
+        "permissions": "r",  // optional, default: "r" (read-only)
+        "check_exists": true // optional, default: true (false = pas d'appel au stockage)
     }
 
     Response:
@@ -70,6 +72,15 @@ def get_sas_url(req: func.HttpRequest) -> func.HttpResponse:
         expiry_hours = req_body.get("expiry_hours", 24)
         permissions = req_body.get("permissions", "r")
 
+        try:
+            check_exists = parse_boolean(req_body.get("check_exists", True), "check_exists")
+        except ValidationError as e:
+            return func.HttpResponse(
+                json.dumps({"error": str(e)}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
         # Validate expiry_hours
         if not isinstance(expiry_hours, int) or expiry_hours < 1 or expiry_hours > 168:
             return func.HttpResponse(
@@ -85,17 +96,20 @@ def get_sas_url(req: func.HttpRequest) -> func.HttpResponse:
         # Initialize Blob client
         blob_client = get_blob_client()
 
-        # Check if file exists
-        if not blob_client.blob_exists(container, file_path):
-            return func.HttpResponse(
-                json.dumps({
-                    "error": "File not found",
-                    "file_path": file_path,
-                    "container": container
-                }),
-                status_code=404,
-                mimetype="application/json"
-            )
+        # Check if file exists (single HEAD request; storage errors are not reported as 404)
+        if check_exists:
+            try:
+                blob_client.get_blob_properties(container, file_path)
+            except ResourceNotFoundError:
+                return func.HttpResponse(
+                    json.dumps({
+                        "error": "File not found",
+                        "file_path": file_path,
+                        "container": container
+                    }),
+                    status_code=404,
+                    mimetype="application/json"
+                )
 
         # Generate SAS URL
         sas_url = blob_client.generate_sas_url(
@@ -0,0 +1,196 @@
+"""
+Get SAS URLs - Génère les URL SAS de plusieurs documents en un seul appel
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import azure.functions as func
+from azure.core.exceptions import AzureError, ResourceNotFoundError
+
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from shared.blob_client import BlobStorageClient, get_blob_client
+from shared.validators import ValidationError, parse_boolean, validate_required_fields
+from shared.logger import setup_logger
+from shared.config import CONTAINER_TEMPLATES
+
+logger = setup_logger(__name__)
+
+# Nombre maximum de fichiers par appel
+MAX_SAS_BATCH_SIZE = 200
+
+# Vérifications d'existence en parallèle (check_exists=true)
+EXISTS_CHECK_WORKERS = 8
+
+
+def _check_blob(blob_client: BlobStorageClient, container: str, path: str) -> Optional[str]:
+    """
+    Check that a blob exists (one HEAD request)
+
+    Returns:
+        None if it exists, "missing" if not found, else the storage error message
+    """
+    try:
+        blob_client.get_blob_properties(container, path)
+        return None
+    except ResourceNotFoundError:
+        return "missing"
+    except AzureError as e:
+        logger.warning(f"Existence check failed for {path}: {str(e)}")
+        return str(e)
+
+
+def get_sas_urls(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Génère les URL SAS de plusieurs fichiers d'un container
+
+    Les URL sont signées localement (aucun appel au stockage) et
+    réutilisées tant qu'elles restent valides assez longtemps. L'existence
+    des fichiers n'est vérifiée que si check_exists vaut true: un fichier
+    introuvable (404) va dans "missing", un fichier dont la vérification a
+    échoué (autre erreur du stockage) dans "errors", tous deux sans URL.
+
+    Request body:
+    {
+        "file_paths": ["Eric FER/proposition_20251020_0830.pdf", ...],  // max 200
+        "container": "word-documents",  // optional, default: word-templates
+        "expiry_hours": 24,             // optional, default: 24
+        "permissions": "r",             // optional, default: "r" (read-only)
+        "check_exists": false           // optional, default: false
+    }
+
+    Response:
+    {
+        "success": true,
+        "container": "word-documents",
+        "expiry_hours": 24,
+        "urls": [
+            {
+                "file_path": "Eric FER/proposition_20251020_0830.pdf",
+                "sas_url": "https://...?sas_token",
+                "expires_on": "2025-10-21T08:30:00+00:00"
+            }
+        ],
+        "missing": [],   // avec check_exists: fichiers introuvables (sans URL)
+        "errors": [],    // avec check_exists: [{"file_path": ..., "error": ...}] (sans URL)
+        "count": 1
+    }
+    """
+    logger.info("Get SAS URLs endpoint called")
+
+    try:
+        # Parse request body
+        try:
+            req_body = req.get_json()
+        except ValueError:
+            return func.HttpResponse(
+                json.dumps({"error": "Invalid JSON in request body"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        # Validate required fields
+        if not validate_required_fields(req_body, ["file_paths"]):
+            return func.HttpResponse(
+                json.dumps({
+                    "error": "Missing required field: file_paths"
+                }),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        file_paths = req_body["file_paths"]
+        container = req_body.get("container", CONTAINER_TEMPLATES)
+        expiry_hours = req_body.get("expiry_hours", 24)
+        permissions = req_body.get("permissions", "r")
+
+        try:
+            check_exists = parse_boolean(req_body.get("check_exists", False), "check_exists")
+        except ValidationError as e:
+            return func.HttpResponse(
+                json.dumps({"error": str(e)}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        if not isinstance(file_paths, list) or not all(isinstance(path, str) and path for path in file_paths):
+            return func.HttpResponse(
+                json.dumps({"error": "file_paths must be a list of file paths"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        if len(file_paths) > MAX_SAS_BATCH_SIZE:
+            return func.HttpResponse(
+                json.dumps({"error": f"At most {MAX_SAS_BATCH_SIZE} file_paths per request"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        # Validate expiry_hours
+        if not isinstance(expiry_hours, int) or expiry_hours < 1 or expiry_hours > 168:
+            return func.HttpResponse(
+                json.dumps({
+                    "error": "expiry_hours must be between 1 and 168 (7 days)"
+                }),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        # Remove duplicates, keep request order
+        file_paths = list(dict.fromkeys(file_paths))
+
+        logger.info(f"Generating {len(file_paths)} SAS URLs in {container} (expires in {expiry_hours}h, check_exists={check_exists})")
+
+        # Initialize Blob client
+        blob_client = get_blob_client()
+
+        missing = []
+        errors = []
+        if check_exists:
+            with ThreadPoolExecutor(max_workers=EXISTS_CHECK_WORKERS) as executor:
+                checks = list(executor.map(lambda path: _check_blob(blob_client, container, path), file_paths))
+            missing = [path for path, check in zip(file_paths, checks) if check == "missing"]
+            errors = [
+                {"file_path": path, "error": check}
+                for path, check in zip(file_paths, checks) if check not in (None, "missing")
+            ]
+            file_paths = [path for path, check in zip(file_paths, checks) if check is None]
+
+        signed = blob_client.generate_sas_urls(
+            container_name=container,
+            blob_names=file_paths,
+            expiry_hours=expiry_hours,
+            permissions=permissions
+        )
+
+        # Return success response
+        response_data = {
+            "success": True,
+            "container": container,
+            "expiry_hours": expiry_hours,
+            "urls": [{"file_path": path, **signed[path]} for path in file_paths],
+            "missing": missing,
+            "errors": errors,
+            "count": len(file_paths)
+        }
+
+        return func.HttpResponse(
+            json.dumps(response_data),
+            status_code=200,
+            mimetype="application/json"
+        )
+
+    except Exception as e:
+        logger.error(f"Error generating SAS URLs: {str(e)}", exc_info=True)
+        return func.HttpResponse(
+            json.dumps({
+                "error": "Failed to generate SAS URLs",
+                "message": str(e)
+            }),
+            status_code=500,
+            mimetype="application/json"
+        )
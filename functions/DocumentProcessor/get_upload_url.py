@@ -0,0 +1,154 @@
+"""
+Get Upload URL - Génère une URL SAS en écriture seule pour déposer un ancien devis
+"""
+
+import json
+import logging
+import os
+from urllib.parse import urlencode
+import azure.functions as func
+
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from shared.blob_client import get_blob_client
+from shared.validators import (
+    ValidationError,
+    validate_required_fields,
+    validate_file_extension,
+    validate_file_size,
+    sanitize_filename,
+    parse_boolean
+)
+from shared.logger import setup_logger
+from shared.config import (
+    CONTAINER_TEMPLATES,
+    PATH_TEMPLATES_GENERAL,
+    UPLOAD_SAS_EXPIRY_MINUTES,
+    UPLOAD_MAX_SIZE_MB,
+    UPLOAD_ALLOWED_EXTENSIONS,
+    get_user_file_path,
+    get_expiry_tags
+)
+
+logger = setup_logger(__name__)
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def get_upload_url(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Génère une URL SAS pour uploader un fichier directement dans Blob Storage
+
+    Le client envoie le fichier par un PUT sur l'URL retournée, sans passer
+    par la fonction. La SAS n'autorise que la création de ce blob précis
+    dans le dossier de l'utilisateur (pas de lecture, liste ni suppression)
+    et expire après quelques minutes. Une SAS ne peut pas limiter la taille
+    envoyée: elle est validée sur le file_size déclaré par le client.
+    Le PUT doit envoyer les en-têtes retournés, dont x-ms-tags: le fichier
+    reçoit à l'upload le tag d'expiration d'un fichier de travail (nettoyage
+    par tags) sans qu'aucune fonction ne le relise. Il entre dans l'index
+    des métadonnées à la réconciliation quotidienne.
+
+    Request body:
+    {
+        "user_folder": "Eric FER",
+        "file_name": "ancien_devis.docx",
+        "file_size": 245760,    // taille en octets
+        "overwrite": false      // optional, default: false
+    }
+
+    Response:
+    {
+        "success": true,
+        "upload_url": "https://...?sas_token",
+        "blob_path": "Eric FER/ancien_devis.docx",
+        "container": "word-templates",
+        "method": "PUT",
+        "headers": {"x-ms-blob-type": "BlockBlob", "Content-Type": "...", "x-ms-tags": "expires_at=001760871600"},
+        "max_size_bytes": 26214400,
+        "expires_on": "2025-10-20T08:45:00+00:00"
+    }
+    """
+    logger.info("Get upload URL endpoint called")
+
+    try:
+        # Parse request body
+        try:
+            req_body = req.get_json()
+        except ValueError:
+            return func.HttpResponse(
+                json.dumps({"error": "Invalid JSON in request body"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        try:
+            validate_required_fields(req_body, ["user_folder", "file_name", "file_size"])
+
+            user_folder = str(req_body["user_folder"]).strip("/ ")
+            if not user_folder.strip(".") or "/" in user_folder or user_folder == PATH_TEMPLATES_GENERAL:
+                raise ValidationError("Invalid user_folder")
+
+            file_size = req_body["file_size"]
+            if not isinstance(file_size, int) or isinstance(file_size, bool) or file_size < 1:
+                raise ValidationError("file_size must be a positive integer (bytes)")
+
+            file_name = sanitize_filename(str(req_body["file_name"]))
+            validate_file_extension(file_name, UPLOAD_ALLOWED_EXTENSIONS)
+            validate_file_size(file_size, UPLOAD_MAX_SIZE_MB)
+
+            overwrite = parse_boolean(req_body.get("overwrite", False), "overwrite")
+
+        except ValidationError as e:
+            return func.HttpResponse(
+                json.dumps({"error": str(e)}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        blob_path = get_user_file_path(user_folder, file_name)
+
+        logger.info(f"Generating upload SAS URL for {blob_path} ({file_size} bytes, overwrite={overwrite})")
+
+        # Signed locally: no storage call
+        blob_client = get_blob_client()
+        upload_url, expires_on = blob_client.generate_upload_sas_url(
+            container_name=CONTAINER_TEMPLATES,
+            blob_name=blob_path,
+            expiry_minutes=UPLOAD_SAS_EXPIRY_MINUTES,
+            overwrite=overwrite
+        )
+
+        # Return success response
+        response_data = {
+            "success": True,
+            "upload_url": upload_url,
+            "blob_path": blob_path,
+            "container": CONTAINER_TEMPLATES,
+            "method": "PUT",
+            "headers": {
+                "x-ms-blob-type": "BlockBlob",
+                "Content-Type": DOCX_CONTENT_TYPE,
+                # Expiry tag set by the Put Blob itself (the SAS grants tags)
+                "x-ms-tags": urlencode(get_expiry_tags())
+            },
+            "max_size_bytes": UPLOAD_MAX_SIZE_MB * 1024 * 1024,
+            "expires_on": expires_on.isoformat()
+        }
+
+        return func.HttpResponse(
+            json.dumps(response_data),
+            status_code=200,
+            mimetype="application/json"
+        )
+
+    except Exception as e:
+        logger.error(f"Error generating upload URL: {str(e)}", exc_info=True)
+        return func.HttpResponse(
+            json.dumps({
+                "error": "Failed to generate upload URL",
+                "message": str(e)
+            }),
+            status_code=500,
+            mimetype="application/json"
+        )
@@ -5,18 +5,65 @@ List General Templates - Liste les templates généraux disponibles
 import json
 import logging
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 import azure.functions as func
 
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
 from shared.logger import setup_logger
-from shared.config import CONTAINER_TEMPLATES
+from shared.config import CONTAINER_TEMPLATES, DEFAULT_LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE, PATH_TEMPLATES_GENERAL
+from shared.folder_listing import list_folder
+from shared.listing_cache import etag_matches, get_listing_cache
+from shared.template_analyzer import from_blob_metadata
+from shared.validators import ValidationError, validate_page_size
 
 logger = setup_logger(__name__)
 
 
+def _format_template(blob: Dict) -> Optional[Dict]:
+    """
+    Convert a general/ blob into a template entry (None if not a template)
+    """
+    # Skip .keep files
+    if blob['name'].endswith('.keep'):
+        return None
+
+    # Skip if it's just the folder
+    if blob['name'] == 'general/' or blob['name'].endswith('/'):
+        return None
+
+    # Only include .docx files
+    if not blob['name'].lower().endswith('.docx'):
+        return None
+
+    # Extract template name (remove "general/" prefix)
+    template_name = blob['name'].replace('general/', '')
+
+    return {
+        "name": template_name,
+        "path": blob['name'],
+        "size": blob['size'],
+        "last_modified": blob['last_modified'].isoformat() if blob['last_modified'] else None,
+        # Precomputed by analyze_template (None until the template is analyzed)
+        "metadata": from_blob_metadata(blob.get('metadata'))
+    }
+
+
+def _load_general_templates(blob_client) -> List[Dict]:
+    """List general templates, sorted by name"""
+    templates, _ = list_folder(
+        blob_client,
+        CONTAINER_TEMPLATES,
+        PATH_TEMPLATES_GENERAL,
+        select=_format_template,
+        delimiter=None,
+        include_metadata=True
+    )
+    templates.sort(key=lambda x: x['name'])
+    return templates
+
+
 def list_general_templates(req: func.HttpRequest) -> func.HttpResponse:
     """
     Liste tous les templates généraux disponibles
@@ -24,7 +71,15 @@ def list_general_templates(req: func.HttpRequest) -> func.HttpResponse:
     Les templates généraux sont stockés dans le dossier "general/"
     du container word-templates.
 
-    Query parameters: Aucun
+    La liste complète est servie depuis un cache en mémoire (TTL
+    LISTING_CACHE_TTL_SECONDS, invalidé par les écritures sous general/)
+    et porte un ETag: avec If-None-Match identique, la réponse est 304.
+
+    Query parameters:
+    - page_size (optional): Nombre de templates par page (1-500). Sans
+      page_size ni continuation_token, tous les templates sont retournés
+      triés par nom (comportement historique).
+    - continuation_token (optional): Token retourné par la page précédente
 
     Response:
     {
@@ -34,65 +89,88 @@ def list_general_templates(req: func.HttpRequest) -> func.HttpResponse:
                 "name": "template.docx",
                 "path": "general/template.docx",
                 "size": 45678,
-                "last_modified": "2025-10-20T08:30:00Z"
+                "last_modified": "2025-10-20T08:30:00Z",
+                "metadata": {
+                    "placeholders": ["CS_EMAIL", "CS_NAME", "CS_TEL"],
+                    "table_count": 2,
+                    "service_tables": [{"code": "480810003", "name": "Service cloud"}]
+                }
             }
         ],
-        "count": 1
+        "count": 1,
+        "continuation_token": "...",  // en mode paginé, null sur la dernière page
+        "has_more": true              // en mode paginé
     }
     """
     logger.info("List general templates endpoint called")
 
     try:
+        # Pagination parameters
+        continuation_token = req.params.get('continuation_token') or None
+        try:
+            page_size = validate_page_size(req.params.get('page_size'), MAX_LIST_PAGE_SIZE)
+        except ValidationError as e:
+            return func.HttpResponse(
+                json.dumps({"error": str(e)}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
         # Initialize Blob client
         blob_client = get_blob_client()
         container_name = CONTAINER_TEMPLATES
 
-        # List all blobs in general/ folder
-        blobs = blob_client.list_blobs_with_metadata(
-            container_name=container_name,
-            name_starts_with="general/"
-        )
-
-        # Filter out .keep files and directories
-        templates = []
-        for blob in blobs:
-            # Skip .keep files
-            if blob['name'].endswith('.keep'):
-                continue
-
-            # Skip if it's just the folder
-            if blob['name'] == 'general/' or blob['name'].endswith('/'):
-                continue
-
-            # Only include .docx files
-            if not blob['name'].lower().endswith('.docx'):
-                continue
-
-            # Extract template name (remove "general/" prefix)
-            template_name = blob['name'].replace('general/', '')
-
-            templates.append({
-                "name": template_name,
-                "path": blob['name'],
-                "size": blob['size'],
-                "last_modified": blob['last_modified'].isoformat() if blob['last_modified'] else None
-            })
+        paginated = bool(page_size or continuation_token)
+
+        if paginated:
+            # Listing of general/ (name order): the template metadata lives
+            # on the blobs, not in the metadata index
+            templates, next_token = list_folder(
+                blob_client,
+                container_name,
+                PATH_TEMPLATES_GENERAL,
+                select=_format_template,
+                page_size=page_size or DEFAULT_LIST_PAGE_SIZE,
+                continuation_token=continuation_token,
+                delimiter=None,
+                include_metadata=True
+            )
+            headers = None
+        else:
+            templates, etag = get_listing_cache().get_or_load(
+                container_name,
+                f"{PATH_TEMPLATES_GENERAL}/",
+                lambda: _load_general_templates(blob_client)
+            )
+            headers = {"ETag": etag}
+
+            if etag_matches(req.headers.get('If-None-Match'), etag):
+                return func.HttpResponse(status_code=304, headers=headers)
 
         logger.info(f"Found {len(templates)} templates in general/")
 
-        # Sort by name
-        templates.sort(key=lambda x: x['name'])
-
         # Return success response
         response_data = {
             "success": True,
             "templates": templates,
             "count": len(templates)
         }
+        if paginated:
+            response_data["continuation_token"] = next_token
+            response_data["has_more"] = next_token is not None
 
         return func.HttpResponse(
             json.dumps(response_data),
             status_code=200,
+            headers=headers,
+            mimetype="application/json"
+        )
+
+    except ValidationError as e:
+        # Continuation token not produced by this endpoint
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
             mimetype="application/json"
         )
 
@@ -5,18 +5,55 @@ List Created Documents - Liste les documents finaux créés par l'utilisateur
 import json
 import logging
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 import azure.functions as func
 
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
 from shared.logger import setup_logger
-from shared.config import CONTAINER_DOCUMENTS
+from shared.config import CONTAINER_DOCUMENTS, DEFAULT_LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE
+from shared.folder_listing import list_folder
+from shared.validators import ValidationError, parse_iso_datetime, validate_page_size
 
 logger = setup_logger(__name__)
 
 
+def _format_document(blob: Dict, folder_prefix: str) -> Optional[Dict]:
+    """
+    Convert a user folder blob into a document entry (None if skipped)
+    """
+    # Skip .keep files
+    if blob['name'].endswith('.keep'):
+        return None
+
+    # Skip if it's just the folder
+    if blob['name'] == folder_prefix or blob['name'].endswith('/'):
+        return None
+
+    # Extract document name (remove user_folder prefix)
+    document_name = blob['name'].replace(folder_prefix, '')
+
+    # Skip if it's in a subfolder (already excluded by the hierarchical listing)
+    if '/' in document_name:
+        return None
+
+    # Determine document type
+    doc_type = None
+    if document_name.lower().endswith('.docx'):
+        doc_type = "word"
+    elif document_name.lower().endswith('.pdf'):
+        doc_type = "pdf"
+
+    return {
+        "name": document_name,
+        "path": blob['name'],
+        "size": blob['size'],
+        "last_modified": blob['last_modified'].isoformat() if blob['last_modified'] else None,
+        "type": doc_type
+    }
+
+
 def list_created_documents(req: func.HttpRequest) -> func.HttpResponse:
     """
     Liste tous les documents finaux créés (Word + PDF)
@@ -26,6 +63,13 @@ def list_created_documents(req: func.HttpRequest) -> func.HttpResponse:
 
     Query parameters:
     - user_folder (required): Nom du dossier utilisateur (e.g., "Eric FER")
+    - page_size (optional): Nombre de documents par page (1-500). Sans
+      page_size ni continuation_token, tous les documents sont retournés
+      en une réponse. Dans les deux modes, les documents sont triés par nom
+      (ordre du listing Blob Storage, le seul stable d'une page à l'autre).
+    - continuation_token (optional): Token retourné par la page précédente
+    - name_prefix (optional): Début du nom de fichier (e.g., "proposition_202510")
+    - modified_after / modified_before (optional): Plage de dates ISO 8601
 
     Response:
     {
@@ -47,7 +91,9 @@ def list_created_documents(req: func.HttpRequest) -> func.HttpResponse:
                 "type": "pdf"
             }
         ],
-        "count": 2
+        "count": 2,
+        "continuation_token": "...",  // en mode paginé, null sur la dernière page
+        "has_more": true              // en mode paginé
     }
     """
     logger.info("List created documents endpoint called")
@@ -65,6 +111,21 @@ def list_created_documents(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json"
             )
 
+        # Pagination and search parameters
+        continuation_token = req.params.get('continuation_token') or None
+        name_prefix = req.params.get('name_prefix') or None
+        try:
+            page_size = validate_page_size(req.params.get('page_size'), MAX_LIST_PAGE_SIZE)
+            modified_after = parse_iso_datetime(req.params.get('modified_after'), 'modified_after')
+            modified_before = parse_iso_datetime(req.params.get('modified_before'), 'modified_before')
+        except ValidationError as e:
+            return func.HttpResponse(
+                json.dumps({"error": str(e)}),
+                status_code=400,
+                mimetype="application/json"
+            )
+        paginated = bool(page_size or continuation_token)
+
         logger.info(f"Listing created documents for user: {user_folder}")
 
         # Initialize Blob client
@@ -74,50 +135,21 @@ def list_created_documents(req: func.HttpRequest) -> func.HttpResponse:
         # Ensure user_folder ends with /
         folder_prefix = user_folder if user_folder.endswith('/') else f"{user_folder}/"
 
-        # List all blobs in user folder
-        blobs = blob_client.list_blobs_with_metadata(
-            container_name=container_name,
-            name_starts_with=folder_prefix
+        # Direct children only (metadata index if enabled, else hierarchical listing)
+        documents, next_token = list_folder(
+            blob_client,
+            container_name,
+            folder_prefix.rstrip('/'),
+            select=lambda blob: _format_document(blob, folder_prefix),
+            page_size=(page_size or DEFAULT_LIST_PAGE_SIZE) if paginated else None,
+            continuation_token=continuation_token,
+            name_prefix=name_prefix,
+            modified_after=modified_after,
+            modified_before=modified_before
         )
 
-        # Filter and format results
-        documents = []
-        for blob in blobs:
-            # Skip .keep files
-            if blob['name'].endswith('.keep'):
-                continue
-
-            # Skip if it's just the folder
-            if blob['name'] == folder_prefix or blob['name'].endswith('/'):
-                continue
-
-            # Extract document name (remove user_folder prefix)
-            document_name = blob['name'].replace(folder_prefix, '')
-
-            # Skip if it's in a subfolder
-            if '/' in document_name:
-                continue
-
-            # Determine document type
-            doc_type = None
-            if document_name.lower().endswith('.docx'):
-                doc_type = "word"
-            elif document_name.lower().endswith('.pdf'):
-                doc_type = "pdf"
-
-            documents.append({
-                "name": document_name,
-                "path": blob['name'],
-                "size": blob['size'],
-                "last_modified": blob['last_modified'].isoformat() if blob['last_modified'] else None,
-                "type": doc_type
-            })
-
         logger.info(f"Found {len(documents)} created documents in {user_folder}/")
 
-        # Sort by last_modified (most recent first)
-        documents.sort(key=lambda x: x['last_modified'] or '', reverse=True)
-
         # Return success response
         response_data = {
             "success": True,
@@ -125,6 +157,9 @@ def list_created_documents(req: func.HttpRequest) -> func.HttpResponse:
             "documents": documents,
             "count": len(documents)
         }
+        if paginated:
+            response_data["continuation_token"] = next_token
+            response_data["has_more"] = next_token is not None
 
         return func.HttpResponse(
             json.dumps(response_data),
@@ -132,6 +167,14 @@ def list_created_documents(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json"
         )
 
+    except ValidationError as e:
+        # Continuation token not produced by this endpoint
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            mimetype="application/json"
+        )
+
     except Exception as e:
         logger.error(f"Error listing user documents: {str(e)}", exc_info=True)
         return func.HttpResponse(
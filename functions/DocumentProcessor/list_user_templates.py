@@ -5,18 +5,51 @@ List User Templates - Liste les templates personnels de l'utilisateur
 import json
 import logging
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 import azure.functions as func
 
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
 from shared.logger import setup_logger
-from shared.config import CONTAINER_TEMPLATES
+from shared.config import CONTAINER_TEMPLATES, DEFAULT_LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE
+from shared.folder_listing import list_folder
+from shared.validators import ValidationError, parse_iso_datetime, validate_page_size
 
 logger = setup_logger(__name__)
 
 
+def _format_template(blob: Dict, folder_prefix: str) -> Optional[Dict]:
+    """
+    Convert a user folder blob into a template entry (None if not a template)
+    """
+    # Skip .keep files
+    if blob['name'].endswith('.keep'):
+        return None
+
+    # Skip if it's just the folder
+    if blob['name'] == folder_prefix or blob['name'].endswith('/'):
+        return None
+
+    # Extract template name (remove user_folder prefix)
+    template_name = blob['name'].replace(folder_prefix, '')
+
+    # Skip if it's in a subfolder (already excluded by the hierarchical listing)
+    if '/' in template_name:
+        return None
+
+    # Only include .docx files
+    if not template_name.lower().endswith('.docx'):
+        return None
+
+    return {
+        "name": template_name,
+        "path": blob['name'],
+        "size": blob['size'],
+        "last_modified": blob['last_modified'].isoformat() if blob['last_modified'] else None
+    }
+
+
 def list_user_templates(req: func.HttpRequest) -> func.HttpResponse:
     """
     Liste les templates personnels de l'utilisateur
@@ -26,6 +59,13 @@ def list_user_templates(req: func.HttpRequest) -> func.HttpResponse:
 
     Query parameters:
     - user_folder (required): Nom du dossier utilisateur (e.g., "Eric FER")
+    - page_size (optional): Nombre de templates par page (1-500). Sans
+      page_size ni continuation_token, tous les templates sont retournés
+      en une réponse. Dans les deux modes, les templates sont triés par nom
+      (ordre du listing Blob Storage, le seul stable d'une page à l'autre).
+    - continuation_token (optional): Token retourné par la page précédente
+    - name_prefix (optional): Début du nom de fichier (e.g., "proposition_202510")
+    - modified_after / modified_before (optional): Plage de dates ISO 8601
 
     Response:
     {
@@ -39,7 +79,9 @@ def list_user_templates(req: func.HttpRequest) -> func.HttpResponse:
                 "last_modified": "2025-10-20T08:30:00Z"
             }
         ],
-        "count": 1
+        "count": 1,
+        "continuation_token": "...",  // en mode paginé, null sur la dernière page
+        "has_more": true              // en mode paginé
     }
     """
     logger.info("List user templates endpoint called")
@@ -57,6 +99,21 @@ def list_user_templates(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json"
             )
 
+        # Pagination and search parameters
+        continuation_token = req.params.get('continuation_token') or None
+        name_prefix = req.params.get('name_prefix') or None
+        try:
+            page_size = validate_page_size(req.params.get('page_size'), MAX_LIST_PAGE_SIZE)
+            modified_after = parse_iso_datetime(req.params.get('modified_after'), 'modified_after')
+            modified_before = parse_iso_datetime(req.params.get('modified_before'), 'modified_before')
+        except ValidationError as e:
+            return func.HttpResponse(
+                json.dumps({"error": str(e)}),
+                status_code=400,
+                mimetype="application/json"
+            )
+        paginated = bool(page_size or continuation_token)
+
         logger.info(f"Listing templates for user: {user_folder}")
 
         # Initialize Blob client
@@ -66,46 +123,24 @@ def list_user_templates(req: func.HttpRequest) -> func.HttpResponse:
         # Ensure user_folder ends with /
         folder_prefix = user_folder if user_folder.endswith('/') else f"{user_folder}/"
 
-        # List all blobs in user folder
-        blobs = blob_client.list_blobs_with_metadata(
-            container_name=container_name,
-            name_starts_with=folder_prefix
+        # Direct children only, hierarchical listing of Blob Storage: files uploaded
+        # with a SAS URL reach the metadata index only at the daily reconciliation
+        templates, next_token = list_folder(
+            blob_client,
+            container_name,
+            folder_prefix.rstrip('/'),
+            select=lambda blob: _format_template(blob, folder_prefix),
+            page_size=(page_size or DEFAULT_LIST_PAGE_SIZE) if paginated else None,
+            continuation_token=continuation_token,
+            suffixes=(".docx",),
+            name_prefix=name_prefix,
+            modified_after=modified_after,
+            modified_before=modified_before,
+            use_index=False
         )
 
-        # Filter and format results
-        templates = []
-        for blob in blobs:
-            # Skip .keep files
-            if blob['name'].endswith('.keep'):
-                continue
-
-            # Skip if it's just the folder
-            if blob['name'] == folder_prefix or blob['name'].endswith('/'):
-                continue
-
-            # Extract template name (remove user_folder prefix)
-            template_name = blob['name'].replace(folder_prefix, '')
-
-            # Skip if it's in a subfolder
-            if '/' in template_name:
-                continue
-
-            # Only include .docx files
-            if not template_name.lower().endswith('.docx'):
-                continue
-
-            templates.append({
-                "name": template_name,
-                "path": blob['name'],
-                "size": blob['size'],
-                "last_modified": blob['last_modified'].isoformat() if blob['last_modified'] else None
-            })
-
         logger.info(f"Found {len(templates)} templates in {user_folder}/")
 
-        # Sort by last_modified (most recent first)
-        templates.sort(key=lambda x: x['last_modified'] or '', reverse=True)
-
         # Return success response
         response_data = {
             "success": True,
@@ -113,6 +148,9 @@ def list_user_templates(req: func.HttpRequest) -> func.HttpResponse:
             "templates": templates,
             "count": len(templates)
         }
+        if paginated:
+            response_data["continuation_token"] = next_token
+            response_data["has_more"] = next_token is not None
 
         return func.HttpResponse(
             json.dumps(response_data),
@@ -120,6 +158,14 @@ def list_user_templates(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json"
         )
 
+    except ValidationError as e:
+        # Continuation token not produced by this endpoint
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            mimetype="application/json"
+        )
+
     except Exception as e:
         logger.error(f"Error listing user templates: {str(e)}", exc_info=True)
         return func.HttpResponse(
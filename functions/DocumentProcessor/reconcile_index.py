@@ -0,0 +1,93 @@
+"""
+Reconcile Blob Index - Resynchronise l'index des métadonnées avec Blob Storage
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable
+import azure.functions as func
+
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from shared.blob_client import BlobStorageClient, get_blob_client
+from shared.blob_index import BlobIndex, make_index_entry
+from shared.logger import setup_logger
+from shared.config import CONTAINER_TEMPLATES, CONTAINER_DOCUMENTS
+
+logger = setup_logger(__name__)
+
+# Champs comparés pour détecter une entrée obsolète
+COMPARED_FIELDS = ("size", "last_modified", "expires_at", "kind")
+
+
+def reconcile_blob_index(
+    blob_client: BlobStorageClient,
+    index: BlobIndex,
+    container_names: Iterable[str] = (CONTAINER_TEMPLATES, CONTAINER_DOCUMENTS)
+) -> Dict:
+    """
+    Repair drift between the metadata index and Blob Storage
+
+    Blobs missing from the index or whose size, modification time, expiry
+    or kind differ are (re)indexed; index entries without blob are removed.
+    Drift comes from index updates that failed after a successful write,
+    and from blobs written outside the API (Power Automate, portal).
+
+    Args:
+        blob_client: Blob Storage client
+        index: Metadata index
+        container_names: Containers to reconcile
+
+    Returns:
+        Counts per container: blobs, added, updated, removed
+    """
+    report = {}
+
+    for container_name in container_names:
+        counts = {"blobs": 0, "added": 0, "updated": 0, "removed": 0}
+        indexed = {entry["name"]: entry for entry in index.iter_container(container_name)}
+
+        for blob in blob_client.list_blobs_with_metadata(container_name, include_tags=True):
+            entry = make_index_entry(container_name, blob["name"], blob["size"], blob["last_modified"], blob["tags"])
+            if entry is None:
+                continue
+
+            counts["blobs"] += 1
+            current = indexed.pop(blob["name"], None)
+            if current is None:
+                index.upsert(entry)
+                counts["added"] += 1
+            elif any(current[field] != entry[field] for field in COMPARED_FIELDS):
+                index.upsert(entry)
+                counts["updated"] += 1
+
+        # Remaining entries have no blob anymore
+        for name in indexed:
+            index.remove(container_name, name)
+            counts["removed"] += 1
+
+        logger.info(f"Reconciled blob index for {container_name}: {counts}")
+        report[container_name] = counts
+
+    return report
+
+
+def reconcile_index_timer(timer: func.TimerRequest) -> None:
+    """
+    Réconciliation planifiée de l'index des métadonnées (timer trigger)
+
+    Sans effet si l'index est désactivé (BLOB_INDEX_BACKEND=none).
+    """
+    blob_client = get_blob_client()
+    if blob_client.index is None:
+        return
+
+    if timer.past_due:
+        logger.warning("Blob index reconciliation is running late")
+
+    try:
+        report = reconcile_blob_index(blob_client, blob_client.index)
+        logger.info(f"Blob index reconciliation: {json.dumps(report)}", extra={"custom_dimensions": report})
+    except Exception as e:
+        logger.error(f"Error reconciling blob index: {str(e)}", exc_info=True)
@@ -0,0 +1,45 @@
+"""
+Sweep Temp Conversions - Supprime les fichiers orphelins de la bibliothèque SharePoint de conversion
+"""
+
+import logging
+import os
+import azure.functions as func
+
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from shared.sharepoint_client import get_sharepoint_client
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Âge minimum (minutes) d'un fichier temporaire avant suppression
+TEMP_MAX_AGE_MINUTES = int(os.environ.get("SHAREPOINT_TEMP_MAX_AGE_MINUTES", 60))
+
+
+def sweep_temp_conversions(timer: func.TimerRequest) -> None:
+    """
+    Nettoie la bibliothèque temporaire de conversion PDF (timer trigger)
+
+    Les suppressions des fichiers temporaires sont différées et regroupées
+    en $batch; celles qui échouent (ou qui sont perdues au recyclage de
+    l'instance) laissent des orphelins. Ce job supprime tous les fichiers
+    plus anciens que SHAREPOINT_TEMP_MAX_AGE_MINUTES ainsi que les dossiers
+    de jours passés devenus vides.
+    """
+    if timer.past_due:
+        logger.warning("Temp conversions sweep is running late")
+
+    logger.info(f"Sweeping SharePoint temp conversions older than {TEMP_MAX_AGE_MINUTES} minutes")
+
+    try:
+        sharepoint_client = get_sharepoint_client()
+
+        # Vider d'abord la file locale des suppressions différées
+        sharepoint_client.flush_pending_deletes()
+
+        result = sharepoint_client.sweep_temp_library(max_age_minutes=TEMP_MAX_AGE_MINUTES)
+        logger.info(f"Temp conversions sweep complete: {result}")
+
+    except Exception as e:
+        logger.error(f"Error sweeping temp conversions: {str(e)}", exc_info=True)
@@ -2,6 +2,7 @@
 Add Offer Line - Ajoute une ligne d'offre dans le document de travail
 """
 
+import copy
 import json
 import logging
 import io
@@ -17,19 +18,14 @@ from docx.oxml import OxmlElement
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
+from shared.docx_tables import table_rows
 from shared.validators import validate_required_fields
 from shared.logger import setup_logger
-from shared.config import CONTAINER_TEMPLATES, get_user_file_path
+from shared.timing import stage, mark_stage
+from shared.config import CONTAINER_TEMPLATES, get_user_file_path, get_expiry_tags, SERVICE_CODE_TO_NAME
 
 logger = setup_logger(__name__)
 
-# Mapping service codes Dataverse -> Service display names
-SERVICE_CODE_TO_NAME = {
-    "480810003": "Service cloud",
-    "480810000": "Services Cloud - Téléphonie",
-    "480810004": "Supports"
-}
-
 
 def find_table_by_title(doc: Document, title: str) -> Optional[int]:
     """
@@ -142,7 +138,7 @@ def find_or_create_service_table(doc: Document, service_name: str) -> Tuple[obje
     return doc.tables[table_idx], table_idx
 
 
-def update_table_total(table: object) -> None:
+def update_table_total(table: object) -> float:
     """
     Calculate and update the total HT for a service table.
 
@@ -150,14 +146,19 @@ def update_table_total(table: object) -> None:
     - Row 0 is headers
     - Last row is the total row
     - Column 4 contains the price totals
+
+    Rows without a parsable price (e.g. emptied by clean-quote) are skipped.
+    Returns the total HT.
     """
     total_ht = 0.0
+    # row.cells walks the whole table on each access (python-docx 1.1): read the cells in one pass
+    rows = table_rows(table)
 
     # Sum all rows except header (0) and total (last)
-    for row_idx in range(1, len(table.rows) - 1):
+    for row_idx, row in enumerate(rows[1:-1], start=1):
         try:
             # Get prix total from column 4 (index 4)
-            prix_total_text = table.rows[row_idx].cells[4].text.strip()
+            prix_total_text = row.cells[4].text.strip()
             # Remove € symbol and convert to float
             prix_total_text = prix_total_text.replace('€', '').replace(',', '.').strip()
             prix_total = float(prix_total_text)
@@ -167,14 +168,15 @@ def update_table_total(table: object) -> None:
             continue
 
     # Update total row (last row, column 4)
-    last_row = table.rows[-1]
-    last_row.cells[4].text = f"{total_ht:.2f} €"
-    for paragraph in last_row.cells[4].paragraphs:
+    total_cell = rows[-1].cells[4]
+    total_cell.text = f"{total_ht:.2f} €"
+    for paragraph in total_cell.paragraphs:
         paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
         for run in paragraph.runs:
             run.font.bold = True
 
     logger.info(f"Updated table total: {total_ht:.2f} €")
+    return total_ht
 
 
 def add_offer_line(req: func.HttpRequest) -> func.HttpResponse:
@@ -303,7 +305,8 @@ def add_offer_line(req: func.HttpRequest) -> func.HttpResponse:
             )
 
         # Load document
-        doc = Document(io.BytesIO(working_bytes))
+        with stage("docx_parse"):
+            doc = Document(io.BytesIO(working_bytes))
 
         # Find or create table for this service
         table, table_idx = find_or_create_service_table(doc, service_name)
@@ -323,12 +326,12 @@ def add_offer_line(req: func.HttpRequest) -> func.HttpResponse:
         # Get the table element
         tbl = table._tbl
         # Create a new row by copying the structure of an existing row
-        new_tr = tbl.tr_lst[0].copy()  # Copy header row structure
+        new_tr = copy.deepcopy(tbl.tr_lst[0])  # Copy header row structure
         # Insert it before the last row (total row)
-        tbl.insert(new_row_idx, new_tr)
+        tbl.tr_lst[-1].addprevious(new_tr)
 
-        # Now get the newly inserted row from the table
-        row = table.rows[new_row_idx]
+        # Now get the cells of the newly inserted row (one pass over the table, see update_table_total)
+        cells = table_rows(table)[new_row_idx].cells
 
         # Fill cells with expected 5-column structure:
         # Col 0: Désignation
@@ -337,50 +340,53 @@ def add_offer_line(req: func.HttpRequest) -> func.HttpResponse:
         # Col 3: Prix unitaire
         # Col 4: Prix total
 
-        if len(row.cells) < 5:
-            logger.warning(f"Table has only {len(row.cells)} columns, expected 5")
+        if len(cells) < 5:
+            logger.warning(f"Table has only {len(cells)} columns, expected 5")
 
         # Clear any existing content from copied row
-        for cell in row.cells:
+        for cell in cells:
             cell.text = ""
 
         # Colonne 0: Désignation
-        row.cells[0].text = designation
-        for paragraph in row.cells[0].paragraphs:
+        cells[0].text = designation
+        for paragraph in cells[0].paragraphs:
             paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
 
         # Colonne 1: Description
-        if len(row.cells) > 1:
-            row.cells[1].text = description
-            for paragraph in row.cells[1].paragraphs:
+        if len(cells) > 1:
+            cells[1].text = description
+            for paragraph in cells[1].paragraphs:
                 paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
 
         # Colonne 2: Quantité
-        if len(row.cells) > 2:
-            row.cells[2].text = str(quantity)
-            for paragraph in row.cells[2].paragraphs:
+        if len(cells) > 2:
+            cells[2].text = str(quantity)
+            for paragraph in cells[2].paragraphs:
                 paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
 
         # Colonne 3: Prix Unitaire HT
-        if len(row.cells) > 3:
-            row.cells[3].text = f"{unit_price:.2f} €"
-            for paragraph in row.cells[3].paragraphs:
+        if len(cells) > 3:
+            cells[3].text = f"{unit_price:.2f} €"
+            for paragraph in cells[3].paragraphs:
                 paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
 
         # Colonne 4: Prix Total HT
-        if len(row.cells) > 4:
-            row.cells[4].text = f"{total_price:.2f} €"
-            for paragraph in row.cells[4].paragraphs:
+        if len(cells) > 4:
+            cells[4].text = f"{total_price:.2f} €"
+            for paragraph in cells[4].paragraphs:
                 paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
 
         logger.info(f"Added offer line: {designation} (Qty: {quantity}, Total: {total_price:.2f}€)")
 
         # Update table total
-        update_table_total(table)
+        total_ht = update_table_total(table)
+
+        mark_stage("docx_mutate")
 
         # Save document
-        output_bytes_io = io.BytesIO()
-        doc.save(output_bytes_io)
+        with stage("docx_save"):
+            output_bytes_io = io.BytesIO()
+            doc.save(output_bytes_io)
         output_bytes = output_bytes_io.getvalue()
 
         # Upload to Blob Storage
@@ -388,7 +394,8 @@ def add_offer_line(req: func.HttpRequest) -> func.HttpResponse:
             container_name=container_name,
             blob_name=working_file_path,
             data=output_bytes,
-            overwrite=True
+            overwrite=True,
+            tags=get_expiry_tags()
         )
 
         logger.info(f"Working file updated: {working_file_path}")
@@ -400,7 +407,7 @@ def add_offer_line(req: func.HttpRequest) -> func.HttpResponse:
             "service_name": service_name,
             "table_created_or_found": "created" if table_idx == len(doc.tables) - 1 else "found",
             "rows_in_table": len(table.rows),
-            "table_total_ht": f"{sum([float(table.rows[i].cells[4].text.replace('€', '').replace(',', '.').strip()) for i in range(1, len(table.rows) - 1)]):.2f} €"
+            "table_total_ht": f"{total_ht:.2f} €"
         }
 
         return func.HttpResponse(
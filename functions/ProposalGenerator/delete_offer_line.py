@@ -13,19 +13,14 @@ from docx import Document
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
+from shared.docx_tables import table_rows
 from shared.validators import validate_required_fields
 from shared.logger import setup_logger
-from shared.config import CONTAINER_TEMPLATES, get_user_file_path
+from shared.timing import stage, mark_stage
+from shared.config import CONTAINER_TEMPLATES, get_user_file_path, get_expiry_tags, SERVICE_CODE_TO_NAME
 
 logger = setup_logger(__name__)
 
-# Mapping service codes Dataverse -> Service display names
-SERVICE_CODE_TO_NAME = {
-    "480810003": "Service cloud",
-    "480810000": "Services Cloud - Téléphonie",
-    "480810004": "Supports"
-}
-
 
 def find_table_by_title(doc: Document, title: str) -> Optional[int]:
     """
@@ -90,11 +85,13 @@ def update_table_total(table: object) -> None:
     Calculate and update the total HT for a service table.
     """
     total_ht = 0.0
+    # row.cells walks the whole table on each access (python-docx 1.1): read the cells in one pass
+    rows = table_rows(table)
 
     # Sum all rows except header (0) and total (last)
-    for row_idx in range(1, len(table.rows) - 1):
+    for row_idx, row in enumerate(rows[1:-1], start=1):
         try:
-            prix_total_text = table.rows[row_idx].cells[4].text.strip()
+            prix_total_text = row.cells[4].text.strip()
             prix_total_text = prix_total_text.replace('€', '').replace(',', '.').strip()
             prix_total = float(prix_total_text)
             total_ht += prix_total
@@ -103,7 +100,7 @@ def update_table_total(table: object) -> None:
             continue
 
     # Update total row
-    last_row = table.rows[-1]
+    last_row = rows[-1]
     last_row.cells[4].text = f"{total_ht:.2f} €"
 
     logger.info(f"Updated table total: {total_ht:.2f} €")
@@ -216,7 +213,8 @@ def delete_offer_line(req: func.HttpRequest) -> func.HttpResponse:
             )
 
         # Load document
-        doc = Document(io.BytesIO(working_bytes))
+        with stage("docx_parse"):
+            doc = Document(io.BytesIO(working_bytes))
 
         # Find table for this service
         table_idx = find_table_by_title(doc, service_name)
@@ -235,28 +233,29 @@ def delete_offer_line(req: func.HttpRequest) -> func.HttpResponse:
         logger.info(f"Found table '{service_name}' at index {table_idx}")
 
         # Find the row to delete
+        rows = table_rows(table)
         row_to_delete_idx = None
         deleted_offer_name = None
 
         if row_index is not None:
             # Use provided row index (1-based, skip header)
             row_to_delete_idx = row_index
-            if row_to_delete_idx < 1 or row_to_delete_idx >= len(table.rows) - 1:
+            if row_to_delete_idx < 1 or row_to_delete_idx >= len(rows) - 1:
                 return func.HttpResponse(
                     json.dumps({
                         "error": "Invalid row_index",
                         "row_index": row_index,
-                        "valid_range": f"1 to {len(table.rows) - 2}"
+                        "valid_range": f"1 to {len(rows) - 2}"
                     }),
                     status_code=400,
                     mimetype="application/json"
                 )
-            deleted_offer_name = table.rows[row_to_delete_idx].cells[0].text
+            deleted_offer_name = rows[row_to_delete_idx].cells[0].text
 
         elif offer_name:
             # Search for offer by name (Désignation column)
-            for idx in range(1, len(table.rows) - 1):  # Skip header and total
-                cell_text = table.rows[idx].cells[0].text.strip()
+            for idx, row in enumerate(rows[1:-1], start=1):  # Skip header and total
+                cell_text = row.cells[0].text.strip()
                 if offer_name.lower() in cell_text.lower():
                     row_to_delete_idx = idx
                     deleted_offer_name = cell_text
@@ -273,12 +272,12 @@ def delete_offer_line(req: func.HttpRequest) -> func.HttpResponse:
 
         # Delete the row
         tbl = table._tbl
-        tbl.remove(table.rows[row_to_delete_idx]._element)
+        tbl.remove(rows[row_to_delete_idx].element)
         logger.info(f"Deleted row {row_to_delete_idx}: {deleted_offer_name}")
 
         # Check if table is now empty (only header + total remain)
         table_deleted = False
-        rows_remaining = len(table.rows) - 2  # Exclude header and total
+        rows_remaining = len(tbl.tr_lst) - 2  # Exclude header and total
 
         if rows_remaining == 0:
             # Delete the entire table and its title
@@ -291,9 +290,12 @@ def delete_offer_line(req: func.HttpRequest) -> func.HttpResponse:
             table_total_ht = update_table_total(table)
             table_total_ht = f"{table_total_ht:.2f} €"
 
+        mark_stage("docx_mutate")
+
         # Save document
-        output_bytes_io = io.BytesIO()
-        doc.save(output_bytes_io)
+        with stage("docx_save"):
+            output_bytes_io = io.BytesIO()
+            doc.save(output_bytes_io)
         output_bytes = output_bytes_io.getvalue()
 
         # Upload to Blob Storage
@@ -301,7 +303,8 @@ def delete_offer_line(req: func.HttpRequest) -> func.HttpResponse:
             container_name=container_name,
             blob_name=working_file_path,
             data=output_bytes,
-            overwrite=True
+            overwrite=True,
+            tags=get_expiry_tags()
         )
 
         logger.info(f"Working file updated: {working_file_path}")
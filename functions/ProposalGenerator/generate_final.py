@@ -9,14 +9,14 @@ import os
 from datetime import datetime
 from typing import Dict
 import azure.functions as func
-from docx import Document
+from azure.core.exceptions import ResourceNotFoundError
 
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
-from shared.sharepoint_client import get_sharepoint_client
 from shared.validators import validate_required_fields
 from shared.logger import setup_logger
+from shared.pdf_converter import convert_to_pdf_blob
 from shared.config import CONTAINER_TEMPLATES, CONTAINER_DOCUMENTS, get_user_file_path
 
 logger = setup_logger(__name__)
@@ -31,10 +31,11 @@ def generate_final_proposal(req: func.HttpRequest) -> func.HttpResponse:
     - Les lignes d'offres (ajoutées via /api/proposal/add-offer-line)
 
     Cet endpoint:
-    1. Charge temp_working.docx
+    1. Localise temp_working.docx
     2. Génère un nom de fichier avec timestamp
-    3. Sauvegarde Word dans word-documents
-    4. Convertit en PDF via SharePoint
+    3. Copie Word dans word-documents (copie côté serveur)
+    4. Génère le PDF (renderer direct si PDF_RENDERER=auto et document
+       standard, sinon conversion via SharePoint)
     5. Retourne URLs SAS avec expiration 24h
 
     Request body:
@@ -83,24 +84,9 @@ def generate_final_proposal(req: func.HttpRequest) -> func.HttpResponse:
         # Initialize clients
         blob_client = get_blob_client()
 
-        # 1. Load working file from word-templates
+        # 1. Working file in word-templates (copied server-side in step 3)
         working_file_path = get_user_file_path(user_folder, "temp_working.docx")
 
-        try:
-            working_bytes = blob_client.download_blob(CONTAINER_TEMPLATES, working_file_path)
-            logger.info(f"Downloaded working file: {working_file_path}")
-        except Exception as e:
-            logger.error(f"Failed to download working file: {str(e)}")
-            return func.HttpResponse(
-                json.dumps({
-                    "error": "Working file not found",
-                    "working_file": working_file_path,
-                    "hint": "Call /api/proposal/prepare-template first and add offers"
-                }),
-                status_code=404,
-                mimetype="application/json"
-            )
-
         # 2. Generate filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M")
         # Sanitize proposal_name for filename
@@ -110,14 +96,29 @@ def generate_final_proposal(req: func.HttpRequest) -> func.HttpResponse:
         else:
             proposal_filename = f"proposition_{timestamp}"
 
-        # 3. Save Word file to word-documents container
+        # 3. Copy Word file to word-documents container (server-side copy:
+        #    the Word bytes are still downloaded once for the PDF in step 4,
+        #    but no longer downloaded AND re-uploaded to save the copy)
         word_file_path = get_user_file_path(user_folder, f"{proposal_filename}.docx")
-        word_blob_url = blob_client.upload_blob(
-            container_name=CONTAINER_DOCUMENTS,
-            blob_name=word_file_path,
-            data=working_bytes,
-            overwrite=True
-        )
+
+        try:
+            word_blob_url = blob_client.copy_blob(
+                source_container=CONTAINER_TEMPLATES,
+                source_blob=working_file_path,
+                dest_container=CONTAINER_DOCUMENTS,
+                dest_blob=word_file_path
+            )
+            logger.info(f"Copied working file: {working_file_path}")
+        except ResourceNotFoundError:
+            return func.HttpResponse(
+                json.dumps({
+                    "error": "Working file not found",
+                    "working_file": working_file_path,
+                    "hint": "Call /api/proposal/prepare-template first and add offers"
+                }),
+                status_code=404,
+                mimetype="application/json"
+            )
 
         # Generate SAS URL with 24h expiration for Word
         word_sas_url = blob_client.generate_sas_url(
@@ -129,38 +130,34 @@ def generate_final_proposal(req: func.HttpRequest) -> func.HttpResponse:
 
         logger.info(f"Word file saved to: {CONTAINER_DOCUMENTS}/{word_file_path}")
 
-        # 4. Convert to PDF via SharePoint
+        # 4. Generate PDF (direct renderer or SharePoint conversion)
         pdf_sas_url = None
         pdf_file_path = None
 
         try:
-            sharepoint_client = get_sharepoint_client()
-            pdf_bytes = sharepoint_client.convert_word_to_pdf(
-                word_content=working_bytes,
-                file_name=f"temp_{proposal_filename}.docx"
+            # Only the PDF conversion needs the Word bytes; read the final
+            # copy so the PDF always matches the saved Word document
+            word_bytes = blob_client.download_blob(CONTAINER_DOCUMENTS, word_file_path)
+
+            pdf_path = get_user_file_path(user_folder, f"{proposal_filename}.pdf")
+            pdf_result = convert_to_pdf_blob(
+                blob_client=blob_client,
+                word_bytes=word_bytes,
+                container_name=CONTAINER_DOCUMENTS,
+                pdf_blob_name=pdf_path,
+                temp_file_name=f"temp_{proposal_filename}.docx"
+            )
+            pdf_file_path = pdf_path
+
+            # Generate SAS URL with 24h expiration for PDF
+            pdf_sas_url = blob_client.generate_sas_url(
+                container_name=CONTAINER_DOCUMENTS,
+                blob_name=pdf_file_path,
+                expiry_hours=24,
+                permissions="r"
             )
 
-            if pdf_bytes:
-                # Upload PDF to word-documents container
-                pdf_file_path = get_user_file_path(user_folder, f"{proposal_filename}.pdf")
-                pdf_blob_url = blob_client.upload_blob(
-                    container_name=CONTAINER_DOCUMENTS,
-                    blob_name=pdf_file_path,
-                    data=pdf_bytes,
-                    overwrite=True
-                )
-
-                # Generate SAS URL with 24h expiration for PDF
-                pdf_sas_url = blob_client.generate_sas_url(
-                    container_name=CONTAINER_DOCUMENTS,
-                    blob_name=pdf_file_path,
-                    expiry_hours=24,
-                    permissions="r"
-                )
-
-                logger.info(f"PDF file saved to: {CONTAINER_DOCUMENTS}/{pdf_file_path}")
-            else:
-                logger.warning("PDF conversion returned empty bytes")
+            logger.info(f"PDF file saved to: {CONTAINER_DOCUMENTS}/{pdf_file_path} ({pdf_result['size']} bytes, {pdf_result['renderer']})")
 
         except Exception as e:
             logger.error(f"PDF conversion failed: {str(e)}")
@@ -13,9 +13,11 @@ from docx import Document
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
+from shared.docx_tables import table_rows
 from shared.validators import validate_required_fields
 from shared.logger import setup_logger
-from shared.config import CONTAINER_TEMPLATES, get_template_path, get_user_file_path
+from shared.timing import stage, mark_stage
+from shared.config import CONTAINER_TEMPLATES, get_template_path, get_user_file_path, get_expiry_tags
 
 logger = setup_logger(__name__)
 
@@ -51,7 +53,8 @@ def replace_customer_success_placeholders(doc: Document, customer_success: Dict[
 
     # Remplacer dans les tableaux
     for table in doc.tables:
-        for row in table.rows:
+        # row.cells reparcourt tout le tableau à chaque accès (python-docx 1.1): une seule lecture des cellules
+        for row in table_rows(table):
             for cell in row.cells:
                 for placeholder, value in placeholders.items():
                     if placeholder in cell.text:
@@ -153,14 +156,18 @@ def prepare_template(req: func.HttpRequest) -> func.HttpResponse:
             )
 
         # Charger le document Word
-        doc = Document(io.BytesIO(template_bytes))
+        with stage("docx_parse"):
+            doc = Document(io.BytesIO(template_bytes))
 
         # Remplacer les placeholders customer success
         doc = replace_customer_success_placeholders(doc, customer_success)
 
+        mark_stage("docx_mutate")
+
         # Sauvegarder le document préparé
-        output_bytes_io = io.BytesIO()
-        doc.save(output_bytes_io)
+        with stage("docx_save"):
+            output_bytes_io = io.BytesIO()
+            doc.save(output_bytes_io)
         output_bytes = output_bytes_io.getvalue()
 
         # Upload vers Blob Storage comme fichier de travail
@@ -170,20 +177,21 @@ def prepare_template(req: func.HttpRequest) -> func.HttpResponse:
             container_name=container_name,
             blob_name=working_file_path,
             data=output_bytes,
-            overwrite=True
+            overwrite=True,
+            tags=get_expiry_tags()
         )
 
         logger.info(f"Working file saved to: {working_file_path}")
 
         # Create .keep file to persist user folder even when empty
+        # (conditional upload: one request whether or not it already exists)
         keep_file_path = get_user_file_path(user_folder, ".keep")
-        if not blob_client.blob_exists(container_name, keep_file_path):
-            blob_client.upload_blob(
-                container_name=container_name,
-                blob_name=keep_file_path,
-                data=b"# This file keeps the folder persistent in Azure Blob Storage",
-                overwrite=False
-            )
+        if blob_client.create_blob_if_missing(
+            container_name=container_name,
+            blob_name=keep_file_path,
+            data=b"# This file keeps the folder persistent in Azure Blob Storage",
+            tags=get_expiry_tags()
+        ):
             logger.info(f"Created .keep file in {user_folder}/")
 
         # Retourner résultat
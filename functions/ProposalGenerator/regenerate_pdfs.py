@@ -0,0 +1,463 @@
+"""
+Regenerate PDFs - Régénère en masse les PDF des documents Word finaux
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+import azure.functions as func
+from azure.core.exceptions import ResourceNotFoundError
+
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from shared.blob_client import BlobStorageClient, get_blob_client
+from shared.pdf_converter import convert_to_pdf_blob
+from shared.logger import setup_logger
+from shared.config import CONTAINER_DOCUMENTS
+from shared.validators import ValidationError, parse_boolean, validate_guid, validate_number, validate_string_list
+
+logger = setup_logger(__name__)
+
+# Parallélisme par défaut et maximum des conversions
+DEFAULT_MAX_WORKERS = int(os.environ.get("PDF_REGEN_MAX_WORKERS", 4))
+MAX_WORKERS_LIMIT = 16
+
+# Budget de temps d'un appel HTTP: la réponse doit partir avant la limite
+# de 230 s du load balancer Azure, conversions en cours comprises
+DEFAULT_TIME_BUDGET_SECONDS = 180
+MAX_TIME_BUDGET_SECONDS = 180
+
+# Emplacement des checkpoints de jobs (container word-documents)
+JOBS_PREFIX = "_jobs/regenerate-pdfs"
+
+# Fréquence minimale de sauvegarde du checkpoint
+CHECKPOINT_INTERVAL_SECONDS = 5
+
+# Un job "running" dont le checkpoint n'a pas bougé depuis ce délai est
+# considéré abandonné (hôte recyclé) et peut être repris par un autre appel
+JOB_CLAIM_TIMEOUT_SECONDS = MAX_TIME_BUDGET_SECONDS + 120
+
+
+class JobConflictError(Exception):
+    """Another call is running the job, or wrote its checkpoint since it was read"""
+    pass
+
+
+def _pdf_path(docx_path: str) -> str:
+    """Return the PDF blob name for a .docx blob name"""
+    return f"{docx_path[:-len('.docx')]}.pdf"
+
+
+class PdfRegenerationJob:
+    """
+    Job de régénération de PDF, reprenable depuis un checkpoint blob
+
+    Le checkpoint ({JOBS_PREFIX}/{job_id}.json dans word-documents) contient
+    la liste des documents, ceux déjà traités, les échecs et le temps cumulé.
+    Chaque exécution reprend là où la précédente s'est arrêtée.
+
+    Le checkpoint est écrit sous condition d'ETag: deux appels concurrents
+    sur le même job ne peuvent pas s'écraser, le second reçoit
+    JobConflictError au lieu de convertir les mêmes documents.
+    """
+
+    def __init__(self, blob_client: BlobStorageClient, state: Dict, etag: Optional[str] = None):
+        self.blob_client = blob_client
+        self.state = state
+        self.etag = etag
+        self._lock = threading.Lock()
+        self._last_checkpoint = 0.0
+
+    @property
+    def job_id(self) -> str:
+        return self.state["job_id"]
+
+    @staticmethod
+    def checkpoint_path(job_id: str) -> str:
+        return f"{JOBS_PREFIX}/{job_id}.json"
+
+    @classmethod
+    def create(
+        cls,
+        blob_client: BlobStorageClient,
+        prefix: Optional[str] = None,
+        blobs: Optional[List[str]] = None
+    ) -> "PdfRegenerationJob":
+        """
+        Create a new job from a blob name prefix or an explicit list of .docx blobs
+
+        Args:
+            blob_client: Blob Storage client
+            prefix: Blob name prefix in word-documents (e.g. "Eric FER/")
+            blobs: Explicit list of .docx blob names
+
+        Returns:
+            New job (checkpoint saved)
+        """
+        if blobs:
+            items = [b for b in blobs if b.lower().endswith(".docx")]
+        else:
+            items = [
+                name for name in blob_client.list_blobs(CONTAINER_DOCUMENTS, name_starts_with=prefix)
+                if name.lower().endswith(".docx") and not name.startswith(f"{JOBS_PREFIX}/")
+            ]
+
+        now = datetime.now(timezone.utc).isoformat()
+        job = cls(blob_client, {
+            "job_id": str(uuid.uuid4()),
+            "status": "pending",
+            "container": CONTAINER_DOCUMENTS,
+            "prefix": prefix,
+            "created_at": now,
+            "updated_at": now,
+            "items": sorted(items),
+            "completed": [],
+            "failed": {},
+            "elapsed_seconds": 0.0
+        })
+        job.save_checkpoint(force=True)
+        logger.info(f"Created PDF regeneration job {job.job_id} with {len(items)} documents")
+        return job
+
+    @classmethod
+    def load(cls, blob_client: BlobStorageClient, job_id: str) -> "PdfRegenerationJob":
+        """
+        Load a job from its checkpoint
+
+        Raises:
+            ResourceNotFoundError: If the job does not exist
+        """
+        data, etag = blob_client.download_blob_with_etag(CONTAINER_DOCUMENTS, cls.checkpoint_path(job_id))
+        return cls(blob_client, json.loads(data), etag)
+
+    def save_checkpoint(self, force: bool = False) -> None:
+        """
+        Persist the job state (throttled to CHECKPOINT_INTERVAL_SECONDS unless forced)
+
+        Raises:
+            JobConflictError: If the checkpoint was written by someone else since it was read
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_checkpoint < CHECKPOINT_INTERVAL_SECONDS:
+                return
+            self._last_checkpoint = now
+            self.state["updated_at"] = datetime.now(timezone.utc).isoformat()
+            payload = json.dumps(self.state).encode("utf-8")
+
+        etag = self.blob_client.upload_blob_if_unchanged(
+            CONTAINER_DOCUMENTS, self.checkpoint_path(self.job_id), payload, self.etag
+        )
+        if etag is None:
+            raise JobConflictError(f"Job {self.job_id} was updated by another call")
+        self.etag = etag
+
+    def claim(self) -> None:
+        """
+        Mark the job as running, unless another call is already running it
+
+        Raises:
+            JobConflictError: If the job is running elsewhere (checkpoint updated
+                less than JOB_CLAIM_TIMEOUT_SECONDS ago), or was claimed concurrently
+        """
+        if self.state["status"] == "running":
+            updated_at = datetime.fromisoformat(self.state["updated_at"])
+            if (datetime.now(timezone.utc) - updated_at).total_seconds() < JOB_CLAIM_TIMEOUT_SECONDS:
+                raise JobConflictError(f"Job {self.job_id} is already running")
+            logger.warning(f"Taking over PDF regeneration job {self.job_id}, not updated since {self.state['updated_at']}")
+
+        self.state["status"] = "running"
+        self.save_checkpoint(force=True)
+
+    def pending_items(self, retry_failed: bool = False) -> List[str]:
+        """Return the documents still to process"""
+        done = set(self.state["completed"])
+        if not retry_failed:
+            done.update(self.state["failed"])
+        return [item for item in self.state["items"] if item not in done]
+
+    def summary(self) -> Dict:
+        """Return progress and throughput figures"""
+        completed = len(self.state["completed"])
+        elapsed = self.state["elapsed_seconds"]
+        return {
+            "job_id": self.job_id,
+            "status": self.state["status"],
+            "total": len(self.state["items"]),
+            "completed": completed,
+            "failed": len(self.state["failed"]),
+            "remaining": len(self.pending_items()),
+            "elapsed_seconds": round(elapsed, 2),
+            "docs_per_minute": round(completed / elapsed * 60, 2) if elapsed > 0 else 0.0
+        }
+
+    def _convert(self, docx_path: str) -> Dict:
+        """Convert one document and store its PDF next to it"""
+        word_bytes = self.blob_client.download_blob(CONTAINER_DOCUMENTS, docx_path)
+        return convert_to_pdf_blob(
+            blob_client=self.blob_client,
+            word_bytes=word_bytes,
+            container_name=CONTAINER_DOCUMENTS,
+            pdf_blob_name=_pdf_path(docx_path),
+            temp_file_name=f"regen_{os.path.basename(docx_path)}"
+        )
+
+    def run(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        time_budget_seconds: Optional[float] = None,
+        retry_failed: bool = False,
+        on_progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Process pending documents with bounded parallelism
+
+        No new conversion is started once the time budget is spent; the
+        conversions in flight are awaited and the checkpoint is saved, so
+        the next run resumes with the remaining documents. The job is
+        claimed first: a run losing its checkpoint to another call stops
+        starting conversions and raises JobConflictError.
+
+        Args:
+            max_workers: Number of concurrent conversions
+            time_budget_seconds: Stop starting conversions after this delay (None = no limit)
+            retry_failed: Also retry documents that failed in a previous run
+            on_progress: Callback receiving one event per processed document
+
+        Returns:
+            Job summary
+
+        Raises:
+            JobConflictError: If another call is running the job
+        """
+        self.claim()
+
+        pending = self.pending_items(retry_failed=retry_failed)
+        if retry_failed:
+            for item in pending:
+                self.state["failed"].pop(item, None)
+
+        started = time.monotonic()
+        elapsed_before = self.state["elapsed_seconds"]
+        deadline = started + time_budget_seconds if time_budget_seconds else None
+        max_workers = max(1, min(max_workers, MAX_WORKERS_LIMIT))
+
+        logger.info(f"Running PDF regeneration job {self.job_id}: {len(pending)} documents, {max_workers} workers")
+
+        queue = iter(pending)
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            def submit_next() -> bool:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                item = next(queue, None)
+                if item is None:
+                    return False
+                in_flight[executor.submit(self._convert, item)] = item
+                return True
+
+            for _ in range(max_workers):
+                if not submit_next():
+                    break
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                        with self._lock:
+                            self.state["completed"].append(item)
+                        event = {"document": item, "status": "completed", "pdf": _pdf_path(item), **result}
+                    except Exception as e:
+                        logger.error(f"PDF regeneration failed for {item}: {str(e)}")
+                        with self._lock:
+                            self.state["failed"][item] = str(e)
+                        event = {"document": item, "status": "failed", "error": str(e)}
+
+                    self.state["elapsed_seconds"] = elapsed_before + time.monotonic() - started
+                    if on_progress:
+                        on_progress({**event, **self.summary()})
+                    self.save_checkpoint()
+                    submit_next()
+
+        self.state["elapsed_seconds"] = elapsed_before + time.monotonic() - started
+        self.state["status"] = "completed" if not self.pending_items() else "partial"
+        self.save_checkpoint(force=True)
+
+        summary = self.summary()
+        logger.info(f"PDF regeneration job {self.job_id}: {summary}")
+        return summary
+
+
+def regenerate_pdfs(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Régénère les PDF d'un ensemble de documents Word (word-documents)
+
+    POST démarre ou reprend un job; GET retourne l'avancement d'un job.
+    Chaque appel POST traite les documents pendant au plus
+    time_budget_seconds puis sauvegarde un checkpoint: tant que
+    "status" vaut "partial", rappeler avec le même job_id. Un job déjà en
+    cours dans un autre appel retourne 409.
+
+    Request body (POST):
+    {
+        "prefix": "Eric FER/",            // OU
+        "blobs": ["Eric FER/proposition_20251020_0830.docx", ...],  // OU
+        "job_id": "...",                  // UUID d'un job existant à reprendre
+        "max_workers": 4,                 // optional, 1-16
+        "time_budget_seconds": 180,       // optional, plafonné à 180
+        "retry_failed": false             // optional
+    }
+
+    Query parameters (GET):
+    - job_id (required)
+
+    Response:
+    {
+        "success": true,
+        "job_id": "...",
+        "status": "partial",
+        "total": 350,
+        "completed": 120,
+        "failed": 2,
+        "remaining": 228,
+        "elapsed_seconds": 298.4,
+        "docs_per_minute": 24.1
+    }
+    """
+    logger.info("Regenerate PDFs endpoint called")
+
+    try:
+        blob_client = get_blob_client()
+
+        if req.method == "GET":
+            job_id = req.params.get('job_id')
+            if not job_id:
+                return func.HttpResponse(
+                    json.dumps({"error": "Missing required parameter: job_id"}),
+                    status_code=400,
+                    mimetype="application/json"
+                )
+            try:
+                validate_guid(job_id)
+            except ValidationError:
+                return func.HttpResponse(
+                    json.dumps({"error": "job_id must be a UUID"}),
+                    status_code=400,
+                    mimetype="application/json"
+                )
+            try:
+                job = PdfRegenerationJob.load(blob_client, job_id)
+            except ResourceNotFoundError:
+                return func.HttpResponse(
+                    json.dumps({"error": "Job not found", "job_id": job_id}),
+                    status_code=404,
+                    mimetype="application/json"
+                )
+            return func.HttpResponse(
+                json.dumps({"success": True, **job.summary(), "failed_documents": job.state["failed"]}),
+                status_code=200,
+                mimetype="application/json"
+            )
+
+        # Parse request body
+        try:
+            req_body = req.get_json()
+        except ValueError:
+            return func.HttpResponse(
+                json.dumps({"error": "Invalid JSON in request body"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        if not isinstance(req_body, dict):
+            return func.HttpResponse(
+                json.dumps({"error": "Request body must be a JSON object"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        try:
+            max_workers = validate_number(
+                req_body.get("max_workers", DEFAULT_MAX_WORKERS), "max_workers", 1, MAX_WORKERS_LIMIT, integer=True
+            )
+            time_budget_seconds = min(
+                validate_number(req_body.get("time_budget_seconds", DEFAULT_TIME_BUDGET_SECONDS), "time_budget_seconds", 1),
+                MAX_TIME_BUDGET_SECONDS
+            )
+            retry_failed = parse_boolean(req_body.get("retry_failed", False), "retry_failed")
+
+            job_id = req_body.get("job_id")
+            prefix = req_body.get("prefix")
+            blobs = req_body.get("blobs")
+
+            if job_id is None and prefix is None and blobs is None:
+                raise ValidationError("One of job_id, prefix or blobs is required")
+            if job_id is not None:
+                # job_id fait partie du nom du checkpoint: seul un UUID est accepté
+                if not isinstance(job_id, str):
+                    raise ValidationError("job_id must be a UUID")
+                try:
+                    validate_guid(job_id)
+                except ValidationError:
+                    raise ValidationError("job_id must be a UUID")
+            elif blobs is not None:
+                blobs = validate_string_list(blobs, "blobs")
+            elif not isinstance(prefix, str) or not prefix:
+                raise ValidationError("prefix must be a non-empty string")
+        except ValidationError as e:
+            return func.HttpResponse(
+                json.dumps({"error": str(e)}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
+        if job_id:
+            try:
+                job = PdfRegenerationJob.load(blob_client, job_id)
+            except ResourceNotFoundError:
+                return func.HttpResponse(
+                    json.dumps({"error": "Job not found", "job_id": job_id}),
+                    status_code=404,
+                    mimetype="application/json"
+                )
+        else:
+            job = PdfRegenerationJob.create(blob_client, prefix=prefix, blobs=blobs)
+
+        try:
+            summary = job.run(
+                max_workers=max_workers,
+                time_budget_seconds=time_budget_seconds,
+                retry_failed=retry_failed
+            )
+        except JobConflictError as e:
+            return func.HttpResponse(
+                json.dumps({"error": "Job is already running", "job_id": job.job_id, "message": str(e)}),
+                status_code=409,
+                mimetype="application/json"
+            )
+
+        return func.HttpResponse(
+            json.dumps({"success": True, **summary}),
+            status_code=200,
+            mimetype="application/json"
+        )
+
+    except Exception as e:
+        logger.error(f"Error regenerating PDFs: {str(e)}", exc_info=True)
+        return func.HttpResponse(
+            json.dumps({
+                "error": "Failed to regenerate PDFs",
+                "message": str(e)
+            }),
+            status_code=500,
+            mimetype="application/json"
+        )
@@ -13,9 +13,11 @@ from docx import Document
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.blob_client import get_blob_client
+from shared.docx_tables import table_rows
 from shared.validators import validate_required_fields
 from shared.logger import setup_logger
-from shared.config import CONTAINER_TEMPLATES, get_user_file_path
+from shared.timing import stage, mark_stage
+from shared.config import CONTAINER_TEMPLATES, get_user_file_path, get_expiry_tags
 
 logger = setup_logger(__name__)
 
@@ -54,7 +56,8 @@ def replace_customer_placeholders(doc: Document, customer_info: Dict[str, str])
 
     # Remplacer dans les tableaux
     for table in doc.tables:
-        for row in table.rows:
+        # row.cells reparcourt tout le tableau à chaque accès (python-docx 1.1): une seule lecture des cellules
+        for row in table_rows(table):
             for cell in row.cells:
                 for paragraph in cell.paragraphs:
                     for placeholder, value in placeholders.items():
@@ -155,14 +158,18 @@ def set_customer_info(req: func.HttpRequest) -> func.HttpResponse:
             )
 
         # Load document
-        doc = Document(io.BytesIO(working_bytes))
+        with stage("docx_parse"):
+            doc = Document(io.BytesIO(working_bytes))
 
         # Replace placeholders
         doc = replace_customer_placeholders(doc, customer_success)
 
+        mark_stage("docx_mutate")
+
         # Save document
-        output_bytes_io = io.BytesIO()
-        doc.save(output_bytes_io)
+        with stage("docx_save"):
+            output_bytes_io = io.BytesIO()
+            doc.save(output_bytes_io)
         output_bytes = output_bytes_io.getvalue()
 
         # Upload to Blob Storage
@@ -170,7 +177,8 @@ def set_customer_info(req: func.HttpRequest) -> func.HttpResponse:
             container_name=container_name,
             blob_name=working_file_path,
             data=output_bytes,
-            overwrite=True
+            overwrite=True,
+            tags=get_expiry_tags()
         )
 
         logger.info(f"Working file updated with customer info: {working_file_path}")
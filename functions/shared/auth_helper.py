@@ -6,9 +6,13 @@ Gère l'authentification avec Azure AD pour Dataverse et autres services
 import os
 import logging
 from typing import Optional
+import requests
 from azure.identity import ClientSecretCredential, DefaultAzureCredential
 from msal import ConfidentialClientApplication
 
+from .timing import timed_stage
+from .tracing import traced, record_http_response, record_storage_response
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,15 +51,19 @@ class AuthHelper:
             ClientSecretCredential instance
         """
         if self._credential is None:
+            # Le hook du pipeline azure-core compte les tentatives (retries) du span aad.token
             self._credential = ClientSecretCredential(
                 tenant_id=self.tenant_id,
                 client_id=self.client_id,
-                client_secret=self.client_secret
+                client_secret=self.client_secret,
+                raw_response_hook=record_storage_response
             )
             logger.info("Created Azure AD credential")
 
         return self._credential
 
+    @timed_stage("auth")
+    @traced("aad.token", lambda a: {"aad.scope": a["scope"]})
     def get_access_token(self, scope: str) -> str:
         """
         Get access token for a specific scope
@@ -110,15 +118,22 @@ class AuthHelper:
         if self._msal_app is None:
             authority = f"https://login.microsoftonline.com/{self.tenant_id}"
 
+            # Session dont le hook renseigne le statut HTTP et les retries du span aad.token
+            http_client = requests.Session()
+            http_client.hooks["response"].append(record_http_response)
+
             self._msal_app = ConfidentialClientApplication(
                 client_id=self.client_id,
                 client_credential=self.client_secret,
-                authority=authority
+                authority=authority,
+                http_client=http_client
             )
             logger.info("Created MSAL application")
 
         return self._msal_app
 
+    @timed_stage("auth")
+    @traced("aad.token", lambda a: {"aad.scope": " ".join(a["scopes"])})
     def acquire_token_for_client(self, scopes: list[str]) -> Optional[str]:
         """
         Acquire token using client credentials flow (service-to-service)
@@ -4,14 +4,54 @@ Gère les opérations de lecture/écriture sur Azure Blob Storage
 """
 
 import os
+import time
+import json
+import base64
+import hashlib
 import logging
-from typing import Optional, BinaryIO, List, Dict
-from datetime import datetime, timedelta
-from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient, generate_blob_sas, BlobSasPermissions
-from azure.core.exceptions import ResourceNotFoundError, AzureError
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, BinaryIO, List, Dict, Iterable, Tuple
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+from azure.storage.blob import (
+    BlobServiceClient, BlobClient, ContainerClient, BlobBlock, BlobPrefix, ContentSettings,
+    generate_blob_sas, BlobSasPermissions
+)
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, ResourceExistsError, ResourceModifiedError, AzureError
+
+from .blob_index import get_blob_index, make_index_entry
+from .listing_cache import get_listing_cache
+from .metrics import record_cache_lookup
+from .request_context import notify_before_read, notify_blob_accessed
+from .timing import timed_stage
+from .validators import ValidationError
+from .tracing import traced, record_storage_response
 
 logger = logging.getLogger(__name__)
 
+# Nombre maximum de blobs par requête Blob Batch
+BLOB_BATCH_SIZE = 256
+
+# Taille des blocs pour les uploads en streaming (4 MiB)
+DEFAULT_STREAM_BLOCK_SIZE = int(os.getenv("BLOB_STREAM_BLOCK_SIZE", 4 * 1024 * 1024))
+
+# Cache des URL SAS: une URL est réutilisée tant qu'il lui reste plus de
+# SAS_CACHE_REFRESH_RATIO de sa durée de validité (ex: 18h sur 24h)
+SAS_CACHE_REFRESH_RATIO = 0.25
+SAS_CACHE_MAX_ENTRIES = 10000
+
+
+def _blob_attributes(arguments: Dict) -> Dict:
+    """Span attributes of a single-blob operation"""
+    return {"blob.container": arguments["container_name"], "blob.name": arguments["blob_name"]}
+
+
+def _listing_attributes(arguments: Dict) -> Dict:
+    """Span attributes of a listing operation"""
+    return {"blob.container": arguments["container_name"], "blob.prefix": arguments.get("name_starts_with")}
+
 
 class BlobStorageClient:
     """Client pour interagir avec Azure Blob Storage"""
@@ -34,13 +74,30 @@ class BlobStorageClient:
         if not self.connection_string:
             raise ValueError("Blob Storage connection string is required (BLOB_STORAGE_CONNECTION_STRING or AZURE_STORAGE_CONNECTION_STRING)")
 
-        self.blob_service_client = BlobServiceClient.from_connection_string(self.connection_string)
+        # The response hook feeds the status code and retry count of each call into its trace span
+        self.blob_service_client = BlobServiceClient.from_connection_string(
+            self.connection_string,
+            raw_response_hook=record_storage_response
+        )
+
+        # Signing material for SAS URLs, parsed once (None without account key, e.g. SAS connection string)
+        conn_parts = dict(item.split('=', 1) for item in self.connection_string.split(';') if '=' in item)
+        self.account_name = conn_parts.get('AccountName')
+        self.account_key = conn_parts.get('AccountKey')
+        self._account_url = self.blob_service_client.url.split('?')[0].rstrip('/')
+
+        # (container, blob, permissions, lifetime in seconds) -> (SAS URL, expiry)
+        self._sas_cache: Dict[Tuple[str, str, str, int], Tuple[str, datetime]] = {}
+        self._sas_lock = threading.Lock()
 
         # Container names from environment or defaults
         self.container_templates = os.getenv("BLOB_CONTAINER_TEMPLATES", "templates")
         self.container_devis = os.getenv("BLOB_CONTAINER_DEVIS", "devis-sources")
         self.container_proposals = os.getenv("BLOB_CONTAINER_PROPOSALS", "propositions-generated")
 
+        # Metadata index updated on every write / delete (None if disabled)
+        self.index = get_blob_index()
+
     def get_blob_client(self, container_name: str, blob_name: str) -> BlobClient:
         """
         Get a BlobClient for a specific blob
@@ -54,12 +111,15 @@ class BlobStorageClient:
         """
         return self.blob_service_client.get_blob_client(container=container_name, blob=blob_name)
 
+    @timed_stage("blob_upload")
+    @traced("blob.upload", lambda a: {**_blob_attributes(a), "blob.size": len(a["data"])})
     def upload_blob(
         self,
         container_name: str,
         blob_name: str,
         data: bytes,
-        overwrite: bool = True
+        overwrite: bool = True,
+        tags: Optional[Dict[str, str]] = None
     ) -> str:
         """
         Upload data to blob storage
@@ -69,21 +129,186 @@ class BlobStorageClient:
             blob_name: Name of the blob
             data: Binary data to upload
             overwrite: Whether to overwrite if blob exists
+            tags: Blob index tags (e.g. expiry tag of working files)
 
         Returns:
             Blob URL
         """
         try:
             blob_client = self.get_blob_client(container_name, blob_name)
-            blob_client.upload_blob(data, overwrite=overwrite)
+            result = blob_client.upload_blob(data, overwrite=overwrite, tags=tags)
 
             logger.info(f"Uploaded blob: {blob_name} to container: {container_name}")
+            self._record_write(container_name, blob_name, len(data), result.get("last_modified"), tags, result.get("etag"))
             return blob_client.url
 
         except AzureError as e:
             logger.error(f"Failed to upload blob {blob_name}: {str(e)}")
             raise
 
+    @timed_stage("blob_upload")
+    @traced("blob.upload", lambda a: {**_blob_attributes(a), "blob.size": len(a["data"])}, lambda etag: {"blob.written": etag is not None})
+    def upload_blob_if_unchanged(
+        self,
+        container_name: str,
+        blob_name: str,
+        data: bytes,
+        etag: Optional[str]
+    ) -> Optional[str]:
+        """
+        Write a blob only if nobody else wrote it since it was read (optimistic concurrency)
+
+        With an ETag the upload is sent with If-Match; without one, with
+        If-None-Match: * (create only). The service answers 412 / 409 when
+        the condition fails, so a concurrent writer is detected without a lease.
+
+        Args:
+            container_name: Name of the container
+            blob_name: Name of the blob
+            data: Binary data to upload
+            etag: ETag returned by the last read or write (None = blob must not exist)
+
+        Returns:
+            ETag of the new content, or None if the blob changed since etag
+        """
+        try:
+            blob_client = self.get_blob_client(container_name, blob_name)
+            if etag:
+                result = blob_client.upload_blob(data, overwrite=True, etag=etag, match_condition=MatchConditions.IfNotModified)
+            else:
+                result = blob_client.upload_blob(data, overwrite=False)
+
+        except (ResourceModifiedError, ResourceExistsError):
+            logger.warning(f"Blob modified by another writer, not uploaded: {blob_name}")
+            return None
+        except AzureError as e:
+            logger.error(f"Failed to upload blob {blob_name}: {str(e)}")
+            raise
+
+        logger.info(f"Uploaded blob: {blob_name} to container: {container_name}")
+        self._record_write(container_name, blob_name, len(data), result.get("last_modified"), etag=result.get("etag"))
+        return result.get("etag")
+
+    @timed_stage("blob_upload")
+    @traced("blob.create", lambda a: {**_blob_attributes(a), "blob.size": len(a["data"])}, lambda created: {"blob.created": created})
+    def create_blob_if_missing(
+        self,
+        container_name: str,
+        blob_name: str,
+        data: bytes,
+        tags: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """
+        Create a blob only if it does not exist yet, in a single request
+
+        The upload is conditional (If-None-Match: *): the service answers
+        409 when the blob already exists, so no existence check is needed.
+
+        Args:
+            container_name: Name of the container
+            blob_name: Name of the blob
+            data: Binary data to upload
+            tags: Blob index tags
+
+        Returns:
+            True if created, False if the blob already existed (left unchanged)
+        """
+        try:
+            blob_client = self.get_blob_client(container_name, blob_name)
+            result = blob_client.upload_blob(data, overwrite=False, tags=tags)
+
+        except ResourceExistsError:
+            logger.debug(f"Blob already exists, not created: {blob_name}")
+            return False
+        except AzureError as e:
+            logger.error(f"Failed to create blob {blob_name}: {str(e)}")
+            raise
+
+        logger.info(f"Created blob: {blob_name} in container: {container_name}")
+        self._record_write(container_name, blob_name, len(data), result.get("last_modified"), tags, result.get("etag"))
+        return True
+
+    @timed_stage("blob_upload")
+    @traced("blob.upload", _blob_attributes, lambda result: {"blob.size": result["size"]})
+    def upload_blob_stream(
+        self,
+        container_name: str,
+        blob_name: str,
+        chunks: Iterable[bytes],
+        content_type: Optional[str] = None,
+        block_size: int = DEFAULT_STREAM_BLOCK_SIZE
+    ) -> Dict:
+        """
+        Upload a stream of chunks as a block blob without buffering the whole payload
+
+        Chunks are accumulated up to block_size, then staged as one block
+        (with transactional MD5 validation). The block list is committed
+        only once the source is fully consumed, so a failed or truncated
+        source never produces a partial blob. Memory use is bounded by
+        block_size.
+
+        Args:
+            container_name: Name of the container
+            blob_name: Name of the blob
+            chunks: Iterable of byte chunks (e.g. response.iter_content())
+            content_type: Content type stored on the blob
+            block_size: Size of each staged block in bytes
+
+        Returns:
+            Dict with url, size, block_count and content_md5 (base64)
+
+        Raises:
+            ValueError: If the stream is empty
+        """
+        try:
+            blob_client = self.get_blob_client(container_name, blob_name)
+            md5 = hashlib.md5()
+            block_list = []
+            buffer = bytearray()
+            total_size = 0
+
+            def stage(data: bytes) -> None:
+                block_id = base64.b64encode(f"{len(block_list):08d}".encode()).decode()
+                blob_client.stage_block(block_id, data, length=len(data), validate_content=True)
+                block_list.append(BlobBlock(block_id=block_id))
+
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                md5.update(chunk)
+                total_size += len(chunk)
+                buffer.extend(chunk)
+                while len(buffer) >= block_size:
+                    stage(bytes(buffer[:block_size]))
+                    del buffer[:block_size]
+
+            if buffer:
+                stage(bytes(buffer))
+
+            if not block_list:
+                raise ValueError(f"Nothing to upload for blob {blob_name}: empty stream")
+
+            content_md5 = md5.digest()
+            result = blob_client.commit_block_list(
+                block_list,
+                content_settings=ContentSettings(content_type=content_type, content_md5=content_md5)
+            )
+
+            logger.info(f"Uploaded blob (streamed): {blob_name} to container: {container_name} ({total_size} bytes, {len(block_list)} blocks)")
+            self._record_write(container_name, blob_name, total_size, result.get("last_modified"), etag=result.get("etag"))
+            return {
+                "url": blob_client.url,
+                "size": total_size,
+                "block_count": len(block_list),
+                "content_md5": base64.b64encode(content_md5).decode()
+            }
+
+        except AzureError as e:
+            logger.error(f"Failed to upload blob {blob_name} (streamed): {str(e)}")
+            raise
+
+    @timed_stage("blob_download")
+    @traced("blob.download", _blob_attributes, lambda data: {"blob.size": len(data)})
     def download_blob(self, container_name: str, blob_name: str) -> bytes:
         """
         Download blob from storage
@@ -98,7 +323,11 @@ class BlobStorageClient:
         try:
             blob_client = self.get_blob_client(container_name, blob_name)
             download_stream = blob_client.download_blob()
+            # The first GET has already returned up to 32 MB: this guards the
+            # processing of the document (memory budget may wait or refuse), not the download
+            notify_before_read(container_name, blob_name, download_stream.size)
             content = download_stream.readall()
+            notify_blob_accessed(container_name, blob_name, download_stream.properties.etag, "read")
 
             logger.info(f"Downloaded blob: {blob_name} from container: {container_name}")
             return content
@@ -110,6 +339,103 @@ class BlobStorageClient:
             logger.error(f"Failed to download blob {blob_name}: {str(e)}")
             raise
 
+    @timed_stage("blob_download")
+    @traced("blob.download", _blob_attributes, lambda result: {"blob.size": len(result[0])})
+    def download_blob_with_etag(self, container_name: str, blob_name: str) -> Tuple[bytes, str]:
+        """
+        Download a blob with the ETag of the downloaded content
+
+        Args:
+            container_name: Name of the container
+            blob_name: Name of the blob
+
+        Returns:
+            Tuple (blob content, ETag), the ETag to pass to upload_blob_if_unchanged
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist
+        """
+        download_stream = self.get_blob_client(container_name, blob_name).download_blob()
+        content = download_stream.readall()
+        notify_blob_accessed(container_name, blob_name, download_stream.properties.etag, "read")
+        return content, download_stream.properties.etag
+
+    @timed_stage("blob_copy")
+    @traced("blob.copy", lambda a: {"blob.container": a["dest_container"], "blob.name": a["dest_blob"], "blob.source": f"{a['source_container']}/{a['source_blob']}"})
+    def copy_blob(
+        self,
+        source_container: str,
+        source_blob: str,
+        dest_container: str,
+        dest_blob: str,
+        timeout_seconds: int = 60,
+        poll_interval: float = 0.5
+    ) -> str:
+        """
+        Copy a blob server-side (no bytes transit through the function)
+
+        Uses start_copy_from_url then polls the copy status until it
+        completes. Within the same storage account the copy is usually
+        synchronous, so polling rarely happens.
+
+        Args:
+            source_container: Source container name
+            source_blob: Source blob name
+            dest_container: Destination container name
+            dest_blob: Destination blob name
+            timeout_seconds: Max time to wait for a pending copy
+            poll_interval: Seconds between two status checks
+
+        Returns:
+            Destination blob URL
+
+        Raises:
+            ResourceNotFoundError: If the source blob does not exist
+            AzureError: If the copy fails, is aborted or times out
+        """
+        try:
+            source_client = self.get_blob_client(source_container, source_blob)
+            dest_client = self.get_blob_client(dest_container, dest_blob)
+
+            # Short-lived read SAS so the service can read the source;
+            # fall back to the plain URL when no account key is available
+            try:
+                source_url = self.generate_sas_url(source_container, source_blob, expiry_hours=1, permissions="r")
+            except ValueError:
+                source_url = source_client.url
+
+            copy = dest_client.start_copy_from_url(source_url)
+            status = copy.get("copy_status")
+            deadline = time.monotonic() + timeout_seconds
+
+            while status == "pending":
+                if time.monotonic() > deadline:
+                    dest_client.abort_copy(copy.get("copy_id"))
+                    raise AzureError(f"Copy of {source_blob} timed out after {timeout_seconds}s")
+                time.sleep(poll_interval)
+                status = dest_client.get_blob_properties().copy.status
+
+            if status != "success":
+                raise AzureError(f"Copy of {source_blob} ended with status: {status}")
+
+            logger.info(f"Copied blob: {source_container}/{source_blob} to {dest_container}/{dest_blob}")
+            if self.index is not None:
+                properties = dest_client.get_blob_properties()
+                self._record_write(dest_container, dest_blob, properties.size, properties.last_modified, etag=properties.etag)
+            else:
+                get_listing_cache().invalidate(dest_container, dest_blob)
+                notify_blob_accessed(dest_container, dest_blob, copy.get("etag"), "write")
+            return dest_client.url
+
+        except ResourceNotFoundError:
+            logger.error(f"Source blob not found for copy: {source_blob} in container: {source_container}")
+            raise
+        except AzureError as e:
+            logger.error(f"Failed to copy blob {source_blob}: {str(e)}")
+            raise
+
+    @timed_stage("blob_metadata")
+    @traced("blob.exists", _blob_attributes)
     def blob_exists(self, container_name: str, blob_name: str) -> bool:
         """
         Check if a blob exists
@@ -128,29 +454,264 @@ class BlobStorageClient:
             logger.error(f"Error checking blob existence: {str(e)}")
             return False
 
-    def delete_blob(self, container_name: str, blob_name: str) -> bool:
+    @timed_stage("blob_metadata")
+    @traced("blob.get_properties", _blob_attributes, lambda blob: {"blob.size": blob["size"]})
+    def get_blob_properties(self, container_name: str, blob_name: str) -> Dict:
+        """
+        Get the properties of a blob (one HEAD request)
+
+        Unlike blob_exists, storage errors are raised instead of being
+        reported as a missing blob.
+
+        Args:
+            container_name: Name of the container
+            blob_name: Name of the blob
+
+        Returns:
+            Dict like list_blobs_with_metadata (name, last_modified, size, content_type)
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist
+        """
+        properties = self.get_blob_client(container_name, blob_name).get_blob_properties()
+        return self._blob_properties_to_dict(properties)
+
+    @timed_stage("blob_metadata")
+    @traced("blob.get_metadata", _blob_attributes)
+    def get_blob_metadata(self, container_name: str, blob_name: str) -> Tuple[Dict[str, str], str]:
+        """
+        Get the metadata of a blob
+
+        Args:
+            container_name: Name of the container
+            blob_name: Name of the blob
+
+        Returns:
+            Tuple (metadata dict, ETag of the blob)
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist
+        """
+        properties = self.get_blob_client(container_name, blob_name).get_blob_properties()
+        return properties.metadata or {}, properties.etag
+
+    @timed_stage("blob_metadata")
+    @traced("blob.set_metadata", _blob_attributes)
+    def set_blob_metadata(
+        self,
+        container_name: str,
+        blob_name: str,
+        metadata: Dict[str, str],
+        etag: Optional[str] = None
+    ) -> bool:
+        """
+        Replace the metadata of a blob
+
+        Args:
+            container_name: Name of the container
+            blob_name: Name of the blob
+            metadata: New metadata (ASCII values; replaces all existing keys)
+            etag: Only update if the blob still has this ETag
+
+        Returns:
+            True if updated, False if the blob changed since etag was read
+        """
+        try:
+            blob_client = self.get_blob_client(container_name, blob_name)
+            if etag:
+                blob_client.set_blob_metadata(metadata, etag=etag, match_condition=MatchConditions.IfNotModified)
+            else:
+                blob_client.set_blob_metadata(metadata)
+
+            logger.info(f"Updated metadata of blob: {blob_name} in container: {container_name}")
+            get_listing_cache().invalidate(container_name, blob_name)
+            return True
+
+        except ResourceModifiedError:
+            logger.warning(f"Blob modified since metadata was computed, not updated: {blob_name}")
+            return False
+        except AzureError as e:
+            logger.error(f"Failed to set metadata of blob {blob_name}: {str(e)}")
+            raise
+
+    @timed_stage("blob_delete")
+    @traced("blob.delete", _blob_attributes)
+    def delete_blob(
+        self,
+        container_name: str,
+        blob_name: str,
+        if_tags_match_condition: Optional[str] = None,
+        if_unmodified_since: Optional[datetime] = None
+    ) -> bool:
         """
         Delete a blob
 
         Args:
             container_name: Name of the container
             blob_name: Name of the blob
+            if_tags_match_condition: Only delete if the blob tags match this expression
+            if_unmodified_since: Only delete if the blob was not modified after this time
 
         Returns:
             True if deleted successfully, False otherwise
         """
         try:
             blob_client = self.get_blob_client(container_name, blob_name)
-            blob_client.delete_blob()
+            blob_client.delete_blob(
+                if_tags_match_condition=if_tags_match_condition,
+                if_unmodified_since=if_unmodified_since
+            )
             logger.info(f"Deleted blob: {blob_name} from container: {container_name}")
+            self._record_delete(container_name, blob_name)
             return True
         except ResourceNotFoundError:
             logger.warning(f"Blob not found for deletion: {blob_name}")
+            self._record_delete(container_name, blob_name)
+            return False
+        except ResourceModifiedError:
+            logger.warning(f"Blob no longer matches the delete condition, not deleted: {blob_name}")
             return False
         except AzureError as e:
             logger.error(f"Failed to delete blob {blob_name}: {str(e)}")
             raise
 
+    @timed_stage("blob_delete")
+    @traced("blob.delete_batch", lambda a: {"blob.container": a["container_name"], "blob.count": len(a["blob_names"])})
+    def delete_blobs_batch(
+        self,
+        container_name: str,
+        blob_names: List[str],
+        max_workers: int = 8,
+        if_tags_match_condition: Optional[str] = None,
+        if_unmodified_since: Optional[datetime] = None
+    ) -> Dict[str, bool]:
+        """
+        Delete many blobs using the Blob Batch API (up to 256 blobs per request)
+
+        Falls back to parallel single deletes (thread pool) when the storage
+        endpoint does not support batch requests (e.g. Azurite).
+
+        Args:
+            container_name: Name of the container
+            blob_names: Names of the blobs to delete
+            max_workers: Thread pool size for the fallback
+            if_tags_match_condition: Only delete blobs whose tags match this expression
+            if_unmodified_since: Only delete blobs not modified after this time
+
+        Returns:
+            Dict mapping each blob name to True (deleted) or False (not found or failed)
+        """
+        results: Dict[str, bool] = {}
+        if not blob_names:
+            return results
+
+        container_client = self.blob_service_client.get_container_client(container_name)
+        batch_supported = True
+
+        for start in range(0, len(blob_names), BLOB_BATCH_SIZE):
+            chunk = blob_names[start:start + BLOB_BATCH_SIZE]
+
+            if batch_supported:
+                try:
+                    responses = list(container_client.delete_blobs(
+                        *chunk,
+                        raise_on_any_failure=False,
+                        if_tags_match_condition=if_tags_match_condition,
+                        if_unmodified_since=if_unmodified_since
+                    ))
+                    for name, response in zip(chunk, responses):
+                        results[name] = 200 <= response.status_code < 300
+                        if results[name] or response.status_code == 404:
+                            self._record_delete(container_name, name)
+                        if not results[name]:
+                            logger.warning(f"Batch delete failed for {name} (status: {response.status_code})")
+                    continue
+                except AzureError as e:
+                    logger.warning(f"Blob batch delete not available, falling back to parallel deletes: {str(e)}")
+                    batch_supported = False
+
+            results.update(self._delete_blobs_parallel(
+                container_name, chunk, max_workers, if_tags_match_condition, if_unmodified_since
+            ))
+
+        deleted = sum(1 for ok in results.values() if ok)
+        logger.info(f"Deleted {deleted}/{len(blob_names)} blobs from container: {container_name}")
+        return results
+
+    def _delete_blobs_parallel(
+        self,
+        container_name: str,
+        blob_names: List[str],
+        max_workers: int,
+        if_tags_match_condition: Optional[str] = None,
+        if_unmodified_since: Optional[datetime] = None
+    ) -> Dict[str, bool]:
+        """
+        Delete blobs one request each, in parallel
+
+        Args:
+            container_name: Name of the container
+            blob_names: Names of the blobs to delete
+            max_workers: Thread pool size
+            if_tags_match_condition: Only delete blobs whose tags match this expression
+            if_unmodified_since: Only delete blobs not modified after this time
+
+        Returns:
+            Dict mapping each blob name to True (deleted) or False
+        """
+        def delete(name: str) -> bool:
+            try:
+                return self.delete_blob(
+                    container_name,
+                    name,
+                    if_tags_match_condition=if_tags_match_condition,
+                    if_unmodified_since=if_unmodified_since
+                )
+            except AzureError:
+                return False
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(blob_names, executor.map(delete, blob_names)))
+
+    @timed_stage("blob_list")
+    @traced("blob.find_by_tags", lambda a: {"blob.container": a["container_name"]}, lambda blobs: {"blob.count": len(blobs)})
+    def find_blobs_by_tags(
+        self,
+        container_name: str,
+        filter_expression: str,
+        max_results: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Find blobs in a container whose index tags match an expression
+
+        The query is served by the blob index, so its cost depends on the
+        number of matches, not on the size of the container.
+
+        Args:
+            container_name: Name of the container
+            filter_expression: Tag filter (e.g. "\"expires_at\" <= '001760000000'")
+            max_results: Stop after this many matches (None = all)
+
+        Returns:
+            List of dicts with blob name and tags
+        """
+        try:
+            container_client = self.blob_service_client.get_container_client(container_name)
+            blobs = []
+            for blob in container_client.find_blobs_by_tags(filter_expression, results_per_page=max_results):
+                blobs.append({"name": blob.name, "tags": blob.tags or {}})
+                if max_results is not None and len(blobs) >= max_results:
+                    break
+
+            logger.info(f"Found {len(blobs)} blobs by tags in container: {container_name}")
+            return blobs
+
+        except AzureError as e:
+            logger.error(f"Failed to find blobs by tags in container {container_name}: {str(e)}")
+            raise
+
+    @timed_stage("blob_list")
+    @traced("blob.list", _listing_attributes, lambda names: {"blob.count": len(names)})
     def list_blobs(self, container_name: str, name_starts_with: Optional[str] = None) -> list[str]:
         """
         List all blobs in a container
@@ -174,6 +735,46 @@ class BlobStorageClient:
             logger.error(f"Failed to list blobs in container {container_name}: {str(e)}")
             raise
 
+    def _record_write(
+        self,
+        container_name: str,
+        blob_name: str,
+        size: int,
+        last_modified: Optional[datetime],
+        tags: Optional[Dict[str, str]] = None,
+        etag: Optional[str] = None
+    ) -> None:
+        """
+        Propagate a blob write: invalidate cached listings, report it to the
+        request observers (request_context) and update the metadata index
+
+        Index failures are logged (reconcile_index repairs drift).
+        """
+        get_listing_cache().invalidate(container_name, blob_name)
+        notify_blob_accessed(container_name, blob_name, etag, "write")
+
+        if self.index is None:
+            return
+        entry = make_index_entry(container_name, blob_name, size, last_modified, tags)
+        if entry is None:
+            return
+        try:
+            self.index.upsert(entry)
+        except Exception as e:
+            logger.warning(f"Failed to index blob {blob_name}: {str(e)}")
+
+    def _record_delete(self, container_name: str, blob_name: str) -> None:
+        """Propagate a blob deletion to cached listings, the request observers and the metadata index (failures are logged)"""
+        get_listing_cache().invalidate(container_name, blob_name)
+        notify_blob_accessed(container_name, blob_name, None, "delete")
+
+        if self.index is None:
+            return
+        try:
+            self.index.remove(container_name, blob_name)
+        except Exception as e:
+            logger.warning(f"Failed to remove blob {blob_name} from index: {str(e)}")
+
     def get_blob_url(self, container_name: str, blob_name: str) -> str:
         """
         Get the URL of a blob
@@ -202,44 +803,126 @@ class BlobStorageClient:
             container_name: Name of the container
             blob_name: Name of the blob
             expiry_hours: Hours until SAS token expires (default: 24h)
-            permissions: Permissions string (r=read, w=write, d=delete, l=list)
+            permissions: Permissions string (r=read, c=create, w=write, d=delete)
 
         Returns:
             Blob URL with SAS token
         """
-        try:
-            blob_client = self.get_blob_client(container_name, blob_name)
+        sas_url, _ = self._sign(container_name, blob_name, timedelta(hours=expiry_hours), permissions)
+        logger.info(f"Generated SAS URL for {blob_name} (expires in {expiry_hours}h)")
+        return sas_url
 
-            # Parse connection string to get account name and key
-            conn_parts = dict(item.split('=', 1) for item in self.connection_string.split(';') if '=' in item)
-            account_name = conn_parts.get('AccountName')
-            account_key = conn_parts.get('AccountKey')
-
-            if not account_name or not account_key:
-                raise ValueError("Could not extract account name and key from connection string")
-
-            # Generate SAS token
-            sas_token = generate_blob_sas(
-                account_name=account_name,
-                container_name=container_name,
-                blob_name=blob_name,
-                account_key=account_key,
-                permission=BlobSasPermissions(read="r" in permissions, write="w" in permissions, delete="d" in permissions),
-                expiry=datetime.utcnow() + timedelta(hours=expiry_hours)
-            )
+    def generate_sas_urls(
+        self,
+        container_name: str,
+        blob_names: List[str],
+        expiry_hours: int = 24,
+        permissions: str = "r"
+    ) -> Dict[str, Dict]:
+        """
+        Generate SAS URLs for many blobs (local signing only, no request to storage)
 
-            sas_url = f"{blob_client.url}?{sas_token}"
-            logger.info(f"Generated SAS URL for {blob_name} (expires in {expiry_hours}h)")
-            return sas_url
+        Args:
+            container_name: Name of the container
+            blob_names: Names of the blobs
+            expiry_hours: Hours until SAS tokens expire
+            permissions: Permissions string (r=read, w=write, d=delete)
 
-        except Exception as e:
-            logger.error(f"Failed to generate SAS URL for {blob_name}: {str(e)}")
-            raise
+        Returns:
+            Dict mapping each blob name to {"sas_url", "expires_on"} (ISO 8601)
+        """
+        results = {}
+        for blob_name in blob_names:
+            sas_url, expires_on = self._sign(container_name, blob_name, timedelta(hours=expiry_hours), permissions)
+            results[blob_name] = {"sas_url": sas_url, "expires_on": expires_on.isoformat()}
+
+        logger.info(f"Generated {len(results)} SAS URLs in container: {container_name} (expires in {expiry_hours}h)")
+        return results
+
+    def generate_upload_sas_url(
+        self,
+        container_name: str,
+        blob_name: str,
+        expiry_minutes: int = 15,
+        overwrite: bool = False
+    ) -> Tuple[str, datetime]:
+        """
+        Generate a write-only SAS URL allowing a client to upload one blob directly
+
+        The SAS grants create (and write if overwrite) on this exact blob
+        name only: no read, list or delete, and no other path. It also
+        grants tags, so the Put Blob request can set the expiry tag
+        (x-ms-tags) of the uploaded file.
+
+        Args:
+            container_name: Name of the container
+            blob_name: Exact blob name the client may upload
+            expiry_minutes: Minutes until the SAS expires
+            overwrite: Allow replacing an existing blob
 
+        Returns:
+            Tuple (SAS URL for a Put Blob request, expiry)
+        """
+        signed = self._sign(container_name, blob_name, timedelta(minutes=expiry_minutes), "cwt" if overwrite else "ct")
+        logger.info(f"Generated upload SAS URL for {blob_name} (expires in {expiry_minutes} min)")
+        return signed
+
+    def _sign(self, container_name: str, blob_name: str, lifetime: timedelta, permissions: str) -> Tuple[str, datetime]:
+        """
+        Return a SAS URL and its expiry, reusing a cached URL that is still valid long enough
+
+        Raises:
+            ValueError: If the connection string has no account key
+        """
+        if not self.account_name or not self.account_key:
+            raise ValueError("Could not extract account name and key from connection string")
+
+        key = (container_name, blob_name, permissions, int(lifetime.total_seconds()))
+        now = datetime.now(timezone.utc)
+        min_remaining = lifetime * SAS_CACHE_REFRESH_RATIO
+
+        with self._sas_lock:
+            cached = self._sas_cache.get(key)
+        if cached and cached[1] - now > min_remaining:
+            record_cache_lookup("sas", hit=True)
+            return cached
+        record_cache_lookup("sas", hit=False)
+
+        expires_on = now + lifetime
+        sas_token = generate_blob_sas(
+            account_name=self.account_name,
+            container_name=container_name,
+            blob_name=blob_name,
+            account_key=self.account_key,
+            permission=BlobSasPermissions(
+                read="r" in permissions,
+                create="c" in permissions,
+                write="w" in permissions,
+                delete="d" in permissions,
+                tag="t" in permissions
+            ),
+            expiry=expires_on
+        )
+        signed = (f"{self._account_url}/{quote(container_name)}/{quote(blob_name, safe='~/')}?{sas_token}", expires_on)
+
+        with self._sas_lock:
+            if len(self._sas_cache) >= SAS_CACHE_MAX_ENTRIES:
+                # Drop expiring entries; if the cache is still full, start over
+                self._sas_cache = {k: v for k, v in self._sas_cache.items() if v[1] - now > min_remaining}
+                if len(self._sas_cache) >= SAS_CACHE_MAX_ENTRIES:
+                    self._sas_cache.clear()
+            self._sas_cache[key] = signed
+
+        return signed
+
+    @timed_stage("blob_list")
+    @traced("blob.list", _listing_attributes, lambda blobs: {"blob.count": len(blobs)})
     def list_blobs_with_metadata(
         self,
         container_name: str,
-        name_starts_with: Optional[str] = None
+        name_starts_with: Optional[str] = None,
+        include_tags: bool = False,
+        include_metadata: bool = False
     ) -> List[Dict]:
         """
         List all blobs in a container with their metadata
@@ -247,22 +930,26 @@ class BlobStorageClient:
         Args:
             container_name: Name of the container
             name_starts_with: Filter blobs by name prefix
+            include_tags: Also return the blob index tags ("tags" key)
+            include_metadata: Also return the blob metadata ("metadata" key)
 
         Returns:
             List of dicts with blob name, last_modified, size
         """
         try:
+            include = (["tags"] if include_tags else []) + (["metadata"] if include_metadata else [])
             container_client = self.blob_service_client.get_container_client(container_name)
-            blobs = container_client.list_blobs(name_starts_with=name_starts_with)
+            blobs = container_client.list_blobs(
+                name_starts_with=name_starts_with,
+                include=include or None
+            )
 
             blob_list = []
             for blob in blobs:
-                blob_list.append({
-                    "name": blob.name,
-                    "last_modified": blob.last_modified,
-                    "size": blob.size,
-                    "content_type": blob.content_settings.content_type if blob.content_settings else None
-                })
+                blob_dict = self._blob_properties_to_dict(blob, include_metadata)
+                if include_tags:
+                    blob_dict["tags"] = blob.tags or {}
+                blob_list.append(blob_dict)
 
             logger.info(f"Listed {len(blob_list)} blobs with metadata from container: {container_name}")
             return blob_list
@@ -271,6 +958,221 @@ class BlobStorageClient:
             logger.error(f"Failed to list blobs with metadata in container {container_name}: {str(e)}")
             raise
 
+    @timed_stage("blob_list")
+    @traced("blob.list", _listing_attributes, lambda blobs: {"blob.count": len(blobs)})
+    def walk_blobs(
+        self,
+        container_name: str,
+        name_starts_with: Optional[str] = None,
+        delimiter: str = "/",
+        suffixes: Optional[Iterable[str]] = None,
+        include_metadata: bool = False
+    ) -> List[Dict]:
+        """
+        List the direct children of a virtual folder (hierarchical listing)
+
+        Blobs in subfolders are collapsed by the service into a single
+        prefix entry per subfolder, which is skipped: their contents are
+        never transferred.
+
+        Args:
+            container_name: Name of the container
+            name_starts_with: Folder prefix, including the trailing delimiter (e.g. "Eric FER/")
+            delimiter: Virtual folder separator
+            suffixes: Only keep blobs whose name ends with one of these (case-insensitive)
+            include_metadata: Also return the blob metadata ("metadata" key)
+
+        Returns:
+            List of dicts like list_blobs_with_metadata
+        """
+        try:
+            container_client = self.blob_service_client.get_container_client(container_name)
+            items = container_client.walk_blobs(
+                name_starts_with=name_starts_with,
+                include=["metadata"] if include_metadata else None,
+                delimiter=delimiter
+            )
+
+            blob_list = self._select_blob_items(items, suffixes, include_metadata)
+
+            logger.info(f"Walked {len(blob_list)} blobs from container: {container_name} (prefix: {name_starts_with})")
+            return blob_list
+
+        except AzureError as e:
+            logger.error(f"Failed to walk blobs in container {container_name}: {str(e)}")
+            raise
+
+    @timed_stage("blob_list")
+    @traced("blob.list", _listing_attributes, lambda page: {"blob.count": len(page[0])})
+    def list_blobs_page(
+        self,
+        container_name: str,
+        name_starts_with: Optional[str] = None,
+        continuation_token: Optional[str] = None,
+        page_size: int = 500,
+        delimiter: Optional[str] = None,
+        suffixes: Optional[Iterable[str]] = None,
+        include_metadata: bool = False
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        List one page of blobs with their metadata
+
+        Only one listing request is made; pass the returned token back to
+        get the next page. With a delimiter the listing is hierarchical
+        (see walk_blobs) and subfolder entries count towards page_size.
+
+        Args:
+            container_name: Name of the container
+            name_starts_with: Filter blobs by name prefix
+            continuation_token: Token returned by the previous page (None = first page)
+            page_size: Maximum number of entries in the listing page
+            delimiter: List only direct children of name_starts_with
+            suffixes: Only keep blobs whose name ends with one of these (case-insensitive)
+            include_metadata: Also return the blob metadata ("metadata" key)
+
+        Returns:
+            Tuple (list of dicts like list_blobs_with_metadata, next continuation token or None)
+        """
+        try:
+            include = ["metadata"] if include_metadata else None
+            container_client = self.blob_service_client.get_container_client(container_name)
+            if delimiter:
+                items = container_client.walk_blobs(
+                    name_starts_with=name_starts_with,
+                    include=include,
+                    delimiter=delimiter,
+                    results_per_page=page_size
+                )
+            else:
+                items = container_client.list_blobs(
+                    name_starts_with=name_starts_with,
+                    include=include,
+                    results_per_page=page_size
+                )
+            pages = items.by_page(continuation_token=continuation_token)
+
+            page = next(pages, [])
+            blob_list = self._select_blob_items(page, suffixes, include_metadata)
+
+            logger.info(f"Listed page of {len(blob_list)} blobs from container: {container_name}")
+            return blob_list, pages.continuation_token or None
+
+        except AzureError as e:
+            logger.error(f"Failed to list blob page in container {container_name}: {str(e)}")
+            raise
+
+    @timed_stage("blob_list")
+    @traced("blob.list", _listing_attributes, lambda page: {"blob.count": len(page[0])})
+    def list_blobs_filtered_page(
+        self,
+        container_name: str,
+        page_size: int,
+        name_starts_with: Optional[str] = None,
+        continuation_token: Optional[str] = None,
+        select: Optional[Callable[[Dict], Optional[Dict]]] = None,
+        delimiter: Optional[str] = None,
+        suffixes: Optional[Iterable[str]] = None,
+        include_metadata: bool = False
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Collect up to page_size selected blobs, following listing pages lazily
+
+        Every listing request asks for a full page, so filtered-out blobs
+        (.keep, subfolders, date range) do not shrink the requests down to
+        one blob per round trip. The returned token holds the service
+        marker of the listing page and the last name handed out: the next
+        call lists that page again and resumes right after it. Results are
+        in blob name order.
+
+        Args:
+            container_name: Name of the container
+            page_size: Number of items to return
+            name_starts_with: Filter blobs by name prefix
+            continuation_token: Token returned by the previous call (None = first page)
+            select: Maps a blob dict to the returned item, or None to skip it
+            delimiter: List only direct children of name_starts_with
+            suffixes: Only keep blobs whose name ends with one of these (case-insensitive)
+            include_metadata: Also return the blob metadata ("metadata" key)
+
+        Returns:
+            Tuple (selected items, next continuation token or None when listing is complete)
+        """
+        marker, after = _decode_listing_token(continuation_token) if continuation_token else (None, None)
+        items = []
+
+        while True:
+            blobs, next_marker = self.list_blobs_page(
+                container_name,
+                name_starts_with=name_starts_with,
+                continuation_token=marker,
+                page_size=page_size,
+                delimiter=delimiter,
+                suffixes=suffixes,
+                include_metadata=include_metadata
+            )
+            for position, blob in enumerate(blobs):
+                if after is not None and blob["name"] <= after:
+                    continue
+                item = select(blob) if select else blob
+                if item is None:
+                    continue
+                items.append(item)
+                if len(items) >= page_size:
+                    if position + 1 < len(blobs):
+                        return items, _encode_listing_token(marker, blob["name"])
+                    return items, _encode_listing_token(next_marker, None) if next_marker else None
+
+            if next_marker is None:
+                return items, None
+            marker, after = next_marker, None
+
+    @classmethod
+    def _select_blob_items(
+        cls,
+        items: Iterable,
+        suffixes: Optional[Iterable[str]] = None,
+        include_metadata: bool = False
+    ) -> List[Dict]:
+        """Convert listing items to dicts, skipping subfolder prefixes and unwanted suffixes"""
+        suffixes = tuple(suffix.lower() for suffix in suffixes) if suffixes else None
+        return [
+            cls._blob_properties_to_dict(item, include_metadata) for item in items
+            if not isinstance(item, BlobPrefix)
+            and (suffixes is None or item.name.lower().endswith(suffixes))
+        ]
+
+    @staticmethod
+    def _blob_properties_to_dict(blob, include_metadata: bool = False) -> Dict:
+        """Convert BlobProperties to the dict format returned by the listing methods"""
+        blob_dict = {
+            "name": blob.name,
+            "last_modified": blob.last_modified,
+            "size": blob.size,
+            "content_type": blob.content_settings.content_type if blob.content_settings else None
+        }
+        if include_metadata:
+            blob_dict["metadata"] = blob.metadata or {}
+        return blob_dict
+
+
+def _encode_listing_token(marker: Optional[str], after: Optional[str]) -> str:
+    """Encode a filtered listing position (service marker, last name returned) as an opaque URL-safe string"""
+    return base64.urlsafe_b64encode(json.dumps([marker, after]).encode("utf-8")).decode("ascii")
+
+
+def _decode_listing_token(token: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Decode a token produced by _encode_listing_token
+
+    Raises:
+        ValidationError: If the token was not produced by _encode_listing_token
+    """
+    try:
+        marker, after = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValidationError("Invalid continuation_token")
+    return marker, after
+
 
 # Singleton instance
 _blob_client_instance: Optional[BlobStorageClient] = None
@@ -0,0 +1,599 @@
+"""
+Blob Index
+Index des métadonnées des blobs (chemin, utilisateur, type, taille, dates, expiration)
+
+Les listes et le nettoyage interrogent l'index au lieu de lister Blob
+Storage: requêtes par dossier, par préfixe de nom, par plage de dates et
+sélection des fichiers expirés. L'index est mis à jour par
+BlobStorageClient à chaque écriture / suppression; un job de
+réconciliation (reconcile_index) corrige les écarts.
+
+Backends (BLOB_INDEX_BACKEND):
+- "table": Azure Table Storage (même compte de stockage que les blobs)
+- "sqlite": fichier SQLite local (BLOB_INDEX_SQLITE_PATH), pour le développement
+- "none" (défaut): index désactivé, les listes interrogent Blob Storage
+"""
+
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from .config import (
+    BLOB_INDEX_BACKEND, BLOB_INDEX_SQLITE_PATH, BLOB_INDEX_TABLE_NAME,
+    CONTAINER_TEMPLATES, EXPIRY_TAG, PATH_TEMPLATES_GENERAL, get_expiry_bucket
+)
+from .validators import ValidationError
+
+logger = logging.getLogger(__name__)
+
+try:
+    from azure.data.tables import TableServiceClient, UpdateMode
+    TABLES_AVAILABLE = True
+except ImportError:
+    TABLES_AVAILABLE = False
+
+# Blobs techniques jamais indexés (checkpoints de jobs)
+INDEX_EXCLUDED_PREFIXES = ("_jobs/",)
+
+
+def _document_kind(container_name: str, blob_name: str) -> str:
+    """
+    Return the kind of a blob: template, working, word, pdf or other
+    """
+    lower_name = blob_name.lower()
+
+    if container_name == CONTAINER_TEMPLATES:
+        if not lower_name.endswith(".docx"):
+            return "other"
+        if blob_name.startswith(f"{PATH_TEMPLATES_GENERAL}/"):
+            return "template"
+        return "working"
+
+    if lower_name.endswith(".docx"):
+        return "word"
+    if lower_name.endswith(".pdf"):
+        return "pdf"
+    return "other"
+
+
+def make_index_entry(
+    container_name: str,
+    blob_name: str,
+    size: int,
+    last_modified: Optional[datetime],
+    tags: Optional[Dict[str, str]] = None
+) -> Optional[Dict]:
+    """
+    Build the index entry of a blob
+
+    The entry uses the same keys as the listing dicts of BlobStorageClient
+    (name = full blob path, size, last_modified) so listing handlers can
+    format index entries and listing results the same way.
+
+    Args:
+        container_name: Name of the container
+        blob_name: Full blob name
+        size: Blob size in bytes
+        last_modified: Last modification time
+        tags: Blob index tags (expiry tag of working files)
+
+    Returns:
+        Entry dict, or None for blobs that are not indexed (.keep files, job checkpoints)
+    """
+    if blob_name.endswith("/") or blob_name.endswith(".keep") or blob_name.startswith(INDEX_EXCLUDED_PREFIXES):
+        return None
+
+    folder, _, file_name = blob_name.rpartition("/")
+    if last_modified is not None and last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    return {
+        "container": container_name,
+        "name": blob_name,
+        "folder": folder,
+        "file_name": file_name,
+        "user_folder": blob_name.split("/", 1)[0] if folder else "",
+        "kind": _document_kind(container_name, blob_name),
+        "size": size,
+        "last_modified": last_modified or datetime.now(timezone.utc),
+        "expires_at": (tags or {}).get(EXPIRY_TAG)
+    }
+
+
+def _prefix_end(prefix: str) -> str:
+    """Return the smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _encode_token(value) -> str:
+    """Encode a backend continuation token as an opaque URL-safe string"""
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+
+def _decode_token(token: str):
+    """
+    Decode a continuation token produced by _encode_token
+
+    Raises:
+        ValidationError: If the token was not produced by _encode_token
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValidationError("Invalid continuation_token")
+
+
+class BlobIndex:
+    """Interface commune des backends d'index"""
+
+    def upsert(self, entry: Dict) -> None:
+        """Insert or replace an entry"""
+        raise NotImplementedError
+
+    def remove(self, container_name: str, blob_name: str) -> None:
+        """Remove an entry (no error if missing)"""
+        raise NotImplementedError
+
+    def remove_entry(self, entry: Dict) -> None:
+        """
+        Remove an entry returned by a query, even if it is stale
+
+        Used when the blob turned out different from the entry (conditional
+        delete refused): the caller re-indexes the blob afterwards.
+        """
+        self.remove(entry["container"], entry["name"])
+
+    def query_folder(
+        self,
+        container_name: str,
+        folder: str,
+        kind: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
+        page_size: Optional[int] = None,
+        continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        List the files directly in a folder, in name order
+
+        Args:
+            container_name: Name of the container
+            folder: Folder path without trailing slash (e.g. "Eric FER", "general")
+            kind: Only entries of this kind
+            name_prefix: Only files whose name (within the folder) starts with this
+            modified_after: Only files modified at or after this time
+            modified_before: Only files modified before this time
+            page_size: Maximum number of entries (None = all)
+            continuation_token: Token returned by the previous page
+
+        Returns:
+            Tuple (entries, next continuation token or None)
+        """
+        raise NotImplementedError
+
+    def find_expired(
+        self,
+        container_name: str,
+        expiry_bucket: str,
+        cutoff_time: datetime,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Select expired user files
+
+        A file is expired when its expiry tag is <= expiry_bucket or, for
+        files without expiry tag, when it was last modified before
+        cutoff_time. General templates are never selected.
+
+        Args:
+            container_name: Name of the container
+            expiry_bucket: Expiry bucket threshold (see config.get_expiry_bucket)
+            cutoff_time: Modification time threshold for untagged files
+            limit: Maximum number of entries (None = all)
+
+        Returns:
+            Expired entries
+        """
+        raise NotImplementedError
+
+    def iter_container(self, container_name: str) -> Iterable[Dict]:
+        """Iterate over all entries of a container (used by reconciliation)"""
+        raise NotImplementedError
+
+
+class SqliteBlobIndex(BlobIndex):
+    """Index SQLite (développement local / tests hors Azure)"""
+
+    COLUMNS = ("container", "name", "folder", "file_name", "user_folder", "kind", "size", "last_modified", "expires_at")
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the SQLite index
+
+        Args:
+            path: Database file path (":memory:" for an in-memory index)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS blob_index (
+                    container TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    folder TEXT NOT NULL,
+                    file_name TEXT NOT NULL,
+                    user_folder TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_modified TEXT NOT NULL,
+                    expires_at TEXT,
+                    PRIMARY KEY (container, name)
+                );
+                CREATE INDEX IF NOT EXISTS ix_blob_index_folder ON blob_index (container, folder, file_name);
+                CREATE INDEX IF NOT EXISTS ix_blob_index_expiry ON blob_index (container, expires_at);
+                CREATE INDEX IF NOT EXISTS ix_blob_index_modified ON blob_index (container, last_modified);
+            """)
+
+    @staticmethod
+    def _to_row(entry: Dict) -> Tuple:
+        return tuple(
+            entry[column].astimezone(timezone.utc).isoformat() if column == "last_modified" else entry[column]
+            for column in SqliteBlobIndex.COLUMNS
+        )
+
+    @staticmethod
+    def _to_entry(row: sqlite3.Row) -> Dict:
+        entry = dict(row)
+        entry["last_modified"] = datetime.fromisoformat(entry["last_modified"])
+        return entry
+
+    def _select(self, where: str, params: List) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT * FROM blob_index WHERE {where}", params).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def upsert(self, entry: Dict) -> None:
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO blob_index ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                self._to_row(entry)
+            )
+
+    def remove(self, container_name: str, blob_name: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM blob_index WHERE container = ? AND name = ?", (container_name, blob_name))
+
+    def query_folder(
+        self,
+        container_name: str,
+        folder: str,
+        kind: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
+        page_size: Optional[int] = None,
+        continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        where = ["container = ?", "folder = ?"]
+        params = [container_name, folder]
+
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        if name_prefix:
+            where.append("file_name >= ? AND file_name < ?")
+            params.extend([name_prefix, _prefix_end(name_prefix)])
+        if modified_after:
+            where.append("last_modified >= ?")
+            params.append(modified_after.astimezone(timezone.utc).isoformat())
+        if modified_before:
+            where.append("last_modified < ?")
+            params.append(modified_before.astimezone(timezone.utc).isoformat())
+        if continuation_token:
+            # Keyset pagination: resume after the last file name returned
+            where.append("file_name > ?")
+            params.append(_decode_token(continuation_token))
+
+        query = " AND ".join(where) + " ORDER BY file_name"
+        if page_size:
+            # One extra row tells whether another page exists
+            query += " LIMIT ?"
+            params.append(page_size + 1)
+
+        entries = self._select(query, params)
+        if page_size and len(entries) > page_size:
+            entries = entries[:page_size]
+            return entries, _encode_token(entries[-1]["file_name"])
+        return entries, None
+
+    def find_expired(
+        self,
+        container_name: str,
+        expiry_bucket: str,
+        cutoff_time: datetime,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        query = (
+            "container = ? AND user_folder NOT IN ('', ?) AND ("
+            "(expires_at IS NOT NULL AND expires_at <= ?) OR "
+            "(expires_at IS NULL AND last_modified < ?))"
+            " ORDER BY name"
+        )
+        params = [container_name, PATH_TEMPLATES_GENERAL, expiry_bucket, cutoff_time.astimezone(timezone.utc).isoformat()]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self._select(query, params)
+
+    def iter_container(self, container_name: str) -> Iterable[Dict]:
+        return self._select("container = ? ORDER BY name", [container_name])
+
+
+class TableBlobIndex(BlobIndex):
+    """
+    Index Azure Table Storage
+
+    PartitionKey = container|dossier parent et RowKey = nom du fichier
+    (encodés, les clés n'acceptent pas "/", "\\", "#" ni "?"): la liste
+    d'un dossier est une requête sur une seule partition, triée par RowKey.
+
+    Chaque fichier utilisateur a aussi une entité d'expiration, copie de
+    l'entrée rangée par heure d'expiration: PartitionKey =
+    ~exp|container|t|{expires_at} (fichiers tagués) ou
+    ~exp|container|m|{heure de modification} (fichiers sans tag), RowKey =
+    chemin complet. La sélection des fichiers expirés est une requête sur
+    une plage de PartitionKey: son coût suit le nombre de fichiers expirés,
+    pas la taille de la table. L'entité principale garde la partition de
+    son entité d'expiration (ExpiryPartition) pour la déplacer à chaque
+    écriture.
+    """
+
+    EXPIRY_PREFIX = "~exp"
+
+    def __init__(self, connection_string: str, table_name: str = BLOB_INDEX_TABLE_NAME):
+        """
+        Connect to (and create if needed) the index table
+
+        Args:
+            connection_string: Storage account connection string
+            table_name: Table name
+        """
+        service = TableServiceClient.from_connection_string(connection_string)
+        self.table = service.create_table_if_not_exists(table_name)
+
+    @staticmethod
+    def _key(value: str) -> str:
+        return quote(value, safe=" ")
+
+    def _partition_key(self, container_name: str, folder: str) -> str:
+        return f"{self._key(container_name)}|{self._key(folder)}"
+
+    def _expiry_prefix(self, container_name: str, tagged: bool) -> str:
+        return f"{self.EXPIRY_PREFIX}|{self._key(container_name)}|{'t' if tagged else 'm'}|"
+
+    def _expiry_partition(self, entry: Dict) -> str:
+        """Partition of the expiry entity of entry ("" for general templates and root files)"""
+        if entry["user_folder"] in ("", PATH_TEMPLATES_GENERAL):
+            return ""
+        if entry["expires_at"]:
+            return self._expiry_prefix(entry["container"], tagged=True) + entry["expires_at"]
+        return self._expiry_prefix(entry["container"], tagged=False) + get_expiry_bucket(entry["last_modified"].timestamp())
+
+    def _to_entity(self, entry: Dict) -> Dict:
+        return {
+            "PartitionKey": self._partition_key(entry["container"], entry["folder"]),
+            "RowKey": self._key(entry["file_name"]),
+            "Container": entry["container"],
+            "Name": entry["name"],
+            "Folder": entry["folder"],
+            "FileName": entry["file_name"],
+            "UserFolder": entry["user_folder"],
+            "Kind": entry["kind"],
+            "Size": entry["size"],
+            "LastModified": entry["last_modified"],
+            # Chaîne vide plutôt qu'absente: les filtres OData ignorent les propriétés manquantes
+            "ExpiresAt": entry["expires_at"] or "",
+            "ExpiryPartition": self._expiry_partition(entry)
+        }
+
+    @staticmethod
+    def _to_entry(entity) -> Dict:
+        return {
+            "container": entity["Container"],
+            "name": entity["Name"],
+            "folder": entity["Folder"],
+            "file_name": entity["FileName"],
+            "user_folder": entity["UserFolder"],
+            "kind": entity["Kind"],
+            "size": entity["Size"],
+            "last_modified": entity["LastModified"],
+            "expires_at": entity["ExpiresAt"] or None
+        }
+
+    def _query(
+        self,
+        query_filter: str,
+        parameters: Dict,
+        page_size: Optional[int] = None,
+        continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        entities = self.table.query_entities(query_filter, parameters=parameters, results_per_page=page_size)
+        if not page_size:
+            return [self._to_entry(entity) for entity in entities], None
+
+        pages = entities.by_page(continuation_token=_decode_token(continuation_token) if continuation_token else None)
+        page = []
+        # Table Storage may return an empty page with a continuation token: keep reading
+        for entity_page in pages:
+            page = [self._to_entry(entity) for entity in entity_page]
+            if page:
+                break
+        next_token = pages.continuation_token
+        return page, _encode_token(next_token) if next_token else None
+
+    def _get_entity(self, container_name: str, blob_name: str):
+        folder, _, file_name = blob_name.rpartition("/")
+        try:
+            return self.table.get_entity(partition_key=self._partition_key(container_name, folder), row_key=self._key(file_name))
+        except ResourceNotFoundError:
+            return None
+
+    def _delete_entity(self, partition_key: str, row_key: str) -> None:
+        try:
+            self.table.delete_entity(partition_key=partition_key, row_key=row_key)
+        except ResourceNotFoundError:
+            pass
+
+    def upsert(self, entry: Dict) -> None:
+        previous = self._get_entity(entry["container"], entry["name"])
+        entity = self._to_entity(entry)
+        self.table.upsert_entity(entity, mode=UpdateMode.REPLACE)
+
+        expiry_partition = entity["ExpiryPartition"]
+        if expiry_partition:
+            self.table.upsert_entity(
+                {**entity, "PartitionKey": expiry_partition, "RowKey": self._key(entry["name"])},
+                mode=UpdateMode.REPLACE
+            )
+        # Written after the new one: a failure leaves a duplicate (refused at delete time), never a gap
+        if previous is not None and previous.get("ExpiryPartition") not in ("", None, expiry_partition):
+            self._delete_entity(previous["ExpiryPartition"], self._key(entry["name"]))
+
+    def remove(self, container_name: str, blob_name: str) -> None:
+        previous = self._get_entity(container_name, blob_name)
+        if previous is None:
+            return
+        if previous.get("ExpiryPartition"):
+            self._delete_entity(previous["ExpiryPartition"], self._key(blob_name))
+        self._delete_entity(previous["PartitionKey"], previous["RowKey"])
+
+    def remove_entry(self, entry: Dict) -> None:
+        # The entry may come from a stale expiry entity the main entity no longer points to
+        expiry_partition = self._expiry_partition(entry)
+        if expiry_partition:
+            self._delete_entity(expiry_partition, self._key(entry["name"]))
+        self.remove(entry["container"], entry["name"])
+
+    def query_folder(
+        self,
+        container_name: str,
+        folder: str,
+        kind: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
+        page_size: Optional[int] = None,
+        continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        query_filter = ["PartitionKey eq @pk"]
+        parameters = {"pk": self._partition_key(container_name, folder)}
+
+        if kind:
+            query_filter.append("Kind eq @kind")
+            parameters["kind"] = kind
+        if name_prefix:
+            encoded_prefix = self._key(name_prefix)
+            query_filter.append("RowKey ge @name_start and RowKey lt @name_end")
+            parameters["name_start"] = encoded_prefix
+            parameters["name_end"] = _prefix_end(encoded_prefix)
+        if modified_after:
+            query_filter.append("LastModified ge @after")
+            parameters["after"] = modified_after
+        if modified_before:
+            query_filter.append("LastModified lt @before")
+            parameters["before"] = modified_before
+
+        return self._query(" and ".join(query_filter), parameters, page_size, continuation_token)
+
+    def find_expired(
+        self,
+        container_name: str,
+        expiry_bucket: str,
+        cutoff_time: datetime,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        See BlobIndex.find_expired
+
+        Two range queries on the expiry partitions, oldest first: tagged
+        files up to expiry_bucket, then untagged files modified up to the
+        hour of cutoff_time (LastModified filters that last hour).
+        """
+        tagged_prefix = self._expiry_prefix(container_name, tagged=True)
+        untagged_prefix = self._expiry_prefix(container_name, tagged=False)
+        queries = [
+            ("PartitionKey ge @start and PartitionKey le @end", {"start": tagged_prefix, "end": tagged_prefix + expiry_bucket}),
+            (
+                "PartitionKey ge @start and PartitionKey le @end and LastModified lt @cutoff",
+                {
+                    "start": untagged_prefix,
+                    "end": untagged_prefix + get_expiry_bucket(cutoff_time.timestamp()),
+                    "cutoff": cutoff_time
+                }
+            )
+        ]
+
+        entries = []
+        for query_filter, parameters in queries:
+            # Iterating the results follows continuation tokens, empty pages included
+            for entity in self.table.query_entities(query_filter, parameters=parameters, results_per_page=limit):
+                entries.append(self._to_entry(entity))
+                if limit and len(entries) >= limit:
+                    return entries
+        return entries
+
+    def iter_container(self, container_name: str) -> Iterable[Dict]:
+        # Main entities only (range of the container's folder partitions)
+        start = f"{self._key(container_name)}|"
+        entities = self.table.query_entities(
+            "PartitionKey ge @start and PartitionKey lt @end",
+            parameters={"start": start, "end": _prefix_end(start)}
+        )
+        return (self._to_entry(entity) for entity in entities)
+
+
+# Singleton instance (False = index désactivé ou indisponible)
+_blob_index_instance = None
+
+
+def get_blob_index() -> Optional[BlobIndex]:
+    """
+    Get singleton instance of the configured blob index
+
+    Returns:
+        BlobIndex instance, or None if the index is disabled
+    """
+    global _blob_index_instance
+
+    if _blob_index_instance is None:
+        _blob_index_instance = False
+
+        if BLOB_INDEX_BACKEND == "sqlite":
+            _blob_index_instance = SqliteBlobIndex(BLOB_INDEX_SQLITE_PATH)
+        elif BLOB_INDEX_BACKEND == "table":
+            connection_string = (
+                os.getenv("BLOB_STORAGE_CONNECTION_STRING") or
+                os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+            )
+            if not TABLES_AVAILABLE:
+                logger.warning("BLOB_INDEX_BACKEND=table but azure-data-tables is not installed, index disabled")
+            elif not connection_string:
+                logger.warning("BLOB_INDEX_BACKEND=table but no storage connection string, index disabled")
+            else:
+                _blob_index_instance = TableBlobIndex(connection_string)
+        elif BLOB_INDEX_BACKEND != "none":
+            logger.warning(f"Unknown BLOB_INDEX_BACKEND '{BLOB_INDEX_BACKEND}', index disabled")
+
+    return _blob_index_instance or None
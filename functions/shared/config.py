@@ -3,11 +3,16 @@ Configuration centralisée pour l'infrastructure réelle
 Mapping entre les noms logiques du code et les noms réels dans Azure
 """
 
+import math
 import os
+import tempfile
+import time
+from typing import Dict, Optional
 
 # Blob Storage Containers
 CONTAINER_TEMPLATES = os.environ.get("BLOB_CONTAINER_TEMPLATES", "word-templates")
 CONTAINER_DOCUMENTS = os.environ.get("BLOB_CONTAINER_DOCUMENTS", "word-documents")
+CONTAINER_DIAGNOSTICS = os.environ.get("BLOB_CONTAINER_DIAGNOSTICS", "diagnostics")  # Profils, traces de requêtes
 
 # Pour compatibilité avec ancien code
 BLOB_CONTAINER_DEVIS = CONTAINER_TEMPLATES  # Ancien nom
@@ -38,6 +43,76 @@ SERVICE_CATEGORIES = {
     480810004: "Services Be-Cloud / IA"
 }
 
+# Tableaux de service des propositions: code crb02_service -> titre du tableau
+SERVICE_CODE_TO_NAME = {
+    "480810003": "Service cloud",
+    "480810000": "Services Cloud - Téléphonie",
+    "480810004": "Supports"
+}
+
+# Génération PDF: "sharepoint" (conversion SharePoint uniquement) ou
+# "auto" (renderer direct reportlab, repli sur SharePoint si le document n'est pas standard)
+PDF_RENDERER = os.environ.get("PDF_RENDERER", "sharepoint").lower()
+
+# Expiration des fichiers de travail (blob index tag "expires_at")
+# Valeur = epoch (secondes) arrondi à l'heure supérieure, sur 12 chiffres
+# pour que la comparaison lexicographique des tags suive l'ordre numérique
+EXPIRY_TAG = "expires_at"
+EXPIRY_BUCKET_SECONDS = 3600
+WORKING_FILE_TTL_HOURS = int(os.environ.get("WORKING_FILE_TTL_HOURS", 24))
+
+# Index des métadonnées des blobs (voir shared/blob_index.py)
+# "table" (Azure Table Storage), "sqlite" (développement local) ou "none"
+BLOB_INDEX_BACKEND = os.environ.get("BLOB_INDEX_BACKEND", "none").lower()
+BLOB_INDEX_TABLE_NAME = os.environ.get("BLOB_INDEX_TABLE_NAME", "blobindex")
+BLOB_INDEX_SQLITE_PATH = os.environ.get(
+    "BLOB_INDEX_SQLITE_PATH",
+    os.path.join(tempfile.gettempdir(), "blob_index.sqlite3")
+)
+
+# Durée de vie du cache en mémoire des listes (list_general_templates)
+LISTING_CACHE_TTL_SECONDS = int(os.environ.get("LISTING_CACHE_TTL_SECONDS", 300))
+
+# Upload direct des anciens devis (URL SAS en écriture seule, voir get_upload_url)
+UPLOAD_SAS_EXPIRY_MINUTES = int(os.environ.get("UPLOAD_SAS_EXPIRY_MINUTES", 15))
+UPLOAD_MAX_SIZE_MB = int(os.environ.get("UPLOAD_MAX_SIZE_MB", 25))
+UPLOAD_ALLOWED_EXTENSIONS = [".docx"]
+
+# Mesure des étapes de chaque requête (en-tête Server-Timing + log structuré)
+STAGE_TIMING_ENABLED = os.environ.get("STAGE_TIMING_ENABLED", "true").lower() == "true"
+
+# Métriques en mémoire (histogrammes de latence, compteurs de cache) exposées par /api/metrics
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+# Enregistre aussi chaque mesure dans un instrument OpenTelemetry (customMetrics avec TRACING_EXPORTER=azure_monitor)
+METRICS_PUSH_ENABLED = os.environ.get("METRICS_PUSH_ENABLED", "false").lower() == "true"
+
+# Tracing OpenTelemetry: "none", "console", "otlp" ou "azure_monitor" (voir shared/tracing.py)
+TRACING_EXPORTER = os.environ.get("TRACING_EXPORTER", "none").lower()
+
+# Profilage à la demande (voir shared/profiling.py): "off", "header" (en-tête X-Profile = PROFILING_TOKEN) ou "always"
+PROFILING_MODE = os.environ.get("PROFILING_MODE", "off").lower()
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+PROFILING_SAMPLE_INTERVAL_MS = int(os.environ.get("PROFILING_SAMPLE_INTERVAL_MS", 5))
+
+# Enregistrement des séquences de requêtes pour rejeu hors ligne (voir shared/trace_recorder.py): "off" ou "on"
+TRACE_RECORDING = os.environ.get("TRACE_RECORDING", "off").lower()
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 1.0))  # part des sessions (dossiers utilisateur) enregistrées
+TRACE_SALT = os.environ.get("TRACE_SALT", "")  # secret de pseudonymisation (HMAC) des dossiers et valeurs
+TRACE_FLUSH_SECONDS = int(os.environ.get("TRACE_FLUSH_SECONDS", 60))
+TRACE_FLUSH_EVENTS = int(os.environ.get("TRACE_FLUSH_EVENTS", 500))
+
+# Mémoire par requête (voir shared/memory_budget.py)
+MEMORY_TRACKING = os.environ.get("MEMORY_TRACKING", "rss").lower()  # "rss", "tracemalloc" ou "off"
+MEMORY_BASE_MB = int(os.environ.get("MEMORY_BASE_MB", 10))
+MEMORY_EXPANSION_FACTOR = float(os.environ.get("MEMORY_EXPANSION_FACTOR", 50))  # pic mesuré / taille du .docx
+MEMORY_REQUEST_BUDGET_MB = int(os.environ.get("MEMORY_REQUEST_BUDGET_MB", 768))  # 0 = pas de limite
+MEMORY_INSTANCE_BUDGET_MB = int(os.environ.get("MEMORY_INSTANCE_BUDGET_MB", 1200))  # Consumption: 1.5 GB
+MEMORY_QUEUE_TIMEOUT_SECONDS = int(os.environ.get("MEMORY_QUEUE_TIMEOUT_SECONDS", 30))
+
+# Pagination des listes (list_general, list_user, list_created)
+DEFAULT_LIST_PAGE_SIZE = 50
+MAX_LIST_PAGE_SIZE = 500
+
 # Chemins dans Blob Storage
 PATH_TEMPLATES_GENERAL = "general"  # Dossier templates généraux
 
@@ -78,6 +153,34 @@ def get_user_file_path(display_name: str, filename: str) -> str:
     """
     return f"{display_name}/{filename}"
 
+def get_expiry_bucket(timestamp: float, round_up: bool = False) -> str:
+    """
+    Retourne le bucket d'expiration (epoch arrondi à l'heure) au format tag
+
+    Args:
+        timestamp: Epoch en secondes
+        round_up: Arrondir à l'heure supérieure (à l'écriture) plutôt qu'inférieure (à la requête)
+
+    Returns:
+        Bucket sur 12 chiffres (ex: "001760871600")
+    """
+    rounding = math.ceil if round_up else math.floor
+    bucket = int(rounding(timestamp / EXPIRY_BUCKET_SECONDS)) * EXPIRY_BUCKET_SECONDS
+    return f"{bucket:012d}"
+
+def get_expiry_tags(ttl_hours: Optional[int] = None) -> Dict[str, str]:
+    """
+    Retourne les blob index tags d'un fichier de travail qui expire dans ttl_hours
+
+    Args:
+        ttl_hours: Durée de vie en heures (défaut: WORKING_FILE_TTL_HOURS)
+
+    Returns:
+        Tags à passer à upload_blob (ex: {"expires_at": "001760871600"})
+    """
+    ttl = WORKING_FILE_TTL_HOURS if ttl_hours is None else ttl_hours
+    return {EXPIRY_TAG: get_expiry_bucket(time.time() + ttl * 3600, round_up=True)}
+
 def map_dataverse_columns(data: dict, entity_type: str, reverse: bool = False) -> dict:
     """
     Convertit les noms de colonnes entre format logique et format Dataverse
@@ -8,6 +8,8 @@ import logging
 import requests
 from typing import Optional, Dict, List, Any
 from .auth_helper import get_auth_helper
+from .timing import timed_stage
+from .tracing import traced, record_http_response
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +33,10 @@ class DataverseClient:
         self.api_url = f"{self.dataverse_url}/api/data/v9.2"
         self.auth_helper = get_auth_helper()
 
+        # Connexions réutilisées; le hook renseigne le statut HTTP et les retries du span
+        self.session = requests.Session()
+        self.session.hooks["response"].append(record_http_response)
+
     def _get_headers(self) -> Dict[str, str]:
         """
         Get HTTP headers with authentication token
@@ -49,6 +55,8 @@ class DataverseClient:
             "Prefer": "return=representation"
         }
 
+    @timed_stage("dataverse")
+    @traced("dataverse.create", lambda a: {"dataverse.entity_set": a["entity_set"]})
     def create_record(self, entity_set: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new record in Dataverse
@@ -64,7 +72,7 @@ class DataverseClient:
             url = f"{self.api_url}/{entity_set}"
             headers = self._get_headers()
 
-            response = requests.post(url, json=data, headers=headers)
+            response = self.session.post(url, json=data, headers=headers)
             response.raise_for_status()
 
             result = response.json()
@@ -77,6 +85,8 @@ class DataverseClient:
                 logger.error(f"Response: {e.response.text}")
             raise
 
+    @timed_stage("dataverse")
+    @traced("dataverse.get", lambda a: {"dataverse.entity_set": a["entity_set"], "dataverse.record_id": a["record_id"]})
     def get_record(self, entity_set: str, record_id: str, select: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Get a record by ID
@@ -96,7 +106,7 @@ class DataverseClient:
                 url += f"?$select={','.join(select)}"
 
             headers = self._get_headers()
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
             response.raise_for_status()
 
             logger.info(f"Retrieved record {record_id} from {entity_set}")
@@ -106,6 +116,8 @@ class DataverseClient:
             logger.error(f"Failed to get record {record_id} from {entity_set}: {str(e)}")
             raise
 
+    @timed_stage("dataverse")
+    @traced("dataverse.query", lambda a: {"dataverse.entity_set": a["entity_set"]}, lambda records: {"dataverse.count": len(records)})
     def query_records(
         self,
         entity_set: str,
@@ -144,7 +156,7 @@ class DataverseClient:
                 url += "?" + "&".join(params)
 
             headers = self._get_headers()
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
             response.raise_for_status()
 
             result = response.json()
@@ -157,6 +169,8 @@ class DataverseClient:
             logger.error(f"Failed to query records from {entity_set}: {str(e)}")
             raise
 
+    @timed_stage("dataverse")
+    @traced("dataverse.update", lambda a: {"dataverse.entity_set": a["entity_set"], "dataverse.record_id": a["record_id"]})
     def update_record(self, entity_set: str, record_id: str, data: Dict[str, Any]) -> bool:
         """
         Update an existing record
@@ -173,7 +187,7 @@ class DataverseClient:
             url = f"{self.api_url}/{entity_set}({record_id})"
             headers = self._get_headers()
 
-            response = requests.patch(url, json=data, headers=headers)
+            response = self.session.patch(url, json=data, headers=headers)
             response.raise_for_status()
 
             logger.info(f"Updated record {record_id} in {entity_set}")
@@ -183,6 +197,8 @@ class DataverseClient:
             logger.error(f"Failed to update record {record_id} in {entity_set}: {str(e)}")
             raise
 
+    @timed_stage("dataverse")
+    @traced("dataverse.delete", lambda a: {"dataverse.entity_set": a["entity_set"], "dataverse.record_id": a["record_id"]})
     def delete_record(self, entity_set: str, record_id: str) -> bool:
         """
         Delete a record
@@ -198,7 +214,7 @@ class DataverseClient:
             url = f"{self.api_url}/{entity_set}({record_id})"
             headers = self._get_headers()
 
-            response = requests.delete(url, headers=headers)
+            response = self.session.delete(url, headers=headers)
             response.raise_for_status()
 
             logger.info(f"Deleted record {record_id} from {entity_set}")
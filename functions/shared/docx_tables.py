@@ -0,0 +1,43 @@
+"""
+Docx Tables
+Lecture des cellules d'un tableau Word en un seul parcours du XML
+
+Avec python-docx 1.1, row.cells reconstruit la grille de TOUT le tableau
+(table.row_cells -> table._cells) à chaque appel: lire une cellule par
+ligne coûte O(lignes²). table_rows() parcourt w:tr / w:tc une seule fois
+et applique les mêmes règles que python-docx (gridSpan, vMerge).
+"""
+
+from typing import List, NamedTuple
+
+from docx.oxml.simpletypes import ST_Merge
+from docx.table import Table, _Cell
+
+
+class TableRow(NamedTuple):
+    """One row of a table: its w:tr element and its cells, one per grid column"""
+    element: object
+    cells: List[_Cell]
+
+
+def table_rows(table: Table) -> List[TableRow]:
+    """
+    Rows of table with their cells, like [row.cells for row in table.rows] in linear time
+
+    A cell spanning several grid columns is repeated once per column; a cell
+    continuing a vertical merge is the cell of the row above at the same
+    grid column.
+    """
+    rows: List[TableRow] = []
+    previous: List[_Cell] = []
+    for tr in table._tbl.tr_lst:
+        cells: List[_Cell] = []
+        for tc in tr.tc_lst:
+            if tc.vMerge == ST_Merge.CONTINUE and len(cells) < len(previous):
+                cell = previous[len(cells)]
+            else:
+                cell = _Cell(tc, table)
+            cells.extend([cell] * tc.grid_span)
+        rows.append(TableRow(tr, cells))
+        previous = cells
+    return rows
@@ -0,0 +1,104 @@
+"""
+Folder Listing
+Liste les fichiers d'un dossier via l'index des métadonnées si activé, sinon via Blob Storage
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .blob_client import BlobStorageClient
+
+logger = logging.getLogger(__name__)
+
+
+def list_folder(
+    blob_client: BlobStorageClient,
+    container_name: str,
+    folder: str,
+    select: Callable[[Dict], Optional[Dict]],
+    page_size: Optional[int] = None,
+    continuation_token: Optional[str] = None,
+    kind: Optional[str] = None,
+    suffixes: Optional[Iterable[str]] = None,
+    delimiter: Optional[str] = "/",
+    name_prefix: Optional[str] = None,
+    modified_after: Optional[datetime] = None,
+    modified_before: Optional[datetime] = None,
+    include_metadata: bool = False,
+    use_index: bool = True
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    List the files of a folder and format them with select
+
+    With the metadata index enabled this is one indexed query on the
+    folder (direct children only); otherwise Blob Storage is listed, with
+    the date range applied client-side. Results are in name order.
+    Blob metadata is not held by the index: include_metadata always lists
+    Blob Storage. So does use_index=False, for folders where files are
+    written outside the API and must be listed as soon as they exist.
+
+    Args:
+        blob_client: Blob Storage client
+        container_name: Name of the container
+        folder: Folder path without trailing slash (e.g. "Eric FER")
+        select: Maps a blob / index entry dict to the returned item, or None to skip it
+        page_size: Items per page (None = everything, no continuation token)
+        continuation_token: Token returned by the previous page
+        kind: Index kind of the files (template, working, word, pdf)
+        suffixes: Blob listing only: keep blobs with one of these suffixes
+        delimiter: Blob listing only: list direct children only (None = whole subtree)
+        name_prefix: Only files whose name within the folder starts with this
+        modified_after: Only files modified at or after this time
+        modified_before: Only files modified before this time
+        include_metadata: Return the blob metadata ("metadata" key)
+        use_index: Query the metadata index when it is enabled
+
+    Returns:
+        Tuple (items, next continuation token or None)
+    """
+    if blob_client.index is not None and use_index and not include_metadata:
+        entries, next_token = blob_client.index.query_folder(
+            container_name,
+            folder,
+            kind=kind,
+            name_prefix=name_prefix,
+            modified_after=modified_after,
+            modified_before=modified_before,
+            page_size=page_size,
+            continuation_token=continuation_token
+        )
+        return [item for item in map(select, entries) if item is not None], next_token
+
+    def select_in_range(blob: Dict) -> Optional[Dict]:
+        if modified_after and blob['last_modified'] < modified_after:
+            return None
+        if modified_before and blob['last_modified'] >= modified_before:
+            return None
+        return select(blob)
+
+    prefix = f"{folder}/{name_prefix or ''}"
+
+    if page_size:
+        return blob_client.list_blobs_filtered_page(
+            container_name=container_name,
+            page_size=page_size,
+            name_starts_with=prefix,
+            continuation_token=continuation_token,
+            select=select_in_range,
+            delimiter=delimiter,
+            suffixes=suffixes,
+            include_metadata=include_metadata
+        )
+
+    if delimiter:
+        blobs = blob_client.walk_blobs(
+            container_name,
+            name_starts_with=prefix,
+            delimiter=delimiter,
+            suffixes=suffixes,
+            include_metadata=include_metadata
+        )
+    else:
+        blobs = blob_client.list_blobs_with_metadata(container_name, name_starts_with=prefix, include_metadata=include_metadata)
+    return [item for item in map(select_in_range, blobs) if item is not None], None
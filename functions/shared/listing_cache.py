@@ -0,0 +1,154 @@
+"""
+Listing Cache
+Cache en mémoire (par instance) des listes de blobs, avec TTL et invalidation sur écriture
+
+Le TTL borne la fraîcheur entre instances (une écriture faite par une
+autre instance ou hors de l'API n'invalide que le cache local).
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import LISTING_CACHE_TTL_SECONDS
+from .metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Attente maximale d'un chargement en cours par un autre thread
+LOAD_WAIT_TIMEOUT_SECONDS = 30
+
+
+def compute_etag(value: Any) -> str:
+    """Return a strong ETag for a JSON-serializable value"""
+    digest = hashlib.sha1(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison, "*" matches)
+
+    Args:
+        if_none_match: Raw If-None-Match header value (None if absent)
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the client copy is current (304 Not Modified)
+    """
+    if not if_none_match:
+        return False
+
+    for tag in (tag.strip() for tag in if_none_match.split(",")):
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ListingCache:
+    """
+    Cache TTL clé = (container, préfixe)
+
+    Un seul chargement par clé à la fois (single-flight): les appels
+    concurrents sur une clé expirée attendent le résultat du premier au
+    lieu de relancer chacun un listing.
+    """
+
+    def __init__(self, ttl_seconds: float = LISTING_CACHE_TTL_SECONDS):
+        """
+        Args:
+            ttl_seconds: Lifetime of a cached listing (0 disables caching)
+        """
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Tuple[float, Any, str]] = {}
+        self._loading: Dict[Tuple[str, str], threading.Event] = {}
+        # Incrémenté à chaque invalidation: un chargement commencé avant
+        # une invalidation n'est pas mis en cache
+        self._versions: Dict[Tuple[str, str], int] = {}
+
+    def get_or_load(self, container_name: str, prefix: str, loader: Callable[[], Any]) -> Tuple[Any, str]:
+        """
+        Return the cached listing for (container, prefix), loading it if missing or expired
+
+        Args:
+            container_name: Name of the container
+            prefix: Listed prefix (e.g. "general/")
+            loader: Produces the listing (JSON-serializable)
+
+        Returns:
+            Tuple (listing, ETag)
+        """
+        key = (container_name, prefix)
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    # Also a hit when the entry was just loaded by a concurrent caller
+                    record_cache_lookup("listing", hit=True)
+                    return entry[1], entry[2]
+
+                event = self._loading.get(key)
+                leader = event is None
+                if leader:
+                    event = threading.Event()
+                    self._loading[key] = event
+                    version = self._versions.get(key, 0)
+
+            if not leader:
+                # Another thread is listing: wait, then re-check the cache
+                # (if that load failed, one of the waiters takes over)
+                event.wait(LOAD_WAIT_TIMEOUT_SECONDS)
+                continue
+
+            record_cache_lookup("listing", hit=False)
+
+            try:
+                value = loader()
+                etag = compute_etag(value)
+                with self._lock:
+                    if self.ttl_seconds > 0 and self._versions.get(key, 0) == version:
+                        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, etag)
+                return value, etag
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+                event.set()
+
+    def invalidate(self, container_name: str, blob_name: Optional[str] = None) -> None:
+        """
+        Drop cached listings that include blob_name (all listings of the container if None)
+
+        Args:
+            container_name: Name of the container
+            blob_name: Written or deleted blob
+        """
+        with self._lock:
+            for key in set(self._entries) | set(self._loading):
+                if key[0] == container_name and (blob_name is None or blob_name.startswith(key[1])):
+                    self._entries.pop(key, None)
+                    self._versions[key] = self._versions.get(key, 0) + 1
+                    logger.info(f"Invalidated listing cache: {container_name}/{key[1]}")
+
+
+# Singleton instance
+_listing_cache_instance: Optional[ListingCache] = None
+
+
+def get_listing_cache() -> ListingCache:
+    """
+    Get singleton instance of ListingCache
+
+    Returns:
+        ListingCache instance
+    """
+    global _listing_cache_instance
+
+    if _listing_cache_instance is None:
+        _listing_cache_instance = ListingCache()
+
+    return _listing_cache_instance
@@ -0,0 +1,239 @@
+"""
+Memory Budget
+Mesure de la mémoire par requête et contrôle d'admission selon la taille des documents lus
+
+Un document Word traité tient plusieurs fois en mémoire (octets téléchargés,
+arbre XML python-docx, BytesIO du save, getvalue()): le pic mesuré est
+d'environ 40 à 60 fois la taille du .docx. Chaque blob lu par
+BlobStorageClient.download_blob (observé via request_context) réserve donc
+MEMORY_BASE_MB + taille x MEMORY_EXPANSION_FACTOR sur le budget de l'instance,
+jusqu'à la fin de la requête:
+- au-delà de MEMORY_REQUEST_BUDGET_MB pour une requête: refus immédiat (413)
+- au-delà de MEMORY_INSTANCE_BUDGET_MB avec les requêtes en cours: attente
+  (jusqu'à MEMORY_QUEUE_TIMEOUT_SECONDS), puis refus (503 + Retry-After)
+La réservation a lieu quand la taille du blob est connue, c'est-à-dire
+après le premier GET du SDK: celui-ci a déjà chargé jusqu'à 32 Mo (tout le
+.docx en pratique). Ce qui est protégé est donc l'analyse python-docx, qui
+concentre l'essentiel du pic, pas le téléchargement lui-même (1x la taille).
+
+MEMORY_TRACKING choisit la mesure rapportée (log + métrique
+request_memory_megabytes):
+- "rss" (défaut): variation de la mémoire résidente du processus pendant la requête
+- "tracemalloc": pic des allocations Python (hors libxml2), exact seulement
+  sans requête concurrente (champ "exclusive")
+- "off": pas de mesure (le contrôle d'admission reste actif)
+Les deux mesures portent sur tout le processus: avec des requêtes
+concurrentes elles majorent la consommation de chacune.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import azure.functions as func
+
+from .config import (
+    MEMORY_TRACKING,
+    MEMORY_BASE_MB,
+    MEMORY_EXPANSION_FACTOR,
+    MEMORY_REQUEST_BUDGET_MB,
+    MEMORY_INSTANCE_BUDGET_MB,
+    MEMORY_QUEUE_TIMEOUT_SECONDS,
+    METRICS_ENABLED
+)
+from .metrics import get_metrics
+from .request_context import BlobObserver, observe_blobs
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised by RequestMemory.before_read when a request cannot be admitted"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RequestMemory(BlobObserver):
+    """Memory reservation and measurements of one request"""
+
+    def __init__(self):
+        self.input_bytes = 0
+        self.reserved_bytes = 0
+        # Set when the request was refused (the handler may swallow the exception)
+        self.rejection: Optional[MemoryBudgetExceeded] = None
+
+    def before_read(self, container_name: str, blob_name: str, size: int) -> None:
+        """
+        Reserve the predicted memory for a blob about to be processed
+
+        Raises:
+            MemoryBudgetExceeded: 413 if over the per-request budget, 503 if the
+                instance budget did not free up in time
+        """
+        # Inputs of one request add up; the base overhead is counted once
+        predicted = predict_peak_bytes(self.input_bytes + size)
+        needed = predicted - self.reserved_bytes
+
+        if MEMORY_REQUEST_BUDGET_MB and predicted > MEMORY_REQUEST_BUDGET_MB * MB:
+            self.rejection = MemoryBudgetExceeded(
+                f"Document too large to process: {blob_name} ({size / MB:.1f} MB, "
+                f"predicted {predicted / MB:.0f} MB > {MEMORY_REQUEST_BUDGET_MB} MB)",
+                status_code=413
+            )
+            raise self.rejection
+
+        if not _budget.reserve(needed, MEMORY_QUEUE_TIMEOUT_SECONDS):
+            self.rejection = MemoryBudgetExceeded(
+                f"Instance memory budget exhausted, retry later ({blob_name}, predicted {needed / MB:.0f} MB)",
+                status_code=503
+            )
+            raise self.rejection
+
+        self.input_bytes += size
+        self.reserved_bytes += needed
+
+
+class MemoryBudget:
+    """Instance-wide memory reservations (thread-safe)"""
+
+    def __init__(self, instance_budget_bytes: int):
+        self.instance_budget_bytes = instance_budget_bytes
+        self.reserved_bytes = 0
+        self.active_requests = 0
+        self._condition = threading.Condition()
+
+    def reserve(self, nbytes: int, timeout_seconds: float) -> bool:
+        """
+        Reserve nbytes, waiting while the instance budget is exhausted
+
+        A reservation is always granted when nothing else is reserved, so a
+        request within the per-request budget cannot wait forever.
+
+        Returns:
+            False if the budget did not free up within timeout_seconds
+        """
+        deadline = time.monotonic() + timeout_seconds
+        with self._condition:
+            while (
+                self.instance_budget_bytes
+                and self.reserved_bytes
+                and self.reserved_bytes + nbytes > self.instance_budget_bytes
+            ):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.reserved_bytes += nbytes
+            return True
+
+    def release(self, nbytes: int) -> None:
+        with self._condition:
+            self.reserved_bytes -= nbytes
+            self._condition.notify_all()
+
+    def enter(self) -> int:
+        with self._condition:
+            self.active_requests += 1
+            return self.active_requests
+
+    def leave(self) -> None:
+        with self._condition:
+            self.active_requests -= 1
+
+
+_budget = MemoryBudget(MEMORY_INSTANCE_BUDGET_MB * MB)
+
+if MEMORY_TRACKING == "tracemalloc" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def predict_peak_bytes(input_bytes: int) -> int:
+    """Predicted peak memory of processing a document of input_bytes"""
+    return int(MEMORY_BASE_MB * MB + input_bytes * MEMORY_EXPANSION_FACTOR)
+
+
+def _read_rss_bytes() -> Optional[int]:
+    """Resident set size of the process (Linux /proc), None if unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory_guarded_handler(handler: Callable[[func.HttpRequest], func.HttpResponse]) -> Callable:
+    """
+    Wrap an HTTP handler: hold its memory reservations, measure its memory
+    use, and answer 413 / 503 when download_blob refused the request
+    """
+    @functools.wraps(handler)
+    def wrapper(req: func.HttpRequest) -> func.HttpResponse:
+        account = RequestMemory()
+        exclusive = _budget.enter() == 1
+        if MEMORY_TRACKING == "tracemalloc" and exclusive:
+            tracemalloc.reset_peak()
+        rss_before = _read_rss_bytes() if MEMORY_TRACKING == "rss" else None
+
+        try:
+            with observe_blobs(account):
+                response = handler(req)
+        except MemoryBudgetExceeded:
+            response = None
+        finally:
+            _budget.leave()
+            if account.reserved_bytes:
+                _budget.release(account.reserved_bytes)
+
+        if account.rejection is not None:
+            logger.warning(f"Request refused by memory budget ({handler.__name__}): {str(account.rejection)}")
+            return func.HttpResponse(
+                json.dumps({"error": str(account.rejection)}),
+                status_code=account.rejection.status_code,
+                mimetype="application/json",
+                headers={"Retry-After": "10"} if account.rejection.status_code == 503 else None
+            )
+
+        _report(handler.__name__, account, rss_before, exclusive)
+        return response
+
+    return wrapper
+
+
+def _report(handler_name: str, account: RequestMemory, rss_before: Optional[int], exclusive: bool) -> None:
+    """Log the memory use of a request and record it in request_memory_megabytes"""
+    if MEMORY_TRACKING == "tracemalloc":
+        used = tracemalloc.get_traced_memory()[1]
+        measure = "tracemalloc_peak"
+    elif MEMORY_TRACKING == "rss" and rss_before is not None:
+        used = max((_read_rss_bytes() or rss_before) - rss_before, 0)
+        measure = "rss_delta"
+    else:
+        return
+
+    if METRICS_ENABLED:
+        get_metrics().observe("request_memory_megabytes", used / MB, handler=handler_name, measure=measure)
+
+    logger.info(
+        f"Memory {handler_name}: {measure}={used / MB:.1f}MB input={account.input_bytes / MB:.2f}MB "
+        f"predicted={account.reserved_bytes / MB:.1f}MB exclusive={exclusive}",
+        extra={"custom_dimensions": {
+            "handler": handler_name,
+            "measure": measure,
+            "used_bytes": used,
+            "input_bytes": account.input_bytes,
+            "predicted_bytes": account.reserved_bytes,
+            # used / input: calibrates MEMORY_EXPANSION_FACTOR
+            "expansion": round(used / account.input_bytes, 1) if account.input_bytes else None,
+            "exclusive": exclusive
+        }}
+    )
@@ -0,0 +1,296 @@
+"""
+Metrics
+Histogrammes de latence et compteurs en mémoire (par instance), exposés au format Prometheus
+
+- http_request_duration_seconds{handler, status}: durée de chaque route HTTP
+- dependency_duration_seconds{operation, outcome}: durée de chaque appel des clients partagés
+- cache_requests_total{cache, result}: hits / misses des caches (listing, sas)
+- request_memory_megabytes{handler, measure}: mémoire par requête (voir memory_budget)
+
+Les histogrammes sont log-linéaires (type HDR): 8 sous-intervalles par
+doublement, soit une erreur relative d'environ 9% sur les quantiles, en
+mémoire constante quel que soit le nombre de mesures. Avec
+METRICS_PUSH_ENABLED=true, chaque mesure est aussi enregistrée dans un
+instrument OpenTelemetry (customMetrics Application Insights avec
+TRACING_EXPORTER=azure_monitor).
+"""
+
+import functools
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import azure.functions as func
+
+from .config import METRICS_ENABLED, METRICS_PUSH_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Histogramme: [HISTOGRAM_MIN_VALUE, HISTOGRAM_MIN_VALUE * 2^HISTOGRAM_DOUBLINGS]
+# (0.1 ms à ~28 min pour les durées, 0.1 KB à ~1.6 GB pour les tailles en MB)
+HISTOGRAM_MIN_VALUE = 0.0001
+HISTOGRAM_SUB_BUCKETS = 8
+HISTOGRAM_DOUBLINGS = 24
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+METRIC_HELP = {
+    "http_request_duration_seconds": "Duration of HTTP requests per handler and status",
+    "dependency_duration_seconds": "Duration of shared client calls (Blob Storage, Dataverse, SharePoint, Azure AD)",
+    "cache_requests_total": "Cache lookups per cache and result (hit or miss)",
+    "request_memory_megabytes": "Memory used per request (RSS delta or tracemalloc peak), in MB"
+}
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """Log-linear histogram of positive values (durations in seconds, sizes in MB)"""
+
+    def __init__(self):
+        # counts[0]: <= HISTOGRAM_MIN_VALUE; counts[i]: (upper_bound(i - 1), upper_bound(i)]; last: overflow
+        self.counts = [0] * (HISTOGRAM_SUB_BUCKETS * HISTOGRAM_DOUBLINGS + 2)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def upper_bound(index: int) -> float:
+        return HISTOGRAM_MIN_VALUE * 2 ** (index / HISTOGRAM_SUB_BUCKETS)
+
+    def record(self, value: float) -> None:
+        if value <= HISTOGRAM_MIN_VALUE:
+            index = 0
+        else:
+            index = min(
+                math.ceil(math.log2(value / HISTOGRAM_MIN_VALUE) * HISTOGRAM_SUB_BUCKETS),
+                len(self.counts) - 1
+            )
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (capped at the observed max)"""
+        if not self.count:
+            return 0.0
+
+        rank = max(1, math.ceil(q * self.count))
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def prometheus_buckets(self) -> List[Tuple[str, int]]:
+        """Cumulative counts at each doubling (le="0.0001", "0.0002"...), then +Inf"""
+        buckets = []
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts[:-1]):
+            cumulative += bucket_count
+            if index % HISTOGRAM_SUB_BUCKETS == 0:
+                buckets.append((f"{self.upper_bound(index):.6g}", cumulative))
+        buckets.append(("+Inf", self.count))
+        return buckets
+
+
+def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Format a label set as {key="value",...} (empty string without labels)"""
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\"", '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in items) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe registry of latency histograms and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelSet, LatencyHistogram]] = {}
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._instruments: Dict[str, object] = {}
+        self.started = time.time()
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record a value (duration in seconds, size in MB) in the histogram name{labels}"""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = LatencyHistogram()
+            histogram.record(value)
+        if METRICS_PUSH_ENABLED:
+            self._push(name, "histogram", value, labels)
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        """Add value to the counter name{labels}"""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+        if METRICS_PUSH_ENABLED:
+            self._push(name, "counter", value, labels)
+
+    def _push(self, name: str, kind: str, value: float, labels: Dict[str, str]) -> None:
+        """Record into the OpenTelemetry instrument of the same name (no-op without opentelemetry)"""
+        instrument = self._instruments.get(name)
+        if instrument is None:
+            try:
+                from opentelemetry import metrics as otel_metrics
+            except ImportError:
+                return
+            meter = otel_metrics.get_meter(__name__)
+            if kind == "histogram":
+                unit = "s" if name.endswith("_seconds") else "MB"
+                instrument = meter.create_histogram(name, unit=unit, description=METRIC_HELP.get(name, ""))
+            else:
+                instrument = meter.create_counter(name, description=METRIC_HELP.get(name, ""))
+            self._instruments[name] = instrument
+
+        if kind == "histogram":
+            instrument.record(value, attributes=labels)
+        else:
+            instrument.add(value, attributes=labels)
+
+    def snapshot(self) -> Dict:
+        """
+        JSON view: count, mean, quantiles and max per histogram series,
+        counter values, and hit ratio per cache
+        """
+        with self._lock:
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "mean_ms": round(histogram.sum / histogram.count * 1000, 2) if histogram.count else 0,
+                        **{f"p{int(q * 100)}_ms": round(histogram.quantile(q) * 1000, 2) for q in QUANTILES},
+                        "max_ms": round(histogram.max * 1000, 2)
+                    }
+                    for labels, histogram in sorted(series.items())
+                ]
+                for name, series in sorted(self._histograms.items())
+            }
+            counters = {
+                name: [{"labels": dict(labels), "value": value} for labels, value in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            }
+
+        return {
+            "uptime_seconds": round(time.time() - self.started),
+            "histograms": histograms,
+            "counters": counters,
+            "cache_hit_ratio": self.cache_hit_ratios()
+        }
+
+    def cache_hit_ratios(self) -> Dict[str, float]:
+        """Hit ratio per cache (hits / lookups) from cache_requests_total"""
+        with self._lock:
+            lookups: Dict[str, List[float]] = {}
+            for labels, value in self._counters.get("cache_requests_total", {}).items():
+                label_dict = dict(labels)
+                totals = lookups.setdefault(label_dict.get("cache", ""), [0, 0])
+                totals[1] += value
+                if label_dict.get("result") == "hit":
+                    totals[0] += value
+        return {cache: round(hits / total, 4) for cache, (hits, total) in sorted(lookups.items()) if total}
+
+    def render_prometheus(self) -> str:
+        """Render every series in the Prometheus text exposition format (0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for le, cumulative in histogram.prometheus_buckets():
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+                # Precomputed quantiles, for dashboards without histogram_quantile()
+                base, unit = name.rsplit("_", 1)
+                quantile_name = f"{base}_quantile_{unit}"
+                lines.append(f"# HELP {quantile_name} Estimated quantiles of {name} since instance start")
+                lines.append(f"# TYPE {quantile_name} gauge")
+                for labels, histogram in sorted(series.items()):
+                    for q in QUANTILES:
+                        lines.append(f"{quantile_name}{_format_labels(labels, ('quantile', str(q)))} {histogram.quantile(q):.6f}")
+
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        ratios = self.cache_hit_ratios()
+        if ratios:
+            lines.append("# HELP cache_hit_ratio Cache hits / lookups since instance start")
+            lines.append("# TYPE cache_hit_ratio gauge")
+            for cache, ratio in ratios.items():
+                lines.append(f"cache_hit_ratio{_format_labels((('cache', cache),))} {ratio}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance
+_metrics_instance: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Get singleton instance of MetricsRegistry
+
+    Returns:
+        MetricsRegistry instance
+    """
+    global _metrics_instance
+
+    if _metrics_instance is None:
+        _metrics_instance = MetricsRegistry()
+
+    return _metrics_instance
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup (no-op when METRICS_ENABLED is false)"""
+    if METRICS_ENABLED:
+        get_metrics().increment("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def metered_handler(handler: Callable[[func.HttpRequest], func.HttpResponse]) -> Callable:
+    """
+    Wrap an HTTP handler: record its duration in http_request_duration_seconds
+
+    Returns the handler unchanged when METRICS_ENABLED is false.
+    """
+    if not METRICS_ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(req: func.HttpRequest) -> func.HttpResponse:
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = handler(req)
+            status_code = response.status_code
+            return response
+        finally:
+            get_metrics().observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - started,
+                handler=handler.__name__,
+                status=str(status_code)
+            )
+
+    return wrapper
@@ -0,0 +1,30 @@
+"""
+Handler Middleware
+Enveloppe commune de toutes les routes HTTP de function_app.py
+"""
+
+from typing import Callable
+
+import azure.functions as func
+
+from .memory_budget import memory_guarded_handler
+from .metrics import metered_handler
+from .profiling import profiled_handler
+from .timing import timed_handler
+from .trace_recorder import recorded_handler
+from .tracing import traced_handler
+
+
+def instrument_handler(handler: Callable[[func.HttpRequest], func.HttpResponse]) -> Callable:
+    """
+    Wrap an HTTP handler with every request middleware
+
+    Outermost first: on-demand profiler (profiling), request trace recorder
+    (trace_recorder), trace span (tracing), Server-Timing stages (timing),
+    latency histogram (metrics), memory budget (memory_budget). The profile
+    upload thus stays out of the span, the Server-Timing total and the
+    latency histograms, and requests refused by the memory budget are still
+    counted (413 / 503) and recorded. Each layer returns the handler
+    unchanged when it is disabled.
+    """
+    return profiled_handler(recorded_handler(traced_handler(timed_handler(metered_handler(memory_guarded_handler(handler))))))
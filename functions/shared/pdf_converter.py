@@ -0,0 +1,76 @@
+"""
+PDF Converter
+Convertit un document Word en PDF avec le backend configuré et stocke le résultat dans Blob Storage
+"""
+
+import logging
+from typing import Dict
+
+from .blob_client import BlobStorageClient
+from .config import PDF_RENDERER
+from .pdf_renderer import render_docx_to_pdf, UnsupportedDocumentError
+from .sharepoint_client import get_sharepoint_client
+from .timing import stage
+
+logger = logging.getLogger(__name__)
+
+
+def convert_to_pdf_blob(
+    blob_client: BlobStorageClient,
+    word_bytes: bytes,
+    container_name: str,
+    pdf_blob_name: str,
+    temp_file_name: str
+) -> Dict:
+    """
+    Convert a Word document to PDF and upload it to blob storage
+
+    Standard documents are rendered in-process when PDF_RENDERER=auto
+    (opt-in, default "sharepoint"); otherwise, or when the renderer cannot
+    reproduce the document or fails on it, the PDF is produced by
+    SharePoint and streamed straight into the blob.
+
+    Args:
+        blob_client: Blob Storage client
+        word_bytes: Word document content as bytes
+        container_name: Destination container
+        pdf_blob_name: Destination blob name for the PDF
+        temp_file_name: Temporary file name for the SharePoint conversion
+
+    Returns:
+        Dict with size (bytes) and renderer ("direct" or "sharepoint")
+    """
+    if PDF_RENDERER == "auto":
+        pdf_bytes = None
+        try:
+            with stage("pdf_render"):
+                pdf_bytes = render_docx_to_pdf(word_bytes)
+        except UnsupportedDocumentError as e:
+            logger.info(f"Direct PDF rendering not possible ({str(e)}), using SharePoint conversion")
+        except Exception as e:
+            # reportlab / python-docx error on a document the checks accepted: SharePoint still renders it
+            logger.warning(f"Direct PDF rendering failed ({type(e).__name__}: {str(e)}), using SharePoint conversion")
+
+        if pdf_bytes is not None:
+            blob_client.upload_blob(
+                container_name=container_name,
+                blob_name=pdf_blob_name,
+                data=pdf_bytes,
+                overwrite=True
+            )
+            return {"size": len(pdf_bytes), "renderer": "direct"}
+
+    # Stream the PDF from SharePoint straight into staged blob blocks:
+    # memory per conversion is bounded by the chunk size, not the PDF size
+    sharepoint_client = get_sharepoint_client()
+    pdf_upload = sharepoint_client.convert_word_to_pdf_streaming(
+        word_content=word_bytes,
+        file_name=temp_file_name,
+        consumer=lambda chunks: blob_client.upload_blob_stream(
+            container_name=container_name,
+            blob_name=pdf_blob_name,
+            chunks=chunks,
+            content_type="application/pdf"
+        )
+    )
+    return {"size": pdf_upload["size"], "renderer": "sharepoint"}
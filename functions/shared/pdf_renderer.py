@@ -0,0 +1,428 @@
+"""
+Direct PDF Renderer
+Génère le PDF d'une proposition directement depuis le document Word (sans conversion SharePoint)
+
+Le renderer ne couvre que les documents "standards": paragraphes, tableaux
+simples (fusions horizontales, comme ceux créés par create_service_table),
+images "en ligne avec le texte" seules dans leur paragraphe (logos), sauts
+de page et en-têtes/pieds de page texte (première page et pages paires
+distinctes comprises). Tout autre contenu (images flottantes ou dans un
+tableau, formes, zones de texte, fusions verticales, tableaux imbriqués,
+sections multiples) lève UnsupportedDocumentError et l'appelant doit
+utiliser la conversion SharePoint.
+"""
+
+import io
+import logging
+from typing import Any, Dict, List, Optional
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+
+logger = logging.getLogger(__name__)
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import (
+        Image, PageBreak, Paragraph as PdfParagraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    )
+    REPORTLAB_AVAILABLE = True
+    PDF_ALIGNMENTS = {
+        WD_ALIGN_PARAGRAPH.LEFT: TA_LEFT,
+        WD_ALIGN_PARAGRAPH.CENTER: TA_CENTER,
+        WD_ALIGN_PARAGRAPH.RIGHT: TA_RIGHT,
+        WD_ALIGN_PARAGRAPH.JUSTIFY: TA_JUSTIFY,
+    }
+    IMAGE_ALIGNMENTS = {TA_CENTER: "CENTER", TA_RIGHT: "RIGHT"}
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+    PDF_ALIGNMENTS = {}
+    IMAGE_ALIGNMENTS = {}
+
+# EMU (python-docx) -> points PDF
+EMU_PER_POINT = 12700
+
+# Marge intérieure du cadre SimpleDocTemplate (6 pt de chaque côté)
+FRAME_PADDING = 12
+
+# Éléments que le renderer ne sait pas reproduire fidèlement
+# (w:drawing est vérifié à part: seules les images en ligne sont reproduites)
+UNSUPPORTED_ELEMENTS = {
+    "w:pict": "legacy VML graphics",
+    "w:object": "embedded objects",
+    "w:txbxContent": "text boxes",
+    "w:sdt": "content controls",
+    "w:vMerge": "vertically merged cells",
+}
+
+# Couleurs proches du style Word "Light Grid Accent 1"
+TABLE_BORDER_COLOR = "#4F81BD"
+TABLE_HEADER_BACKGROUND = "#DBE5F1"
+
+
+class UnsupportedDocumentError(Exception):
+    """Le document contient des éléments que le renderer direct ne sait pas reproduire"""
+    pass
+
+
+def _inline_picture_blip(drawing: Any) -> Optional[Any]:
+    """Return the a:blip of an inline picture drawing (None for floating images, charts, shapes)"""
+    return drawing.find(
+        f"./{qn('wp:inline')}/{qn('a:graphic')}/{qn('a:graphicData')}/{qn('pic:pic')}/{qn('pic:blipFill')}/{qn('a:blip')}"
+    )
+
+
+def _check_supported(element: Any, where: str, inline_pictures: bool = False) -> None:
+    """
+    Raise UnsupportedDocumentError if the XML element contains unsupported content
+
+    Args:
+        element: lxml element to inspect (document body, header, footer)
+        where: Location used in the error message
+        inline_pictures: Accept inline pictures in top-level paragraphs (document body)
+    """
+    for tag, label in UNSUPPORTED_ELEMENTS.items():
+        if element.find(f".//{qn(tag)}") is not None:
+            raise UnsupportedDocumentError(f"{where} contains {label}")
+
+    for drawing in element.iter(qn("w:drawing")):
+        if not inline_pictures:
+            raise UnsupportedDocumentError(f"{where} contains images or shapes")
+        blip = _inline_picture_blip(drawing)
+        if blip is None or blip.get(qn("r:embed")) is None:
+            raise UnsupportedDocumentError(f"{where} contains floating or linked images, charts or shapes")
+        paragraph = next(drawing.iterancestors(qn("w:p")), None)
+        if paragraph is None or paragraph.getparent().tag != qn("w:body"):
+            raise UnsupportedDocumentError(f"{where} contains images in tables")
+
+    for tbl in element.iter(qn("w:tbl")):
+        if tbl.find(f".//{qn('w:tbl')}") is not None:
+            raise UnsupportedDocumentError(f"{where} contains nested tables")
+
+    # Un sectPr dans un paragraphe = changement de section (orientation, marges...)
+    if element.find(f".//{qn('w:pPr')}/{qn('w:sectPr')}") is not None:
+        raise UnsupportedDocumentError(f"{where} contains multiple sections")
+
+
+def _escape(text: str) -> str:
+    """Escape text for reportlab paragraph markup"""
+    return (
+        text.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace("\t", "&nbsp;&nbsp;&nbsp;&nbsp;")
+        .replace("\n", "<br/>")
+    )
+
+
+def _paragraph_runs(paragraph: Paragraph) -> List[Run]:
+    """Return the runs of a paragraph, including runs nested in hyperlinks"""
+    return [Run(r, paragraph) for r in paragraph._p.xpath("./w:r | ./w:hyperlink/w:r")]
+
+
+def _paragraph_markup(paragraph: Paragraph) -> Dict[str, Any]:
+    """
+    Convert a Word paragraph into reportlab markup and layout hints
+
+    Returns:
+        Dict with markup, font_size (points or None), page_break
+    """
+    parts = []
+    font_size = None
+    page_break = False
+
+    for run in _paragraph_runs(paragraph):
+        if run._r.find(f".//{qn('w:br')}[@{qn('w:type')}='page']") is not None:
+            page_break = True
+
+        text = run.text
+        if not text:
+            continue
+
+        chunk = _escape(text)
+        bold = run.bold if run.bold is not None else bool(paragraph.style.font.bold)
+        if bold:
+            chunk = f"<b>{chunk}</b>"
+        if run.italic:
+            chunk = f"<i>{chunk}</i>"
+        if run.underline:
+            chunk = f"<u>{chunk}</u>"
+        parts.append(chunk)
+
+        if run.font.size is not None:
+            font_size = max(font_size or 0, run.font.size.pt)
+
+    if paragraph._p.find(f"./{qn('w:pPr')}/{qn('w:numPr')}") is not None and parts:
+        parts.insert(0, "&bull;&nbsp;")
+
+    return {
+        "markup": "".join(parts),
+        "font_size": font_size,
+        "page_break": page_break,
+    }
+
+
+class DirectPdfRenderer:
+    """Renderer PDF en Python pur (reportlab) pour les propositions standards"""
+
+    def __init__(self):
+        """Initialize renderer styles"""
+        if not REPORTLAB_AVAILABLE:
+            raise UnsupportedDocumentError("reportlab is not installed")
+
+        self.styles = getSampleStyleSheet()
+        self.body_style = self.styles["BodyText"]
+
+    def _paragraph_style(self, paragraph: Paragraph, font_size: Optional[float]) -> "ParagraphStyle":
+        """Map the Word paragraph style and alignment to a reportlab style"""
+        style_name = paragraph.style.name if paragraph.style is not None else ""
+
+        if style_name == "Title":
+            base = self.styles["Title"]
+        elif style_name.startswith("Heading 1"):
+            base = self.styles["Heading1"]
+        elif style_name.startswith("Heading 2"):
+            base = self.styles["Heading2"]
+        elif style_name.startswith("Heading"):
+            base = self.styles["Heading3"]
+        else:
+            base = self.body_style
+
+        overrides = {}
+        alignment = PDF_ALIGNMENTS.get(paragraph.alignment)
+        if alignment is not None:
+            overrides["alignment"] = alignment
+        if font_size:
+            overrides["fontSize"] = font_size
+            overrides["leading"] = font_size * 1.2
+
+        if not overrides:
+            return base
+        return ParagraphStyle(f"{base.name}-custom", parent=base, **overrides)
+
+    def _render_picture(self, paragraph: Paragraph, drawing: Any, max_width: float, max_height: float) -> "Image":
+        """
+        Render an inline picture at its Word size (scaled down to fit the frame)
+
+        Args:
+            paragraph: Paragraph holding the picture (alignment, image part)
+            drawing: w:drawing element of the picture
+            max_width: Available width in points
+            max_height: Available height in points
+        """
+        extent = drawing.find(f"./{qn('wp:inline')}/{qn('wp:extent')}")
+        width = int(extent.get("cx")) / EMU_PER_POINT
+        height = int(extent.get("cy")) / EMU_PER_POINT
+        scale = min(1.0, max_width / width, max_height / height)
+
+        image_part = paragraph.part.related_parts[_inline_picture_blip(drawing).get(qn("r:embed"))]
+        image = Image(io.BytesIO(image_part.blob), width=width * scale, height=height * scale)
+        image.hAlign = IMAGE_ALIGNMENTS.get(PDF_ALIGNMENTS.get(paragraph.alignment), "LEFT")
+        return image
+
+    def _render_paragraph(self, paragraph: Paragraph, max_width: float, max_height: float) -> List[Any]:
+        """
+        Render a body paragraph as flowables
+
+        Args:
+            paragraph: Body paragraph
+            max_width: Available width in points (pictures)
+            max_height: Available height in points (pictures)
+        """
+        info = _paragraph_markup(paragraph)
+        drawings = list(paragraph._p.iter(qn("w:drawing")))
+        flowables = []
+
+        if drawings:
+            if info["markup"] or len(drawings) > 1:
+                raise UnsupportedDocumentError("body contains images sharing a paragraph with text or other images")
+            flowables.append(self._render_picture(paragraph, drawings[0], max_width, max_height))
+        elif info["markup"]:
+            style = self._paragraph_style(paragraph, info["font_size"])
+            flowables.append(PdfParagraph(info["markup"], style))
+        else:
+            # Paragraphe vide = espacement (ex: après un tableau de service)
+            flowables.append(Spacer(1, self.body_style.leading))
+
+        if info["page_break"]:
+            flowables.append(PageBreak())
+
+        return flowables
+
+    def _render_table(self, tbl: Any, parent: Any, frame_width: float) -> "Table":
+        """
+        Render a Word table (horizontal merges only) as a reportlab Table
+
+        Args:
+            tbl: CT_Tbl element
+            parent: python-docx parent used to build paragraphs
+            frame_width: Available width in points
+        """
+        grid_widths = [
+            int(col.get(qn("w:w"), 0)) for col in tbl.findall(f"./{qn('w:tblGrid')}/{qn('w:gridCol')}")
+        ]
+
+        data = []
+        spans = []
+        cell_style = ParagraphStyle("TableCell", parent=self.body_style, fontSize=9, leading=11)
+
+        for row_idx, tr in enumerate(tbl.tr_lst):
+            row = []
+            for tc in tr.tc_lst:
+                col_idx = len(row)
+                span = tc.grid_span
+                paragraphs = [Paragraph(p, parent) for p in tc.p_lst]
+                infos = [_paragraph_markup(p) for p in paragraphs]
+                markup = "<br/>".join(info["markup"] for info in infos if info["markup"])
+
+                alignment = next(
+                    (PDF_ALIGNMENTS.get(p.alignment) for p in paragraphs if p.alignment is not None),
+                    None
+                )
+                style = cell_style if alignment is None else ParagraphStyle(
+                    "TableCellAligned", parent=cell_style, alignment=alignment
+                )
+                row.append(PdfParagraph(markup, style))
+                row.extend([""] * (span - 1))
+
+                if span > 1:
+                    spans.append(("SPAN", (col_idx, row_idx), (col_idx + span - 1, row_idx)))
+            data.append(row)
+
+        col_count = max((len(row) for row in data), default=0)
+        for row in data:
+            row.extend([""] * (col_count - len(row)))
+
+        if len(grid_widths) == col_count and sum(grid_widths) > 0:
+            scale = frame_width / sum(grid_widths)
+            col_widths = [w * scale for w in grid_widths]
+        else:
+            col_widths = [frame_width / max(col_count, 1)] * col_count
+
+        style_commands = [
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor(TABLE_BORDER_COLOR)),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor(TABLE_HEADER_BACKGROUND)),
+        ] + spans
+
+        table = Table(data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(TableStyle(style_commands))
+        return table
+
+    def _header_footer_texts(self, document: Document) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Collect plain text of the first section headers and footers
+
+        Returns:
+            {"default": {"header": [...], "footer": [...]}}, plus "first" when the
+            first page has its own header/footer and "even" for even pages
+        """
+        section = document.sections[0]
+        variants = {"default": (section.header, section.footer)}
+        if section.different_first_page_header_footer:
+            variants["first"] = (section.first_page_header, section.first_page_footer)
+        if document.settings.odd_and_even_pages_header_footer:
+            variants["even"] = (section.even_page_header, section.even_page_footer)
+
+        texts = {}
+        for variant, parts in variants.items():
+            texts[variant] = {}
+            for kind, part in zip(("header", "footer"), parts):
+                # Section unique: un en-tête "lié" n'est pas défini, la page n'en a pas
+                if part.is_linked_to_previous:
+                    texts[variant][kind] = []
+                    continue
+                _check_supported(part._element, f"{variant} {kind}")
+                texts[variant][kind] = [p.text for p in part.paragraphs if p.text.strip()]
+        return texts
+
+    def render(self, docx_bytes: bytes) -> bytes:
+        """
+        Render a Word document as PDF
+
+        Args:
+            docx_bytes: Word document content as bytes
+
+        Returns:
+            PDF content as bytes
+
+        Raises:
+            UnsupportedDocumentError: If the document cannot be rendered faithfully
+        """
+        document = Document(io.BytesIO(docx_bytes))
+        body = document.element.body
+
+        _check_supported(body, "body", inline_pictures=True)
+        header_footer = self._header_footer_texts(document)
+
+        section = document.sections[0]
+        page_width = section.page_width / EMU_PER_POINT
+        page_height = section.page_height / EMU_PER_POINT
+        left = section.left_margin / EMU_PER_POINT
+        right = section.right_margin / EMU_PER_POINT
+        top = section.top_margin / EMU_PER_POINT
+        bottom = section.bottom_margin / EMU_PER_POINT
+        frame_width = page_width - left - right
+        frame_height = page_height - top - bottom
+
+        story = []
+        for child in body.iterchildren():
+            if child.tag == qn("w:p"):
+                story.extend(self._render_paragraph(
+                    Paragraph(child, document._body), frame_width - FRAME_PADDING, frame_height - FRAME_PADDING
+                ))
+            elif child.tag == qn("w:tbl"):
+                story.append(self._render_table(child, document._body, frame_width))
+
+        def draw_header_footer(canvas, doc_template):
+            page_number = canvas.getPageNumber()
+            if page_number == 1 and "first" in header_footer:
+                texts = header_footer["first"]
+            elif page_number % 2 == 0 and "even" in header_footer:
+                texts = header_footer["even"]
+            else:
+                texts = header_footer["default"]
+
+            canvas.saveState()
+            canvas.setFont("Helvetica", 8)
+            for idx, line in enumerate(texts["header"]):
+                canvas.drawString(left, page_height - top / 2 - idx * 10, line)
+            for idx, line in enumerate(texts["footer"]):
+                canvas.drawString(left, bottom / 2 + idx * 10, line)
+            canvas.restoreState()
+
+        output = io.BytesIO()
+        pdf = SimpleDocTemplate(
+            output,
+            pagesize=(page_width, page_height),
+            leftMargin=left,
+            rightMargin=right,
+            topMargin=top,
+            bottomMargin=bottom,
+        )
+        pdf.build(story, onFirstPage=draw_header_footer, onLaterPages=draw_header_footer)
+
+        pdf_bytes = output.getvalue()
+        logger.info(f"Rendered PDF directly ({len(pdf_bytes)} bytes)")
+        return pdf_bytes
+
+
+def render_docx_to_pdf(docx_bytes: bytes) -> bytes:
+    """
+    Render a standard proposal Word document to PDF in-process
+
+    Args:
+        docx_bytes: Word document content as bytes
+
+    Returns:
+        PDF content as bytes
+
+    Raises:
+        UnsupportedDocumentError: If the document needs the conversion backend
+    """
+    return DirectPdfRenderer().render(docx_bytes)
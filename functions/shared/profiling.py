@@ -0,0 +1,200 @@
+"""
+Profiling
+Profilage à la demande d'une requête HTTP (cProfile + échantillonnage de la pile)
+
+Activé par PROFILING_MODE:
+- "off" (défaut): aucune enveloppe, coût nul
+- "header": seules les requêtes portant l'en-tête X-Profile égal à
+  PROFILING_TOKEN (secret réservé aux admins) sont profilées
+- "always": toutes les requêtes (slot de diagnostic uniquement)
+
+Pour chaque requête profilée, trois fichiers sont écrits dans le container
+de diagnostic (BLOB_CONTAINER_DIAGNOSTICS) sous profiles/{date}/{handler}/:
+- .pstats: profil cProfile (python -m pstats, snakeviz)
+- .collapsed: piles échantillonnées au format "a;b;c N" (flamegraph.pl, speedscope)
+- .json: route, statut, durée et ETag des blobs lus pendant la requête,
+  pour retrouver le document qui a produit le profil
+"""
+
+import cProfile
+import functools
+import hmac
+import json
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import azure.functions as func
+from azure.core.exceptions import ResourceExistsError
+
+from .blob_client import get_blob_client
+from .config import (
+    PROFILING_MODE,
+    PROFILING_TOKEN,
+    PROFILING_SAMPLE_INTERVAL_MS,
+    CONTAINER_DIAGNOSTICS
+)
+from .request_context import BlobObserver, observe_blobs
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILES_PREFIX = "profiles"
+
+class InputBlobs(BlobObserver):
+    """Blobs read during the profiled request: list of {container, blob, etag}"""
+
+    def __init__(self):
+        self.blobs: List[Dict] = []
+
+    def blob_accessed(self, container_name: str, blob_name: str, etag: Optional[str], access: str) -> None:
+        if access == "read":
+            self.blobs.append({"container": container_name, "blob": blob_name, "etag": etag})
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval (collapsed stack counts)"""
+
+    def __init__(self, thread_id: int, interval_seconds: float):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def collapsed(self) -> str:
+        """Folded stacks, one "frame;frame;frame count" line per distinct stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _profiling_requested(req: func.HttpRequest) -> bool:
+    if PROFILING_MODE == "always":
+        return True
+    token = req.headers.get(PROFILE_HEADER)
+    return bool(PROFILING_TOKEN and token and hmac.compare_digest(token, PROFILING_TOKEN))
+
+
+def _store_profile(
+    handler_name: str,
+    req: func.HttpRequest,
+    status_code: int,
+    duration_seconds: float,
+    profiler: cProfile.Profile,
+    sampler: StackSampler,
+    input_blobs: List[Dict]
+) -> Optional[str]:
+    """
+    Upload the profile files to the diagnostics container
+
+    Returns:
+        Blob path prefix of the files, or None if the upload failed
+    """
+    now = datetime.now(timezone.utc)
+    profile_id = f"{PROFILES_PREFIX}/{now:%Y-%m-%d}/{handler_name}/{now:%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    profiler.create_stats()
+    metadata = {
+        "handler": handler_name,
+        "method": req.method,
+        # Query string dropped: it may carry the function key (code=...)
+        "url": req.url.split("?")[0],
+        "status_code": status_code,
+        "duration_ms": round(duration_seconds * 1000, 1),
+        "profiled_at": now.isoformat(),
+        "input_blobs": input_blobs,
+        "sample_interval_ms": PROFILING_SAMPLE_INTERVAL_MS,
+        "sample_count": sum(sampler.stacks.values()),
+        "instance_id": os.environ.get("WEBSITE_INSTANCE_ID", "local"),
+        "python_version": sys.version.split()[0]
+    }
+
+    try:
+        container_client = get_blob_client().blob_service_client.get_container_client(CONTAINER_DIAGNOSTICS)
+        try:
+            container_client.create_container()
+        except ResourceExistsError:
+            pass
+
+        container_client.upload_blob(f"{profile_id}.pstats", marshal.dumps(profiler.stats), overwrite=True)
+        container_client.upload_blob(f"{profile_id}.collapsed", sampler.collapsed().encode("utf-8"), overwrite=True)
+        container_client.upload_blob(f"{profile_id}.json", json.dumps(metadata, indent=2).encode("utf-8"), overwrite=True)
+
+        logger.info(f"Stored profile {CONTAINER_DIAGNOSTICS}/{profile_id} ({metadata['duration_ms']} ms, {metadata['sample_count']} samples)")
+        return profile_id
+
+    except Exception as e:
+        logger.error(f"Failed to store profile {profile_id}: {str(e)}")
+        return None
+
+
+def profiled_handler(handler: Callable[[func.HttpRequest], func.HttpResponse]) -> Callable:
+    """
+    Wrap an HTTP handler: profile the requests selected by PROFILING_MODE
+
+    The profile location is returned in the X-Profile-Id response header.
+    Returns the handler unchanged when PROFILING_MODE is off (or "header"
+    without PROFILING_TOKEN).
+    """
+    if PROFILING_MODE == "off":
+        return handler
+    if PROFILING_MODE == "header" and not PROFILING_TOKEN:
+        logger.warning("PROFILING_MODE=header requires PROFILING_TOKEN, profiling disabled")
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(req: func.HttpRequest) -> func.HttpResponse:
+        if not _profiling_requested(req):
+            return handler(req)
+
+        input_blobs = InputBlobs()
+        sampler = StackSampler(threading.get_ident(), PROFILING_SAMPLE_INTERVAL_MS / 1000)
+        profiler = cProfile.Profile()
+        response = None
+        status_code = 500
+
+        started = time.perf_counter()
+        sampler.start()
+        profiler.enable()
+        try:
+            with observe_blobs(input_blobs):
+                response = handler(req)
+            status_code = response.status_code
+            return response
+        finally:
+            profiler.disable()
+            sampler.stop()
+
+            profile_id = _store_profile(
+                handler.__name__, req, status_code, time.perf_counter() - started,
+                profiler, sampler, input_blobs.blobs
+            )
+            if response is not None and profile_id:
+                response.headers[PROFILE_ID_HEADER] = profile_id
+
+    return wrapper
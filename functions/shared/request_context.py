@@ -0,0 +1,54 @@
+"""
+Request Context
+Observateurs des accès Blob Storage de la requête HTTP en cours
+
+BlobStorageClient signale ses lectures, écritures et suppressions à ce seul
+point d'extension, sans connaître ceux qui les observent. Les middlewares
+qui en ont besoin (budget mémoire, profilage, enregistrement des requêtes)
+s'abonnent pour la durée d'une requête avec observe_blobs(). Hors requête
+(timers, threads de travail), aucun observateur: les notifications sont
+des no-op.
+"""
+
+import contextlib
+from contextvars import ContextVar
+from typing import Iterator, Optional, Tuple
+
+
+class BlobObserver:
+    """Blob accesses of one request (both hooks do nothing by default)"""
+
+    def before_read(self, container_name: str, blob_name: str, size: int) -> None:
+        """
+        Called when the size of a blob being downloaded is known, before it is read in full
+
+        May raise to refuse the read (memory budget).
+        """
+
+    def blob_accessed(self, container_name: str, blob_name: str, etag: Optional[str], access: str) -> None:
+        """Called after a blob was read ("read"), written ("write") or deleted ("delete")"""
+
+
+_observers: ContextVar[Tuple[BlobObserver, ...]] = ContextVar("blob_observers", default=())
+
+
+@contextlib.contextmanager
+def observe_blobs(observer: BlobObserver) -> Iterator[BlobObserver]:
+    """Notify observer of the blob accesses of the current request until the block exits"""
+    token = _observers.set(_observers.get() + (observer,))
+    try:
+        yield observer
+    finally:
+        _observers.reset(token)
+
+
+def notify_before_read(container_name: str, blob_name: str, size: int) -> None:
+    """Announce a blob read to the observers of the current request (see BlobObserver.before_read)"""
+    for observer in _observers.get():
+        observer.before_read(container_name, blob_name, size)
+
+
+def notify_blob_accessed(container_name: str, blob_name: str, etag: Optional[str], access: str) -> None:
+    """Report a blob access to the observers of the current request"""
+    for observer in _observers.get():
+        observer.blob_accessed(container_name, blob_name, etag, access)
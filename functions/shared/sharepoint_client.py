@@ -3,14 +3,39 @@ SharePoint client for file operations and Word to PDF conversion
 """
 
 import os
+import re
+import uuid
+import hashlib
 import logging
+import threading
 import requests
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Iterator, Callable, TypeVar, List, Dict
 from .auth_helper import get_auth_helper
 from .logger import setup_logger
+from .timing import timed_stage
+from .tracing import traced, record_http_response
 
 logger = setup_logger(__name__)
 
+# Taille des chunks lus depuis SharePoint en mode streaming (1 MiB)
+PDF_STREAM_CHUNK_SIZE = int(os.environ.get("SHAREPOINT_PDF_CHUNK_SIZE", 1024 * 1024))
+
+# Sharding de la bibliothèque temporaire: {library}/{YYYYMMDD}/{shard}
+# (reste loin du seuil de 5000 éléments par dossier de SharePoint)
+TEMP_LIBRARY_SHARDS = int(os.environ.get("SHAREPOINT_TEMP_SHARDS", 16))
+
+# Suppressions différées: délai avant envoi du $batch et taille max d'un $batch
+DELETE_FLUSH_DELAY_SECONDS = float(os.environ.get("SHAREPOINT_DELETE_FLUSH_SECONDS", 5))
+DELETE_BATCH_SIZE = 100
+
+T = TypeVar("T")
+
+
+def _odata_quote(value: str) -> str:
+    """Escape a value for an OData string literal (single quotes are doubled)"""
+    return value.replace("'", "''")
+
 
 class SharePointClient:
     """
@@ -41,6 +66,21 @@ class SharePointClient:
             logger.warning("SHAREPOINT_SITE_URL not configured")
 
         self.auth_helper = get_auth_helper()
+
+        # Connexions réutilisées par les threads de l'instance; le hook
+        # renseigne le statut HTTP et les retries du span
+        self.session = requests.Session()
+        self.session.hooks["response"].append(record_http_response)
+
+        # Dossiers de conversion déjà créés (évite un appel par conversion),
+        # partagés par les threads de l'instance
+        self._known_folders = set()
+        self._folders_lock = threading.Lock()
+        # Fichiers temporaires en attente de suppression par $batch
+        self._pending_deletes: List[str] = []
+        self._delete_lock = threading.Lock()
+        self._delete_timer: Optional[threading.Timer] = None
+
         self._initialized = True
 
         logger.info(f"SharePointClient initialized for site: {self.site_url}")
@@ -70,6 +110,8 @@ class SharePointClient:
             "Content-Type": "application/json;odata=verbose"
         }
 
+    @timed_stage("sharepoint")
+    @traced("sharepoint.upload", lambda a: {"sharepoint.file": a["file_name"], "sharepoint.size": len(a["file_content"])})
     def upload_file(
         self,
         file_name: str,
@@ -104,7 +146,7 @@ class SharePointClient:
         headers["Content-Type"] = "application/octet-stream"
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 upload_url,
                 headers=headers,
                 data=file_content,
@@ -122,6 +164,8 @@ class SharePointClient:
             logger.error(f"Failed to upload file to SharePoint: {str(e)}")
             raise Exception(f"SharePoint upload failed: {str(e)}")
 
+    @timed_stage("sharepoint")
+    @traced("sharepoint.download_pdf", lambda a: {"sharepoint.file": a["server_relative_url"]}, lambda pdf: {"sharepoint.size": len(pdf)})
     def download_file_as_pdf(self, server_relative_url: str) -> bytes:
         """
         Download a Word document from SharePoint as PDF
@@ -153,7 +197,7 @@ class SharePointClient:
         headers.pop("Content-Type", None)  # Remove Content-Type for download
 
         try:
-            response = requests.get(
+            response = self.session.get(
                 pdf_url,
                 headers=headers,
                 params=params,
@@ -169,6 +213,78 @@ class SharePointClient:
             logger.error(f"Failed to download PDF from SharePoint: {str(e)}")
             raise Exception(f"SharePoint PDF download failed: {str(e)}")
 
+    def download_file_as_pdf_stream(
+        self,
+        server_relative_url: str,
+        chunk_size: int = PDF_STREAM_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Download a Word document from SharePoint as PDF, chunk by chunk
+
+        Same conversion endpoint as download_file_as_pdf, but the response
+        is read with stream=True so that only one chunk is held in memory.
+        The PDF is requested without content encoding (iter_content yields
+        decoded bytes); when the server sends a Content-Length and no
+        Content-Encoding, the number of bytes received is checked against it
+        once the stream is exhausted.
+
+        Args:
+            server_relative_url: Server-relative URL of the Word file
+            chunk_size: Size of the chunks yielded
+
+        Yields:
+            PDF content chunks
+
+        Raises:
+            Exception if download or conversion fails, or if the PDF is truncated
+        """
+        pdf_url = f"{self.site_url}/_layouts/15/download.aspx"
+
+        params = {
+            "SourceUrl": server_relative_url,
+            "format": "pdf"
+        }
+
+        logger.info(f"Streaming file as PDF: {server_relative_url}")
+
+        headers = self._get_headers()
+        headers.pop("Content-Type", None)  # Remove Content-Type for download
+        headers["Accept-Encoding"] = "identity"
+
+        try:
+            with self.session.get(
+                pdf_url,
+                headers=headers,
+                params=params,
+                stream=True,
+                timeout=120  # PDF conversion can take time
+            ) as response:
+                response.raise_for_status()
+
+                # Content-Length is the encoded size: not comparable if the server still compressed
+                expected_size = None
+                if response.headers.get("Content-Encoding", "identity").lower() == "identity":
+                    expected_size = response.headers.get("Content-Length")
+                received_size = 0
+
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        received_size += len(chunk)
+                        yield chunk
+
+                if expected_size is not None and received_size != int(expected_size):
+                    raise Exception(
+                        f"Truncated PDF: received {received_size} bytes, expected {expected_size}"
+                    )
+
+                logger.info(f"PDF streamed successfully ({received_size} bytes)")
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to stream PDF from SharePoint: {str(e)}")
+            raise Exception(f"SharePoint PDF download failed: {str(e)}")
+
+    @timed_stage("sharepoint")
+    @traced("sharepoint.delete", lambda a: {"sharepoint.file": a["server_relative_url"]})
     def delete_file(self, server_relative_url: str) -> bool:
         """
         Delete file from SharePoint
@@ -188,7 +304,7 @@ class SharePointClient:
         headers["IF-MATCH"] = "*"
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 delete_url,
                 headers=headers,
                 timeout=30
@@ -202,6 +318,309 @@ class SharePointClient:
             logger.warning(f"Failed to delete file from SharePoint: {str(e)}")
             return False
 
+    def _ensure_folder(self, parent: str, name: str) -> str:
+        """
+        Create a folder under parent if it was not already created by this instance
+
+        Folders/add returns the existing folder when it already exists, so
+        the call is idempotent; the in-process cache only saves round trips.
+
+        Args:
+            parent: Server-relative (or library-relative) parent folder
+            name: Folder name
+
+        Returns:
+            Path of the folder (parent/name)
+        """
+        folder_path = f"{parent}/{name}"
+        with self._folders_lock:
+            if folder_path in self._known_folders:
+                return folder_path
+
+        add_url = (
+            f"{self.site_url}/_api/web/GetFolderByServerRelativeUrl('{_odata_quote(parent)}')"
+            f"/Folders/add(url='{_odata_quote(name)}')"
+        )
+
+        try:
+            response = self.session.post(add_url, headers=self._get_headers(), timeout=30)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to create SharePoint folder {folder_path}: {str(e)}")
+            raise Exception(f"SharePoint folder creation failed: {str(e)}")
+
+        with self._folders_lock:
+            self._known_folders.add(folder_path)
+        return folder_path
+
+    @staticmethod
+    def _temp_file_name(file_name: str) -> str:
+        """
+        Unique name of the temporary file of one conversion
+
+        Temporary files are deleted later (schedule_delete): two conversions
+        of the same document (concurrent users, retries) must never share a
+        file, or one's deferred delete could remove the other's upload.
+        """
+        return f"{uuid.uuid4().hex[:12]}_{file_name}"
+
+    def get_conversion_folder(self, file_name: str, now: Optional[datetime] = None) -> str:
+        """
+        Get (and create if needed) the partitioned temp folder for a conversion
+
+        Files are spread by day, then by a hash shard of the file name:
+        {temp_library}/{YYYYMMDD}/{shard}. Each folder stays far below the
+        5000-item list view threshold, and old days are easy to sweep.
+
+        Args:
+            file_name: Temporary file name
+            now: Reference time (defaults to current UTC time)
+
+        Returns:
+            Library-relative folder path
+        """
+        day = (now or datetime.now(timezone.utc)).strftime("%Y%m%d")
+        shard = int(hashlib.md5(file_name.encode("utf-8")).hexdigest(), 16) % max(TEMP_LIBRARY_SHARDS, 1)
+
+        day_folder = self._ensure_folder(self.temp_library, day)
+        return self._ensure_folder(day_folder, f"{shard:02x}")
+
+    @timed_stage("sharepoint")
+    @traced("sharepoint.delete_batch", lambda a: {"sharepoint.count": len(a["server_relative_urls"])})
+    def delete_files_batch(self, server_relative_urls: List[str]) -> Dict[str, bool]:
+        """
+        Delete several files in one SharePoint $batch request
+
+        Each delete is sent in its own changeset so one failure does not
+        affect the others. A 404 counts as deleted.
+
+        Args:
+            server_relative_urls: Server-relative URLs of the files (max 100)
+
+        Returns:
+            Dict mapping each URL to True (deleted) or False (failed)
+        """
+        if not server_relative_urls:
+            return {}
+
+        batch_boundary = f"batch_{uuid.uuid4()}"
+        parts = []
+        for url in server_relative_urls:
+            changeset_boundary = f"changeset_{uuid.uuid4()}"
+            parts.append(
+                f"--{batch_boundary}\r\n"
+                f"Content-Type: multipart/mixed; boundary={changeset_boundary}\r\n\r\n"
+                f"--{changeset_boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                "Content-Transfer-Encoding: binary\r\n\r\n"
+                f"DELETE {self.site_url}/_api/web/GetFileByServerRelativeUrl('{_odata_quote(url)}') HTTP/1.1\r\n"
+                "If-Match: *\r\n"
+                "Accept: application/json;odata=verbose\r\n\r\n"
+                f"--{changeset_boundary}--\r\n"
+            )
+        body = "".join(parts) + f"--{batch_boundary}--\r\n"
+
+        headers = self._get_headers()
+        headers["Content-Type"] = f"multipart/mixed; boundary={batch_boundary}"
+
+        logger.info(f"Deleting {len(server_relative_urls)} files from SharePoint ($batch)")
+
+        try:
+            response = self.session.post(
+                f"{self.site_url}/_api/$batch",
+                headers=headers,
+                data=body.encode("utf-8"),
+                timeout=60
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"SharePoint $batch delete failed: {str(e)}")
+            return {url: False for url in server_relative_urls}
+
+        # Une ligne de statut HTTP par opération, dans l'ordre d'envoi
+        statuses = [int(code) for code in re.findall(r"^HTTP/1\.1 (\d{3})", response.text, re.MULTILINE)]
+        results = {}
+        for idx, url in enumerate(server_relative_urls):
+            status = statuses[idx] if idx < len(statuses) else None
+            results[url] = status is not None and (200 <= status < 300 or status == 404)
+            if not results[url]:
+                logger.warning(f"Failed to delete {url} from SharePoint (status: {status})")
+
+        return results
+
+    def schedule_delete(self, server_relative_url: str) -> None:
+        """
+        Queue a temporary file for deletion off the request path
+
+        Deletions are accumulated and flushed as $batch requests by a
+        background timer. Files whose deletion fails are left to
+        sweep_temp_library.
+
+        Args:
+            server_relative_url: Server-relative URL of the file to delete
+        """
+        with self._delete_lock:
+            self._pending_deletes.append(server_relative_url)
+            if self._delete_timer is None:
+                self._delete_timer = threading.Timer(DELETE_FLUSH_DELAY_SECONDS, self.flush_pending_deletes)
+                self._delete_timer.daemon = True
+                self._delete_timer.start()
+
+    def flush_pending_deletes(self) -> int:
+        """
+        Delete all queued temporary files with $batch requests
+
+        Returns:
+            Number of files deleted
+        """
+        with self._delete_lock:
+            pending = self._pending_deletes
+            self._pending_deletes = []
+            self._delete_timer = None
+
+        deleted = 0
+        for start in range(0, len(pending), DELETE_BATCH_SIZE):
+            results = self.delete_files_batch(pending[start:start + DELETE_BATCH_SIZE])
+            deleted += sum(1 for ok in results.values() if ok)
+
+        if pending:
+            logger.info(f"Flushed deferred SharePoint deletes: {deleted}/{len(pending)} deleted")
+        return deleted
+
+    def _delete_folder(self, server_relative_url: str) -> bool:
+        """
+        Delete a folder (and its content) from SharePoint
+
+        Args:
+            server_relative_url: Server-relative URL of the folder
+
+        Returns:
+            True if deletion successful, False otherwise
+        """
+        delete_url = f"{self.site_url}/_api/web/GetFolderByServerRelativeUrl('{_odata_quote(server_relative_url)}')"
+
+        headers = self._get_headers()
+        headers["X-HTTP-Method"] = "DELETE"
+        headers["IF-MATCH"] = "*"
+
+        try:
+            response = self.session.post(delete_url, headers=headers, timeout=30)
+            response.raise_for_status()
+            logger.info(f"Deleted SharePoint folder: {server_relative_url}")
+            return True
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Failed to delete SharePoint folder {server_relative_url}: {str(e)}")
+            return False
+
+    def _list_folder(self, folder_path: str) -> Dict[str, list]:
+        """
+        List direct subfolders and files of a folder
+
+        Args:
+            folder_path: Server-relative (or library-relative) folder path
+
+        Returns:
+            Dict with "folders" and "files" (raw SharePoint metadata)
+        """
+        base_url = f"{self.site_url}/_api/web/GetFolderByServerRelativeUrl('{_odata_quote(folder_path)}')"
+        headers = self._get_headers()
+
+        try:
+            folders = self.session.get(
+                f"{base_url}/Folders?$select=Name,ServerRelativeUrl,ItemCount",
+                headers=headers,
+                timeout=30
+            )
+            folders.raise_for_status()
+            files = self.session.get(
+                f"{base_url}/Files?$select=ServerRelativeUrl,TimeLastModified",
+                headers=headers,
+                timeout=30
+            )
+            files.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to list SharePoint folder {folder_path}: {str(e)}")
+            raise Exception(f"SharePoint listing failed: {str(e)}")
+
+        return {
+            "folders": folders.json().get("d", {}).get("results", []),
+            "files": files.json().get("d", {}).get("results", [])
+        }
+
+    def sweep_temp_library(self, max_age_minutes: int = 60) -> Dict[str, int]:
+        """
+        Remove orphaned temporary conversion files older than max_age_minutes
+
+        Walks the temp library (legacy flat files, day folders and their
+        shards), deletes old files with $batch requests, then removes day
+        folders that are empty and older than today.
+
+        Args:
+            max_age_minutes: Minimum age of the files to delete
+
+        Returns:
+            Dict with scanned, deleted and failed counts
+        """
+        if not self.site_url:
+            raise Exception("SharePoint site URL not configured (SHAREPOINT_SITE_URL)")
+
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=max_age_minutes)
+        today = datetime.now(timezone.utc).strftime("%Y%m%d")
+        expired: List[str] = []
+        scanned = 0
+
+        def collect(listing: Dict[str, list]) -> None:
+            nonlocal scanned
+            for file_info in listing["files"]:
+                scanned += 1
+                modified = datetime.fromisoformat(file_info["TimeLastModified"].replace("Z", "+00:00"))
+                if modified < cutoff:
+                    expired.append(file_info["ServerRelativeUrl"])
+
+        root = self._list_folder(self.temp_library)
+        collect(root)
+
+        past_day_folders = []
+        for day_folder in root["folders"]:
+            if day_folder.get("Name") == "Forms":
+                continue  # dossier système de la bibliothèque
+            day_listing = self._list_folder(day_folder["ServerRelativeUrl"])
+            collect(day_listing)
+            for shard_folder in day_listing["folders"]:
+                collect(self._list_folder(shard_folder["ServerRelativeUrl"]))
+
+            name = day_folder.get("Name", "")
+            if re.fullmatch(r"\d{8}", name) and name < today:
+                past_day_folders.append(day_folder["ServerRelativeUrl"])
+
+        deleted = 0
+        for start in range(0, len(expired), DELETE_BATCH_SIZE):
+            results = self.delete_files_batch(expired[start:start + DELETE_BATCH_SIZE])
+            deleted += sum(1 for ok in results.values() if ok)
+
+        # Les dossiers des jours passés ne reçoivent plus de fichiers:
+        # on les supprime une fois vides
+        folders_removed = 0
+        for folder_url in past_day_folders:
+            listing = self._list_folder(folder_url)
+            remaining = sum(int(shard.get("ItemCount", 0)) for shard in listing["folders"])
+            if not listing["files"] and remaining == 0 and self._delete_folder(folder_url):
+                folders_removed += 1
+
+        # Seuls les dossiers du jour restent utiles au cache
+        with self._folders_lock:
+            self._known_folders = {f for f in self._known_folders if f.startswith(f"{self.temp_library}/{today}")}
+
+        logger.info(f"SharePoint temp sweep: scanned={scanned}, deleted={deleted}, failed={len(expired) - deleted}")
+        return {
+            "scanned": scanned,
+            "deleted": deleted,
+            "failed": len(expired) - deleted,
+            "folders_removed": folders_removed
+        }
+
+    @timed_stage("sharepoint")
+    @traced("sharepoint.convert_pdf", lambda a: {"sharepoint.file": a["file_name"], "sharepoint.size": len(a["word_content"])}, lambda pdf: {"sharepoint.pdf_size": len(pdf)})
     def convert_word_to_pdf(
         self,
         word_content: bytes,
@@ -211,14 +630,14 @@ class SharePointClient:
         Convert Word document to PDF using SharePoint
 
         Process:
-        1. Upload Word file to temporary SharePoint library
+        1. Upload Word file to a partitioned folder of the temporary library
         2. Request file as PDF (SharePoint converts automatically)
         3. Download the PDF
-        4. Delete temporary Word file
+        4. Queue the temporary Word file for deferred ($batch) deletion
 
         Args:
             word_content: Word document content as bytes
-            file_name: Name for the temporary file (should end with .docx)
+            file_name: Name for the temporary file (should end with .docx), made unique
 
         Returns:
             PDF content as bytes
@@ -233,9 +652,11 @@ class SharePointClient:
 
         try:
             # Step 1: Upload Word file
+            temp_name = self._temp_file_name(file_name)
             uploaded_file = self.upload_file(
-                file_name=file_name,
-                file_content=word_content
+                file_name=temp_name,
+                file_content=word_content,
+                library_name=self.get_conversion_folder(temp_name)
             )
 
             server_relative_url = uploaded_file.get("ServerRelativeUrl")
@@ -245,8 +666,8 @@ class SharePointClient:
             # Step 2: Download as PDF
             pdf_content = self.download_file_as_pdf(server_relative_url)
 
-            # Step 3: Clean up temporary file
-            self.delete_file(server_relative_url)
+            # Step 3: Clean up temporary file (off the request path)
+            self.schedule_delete(server_relative_url)
 
             logger.info("Word to PDF conversion completed successfully")
             return pdf_content
@@ -255,6 +676,61 @@ class SharePointClient:
             logger.error(f"Word to PDF conversion failed: {str(e)}")
             raise
 
+    @timed_stage("sharepoint")
+    @traced("sharepoint.convert_pdf", lambda a: {"sharepoint.file": a["file_name"], "sharepoint.size": len(a["word_content"])})
+    def convert_word_to_pdf_streaming(
+        self,
+        word_content: bytes,
+        file_name: str,
+        consumer: Callable[[Iterator[bytes]], T]
+    ) -> T:
+        """
+        Convert Word document to PDF using SharePoint, streaming the result
+
+        Same process as convert_word_to_pdf, but the PDF is never held in
+        memory as a whole: the chunk iterator is handed to the consumer
+        (typically BlobStorageClient.upload_blob_stream) while it downloads.
+        The temporary Word file is queued for deletion even if the consumer fails.
+
+        Args:
+            word_content: Word document content as bytes
+            file_name: Name for the temporary file (should end with .docx), made unique
+            consumer: Callable receiving the PDF chunk iterator
+
+        Returns:
+            Whatever the consumer returns
+
+        Raises:
+            Exception if conversion fails
+        """
+        if not self.site_url:
+            raise Exception("SharePoint site URL not configured (SHAREPOINT_SITE_URL)")
+
+        logger.info(f"Starting streamed Word to PDF conversion via SharePoint: {file_name}")
+
+        temp_name = self._temp_file_name(file_name)
+        uploaded_file = self.upload_file(
+            file_name=temp_name,
+            file_content=word_content,
+            library_name=self.get_conversion_folder(temp_name)
+        )
+
+        server_relative_url = uploaded_file.get("ServerRelativeUrl")
+        if not server_relative_url:
+            raise Exception("Failed to get ServerRelativeUrl from upload response")
+
+        try:
+            result = consumer(self.download_file_as_pdf_stream(server_relative_url))
+            logger.info("Streamed Word to PDF conversion completed successfully")
+            return result
+
+        except Exception as e:
+            logger.error(f"Streamed Word to PDF conversion failed: {str(e)}")
+            raise
+
+        finally:
+            self.schedule_delete(server_relative_url)
+
 
 def get_sharepoint_client() -> SharePointClient:
     """
@@ -0,0 +1,132 @@
+"""
+Template Analyzer
+Calcule les métadonnées d'un template (placeholders, tableaux, tableaux de service)
+
+Le résultat est stocké dans les métadonnées du blob (une fois par version
+du template) et retourné par list_general_templates sans ouvrir le DOCX.
+Les valeurs de métadonnées blob doivent être ASCII: les tableaux de
+service sont stockés par code crb02_service et retraduits en titres.
+"""
+
+import hashlib
+import io
+import re
+from typing import Dict, List, Optional
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+from .config import SERVICE_CODE_TO_NAME
+
+# Incrémenter quand le contenu de l'analyse change (force une nouvelle analyse)
+ANALYZER_VERSION = "1"
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([A-Za-z0-9_]+)\}\}")
+
+# Clés des métadonnées blob
+METADATA_VERSION = "analyzer_version"
+METADATA_SHA256 = "content_sha256"
+METADATA_PLACEHOLDERS = "placeholders"
+METADATA_TABLE_COUNT = "table_count"
+METADATA_SERVICE_TABLES = "service_tables"
+
+
+def _find_service_code(title: str) -> Optional[str]:
+    """Return the service code whose table title appears in the paragraph text"""
+    lower_title = title.lower()
+    for code, name in SERVICE_CODE_TO_NAME.items():
+        if name.lower() in lower_title:
+            return code
+    return None
+
+
+def analyze_template(docx_bytes: bytes) -> Dict:
+    """
+    Analyze a Word template
+
+    Placeholders are collected from body paragraphs, table cells, headers
+    and footers. A table is a service table when the nearest non-empty
+    paragraph before it contains a service table title (as created by
+    add_offer_line).
+
+    Args:
+        docx_bytes: Word document content as bytes
+
+    Returns:
+        Dict with placeholders (sorted names, without braces), table_count,
+        service_tables (service codes, document order) and content_sha256
+    """
+    document = Document(io.BytesIO(docx_bytes))
+    body = document.element.body
+
+    texts = [Paragraph(p, document._body).text for p in body.iter(qn("w:p"))]
+    for section in document.sections:
+        for part in (section.header, section.footer, section.first_page_header, section.first_page_footer):
+            if not part.is_linked_to_previous:
+                texts.extend(Paragraph(p, part).text for p in part._element.iter(qn("w:p")))
+
+    placeholders = sorted({name for text in texts for name in PLACEHOLDER_PATTERN.findall(text)})
+
+    table_count = 0
+    service_tables = []
+    last_title = ""
+    for child in body.iterchildren():
+        if child.tag == qn("w:p"):
+            text = Paragraph(child, document._body).text.strip()
+            if text:
+                last_title = text
+        elif child.tag == qn("w:tbl"):
+            table_count += 1
+            code = _find_service_code(last_title)
+            if code and code not in service_tables:
+                service_tables.append(code)
+            last_title = ""
+
+    return {
+        "placeholders": placeholders,
+        "table_count": table_count,
+        "service_tables": service_tables,
+        "content_sha256": hashlib.sha256(docx_bytes).hexdigest()
+    }
+
+
+def to_blob_metadata(analysis: Dict) -> Dict[str, str]:
+    """Encode an analysis as blob metadata (ASCII string values)"""
+    return {
+        METADATA_VERSION: ANALYZER_VERSION,
+        METADATA_SHA256: analysis["content_sha256"],
+        METADATA_PLACEHOLDERS: ",".join(analysis["placeholders"]),
+        METADATA_TABLE_COUNT: str(analysis["table_count"]),
+        METADATA_SERVICE_TABLES: ",".join(analysis["service_tables"])
+    }
+
+
+def is_analysis_current(metadata: Optional[Dict[str, str]], content_sha256: str) -> bool:
+    """Check whether blob metadata already holds the analysis of this content"""
+    metadata = metadata or {}
+    return metadata.get(METADATA_VERSION) == ANALYZER_VERSION and metadata.get(METADATA_SHA256) == content_sha256
+
+
+def from_blob_metadata(metadata: Optional[Dict[str, str]]) -> Optional[Dict]:
+    """
+    Decode template metadata for API responses
+
+    Returns:
+        Dict with placeholders, table_count and service_tables (codes and
+        titles), or None if the template has not been analyzed yet
+    """
+    if not metadata or METADATA_VERSION not in metadata:
+        return None
+
+    def split(value: Optional[str]) -> List[str]:
+        return [item for item in (value or "").split(",") if item]
+
+    return {
+        "placeholders": split(metadata.get(METADATA_PLACEHOLDERS)),
+        "table_count": int(metadata.get(METADATA_TABLE_COUNT) or 0),
+        "service_tables": [
+            {"code": code, "name": SERVICE_CODE_TO_NAME.get(code, code)}
+            for code in split(metadata.get(METADATA_SERVICE_TABLES))
+        ]
+    }
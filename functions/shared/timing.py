@@ -0,0 +1,182 @@
+"""
+Stage Timing
+Mesure la durée des étapes d'une requête (blob, python-docx, Dataverse, SharePoint...)
+
+Chaque route HTTP est enveloppée par timed_handler: les étapes mesurées
+pendant la requête avec stage(), mark_stage() ou @timed_stage sont
+additionnées par nom, renvoyées dans l'en-tête Server-Timing et loguées en
+un seul enregistrement structuré. Hors requête (timers, threads de travail) ou si
+STAGE_TIMING_ENABLED=false, stage() ne fait rien.
+"""
+
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+import azure.functions as func
+
+from .config import STAGE_TIMING_ENABLED, METRICS_ENABLED
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+
+class StageTimer:
+    """Accumulates the stage durations of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # End of the last stage (or last mark): start of the next mark_stage interval
+        self.boundary = self.started
+        # stage name -> [total seconds, count], in first-seen order
+        self.stages: Dict[str, list] = {}
+        self._active = set()
+
+    def record(self, name: str, seconds: float) -> None:
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Stage timings in milliseconds, with the request total"""
+        result = {
+            name: {"ms": round(seconds * 1000, 1), "count": count}
+            for name, (seconds, count) in self.stages.items()
+        }
+        result["total"] = {"ms": round(self.elapsed() * 1000, 1), "count": 1}
+        return result
+
+
+def format_server_timing(timings: Dict[str, Dict]) -> str:
+    """Format timings from StageTimer.to_dict as a Server-Timing header value"""
+    return ", ".join(f"{name};dur={timing['ms']}" for name, timing in timings.items())
+
+
+_current: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a named stage of the current request
+
+    Durations of a stage repeated in one request are summed. A stage nested
+    in a stage of the same name (e.g. a client method calling another timed
+    method) is only counted once.
+
+    Usage:
+        with stage("docx_parse"):
+            doc = Document(io.BytesIO(data))
+    """
+    timer = _current.get()
+    if timer is None or name in timer._active:
+        yield
+        return
+
+    timer._active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer._active.discard(name)
+        timer.boundary = time.perf_counter()
+        timer.record(name, timer.boundary - started)
+
+
+def mark_stage(name: str) -> None:
+    """
+    Record the time since the previous stage ended (or the request started) as a stage
+
+    For code spanning many statements, e.g. the document mutation between
+    docx_parse and docx_save:
+        mark_stage("docx_mutate")
+    """
+    timer = _current.get()
+    if timer is None:
+        return
+
+    now = time.perf_counter()
+    timer.record(name, now - timer.boundary)
+    timer.boundary = now
+
+
+def timed_stage(name: str) -> Callable:
+    """
+    Decorator timing every call of a function as the given stage
+
+    Each call is also recorded in the dependency_duration_seconds metric
+    (operation = qualified function name), inside or outside a request.
+    """
+    def decorator(function: Callable) -> Callable:
+        operation = function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not METRICS_ENABLED:
+                if _current.get() is None:
+                    return function(*args, **kwargs)
+                with stage(name):
+                    return function(*args, **kwargs)
+
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                with stage(name):
+                    result = function(*args, **kwargs)
+                outcome = "success"
+                return result
+            finally:
+                get_metrics().observe(
+                    "dependency_duration_seconds",
+                    time.perf_counter() - started,
+                    operation=operation,
+                    outcome=outcome
+                )
+        return wrapper
+    return decorator
+
+
+def timed_handler(handler: Callable[[func.HttpRequest], func.HttpResponse]) -> Callable:
+    """
+    Wrap an HTTP handler: collect its stage timings, add the Server-Timing
+    header to the response and log them as one structured record
+
+    Returns the handler unchanged when STAGE_TIMING_ENABLED is false.
+    """
+    if not STAGE_TIMING_ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(req: func.HttpRequest) -> func.HttpResponse:
+        timer = StageTimer()
+        token = _current.set(timer)
+        status_code = 500
+        response = None
+        try:
+            response = handler(req)
+            status_code = response.status_code
+            return response
+        finally:
+            _current.reset(token)
+            timings = timer.to_dict()
+            if response is not None:
+                response.headers[SERVER_TIMING_HEADER] = format_server_timing(timings)
+            logger.info(
+                f"Stage timings {handler.__name__} ({status_code}): "
+                + " ".join(f"{name}={timing['ms']}ms" for name, timing in timings.items()),
+                extra={"custom_dimensions": {
+                    "handler": handler.__name__,
+                    "status_code": status_code,
+                    "stage_timings": timings
+                }}
+            )
+
+    return wrapper
@@ -0,0 +1,282 @@
+"""
+Request Trace Recorder
+Enregistrement opt-in des séquences de requêtes par session, anonymisées, pour les rejouer hors ligne
+
+Activé par TRACE_RECORDING=on. Une session est un dossier utilisateur
+(user_folder, ou premier segment de file_path / blob_path); TRACE_SAMPLE_RATE
+choisit la part des sessions enregistrées, de façon déterministe (une
+session est enregistrée en entier ou pas du tout).
+
+Chaque requête donne un événement: route, méthode, statut, horodatage,
+durée, forme du corps et des paramètres, et ETag des blobs lus / écrits.
+Aucune valeur personnelle n'est conservée:
+- dossiers utilisateur et noms de fichiers utilisateur: pseudonymes HMAC
+  (TRACE_SALT, obligatoire: sans secret l'enregistrement reste désactivé),
+  stables d'une requête à l'autre
+- chaînes: longueur + référence HMAC (une même offre ajoutée puis
+  supprimée garde la même référence)
+- nombres: type seulement
+- seuls les champs de KEPT_FIELDS (codes service, quantités, nom de
+  template...) sont gardés tels quels
+
+Les événements sont regroupés en mémoire et écrits hors du chemin de la
+requête (toutes les TRACE_FLUSH_SECONDS ou tous les TRACE_FLUSH_EVENTS)
+dans le container de diagnostic, sous traces/{date}/, au format JSON Lines.
+benchmarks/replay.py les rejoue.
+"""
+
+import atexit
+import functools
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import azure.functions as func
+from azure.core.exceptions import ResourceExistsError
+
+from .blob_client import get_blob_client
+from .config import (
+    TRACE_RECORDING,
+    TRACE_SAMPLE_RATE,
+    TRACE_SALT,
+    TRACE_FLUSH_SECONDS,
+    TRACE_FLUSH_EVENTS,
+    CONTAINER_DIAGNOSTICS,
+    PATH_TEMPLATES_GENERAL
+)
+from .request_context import BlobObserver, observe_blobs
+
+logger = logging.getLogger(__name__)
+
+TRACES_PREFIX = "traces"
+TRACE_FORMAT_VERSION = 1
+
+# Valeurs sans donnée personnelle, conservées telles quelles
+KEPT_FIELDS = {
+    "template_name", "crb02_service", "quantity", "row_index", "container", "check_exists",
+    "permissions", "expiry_hours", "file_size", "overwrite", "page_size", "format", "mode",
+    "max_age_hours", "retry_failed", "max_workers", "time_budget_seconds"
+}
+# Dossier utilisateur seul / chemins "{dossier}/{fichier}"
+USER_FIELDS = {"user_folder"}
+PATH_FIELDS = {"file_path", "blob_path", "file_paths"}
+# Fichiers créés par l'API, dont le nom ne dit rien de l'utilisateur
+SYSTEM_FILES = {"temp_working.docx", ".keep", "ancien_devis.docx"}
+
+MAX_LIST_ITEMS = 100
+
+
+
+def pseudonym(value: str) -> str:
+    """Stable, non reversible reference of a value (HMAC-SHA256 with TRACE_SALT)"""
+    return hmac.new(TRACE_SALT.encode("utf-8"), value.encode("utf-8"), hashlib.sha256).hexdigest()[:12]
+
+
+def sanitize_path(path: str) -> str:
+    """
+    Pseudonymize a blob path
+
+    general/{template} is kept; in {folder}/{file}, the folder becomes
+    u-{pseudonym} and the file name f-{pseudonym}{ext} unless it is one
+    of SYSTEM_FILES.
+    """
+    folder, separator, name = path.partition("/")
+    if not separator:
+        return f"u-{pseudonym(path)}"
+    if folder == PATH_TEMPLATES_GENERAL:
+        return path
+    if name not in SYSTEM_FILES:
+        name = f"f-{pseudonym(name)}{os.path.splitext(name)[1]}"
+    return f"u-{pseudonym(folder)}/{name}"
+
+
+def shape(value: Any, key: Optional[str] = None) -> Any:
+    """
+    Sanitized shape of a JSON value (see the module docstring)
+
+    Returns:
+        {"value": v} for kept values, {"folder": ...} / {"path": ...} for
+        user folders and paths, {"str": length, "ref": ...},
+        {"number": "int" | "float"}, {"list": [...], "length": n},
+        {"object": {key: shape}}, or None
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return {"object": {name: shape(item, name) for name, item in value.items()}}
+    if isinstance(value, list):
+        return {"list": [shape(item, key) for item in value[:MAX_LIST_ITEMS]], "length": len(value)}
+    if key in KEPT_FIELDS or isinstance(value, bool):
+        return {"value": value}
+    if isinstance(value, (int, float)):
+        return {"number": type(value).__name__}
+    value = str(value)
+    if key in USER_FIELDS:
+        return {"folder": f"u-{pseudonym(value)}"}
+    if key in PATH_FIELDS:
+        return {"path": sanitize_path(value)}
+    return {"str": len(value), "ref": pseudonym(value)[:8]}
+
+
+def _session_folder(body: Any, params: Dict[str, str]) -> Optional[str]:
+    """User folder the request belongs to, if any"""
+    fields = dict(params)
+    if isinstance(body, dict):
+        fields.update(body)
+    if fields.get("user_folder"):
+        return str(fields["user_folder"])
+    for key in ("file_path", "blob_path", "file_paths"):
+        path = fields.get(key)
+        if isinstance(path, list):
+            path = path[0] if path else None
+        if isinstance(path, str) and "/" in path and not path.startswith(f"{PATH_TEMPLATES_GENERAL}/"):
+            return path.split("/")[0]
+    return None
+
+
+def _sampled(session: str) -> bool:
+    """Deterministic per session: the same folder is always in or out (requests without folder: at random)"""
+    if session == "anonymous":
+        return random.random() < TRACE_SAMPLE_RATE
+    return int(session[2:10], 16) / 0xFFFFFFFF < TRACE_SAMPLE_RATE
+
+
+class RequestBlobs(BlobObserver):
+    """Blobs touched by the recorded request: list of {container, blob, etag, access}"""
+
+    def __init__(self):
+        self.blobs: List[Dict] = []
+
+    def blob_accessed(self, container_name: str, blob_name: str, etag: Optional[str], access: str) -> None:
+        self.blobs.append({"container": container_name, "blob": sanitize_path(blob_name), "etag": etag, "access": access})
+
+
+class TraceRecorder:
+    """Buffers trace events and writes them to the diagnostics container in batches"""
+
+    def __init__(self):
+        self._events: List[Dict] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self.instance_id = os.environ.get("WEBSITE_INSTANCE_ID", "local")[:12]
+
+    def record(self, event: Dict) -> None:
+        with self._lock:
+            self._events.append(event)
+            flush_now = len(self._events) >= TRACE_FLUSH_EVENTS
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(TRACE_FLUSH_SECONDS, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            threading.Thread(target=self.flush, name="trace-flush", daemon=True).start()
+
+    def flush(self) -> int:
+        """
+        Write the buffered events as one JSON Lines blob
+
+        Returns:
+            Number of events written (0 if none, or if the upload failed: the events are dropped)
+        """
+        with self._lock:
+            events = self._events
+            self._events = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not events:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        blob_name = f"{TRACES_PREFIX}/{now:%Y-%m-%d}/{self.instance_id}-{now:%H%M%S}-{uuid.uuid4().hex[:8]}.jsonl"
+        data = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events).encode("utf-8")
+
+        try:
+            container_client = get_blob_client().blob_service_client.get_container_client(CONTAINER_DIAGNOSTICS)
+            try:
+                container_client.create_container()
+            except ResourceExistsError:
+                pass
+            container_client.upload_blob(blob_name, data, overwrite=True)
+            logger.info(f"Stored {len(events)} trace events in {CONTAINER_DIAGNOSTICS}/{blob_name}")
+            return len(events)
+
+        except Exception as e:
+            logger.error(f"Failed to store {len(events)} trace events: {str(e)}")
+            return 0
+
+
+_trace_recorder_instance: Optional[TraceRecorder] = None
+_trace_recorder_lock = threading.Lock()
+
+
+def get_trace_recorder() -> TraceRecorder:
+    """Get the trace recorder singleton (flushed at interpreter exit)"""
+    global _trace_recorder_instance
+    if _trace_recorder_instance is None:
+        with _trace_recorder_lock:
+            if _trace_recorder_instance is None:
+                _trace_recorder_instance = TraceRecorder()
+                atexit.register(_trace_recorder_instance.flush)
+    return _trace_recorder_instance
+
+
+def recorded_handler(handler: Callable[[func.HttpRequest], func.HttpResponse]) -> Callable:
+    """
+    Wrap an HTTP handler: record one trace event per request of a sampled session
+
+    Returns the handler unchanged when TRACE_RECORDING is off, or when
+    TRACE_SALT is empty (the pseudonyms of known folder names could be recomputed).
+    """
+    if TRACE_RECORDING != "on":
+        return handler
+    if not TRACE_SALT:
+        logger.warning("TRACE_RECORDING=on requires TRACE_SALT, recording disabled")
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(req: func.HttpRequest) -> func.HttpResponse:
+        try:
+            body = req.get_json() if req.get_body() else None
+        except ValueError:
+            body = None
+        # The function key (code=...) never enters a trace
+        params = {name: value for name, value in req.params.items() if name != "code"}
+        folder = _session_folder(body, params)
+        session = f"u-{pseudonym(folder)}" if folder else "anonymous"
+        if not _sampled(session):
+            return handler(req)
+
+        request_blobs = RequestBlobs()
+        started_at = time.time()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            with observe_blobs(request_blobs):
+                response = handler(req)
+            status_code = response.status_code
+            return response
+        finally:
+            get_trace_recorder().record({
+                "v": TRACE_FORMAT_VERSION,
+                "session": session,
+                "ts": round(started_at, 3),
+                "method": req.method,
+                "route": urlsplit(req.url).path.split("/api/", 1)[-1],
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "params": shape(params) if params else None,
+                "body": shape(body),
+                "blobs": request_blobs.blobs
+            })
+
+    return wrapper
@@ -0,0 +1,275 @@
+"""
+Tracing
+Spans OpenTelemetry autour des appels sortants (Blob Storage, Dataverse, SharePoint, Azure AD)
+
+Chaque route HTTP ouvre un span serveur (enveloppe traced_handler), parent
+des spans de dépendance créés par @traced sur les méthodes des clients
+partagés: une requête add-offer-line ou generate donne une trace complète.
+L'export est choisi par TRACING_EXPORTER:
+- "none" (défaut): aucun span, coût nul
+- "console": spans écrits sur la sortie standard (développement)
+- "otlp": collecteur OTLP/HTTP (OTEL_EXPORTER_OTLP_ENDPOINT, ex: Jaeger local)
+- "azure_monitor": Application Insights (APPLICATIONINSIGHTS_CONNECTION_STRING)
+
+Les paquets OpenTelemetry sont optionnels: s'ils manquent, le tracing reste désactivé.
+"""
+
+import functools
+import inspect
+import logging
+import os
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import azure.functions as func
+
+try:
+    from opentelemetry import trace, propagate
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+from .config import TRACING_EXPORTER
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "business-proposal-generator"
+
+# Tracer set by configure_tracing(); None = tracing disabled
+_tracer = None
+
+
+class _DependencyCall:
+    """HTTP attempts seen during one traced dependency call"""
+
+    def __init__(self, span):
+        self.span = span
+        # id(HTTP request) -> number of attempts (retries resend the same request)
+        self.attempts: Dict[int, int] = {}
+        # requests responses seen and urllib3 retries behind them
+        self.responses = 0
+        self.retries = 0
+
+    def record_attempt(self, request, status_code: Optional[int]) -> None:
+        self.attempts[id(request)] = self.attempts.get(id(request), 0) + 1
+        if status_code is not None:
+            self.span.set_attribute("http.status_code", status_code)
+
+    def record_response(self, status_code: int, retries: int) -> None:
+        self.responses += 1
+        self.retries += retries
+        self.span.set_attribute("http.status_code", status_code)
+
+    def retry_count(self) -> int:
+        return sum(count - 1 for count in self.attempts.values()) + self.retries
+
+
+_current_call: ContextVar[Optional[_DependencyCall]] = ContextVar("dependency_call", default=None)
+
+
+def configure_tracing() -> bool:
+    """
+    Install the tracer provider and exporter selected by TRACING_EXPORTER
+
+    Called once at startup (function_app.py); later calls are no-ops.
+
+    Returns:
+        True if tracing is enabled
+    """
+    global _tracer
+
+    if _tracer is not None:
+        return True
+    if TRACING_EXPORTER == "none":
+        return False
+    if not OTEL_AVAILABLE:
+        logger.warning(f"TRACING_EXPORTER={TRACING_EXPORTER} but opentelemetry is not installed, tracing disabled")
+        return False
+
+    try:
+        if TRACING_EXPORTER == "azure_monitor":
+            # Also instruments requests and the Azure SDK HTTP pipeline
+            from azure.monitor.opentelemetry import configure_azure_monitor
+            configure_azure_monitor()
+        elif TRACING_EXPORTER in ("console", "otlp"):
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+            if TRACING_EXPORTER == "otlp":
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                exporter = OTLPSpanExporter()
+            else:
+                exporter = ConsoleSpanExporter()
+
+            provider = TracerProvider(resource=Resource.create({
+                "service.name": os.environ.get("OTEL_SERVICE_NAME", TRACER_NAME)
+            }))
+            provider.add_span_processor(BatchSpanProcessor(exporter))
+            trace.set_tracer_provider(provider)
+            _instrument_http_libraries()
+        else:
+            logger.warning(f"Unknown TRACING_EXPORTER: {TRACING_EXPORTER}, tracing disabled")
+            return False
+
+    except ImportError as e:
+        logger.warning(f"Tracing exporter {TRACING_EXPORTER} not available ({str(e)}), tracing disabled")
+        return False
+
+    _tracer = trace.get_tracer(TRACER_NAME)
+    logger.info(f"Tracing enabled (exporter: {TRACING_EXPORTER})")
+    return True
+
+
+def _instrument_http_libraries() -> None:
+    """Add HTTP-level child spans when the instrumentation packages are installed"""
+    try:
+        from opentelemetry.instrumentation.requests import RequestsInstrumentor
+        RequestsInstrumentor().instrument()
+    except ImportError:
+        pass
+
+    try:
+        import azure.core.tracing.ext.opentelemetry_span  # noqa: F401
+        from azure.core.settings import settings
+        settings.tracing_implementation = "opentelemetry"
+    except ImportError:
+        pass
+
+
+def _set_attributes(span, attributes: Dict[str, Any]) -> None:
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(key, value)
+
+
+def _error_status_code(error: Exception) -> Optional[int]:
+    """HTTP status of an Azure SDK or requests error, if any"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None and getattr(error, "response", None) is not None:
+        status_code = getattr(error.response, "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def traced(
+    name: str,
+    attributes: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    result_attributes: Optional[Callable[[Any], Dict[str, Any]]] = None
+) -> Callable:
+    """
+    Decorator wrapping every call of a client method in a CLIENT span
+
+    The span records the exception and error status when the call fails,
+    with http.status_code when the error carries one. The response hooks
+    (record_storage_response for the Azure SDK, record_http_response for
+    requests) add the final status and the retry count.
+
+    Args:
+        name: Span name (e.g. "blob.download")
+        attributes: Maps the call arguments (by parameter name) to span attributes
+        result_attributes: Maps the return value to span attributes
+
+    Usage:
+        @traced("blob.download",
+                lambda a: {"blob.container": a["container_name"], "blob.name": a["blob_name"]},
+                lambda data: {"blob.size": len(data)})
+    """
+    def decorator(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return function(*args, **kwargs)
+
+            with _tracer.start_as_current_span(name, kind=SpanKind.CLIENT) as span:
+                call = _DependencyCall(span)
+                token = _current_call.set(call)
+                try:
+                    if attributes:
+                        bound = signature.bind(*args, **kwargs)
+                        bound.apply_defaults()
+                        _set_attributes(span, attributes(bound.arguments))
+
+                    result = function(*args, **kwargs)
+
+                    if result_attributes:
+                        _set_attributes(span, result_attributes(result))
+                    return result
+
+                except Exception as e:
+                    status_code = _error_status_code(e)
+                    if status_code is not None:
+                        span.set_attribute("http.status_code", status_code)
+                    raise
+
+                finally:
+                    _current_call.reset(token)
+                    if call.attempts or call.responses:
+                        span.set_attribute("retry.count", call.retry_count())
+
+        return wrapper
+    return decorator
+
+
+def record_storage_response(pipeline_response) -> None:
+    """
+    Azure SDK raw_response_hook: count HTTP attempts of the current traced call
+
+    Called by the azure-core pipeline (Blob Storage, azure-identity) after
+    every attempt, retries included.
+    """
+    call = _current_call.get()
+    if call is None:
+        return
+
+    http_response = getattr(pipeline_response, "http_response", None)
+    call.record_attempt(
+        getattr(pipeline_response, "http_request", None),
+        getattr(http_response, "status_code", None)
+    )
+
+
+def record_http_response(response, *args, **kwargs) -> None:
+    """
+    requests response hook: record the status code and retries of the current traced call
+
+    Installed on the sessions of the Dataverse and SharePoint clients and
+    of MSAL. Retries done by a urllib3 Retry mounted on the session adapter
+    are read from the Retry history attached to the raw response (empty
+    with the default adapter, which does not retry).
+    """
+    call = _current_call.get()
+    if call is None:
+        return
+
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    call.record_response(response.status_code, len(getattr(retries, "history", None) or ()))
+
+
+def traced_handler(handler: Callable[[func.HttpRequest], func.HttpResponse]) -> Callable:
+    """
+    Wrap an HTTP handler in a SERVER span
+
+    The trace context of the incoming request (traceparent header) is
+    continued, so the spans join the caller's trace.
+    """
+    @functools.wraps(handler)
+    def wrapper(req: func.HttpRequest) -> func.HttpResponse:
+        if _tracer is None:
+            return handler(req)
+
+        parent = propagate.extract(dict(req.headers))
+        with _tracer.start_as_current_span(handler.__name__, context=parent, kind=SpanKind.SERVER) as span:
+            span.set_attribute("http.method", req.method)
+            # Without the query string: ?code= carries the function key
+            span.set_attribute("http.url", urlsplit(req.url)._replace(query="", fragment="").geturl())
+            response = handler(req)
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.set_status(Status(StatusCode.ERROR))
+            return response
+
+    return wrapper
@@ -4,6 +4,7 @@ Validation functions for inputs and data
 """
 
 import re
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 
@@ -129,3 +130,142 @@ def sanitize_filename(filename: str) -> str:
         filename = "unnamed_file"
 
     return filename
+
+
+def validate_page_size(page_size: Optional[str], max_page_size: int) -> Optional[int]:
+    """
+    Validate the page_size query parameter of paginated listings
+
+    Args:
+        page_size: Raw query parameter value (None = no pagination)
+        max_page_size: Maximum allowed page size
+
+    Returns:
+        Page size as int, or None if not provided
+
+    Raises:
+        ValidationError: If not an integer between 1 and max_page_size
+    """
+    if page_size is None or page_size == "":
+        return None
+
+    try:
+        value = int(page_size)
+    except ValueError:
+        raise ValidationError("page_size must be an integer")
+
+    if value < 1 or value > max_page_size:
+        raise ValidationError(f"page_size must be between 1 and {max_page_size}")
+
+    return value
+
+
+def parse_boolean(value: Any, field_name: str) -> bool:
+    """
+    Parse a boolean field of a JSON body
+
+    Connectors (Power Automate, Copilot Studio) often send booleans as
+    strings: only true / false and "true" / "false" (any case) are accepted.
+
+    Args:
+        value: Raw field value
+        field_name: Field name used in the error message
+
+    Returns:
+        Parsed boolean
+
+    Raises:
+        ValidationError: If the value is not a boolean
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ValidationError(f"{field_name} must be true or false")
+
+
+def validate_number(
+    value: Any,
+    field_name: str,
+    minimum: float,
+    maximum: Optional[float] = None,
+    integer: bool = False
+) -> float:
+    """
+    Validate a numeric field of a JSON body
+
+    Args:
+        value: Raw field value (number, or numeric string)
+        field_name: Field name used in the error message
+        minimum: Smallest allowed value
+        maximum: Largest allowed value (None = no limit)
+        integer: Whether the value must be an integer
+
+    Returns:
+        Value as int or float
+
+    Raises:
+        ValidationError: If not a number, or out of range
+    """
+    if isinstance(value, bool):
+        raise ValidationError(f"{field_name} must be a number")
+
+    try:
+        number = int(value) if integer else float(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{field_name} must be {'an integer' if integer else 'a number'}")
+
+    if number != number or number < minimum or (maximum is not None and number > maximum):
+        limit = f"between {minimum} and {maximum}" if maximum is not None else f"at least {minimum}"
+        raise ValidationError(f"{field_name} must be {limit}")
+
+    return number
+
+
+def validate_string_list(value: Any, field_name: str) -> List[str]:
+    """
+    Validate a non-empty list of non-empty strings in a JSON body
+
+    Args:
+        value: Raw field value
+        field_name: Field name used in the error message
+
+    Returns:
+        The list
+
+    Raises:
+        ValidationError: If not a list, empty, or with an item that is not a non-empty string
+    """
+    if not isinstance(value, list) or not value:
+        raise ValidationError(f"{field_name} must be a non-empty list of strings")
+    if not all(isinstance(item, str) and item.strip() for item in value):
+        raise ValidationError(f"{field_name} must only contain non-empty strings")
+    return value
+
+
+def parse_iso_datetime(value: Optional[str], field_name: str) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 date or datetime query parameter
+
+    Args:
+        value: Raw parameter value (None = not provided)
+        field_name: Parameter name used in the error message
+
+    Returns:
+        Timezone-aware datetime (UTC if no offset given), or None
+
+    Raises:
+        ValidationError: If the value is not an ISO 8601 date
+    """
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValidationError(f"{field_name} must be an ISO 8601 date (e.g. 2025-10-20 or 2025-10-20T08:30:00Z)")
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+
+    return parsed
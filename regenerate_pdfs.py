@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Régénération en masse des PDF (CLI)
+- Convertit les .docx de word-documents (préfixe ou liste) avec le backend PDF configuré
+- Affiche l'avancement en JSON lines (un événement par document)
+- Reprenable via --job-id (checkpoint dans word-documents/_jobs/regenerate-pdfs/)
+
+Usage:
+    python regenerate_pdfs.py --prefix "Eric FER/" --workers 4
+    python regenerate_pdfs.py --blob "Eric FER/proposition_20251020_0830.docx"
+    python regenerate_pdfs.py --job-id <job_id> [--retry-failed]
+"""
+
+import argparse
+import json
+import os
+import sys
+from dotenv import load_dotenv
+
+# Ajouter le path des functions
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'functions'))
+
+# Charger .env
+load_dotenv()
+
+from shared.blob_client import get_blob_client
+from ProposalGenerator.regenerate_pdfs import PdfRegenerationJob, DEFAULT_MAX_WORKERS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Régénère les PDF des documents Word finaux")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--prefix", help="Préfixe des blobs .docx (ex: 'Eric FER/')")
+    source.add_argument("--blob", action="append", help="Blob .docx à régénérer (répétable)")
+    source.add_argument("--job-id", help="Reprendre un job existant")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Conversions en parallèle")
+    parser.add_argument("--time-budget", type=float, default=None, help="Arrêter après N secondes (reprendre avec --job-id)")
+    parser.add_argument("--retry-failed", action="store_true", help="Retenter les documents en échec")
+    args = parser.parse_args()
+
+    blob_client = get_blob_client()
+
+    if args.job_id:
+        job = PdfRegenerationJob.load(blob_client, args.job_id)
+    else:
+        job = PdfRegenerationJob.create(blob_client, prefix=args.prefix, blobs=args.blob)
+
+    print(json.dumps({"event": "start", **job.summary()}), flush=True)
+
+    summary = job.run(
+        max_workers=args.workers,
+        time_budget_seconds=args.time_budget,
+        retry_failed=args.retry_failed,
+        on_progress=lambda event: print(json.dumps({"event": "progress", **event}), flush=True)
+    )
+
+    print(json.dumps({"event": "done", **summary}), flush=True)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Tests
+Exécutés depuis la racine du dépôt: python -m pytest tests
+"""
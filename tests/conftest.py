@@ -0,0 +1,24 @@
+"""
+Fixtures communes: stand-ins hors ligne de benchmarks/backends.py
+"""
+
+import logging
+
+import pytest
+
+from benchmarks.backends import offline_backends
+
+
+@pytest.fixture(autouse=True)
+def quiet_handlers():
+    # Les handlers journalisent à chaque appel
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def backends():
+    """Blob Storage en mémoire et faux SharePoint / Dataverse / Azure AD derrière les clients partagés"""
+    with offline_backends() as installed:
+        yield installed
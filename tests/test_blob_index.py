@@ -0,0 +1,109 @@
+"""
+Index des métadonnées des blobs (shared/blob_index.py, backend SQLite):
+sélection des fichiers expirés et synchronisation avec les écritures
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from DocumentProcessor.cleanup_expired import delete_index_entries, get_expiry_condition
+from shared.blob_client import get_blob_client
+from shared.blob_index import SqliteBlobIndex, make_index_entry
+from shared.config import CONTAINER_DOCUMENTS, CONTAINER_TEMPLATES, EXPIRY_TAG, get_expiry_bucket
+
+NOW = datetime(2025, 10, 20, 8, 30, tzinfo=timezone.utc)
+CUTOFF = NOW - timedelta(hours=24)
+BUCKET = get_expiry_bucket(NOW.timestamp())
+
+
+def _bucket(hours_from_now):
+    return {EXPIRY_TAG: get_expiry_bucket((NOW + timedelta(hours=hours_from_now)).timestamp())}
+
+
+@pytest.fixture
+def index():
+    return SqliteBlobIndex(":memory:")
+
+
+def _add(index, name, last_modified=NOW, tags=None, container=CONTAINER_TEMPLATES):
+    index.upsert(make_index_entry(container, name, 10, last_modified, tags))
+
+
+def _expired(index, limit=None):
+    return [entry["name"] for entry in index.find_expired(CONTAINER_TEMPLATES, BUCKET, CUTOFF, limit=limit)]
+
+
+def test_tagged_files_selected_on_expiry_bucket(index):
+    _add(index, "Alice/expired.docx", tags=_bucket(-2))
+    _add(index, "Alice/expires_now.docx", tags=_bucket(0))
+    _add(index, "Alice/live.docx", tags=_bucket(+2))
+    # Tag expiré mais modifié récemment: le tag prime sur last_modified
+    _add(index, "Alice/old_but_live.docx", NOW - timedelta(days=3), tags=_bucket(+2))
+
+    assert _expired(index) == ["Alice/expired.docx", "Alice/expires_now.docx"]
+
+
+def test_untagged_files_selected_on_last_modified(index):
+    _add(index, "Alice/old.docx", CUTOFF - timedelta(minutes=1))
+    _add(index, "Alice/at_cutoff.docx", CUTOFF)
+    _add(index, "Alice/recent.docx", NOW - timedelta(hours=1))
+
+    assert _expired(index) == ["Alice/old.docx"]
+
+
+def test_general_templates_root_files_and_other_containers_never_selected(index):
+    old = NOW - timedelta(days=30)
+    _add(index, "general/template.docx", old)
+    _add(index, "general/tagged.docx", old, tags=_bucket(-48))
+    _add(index, "root.docx", old)
+    _add(index, "Alice/proposition.docx", old, container=CONTAINER_DOCUMENTS)
+
+    assert _expired(index) == []
+
+
+def test_limit_returns_first_names(index):
+    for number in range(5):
+        _add(index, f"Alice/old_{number}.docx", NOW - timedelta(days=2))
+
+    assert _expired(index, limit=2) == ["Alice/old_0.docx", "Alice/old_1.docx"]
+
+
+def test_rewrite_replaces_entry(index):
+    _add(index, "Alice/temp_working.docx", tags=_bucket(-2))
+    _add(index, "Alice/temp_working.docx", tags=_bucket(+24))
+
+    assert _expired(index) == []
+    assert len(list(index.iter_container(CONTAINER_TEMPLATES))) == 1
+
+
+def test_blob_client_writes_and_deletes_update_index(backends, index):
+    blob_client = get_blob_client()
+    blob_client.index = index
+
+    blob_client.upload_blob(CONTAINER_TEMPLATES, "Alice/temp_working.docx", b"docx", tags={EXPIRY_TAG: "000000000001"})
+    blob_client.upload_blob(CONTAINER_TEMPLATES, "Alice/.keep", b"")
+    (entry,) = index.iter_container(CONTAINER_TEMPLATES)
+    blob_client.delete_blob(CONTAINER_TEMPLATES, "Alice/temp_working.docx")
+
+    assert (entry["name"], entry["kind"], entry["user_folder"], entry["expires_at"]) == (
+        "Alice/temp_working.docx", "working", "Alice", "000000000001"
+    )
+    assert list(index.iter_container(CONTAINER_TEMPLATES)) == []
+
+
+def test_stale_entry_is_refreshed_instead_of_deleted(backends, index):
+    blob_client = get_blob_client()
+    blob_client.index = index
+    # L'index croit le fichier ancien; il a été réécrit hors API depuis
+    _add(index, "Alice/reuploaded.docx", datetime.now(timezone.utc) - timedelta(days=3))
+    backends.blob_service.put(CONTAINER_TEMPLATES, "Alice/reuploaded.docx", b"docx")
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
+    entries = index.find_expired(CONTAINER_TEMPLATES, get_expiry_bucket(cutoff.timestamp()), cutoff)
+
+    results = delete_index_entries(blob_client, CONTAINER_TEMPLATES, entries, get_expiry_condition(24), cutoff)
+
+    assert results == {"Alice/reuploaded.docx": False}
+    assert backends.blob_service.names(CONTAINER_TEMPLATES) == ["Alice/reuploaded.docx"]
+    # Entrée rafraîchie: la requête suivante ne la renvoie plus
+    assert index.find_expired(CONTAINER_TEMPLATES, get_expiry_bucket(cutoff.timestamp()), cutoff) == []
@@ -0,0 +1,23 @@
+"""
+Budgets d'appels sortants par endpoint (benchmarks/call_budgets.py) sous pytest
+"""
+
+import logging
+
+import pytest
+
+from benchmarks.call_budgets import SCENARIOS, run_scenario
+
+
+@pytest.fixture(autouse=True)
+def quiet_handlers():
+    # Les handlers journalisent à chaque appel
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=[scenario.name for scenario in SCENARIOS])
+def test_scenario_within_budget(scenario):
+    result = run_scenario(scenario)
+    assert result["violations"] == [], result["operations"]
@@ -0,0 +1,180 @@
+"""
+Nettoyage des fichiers expirés (DocumentProcessor/cleanup_expired.py): modes
+scan / tags / index de l'endpoint et reprise du nettoyage planifié au checkpoint
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.backends import http_request, overridden
+from DocumentProcessor import cleanup_expired as cleanup
+from shared.blob_client import get_blob_client
+from shared.blob_index import SqliteBlobIndex, make_index_entry
+from shared.config import CONTAINER_DOCUMENTS, CONTAINER_TEMPLATES, EXPIRY_TAG, get_expiry_bucket
+
+NOW = datetime.now(timezone.utc)
+OLD = NOW - timedelta(hours=30)
+EXPIRED_TAGS = {EXPIRY_TAG: get_expiry_bucket((NOW - timedelta(hours=6)).timestamp())}
+LIVE_TAGS = {EXPIRY_TAG: get_expiry_bucket((NOW + timedelta(hours=20)).timestamp(), round_up=True)}
+
+
+def _put(backends, name, last_modified=None, tags=None, index=None):
+    backends.blob_service.put(CONTAINER_TEMPLATES, name, b"docx", tags=tags, last_modified=last_modified)
+    if index is not None:
+        index.upsert(make_index_entry(CONTAINER_TEMPLATES, name, 4, last_modified or NOW, tags))
+
+
+def _cleanup(mode, **params):
+    response = cleanup.cleanup_expired(http_request("POST", "cleanup-expired", params={"mode": mode, **params}))
+    return response.status_code, json.loads(response.get_body())
+
+
+def test_scan_mode_deletes_old_user_files_only(backends):
+    _put(backends, "Alice/old.docx", OLD)
+    _put(backends, "Alice/recent.docx")
+    _put(backends, "general/old_template.docx", OLD)
+
+    status, body = _cleanup("scan")
+
+    assert status == 200
+    assert body["deleted_files"] == ["Alice/old.docx"]
+    assert backends.blob_service.names(CONTAINER_TEMPLATES) == ["Alice/recent.docx", "general/old_template.docx"]
+
+
+def test_scan_mode_restricted_to_user_folder(backends):
+    _put(backends, "Alice/old.docx", OLD)
+    _put(backends, "Bob/old.docx", OLD)
+
+    status, body = _cleanup("scan", user_folder="Bob")
+
+    assert status == 200
+    assert body["deleted_files"] == ["Bob/old.docx"]
+
+
+def test_tags_mode_sees_expired_tagged_files_only(backends):
+    _put(backends, "Alice/temp_working.docx", tags=EXPIRED_TAGS)
+    _put(backends, "Alice/live.docx", tags=LIVE_TAGS)
+    # Sans tag: invisible pour le mode tags, même ancien
+    _put(backends, "Alice/untagged.docx", OLD)
+
+    status, body = _cleanup("tags")
+
+    assert status == 200
+    assert body["deleted_files"] == ["Alice/temp_working.docx"]
+    assert backends.blob_service.names(CONTAINER_TEMPLATES) == ["Alice/live.docx", "Alice/untagged.docx"]
+
+
+def test_index_mode_requires_index(backends):
+    status, body = _cleanup("index")
+
+    assert status == 400
+    assert "BLOB_INDEX_BACKEND" in body["error"]
+
+
+def test_index_mode_deletes_tagged_and_untagged(backends):
+    index = get_blob_client().index = SqliteBlobIndex(":memory:")
+    _put(backends, "Alice/temp_working.docx", tags=EXPIRED_TAGS, index=index)
+    _put(backends, "Alice/old.docx", OLD, index=index)
+    _put(backends, "Alice/live.docx", tags=LIVE_TAGS, index=index)
+
+    status, body = _cleanup("index")
+
+    assert status == 200
+    assert sorted(body["deleted_files"]) == ["Alice/old.docx", "Alice/temp_working.docx"]
+    assert backends.blob_service.names(CONTAINER_TEMPLATES) == ["Alice/live.docx"]
+    assert [entry["name"] for entry in index.iter_container(CONTAINER_TEMPLATES)] == ["Alice/live.docx"]
+
+
+def test_invalid_mode(backends):
+    status, _ = _cleanup("everything")
+
+    assert status == 400
+
+
+class _PageClock:
+    """time.monotonic of cleanup_expired: each listing page costs 10 s"""
+
+    def __init__(self, blob_client):
+        self.now = 0.0
+        self._list_blobs_page = blob_client.list_blobs_page
+
+    def monotonic(self):
+        return self.now
+
+    def list_blobs_page(self, *args, **kwargs):
+        self.now += 10
+        return self._list_blobs_page(*args, **kwargs)
+
+
+@pytest.fixture
+def one_page_per_run(backends):
+    """Run run_incremental_cleanup with a budget covering exactly one listing page"""
+    blob_client = get_blob_client()
+    clock = _PageClock(blob_client)
+    with overridden({cleanup: {"time": clock}, blob_client: {"list_blobs_page": clock.list_blobs_page}}):
+        yield lambda **kwargs: cleanup.run_incremental_cleanup(blob_client, time_budget_seconds=5, page_size=2, **kwargs)
+
+
+def test_incremental_cleanup_resumes_from_checkpoint(backends, one_page_per_run):
+    for index in range(5):
+        _put(backends, f"Alice/old_{index}.docx", OLD)
+
+    first = one_page_per_run()
+    checkpoint = json.loads(backends.blob_service.get(CONTAINER_DOCUMENTS, cleanup.CHECKPOINT_PATH))
+    second = one_page_per_run()
+    third = one_page_per_run()
+
+    assert (first["files_deleted"], first["scan_complete"], first["continuation_token_saved"]) == (2, False, True)
+    assert checkpoint["continuation_token"] is not None
+    assert checkpoint["pass_started_at"] is not None
+    # La reprise repart du token: aucun fichier sauté ni relu
+    assert (second["files_deleted"], second["scan_complete"]) == (2, False)
+    assert (third["files_deleted"], third["scan_complete"]) == (1, True)
+    assert backends.blob_service.names(CONTAINER_TEMPLATES) == []
+
+    checkpoint = json.loads(backends.blob_service.get(CONTAINER_DOCUMENTS, cleanup.CHECKPOINT_PATH))
+    assert checkpoint["continuation_token"] is None
+    assert checkpoint["pass_started_at"] is None
+    assert checkpoint["last_pass_totals"] == {"scanned": 5, "deleted": 5}
+
+
+def test_incremental_cleanup_waits_scan_interval(backends, one_page_per_run):
+    _put(backends, "Alice/old_0.docx", OLD)
+    assert one_page_per_run()["scan_complete"]
+
+    _put(backends, "Alice/old_1.docx", OLD)
+    skipped = one_page_per_run()
+    rescanned = one_page_per_run(scan_interval_hours=0)
+
+    assert skipped["scan_skipped"] and skipped["files_deleted"] == 0
+    assert rescanned["files_deleted"] == 1
+
+
+def test_incremental_tag_pass_runs_between_scan_passes(backends, one_page_per_run):
+    assert one_page_per_run()["scan_complete"]
+    _put(backends, "Alice/temp_working.docx", tags=EXPIRED_TAGS)
+
+    metrics = one_page_per_run()
+
+    assert metrics["scan_skipped"] and metrics["tag_pass_complete"]
+    assert metrics["files_deleted"] == 1
+
+
+def test_incremental_scan_keeps_files_rewritten_after_cutoff(backends, one_page_per_run):
+    _put(backends, "Alice/old.docx", OLD)
+    blob_client = get_blob_client()
+    list_page = blob_client.list_blobs_page
+
+    def list_then_rewrite(*args, **kwargs):
+        # Réécrit entre le listing et la suppression (ex: temp_working.docx)
+        page = list_page(*args, **kwargs)
+        _put(backends, "Alice/old.docx")
+        return page
+
+    with overridden({blob_client: {"list_blobs_page": list_then_rewrite}}):
+        metrics = one_page_per_run()
+
+    assert metrics["files_deleted"] == 0 and metrics["files_remaining"] == 1
+    assert backends.blob_service.names(CONTAINER_TEMPLATES) == ["Alice/old.docx"]
@@ -0,0 +1,93 @@
+"""
+URL d'upload direct (DocumentProcessor/get_upload_url.py): validation de la
+demande, SAS en écriture seule sur le blob exact et tag d'expiration posé
+par le PUT du client (en-tête x-ms-tags)
+"""
+
+import json
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import pytest
+
+from benchmarks.backends import http_request
+from DocumentProcessor.get_upload_url import get_upload_url
+from shared.config import CONTAINER_TEMPLATES, EXPIRY_TAG, WORKING_FILE_TTL_HOURS, get_expiry_tags
+
+VALID = {"user_folder": "Eric FER", "file_name": "ancien_devis.docx", "file_size": 245760}
+
+
+def _request(body):
+    response = get_upload_url(http_request("POST", "get-upload-url", body))
+    return response.status_code, json.loads(response.get_body())
+
+
+def _sas(upload_url):
+    return {key: values[0] for key, values in parse_qs(urlsplit(upload_url).query).items()}
+
+
+@pytest.mark.parametrize("changes", [
+    {"user_folder": None},
+    {"file_name": None},
+    {"file_size": None},
+    {"user_folder": "general"},
+    {"user_folder": "Eric/../Bob"},
+    {"user_folder": ".."},
+    {"file_size": 0},
+    {"file_size": "245760"},
+    {"file_size": True},
+    {"file_size": 26 * 1024 * 1024},
+    {"file_name": "ancien_devis.pdf"},
+    {"overwrite": "maybe"},
+], ids=[
+    "missing-user-folder", "missing-file-name", "missing-file-size", "general-folder", "nested-folder",
+    "dot-folder", "zero-size", "string-size", "boolean-size", "too-large", "not-docx", "invalid-overwrite",
+])
+def test_invalid_request_is_rejected(backends, changes):
+    body = {key: value for key, value in {**VALID, **changes}.items() if value is not None}
+
+    status, response = _request(body)
+
+    assert status == 400
+    assert response["error"]
+
+
+def test_upload_url_signed_without_storage_call(backends):
+    before = backends.calls.snapshot()
+
+    status, response = _request(VALID)
+
+    assert status == 200
+    assert backends.calls.since(before) == {}
+    assert response["blob_path"] == "Eric FER/ancien_devis.docx"
+    assert response["container"] == CONTAINER_TEMPLATES
+    assert urlsplit(response["upload_url"]).path == f"/{CONTAINER_TEMPLATES}/Eric%20FER/ancien_devis.docx"
+    assert response["max_size_bytes"] == 25 * 1024 * 1024
+
+
+def test_file_name_sanitized_into_user_folder(backends):
+    _, response = _request({**VALID, "file_name": "../../general/offre.docx"})
+
+    assert response["blob_path"] == "Eric FER/generaloffre.docx"
+
+
+@pytest.mark.parametrize("overwrite,permissions", [(False, "ct"), (True, "cwt")])
+def test_sas_grants_create_and_tags_only(backends, overwrite, permissions):
+    _, response = _request({**VALID, "overwrite": overwrite})
+
+    sas = _sas(response["upload_url"])
+    # Blob précis (sr=b), sans lecture, liste ni suppression; "t" pour x-ms-tags
+    assert sas["sr"] == "b"
+    assert sas["sp"] == permissions
+
+
+def test_put_headers_set_working_file_expiry_tag(backends):
+    _, response = _request(VALID)
+
+    headers = response["headers"]
+    tags = {key: values[0] for key, values in parse_qs(headers["x-ms-tags"]).items()}
+    assert headers["x-ms-blob-type"] == "BlockBlob"
+    assert headers["x-ms-tags"] == urlencode(get_expiry_tags())
+    # Le tag d'expiration couvre au moins la durée de vie d'un fichier de travail
+    expires_at = int(tags[EXPIRY_TAG])
+    assert expires_at >= datetime.now(timezone.utc).timestamp() + WORKING_FILE_TTL_HOURS * 3600 - 60
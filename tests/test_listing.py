@@ -0,0 +1,133 @@
+"""
+Listings paginés: jetons de list_blobs_filtered_page (aller-retour, écritures
+entre deux pages) et pagination des endpoints de listing
+"""
+
+import json
+
+import pytest
+
+from benchmarks.backends import http_request
+from DocumentProcessor.list_templates import list_general_templates
+from DocumentProcessor.list_user_documents import list_created_documents
+from DocumentProcessor.list_user_templates import list_user_templates
+from shared.blob_client import get_blob_client
+from shared.blob_index import SqliteBlobIndex, make_index_entry
+from shared.config import CONTAINER_DOCUMENTS
+
+DOCUMENTS = [f"Alice/proposition_{index:02d}.{extension}" for index in range(12) for extension in ("docx", "pdf")]
+
+
+@pytest.fixture
+def alice_documents(backends):
+    for name in DOCUMENTS + ["Alice/.keep", "Alice/archives/old.docx", "Bob/proposition_00.docx"]:
+        backends.blob_service.put(CONTAINER_DOCUMENTS, name, b"content")
+    return backends
+
+
+def _skip_keep(blob):
+    return None if blob["name"].endswith(".keep") else blob
+
+
+def _all_pages(page_size, **kwargs):
+    """Follow the continuation tokens of list_blobs_filtered_page; returns the pages"""
+    pages, token = [], None
+    while True:
+        items, token = get_blob_client().list_blobs_filtered_page(
+            CONTAINER_DOCUMENTS, page_size, name_starts_with="Alice/", continuation_token=token,
+            select=_skip_keep, delimiter="/", **kwargs
+        )
+        pages.append([item["name"] for item in items])
+        if token is None:
+            return pages
+
+
+@pytest.mark.parametrize("page_size", [1, 5, 24, 100])
+def test_tokens_return_every_blob_once_in_name_order(alice_documents, page_size):
+    pages = _all_pages(page_size)
+
+    assert [name for page in pages for name in page] == sorted(DOCUMENTS)
+    assert all(len(page) == page_size for page in pages[:-1])
+
+
+def test_filtered_out_blobs_do_not_shrink_listing_requests(alice_documents):
+    before = alice_documents.calls.snapshot()
+
+    items, _ = get_blob_client().list_blobs_filtered_page(
+        CONTAINER_DOCUMENTS, 5, name_starts_with="Alice/", select=_skip_keep, delimiter="/"
+    )
+
+    # .keep et le sous-dossier archives/ sont dans la première page du service:
+    # une seconde requête complète la page, pas une requête par blob
+    assert len(items) == 5
+    assert alice_documents.calls.since(before)[("storage", "walk_blobs")] == 2
+
+
+def test_token_resumes_after_last_name_when_blobs_change(alice_documents):
+    first, token = get_blob_client().list_blobs_filtered_page(
+        CONTAINER_DOCUMENTS, 5, name_starts_with="Alice/", select=_skip_keep, delimiter="/"
+    )
+    # Avant la position du jeton: non retourné; après: retourné une fois
+    alice_documents.blob_service.put(CONTAINER_DOCUMENTS, "Alice/proposition_00.zip", b"content")
+    alice_documents.blob_service.put(CONTAINER_DOCUMENTS, "Alice/proposition_05.zip", b"content")
+    alice_documents.blob_service.blobs.pop((CONTAINER_DOCUMENTS, "Alice/proposition_03.pdf"))
+
+    rest, token = get_blob_client().list_blobs_filtered_page(
+        CONTAINER_DOCUMENTS, 100, name_starts_with="Alice/", continuation_token=token, select=_skip_keep, delimiter="/"
+    )
+
+    names = [item["name"] for item in first + rest]
+    assert token is None
+    assert names == sorted(set(DOCUMENTS + ["Alice/proposition_05.zip"]) - {"Alice/proposition_03.pdf"})
+
+
+def _get(handler, **params):
+    response = handler(http_request("GET", "list", params=params))
+    return response.status_code, json.loads(response.get_body()) if response.get_body() else None
+
+
+@pytest.mark.parametrize("indexed", [False, True], ids=["blob-listing", "metadata-index"])
+def test_paginated_documents_match_full_listing(alice_documents, indexed):
+    if indexed:
+        index = get_blob_client().index = SqliteBlobIndex(":memory:")
+        for blob in get_blob_client().list_blobs_with_metadata(CONTAINER_DOCUMENTS):
+            entry = make_index_entry(CONTAINER_DOCUMENTS, blob["name"], blob["size"], blob["last_modified"])
+            if entry is not None:
+                index.upsert(entry)
+
+    _, full = _get(list_created_documents, user_folder="Alice")
+    paged, token = [], None
+    while True:
+        status, body = _get(list_created_documents, user_folder="Alice", page_size="7", **({"continuation_token": token} if token else {}))
+        assert status == 200
+        paged.extend(body["documents"])
+        token = body["continuation_token"]
+        assert body["has_more"] == (token is not None)
+        if token is None:
+            break
+
+    # Même contenu et même ordre (nom) avec ou sans pagination
+    assert [document["path"] for document in paged] == [document["path"] for document in full["documents"]]
+    assert [document["path"] for document in paged] == sorted(DOCUMENTS)
+
+
+@pytest.mark.parametrize("handler,params", [
+    (list_created_documents, {"user_folder": "Alice"}),
+    (list_user_templates, {"user_folder": "Alice"}),
+    (list_general_templates, {}),
+], ids=["list-user-documents", "list-user-templates", "list-templates"])
+@pytest.mark.parametrize("token", ["not a token", "bm90IGpzb24="], ids=["not-base64", "not-json"])
+def test_invalid_continuation_token_is_rejected(alice_documents, handler, params, token):
+    status, body = _get(handler, continuation_token=token, **params)
+
+    assert status == 400
+    assert body["error"] == "Invalid continuation_token"
+
+
+def test_invalid_index_token_is_rejected(alice_documents):
+    get_blob_client().index = SqliteBlobIndex(":memory:")
+
+    status, body = _get(list_created_documents, user_folder="Alice", continuation_token="%%%")
+
+    assert status == 400
+    assert body["error"] == "Invalid continuation_token"
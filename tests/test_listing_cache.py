@@ -0,0 +1,145 @@
+"""
+Cache des listings (shared/listing_cache.py): invalidation sur écriture /
+suppression, TTL et réponses 304 de list-templates sur ETag
+"""
+
+import json
+
+import pytest
+
+from benchmarks.backends import http_request, overridden
+from DocumentProcessor.list_templates import list_general_templates
+from shared import listing_cache
+from shared.blob_client import get_blob_client
+from shared.config import CONTAINER_TEMPLATES
+from shared.listing_cache import ListingCache, etag_matches
+
+
+@pytest.fixture
+def templates(backends):
+    for name in ("general/offre.docx", "general/devis.docx", "Alice/perso.docx"):
+        backends.blob_service.put(CONTAINER_TEMPLATES, name, b"docx")
+    return backends
+
+
+def _list(if_none_match=None):
+    headers = {"If-None-Match": if_none_match} if if_none_match else None
+    response = list_general_templates(http_request("GET", "list-templates", headers=headers))
+    body = json.loads(response.get_body()) if response.get_body() else None
+    return response.status_code, response.headers.get("ETag"), body
+
+
+def _storage_calls(backends, before):
+    return backends.calls.per_service(backends.calls.since(before)).get("storage", 0)
+
+
+def test_listing_served_from_cache(templates):
+    _, first_etag, first = _list()
+    before = templates.calls.snapshot()
+
+    _, etag, body = _list()
+
+    assert _storage_calls(templates, before) == 0
+    assert (etag, body) == (first_etag, first)
+    assert [template["path"] for template in body["templates"]] == ["general/devis.docx", "general/offre.docx"]
+
+
+@pytest.mark.parametrize("header", ["{etag}", "W/{etag}", '"other", {etag}', "*"])
+def test_matching_etag_answers_304(templates, header):
+    _, etag, _ = _list()
+
+    status, response_etag, body = _list(header.format(etag=etag))
+
+    assert status == 304
+    assert response_etag == etag
+    assert body is None
+
+
+def test_stale_etag_answers_200(templates):
+    status, _, body = _list('"0000"')
+
+    assert status == 200
+    assert body["count"] == 2
+
+
+@pytest.mark.parametrize("write", [
+    lambda client: client.upload_blob(CONTAINER_TEMPLATES, "general/nouveau.docx", b"docx"),
+    lambda client: client.delete_blob(CONTAINER_TEMPLATES, "general/devis.docx"),
+], ids=["upload", "delete"])
+def test_write_under_general_invalidates(templates, write):
+    _, etag, _ = _list()
+
+    write(get_blob_client())
+    before = templates.calls.snapshot()
+    status, new_etag, _ = _list(etag)
+
+    # L'ancien ETag ne correspond plus: liste rechargée et renvoyée
+    assert status == 200
+    assert new_etag != etag
+    assert _storage_calls(templates, before) > 0
+
+
+def test_write_outside_general_keeps_cache(templates):
+    _list()
+
+    get_blob_client().upload_blob(CONTAINER_TEMPLATES, "Alice/autre.docx", b"docx")
+    before = templates.calls.snapshot()
+    _list()
+
+    assert _storage_calls(templates, before) == 0
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_entry_expires_after_ttl():
+    cache, clock, loads = ListingCache(ttl_seconds=60), _Clock(), []
+
+    def loader():
+        loads.append(clock.now)
+        return ["general/offre.docx"]
+
+    with overridden({listing_cache: {"time": clock}}):
+        cache.get_or_load(CONTAINER_TEMPLATES, "general/", loader)
+        clock.now += 59
+        cache.get_or_load(CONTAINER_TEMPLATES, "general/", loader)
+        clock.now += 2
+        cache.get_or_load(CONTAINER_TEMPLATES, "general/", loader)
+
+    assert loads == [1000.0, 1061.0]
+
+
+def test_zero_ttl_disables_cache():
+    cache, loads = ListingCache(ttl_seconds=0), []
+
+    for _ in range(2):
+        cache.get_or_load(CONTAINER_TEMPLATES, "general/", lambda: loads.append(1) or [])
+
+    assert len(loads) == 2
+
+
+def test_load_invalidated_while_running_is_not_cached():
+    cache, loads = ListingCache(ttl_seconds=60), []
+
+    def loader():
+        loads.append(1)
+        if len(loads) == 1:
+            # Écriture concurrente pendant le listing
+            cache.invalidate(CONTAINER_TEMPLATES, "general/nouveau.docx")
+        return len(loads)
+
+    first, _ = cache.get_or_load(CONTAINER_TEMPLATES, "general/", loader)
+    second, _ = cache.get_or_load(CONTAINER_TEMPLATES, "general/", loader)
+    third, _ = cache.get_or_load(CONTAINER_TEMPLATES, "general/", loader)
+
+    assert (first, second, third) == (1, 2, 2)
+
+
+def test_etag_matches_without_header():
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches("", '"abc"')
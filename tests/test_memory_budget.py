@@ -0,0 +1,123 @@
+"""
+Contrôle d'admission mémoire (shared/memory_budget.py): 413 au-delà du budget
+d'une requête, attente puis 503 quand le budget de l'instance est épuisé
+"""
+
+import json
+import threading
+
+import azure.functions as func
+import pytest
+
+from benchmarks.backends import http_request, overridden
+from DocumentProcessor.clean_quote import clean_quote
+from shared import memory_budget
+from shared.blob_client import get_blob_client
+from shared.config import CONTAINER_TEMPLATES
+from shared.memory_budget import MB, MemoryBudget, RequestMemory, memory_guarded_handler, predict_peak_bytes
+
+DOCX_SIZE = 100 * 1024
+# Base 10 MB + 100 KB x 50 = ~14.9 MB par document
+PREDICTED = predict_peak_bytes(DOCX_SIZE)
+
+
+@pytest.fixture
+def budget(backends):
+    """Fresh instance budget of 20 MB (one document at a time), no queue wait"""
+    backends.blob_service.put(CONTAINER_TEMPLATES, "Alice/devis.docx", b"x" * DOCX_SIZE)
+    backends.blob_service.put(CONTAINER_TEMPLATES, "Alice/annexe.docx", b"x" * DOCX_SIZE)
+    budget = MemoryBudget(20 * MB)
+    with overridden({memory_budget: {"_budget": budget, "MEMORY_QUEUE_TIMEOUT_SECONDS": 0}}):
+        yield budget
+
+
+def _download_handler(*names):
+    """Handler downloading the given blobs of Alice/, as the document endpoints do"""
+    def download(req):
+        for name in names:
+            get_blob_client().download_blob(CONTAINER_TEMPLATES, f"Alice/{name}")
+        return func.HttpResponse(json.dumps({"success": True}), status_code=200)
+    return memory_guarded_handler(download)
+
+
+def _call(handler):
+    response = handler(http_request("POST", "test", {}))
+    return response.status_code, json.loads(response.get_body()), response.headers
+
+
+def test_request_within_budgets_is_admitted_and_released(budget):
+    status, _, _ = _call(_download_handler("devis.docx"))
+
+    assert status == 200
+    assert budget.reserved_bytes == 0
+    assert budget.active_requests == 0
+
+
+def test_document_over_request_budget_answers_413(budget):
+    with overridden({memory_budget: {"MEMORY_REQUEST_BUDGET_MB": 14}}):
+        status, body, headers = _call(_download_handler("devis.docx"))
+
+    assert status == 413
+    assert "Alice/devis.docx" in body["error"]
+    assert "Retry-After" not in headers
+    assert budget.reserved_bytes == 0
+
+
+def test_413_even_when_handler_swallows_the_refusal(budget):
+    # clean_quote transforme toute erreur de download_blob en 404
+    with overridden({memory_budget: {"MEMORY_REQUEST_BUDGET_MB": 14}}):
+        response = memory_guarded_handler(clean_quote)(
+            http_request("POST", "document/clean-quote", {"blob_path": "Alice/devis.docx", "user_folder": "Alice"})
+        )
+
+    assert response.status_code == 413
+
+
+def test_inputs_of_one_request_add_up(budget):
+    # Chaque document tient seul dans le budget de la requête, pas les deux
+    with overridden({memory_budget: {"MEMORY_REQUEST_BUDGET_MB": 16}}):
+        assert _call(_download_handler("devis.docx"))[0] == 200
+        status, body, _ = _call(_download_handler("devis.docx", "annexe.docx"))
+
+    assert status == 413
+    assert "Alice/annexe.docx" in body["error"]
+    assert budget.reserved_bytes == 0
+
+
+def test_exhausted_instance_budget_answers_503(budget):
+    # Une autre requête en cours réserve déjà la place d'un document
+    assert budget.reserve(PREDICTED, timeout_seconds=0)
+
+    status, body, headers = _call(_download_handler("devis.docx"))
+
+    assert status == 503
+    assert headers["Retry-After"] == "10"
+    assert "retry later" in body["error"]
+    assert budget.reserved_bytes == PREDICTED
+
+
+def test_queued_request_admitted_when_budget_frees_up(budget):
+    assert budget.reserve(PREDICTED, timeout_seconds=0)
+    threading.Timer(0.05, budget.release, args=(PREDICTED,)).start()
+
+    with overridden({memory_budget: {"MEMORY_QUEUE_TIMEOUT_SECONDS": 5}}):
+        status, _, _ = _call(_download_handler("devis.docx"))
+
+    assert status == 200
+    assert budget.reserved_bytes == 0
+
+
+def test_first_reservation_always_granted(budget):
+    # Plus grand que le budget de l'instance, mais rien d'autre n'est réservé
+    assert budget.reserve(50 * MB, timeout_seconds=0)
+    assert not budget.reserve(1, timeout_seconds=0)
+
+
+def test_request_memory_counts_base_overhead_once(budget):
+    account = RequestMemory()
+
+    account.before_read(CONTAINER_TEMPLATES, "Alice/devis.docx", DOCX_SIZE)
+    account.before_read(CONTAINER_TEMPLATES, "Alice/annexe.docx", DOCX_SIZE)
+
+    assert account.reserved_bytes == predict_peak_bytes(2 * DOCX_SIZE)
+    assert budget.reserved_bytes == account.reserved_bytes
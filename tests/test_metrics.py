@@ -0,0 +1,126 @@
+"""
+Métriques de l'instance (shared/metrics.py): rendu Prometheus (format texte
+0.0.4), quantiles des histogrammes et endpoint export_metrics
+"""
+
+import json
+import re
+
+import pytest
+
+from benchmarks.backends import http_request, overridden
+import DocumentProcessor.export_metrics as export_metrics_module
+from DocumentProcessor.export_metrics import PROMETHEUS_CONTENT_TYPE, export_metrics
+from shared import metrics
+from shared.metrics import LatencyHistogram, MetricsRegistry, record_cache_lookup
+
+# Ligne d'échantillon: nom, labels optionnels, valeur
+SAMPLE_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    with overridden({metrics: {"_metrics_instance": registry}}):
+        yield registry
+
+
+def _samples(text):
+    """Prometheus text as [(name, labels, value)], checking every line"""
+    assert text.endswith("\n")
+    samples = []
+    for line in text.splitlines():
+        if line.startswith("# "):
+            assert re.match(r"^# (HELP|TYPE) [a-zA-Z_:][a-zA-Z0-9_:]* \S", line)
+            continue
+        match = SAMPLE_LINE.match(line)
+        assert match is not None, line
+        samples.append((match.group(1), match.group(2) or "", float(match.group(3))))
+    return samples
+
+
+def test_histogram_rendering(registry):
+    for value in (0.002, 0.004, 0.004, 0.3):
+        registry.observe("http_request_duration_seconds", value, handler="list_templates", status="200")
+
+    text = registry.render_prometheus()
+    samples = _samples(text)
+
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert "# TYPE http_request_duration_quantile_seconds gauge" in text
+    buckets = [(labels, value) for name, labels, value in samples if name == "http_request_duration_seconds_bucket"]
+    counts = [value for _, value in buckets]
+    # Cumulatifs croissants, +Inf = nombre de mesures
+    assert counts == sorted(counts)
+    assert buckets[-1] == ('{handler="list_templates",status="200",le="+Inf"}', 4)
+    assert ('http_request_duration_seconds_count', '{handler="list_templates",status="200"}', 4) in samples
+    assert ('http_request_duration_seconds_sum', '{handler="list_templates",status="200"}', pytest.approx(0.31)) in samples
+    quantiles = {labels: value for name, labels, value in samples if name == "http_request_duration_quantile_seconds"}
+    assert quantiles['{handler="list_templates",status="200",quantile="0.99"}'] == pytest.approx(0.3)
+
+
+def test_counters_and_cache_hit_ratio(registry):
+    for hit in (True, True, True, False):
+        record_cache_lookup("sas", hit=hit)
+
+    samples = _samples(registry.render_prometheus())
+
+    assert ("cache_requests_total", '{cache="sas",result="hit"}', 3) in samples
+    assert ("cache_requests_total", '{cache="sas",result="miss"}', 1) in samples
+    assert ("cache_hit_ratio", '{cache="sas"}', 0.75) in samples
+
+
+def test_label_values_escaped(registry):
+    registry.increment("cache_requests_total", cache='say "hi"\\\n', result="hit")
+
+    samples = _samples(registry.render_prometheus())
+
+    assert ("cache_requests_total", r'{cache="say \"hi\"\\\n",result="hit"}', 1) in samples
+
+
+@pytest.mark.parametrize("value", [0.0013, 0.042, 1.7, 95.0])
+def test_histogram_quantile_relative_error(value):
+    histogram = LatencyHistogram()
+    histogram.record(value)
+    histogram.record(value * 10)
+
+    # Borne haute du sous-intervalle: au plus 2^(1/8) - 1 (~9%) au-dessus
+    assert value <= histogram.quantile(0.5) <= value * 2 ** (1 / 8)
+    assert histogram.quantile(0.99) == value * 10
+
+
+def _export(**params):
+    return export_metrics(http_request("GET", "admin/metrics", params=params))
+
+
+def test_endpoint_prometheus_format(registry):
+    registry.observe("dependency_duration_seconds", 0.01, operation="BlobStorageClient.download_blob", outcome="success")
+
+    response = _export()
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+    assert response.headers["Cache-Control"] == "no-store"
+    assert response.headers["X-Instance-Id"]
+    assert response.get_body().decode() == registry.render_prometheus()
+
+
+def test_endpoint_json_format(registry):
+    registry.observe("http_request_duration_seconds", 0.02, handler="get_sas_url", status="200")
+
+    response = _export(format="json")
+
+    body = json.loads(response.get_body())
+    (series,) = body["histograms"]["http_request_duration_seconds"]
+    assert series["labels"] == {"handler": "get_sas_url", "status": "200"}
+    assert series["count"] == 1
+    assert series["max_ms"] == 20.0
+
+
+def test_endpoint_rejects_unknown_format(registry):
+    assert _export(format="xml").status_code == 400
+
+
+def test_endpoint_disabled(registry):
+    with overridden({export_metrics_module: {"METRICS_ENABLED": False}}):
+        assert _export().status_code == 404
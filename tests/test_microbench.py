@@ -0,0 +1,31 @@
+"""
+Exposants de croissance des chemins chauds python-docx (benchmarks/microbench.py) sous pytest
+
+Tailles de --quick (sans la plus grande de chaque courbe); ignorés si
+python-docx / reportlab ne sont pas aux versions de requirements.txt.
+"""
+
+import logging
+
+import pytest
+
+from benchmarks.microbench import BENCHMARKS, run_benchmark
+from benchmarks.pins import pin_mismatches
+
+REPEAT = 3
+
+pytestmark = pytest.mark.skipif(bool(pin_mismatches()), reason="; ".join(pin_mismatches()))
+
+
+@pytest.fixture(autouse=True)
+def quiet_handlers():
+    # Les fonctions mesurées journalisent à chaque appel
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize("benchmark", BENCHMARKS, ids=[benchmark.name for benchmark in BENCHMARKS])
+def test_growth_exponent_within_max(benchmark):
+    result = run_benchmark(benchmark, REPEAT, quick=True)
+    assert result["violations"] == []
@@ -0,0 +1,134 @@
+"""
+Renderer PDF direct (shared/pdf_renderer.py) comparé au template de référence
+benchmarks.documents.build_rendering_template: textes par page, en-têtes /
+pieds de page (première page, pages paires) et image en ligne
+"""
+
+import base64
+import io
+import re
+import zlib
+from typing import List
+
+import pytest
+from docx import Document
+from docx.shared import Cm
+
+from benchmarks.documents import build_rendering_template
+from shared.pdf_renderer import UnsupportedDocumentError, render_docx_to_pdf
+
+POINTS_PER_CM = 72 / 2.54
+
+# Template python-docx par défaut: page Letter (612 pt), marges gauche / droite
+# de 90 pt; le cadre reportlab ajoute 6 pt de marge intérieure de chaque côté
+FRAME_LEFT = 90 + 6
+FRAME_WIDTH = 612 - 2 * 90 - 12
+
+
+def _page_contents(pdf: bytes) -> List[str]:
+    """Decoded content stream of each page, in page order (reportlab output: ASCII85 + Flate)"""
+    objects = {int(m.group(1)): m.group(2) for m in re.finditer(rb"(\d+) 0 obj\n(.*?)endobj", pdf, re.S)}
+    kids = re.search(rb"/Kids \[ (.*?) \] /Type /Pages", pdf).group(1)
+    contents = []
+    for ref in re.findall(rb"(\d+) 0 R", kids):
+        content_ref = int(re.search(rb"/Contents (\d+) 0 R", objects[int(ref)]).group(1))
+        stream = re.search(rb"stream\r?\n(.*?)endstream", objects[content_ref], re.S).group(1).strip()
+        contents.append(zlib.decompress(base64.a85decode(stream.rstrip(b"~>"))).decode("latin-1"))
+    return contents
+
+
+def _page_texts(content: str) -> List[str]:
+    """Strings shown on a page (Tj operands), PDF escapes decoded"""
+    texts = []
+    for literal in re.findall(r"\(((?:[^()\\]|\\.)*)\) Tj", content):
+        literal = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), literal)
+        texts.append(re.sub(r"\\(.)", r"\1", literal))
+    return texts
+
+
+def _with_document(docx_bytes: bytes, change) -> bytes:
+    """Apply change(document) to a DOCX and return the new content"""
+    document = Document(io.BytesIO(docx_bytes))
+    change(document)
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def test_rendering_matches_template_pages():
+    pages = [_page_texts(content) for content in _page_contents(render_docx_to_pdf(build_rendering_template()))]
+
+    assert len(pages) == 2
+    assert pages[0][:2] == ["Couverture", "Page de garde"]
+    assert "Proposition commerciale" in pages[0][2:]
+    assert pages[1][:2] == ["Proposition commerciale", "Confidentiel"]
+    for text in ("Désignation", "Description", "Qté", "Prix unitaire", "Prix total", "Offre 0001", "Total HT"):
+        assert text in pages[1]
+
+
+def test_default_header_on_every_page_without_first_page_header():
+    pdf = render_docx_to_pdf(build_rendering_template(first_page_header=False))
+
+    for content in _page_contents(pdf):
+        assert _page_texts(content)[:2] == ["Proposition commerciale", "Confidentiel"]
+
+
+def test_even_page_header():
+    def even_pages(document):
+        document.settings.odd_and_even_pages_header_footer = True
+        document.sections[0].even_page_header.paragraphs[0].text = "Page paire"
+
+    pdf = render_docx_to_pdf(_with_document(build_rendering_template(), even_pages))
+
+    pages = [_page_texts(content) for content in _page_contents(pdf)]
+    assert pages[0][0] == "Couverture"
+    assert pages[1][0] == "Page paire"
+    # Pied de page pair non défini: vide, comme dans Word
+    assert "Confidentiel" not in pages[1]
+
+
+def test_inline_picture_drawn_at_word_size_and_centered():
+    first_page = _page_contents(render_docx_to_pdf(build_rendering_template()))[0]
+
+    # Image XObject: "x y cm" (position) puis "largeur 0 0 hauteur 0 0 cm" et Do
+    match = re.search(r"1 0 0 1 ([\d.]+) [\d.]+ cm\nq\n([\d.]+) 0 0 ([\d.]+) 0 0 cm\n/\S+ Do", first_page)
+    assert match is not None
+    x, width, height = (float(value) for value in match.groups())
+    assert width == pytest.approx(4 * POINTS_PER_CM, abs=0.1)
+    assert height == pytest.approx(3 * POINTS_PER_CM, abs=0.1)
+    assert x + width / 2 == pytest.approx(FRAME_LEFT + FRAME_WIDTH / 2, abs=0.5)
+
+
+def _picture_in_table(document):
+    logo = document.inline_shapes[0]._inline
+    document.tables[0].cell(1, 0).paragraphs[0].add_run()._r.add_drawing(logo)
+
+
+def _picture_in_header(document):
+    logo = document.inline_shapes[0]._inline
+    document.sections[0].header.paragraphs[0].add_run()._r.add_drawing(logo)
+
+
+def _picture_with_text(document):
+    document.paragraphs[0].add_run("Logo")
+
+
+@pytest.mark.parametrize("change", [
+    _picture_in_table,
+    _picture_in_header,
+    _picture_with_text,
+], ids=["picture-in-table", "picture-in-header", "picture-with-text"])
+def test_unsupported_pictures_fall_back(change):
+    with pytest.raises(UnsupportedDocumentError):
+        render_docx_to_pdf(_with_document(build_rendering_template(), change))
+
+
+def test_picture_scaled_down_to_frame():
+    def huge_picture(document):
+        inline = document.inline_shapes[0]
+        inline.width, inline.height = Cm(40), Cm(30)
+
+    first_page = _page_contents(render_docx_to_pdf(_with_document(build_rendering_template(), huge_picture)))[0]
+
+    width = float(re.search(r"([\d.]+) 0 0 [\d.]+ 0 0 cm\n/\S+ Do", first_page).group(1))
+    assert width == pytest.approx(FRAME_WIDTH, abs=0.5)
@@ -0,0 +1,92 @@
+"""
+Cache des URL SAS (BlobStorageClient._sign): réutilisation tant qu'il reste
+plus de SAS_CACHE_REFRESH_RATIO de la validité, nouvelle signature ensuite
+"""
+
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from benchmarks.backends import overridden
+from shared import blob_client as blob_client_module
+from shared.blob_client import SAS_CACHE_REFRESH_RATIO, get_blob_client
+from shared.config import CONTAINER_DOCUMENTS
+
+START = datetime(2025, 10, 20, 8, 30, tzinfo=timezone.utc)
+LIFETIME = timedelta(hours=24)
+MARGIN = LIFETIME * SAS_CACHE_REFRESH_RATIO
+
+
+class _FrozenDatetime(datetime):
+    """datetime of shared.blob_client with a settable now()"""
+
+    current = START
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(backends):
+    _FrozenDatetime.current = START
+    with overridden({blob_client_module: {"datetime": _FrozenDatetime}}):
+        yield _FrozenDatetime
+
+
+def _sign(blob_name="Alice/proposition.pdf", expiry_hours=24, permissions="r"):
+    urls = get_blob_client().generate_sas_urls(CONTAINER_DOCUMENTS, [blob_name], expiry_hours=expiry_hours, permissions=permissions)
+    return urls[blob_name]
+
+
+def _signed_expiry(sas_url):
+    return parse_qs(urlsplit(sas_url).query)["se"][0]
+
+
+def test_url_reused_while_remaining_validity_above_margin(clock):
+    first = _sign()
+
+    clock.current = START + LIFETIME - MARGIN - timedelta(minutes=1)
+    reused = _sign()
+
+    assert reused == first
+    assert first["expires_on"] == (START + LIFETIME).isoformat()
+
+
+def test_url_resigned_once_remaining_validity_below_margin(clock):
+    first = _sign()
+
+    clock.current = START + LIFETIME - MARGIN + timedelta(minutes=1)
+    renewed = _sign()
+
+    # Le client reçoit toujours au moins 1 - SAS_CACHE_REFRESH_RATIO de la durée demandée
+    assert renewed["sas_url"] != first["sas_url"]
+    assert renewed["expires_on"] == (clock.current + LIFETIME).isoformat()
+    assert _signed_expiry(renewed["sas_url"]) == (clock.current + LIFETIME).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@pytest.mark.parametrize("other", [
+    {"blob_name": "Alice/autre.pdf"},
+    {"expiry_hours": 1},
+    {"permissions": "rw"},
+], ids=["blob", "lifetime", "permissions"])
+def test_cache_key_covers_blob_lifetime_and_permissions(clock, other):
+    first = _sign()
+
+    assert _sign(**other)["sas_url"] != first["sas_url"]
+    assert _sign() == first
+
+
+def test_full_cache_drops_expiring_entries(clock):
+    with overridden({blob_client_module: {"SAS_CACHE_MAX_ENTRIES": 2}}):
+        kept = _sign("Alice/a.pdf")
+        _sign("Alice/b.pdf", expiry_hours=1)
+        clock.current = START + timedelta(minutes=50)
+        _sign("Alice/c.pdf")
+
+        cache = get_blob_client()._sas_cache
+
+        # L'URL d'une heure n'a plus que 10 min: retirée; celle de 24h reste en cache
+        assert sorted(key[1] for key in cache) == ["Alice/a.pdf", "Alice/c.pdf"]
+        assert _sign("Alice/a.pdf") == kept
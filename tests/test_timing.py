@@ -0,0 +1,96 @@
+"""
+Durées par étape (shared/timing.py): en-tête Server-Timing des réponses,
+cumul des étapes répétées et étapes imbriquées
+"""
+
+import re
+
+import azure.functions as func
+import pytest
+
+from benchmarks.backends import http_request
+from DocumentProcessor.list_templates import list_general_templates
+from shared.config import CONTAINER_TEMPLATES
+from shared.middleware import instrument_handler
+from shared.timing import SERVER_TIMING_HEADER, _current, mark_stage, stage, timed_handler, timed_stage
+
+SERVER_TIMING_ENTRY = re.compile(r"^([a-z_]+);dur=(\d+(?:\.\d+)?)$")
+
+
+def _server_timing(response):
+    """Server-Timing header as {stage: ms}, checking each entry is well formed"""
+    entries = {}
+    for entry in response.headers[SERVER_TIMING_HEADER].split(", "):
+        name, duration = SERVER_TIMING_ENTRY.match(entry).groups()
+        entries[name] = float(duration)
+    return entries
+
+
+def _run(handler):
+    return timed_handler(handler)(http_request("GET", "test"))
+
+
+def test_instrumented_route_reports_its_stages(backends):
+    backends.blob_service.put(CONTAINER_TEMPLATES, "general/offre.docx", b"docx")
+
+    response = instrument_handler(list_general_templates)(http_request("GET", "list-templates"))
+
+    timings = _server_timing(response)
+    assert response.status_code == 200
+    assert list(timings) == ["blob_list", "total"]
+    assert timings["blob_list"] <= timings["total"]
+
+
+def test_error_responses_carry_header(backends):
+    response = instrument_handler(list_general_templates)(
+        http_request("GET", "list-templates", params={"page_size": "0"})
+    )
+
+    assert response.status_code == 400
+    assert list(_server_timing(response)) == ["total"]
+
+
+@timed_stage("blob_download")
+def _download():
+    # A timed client method calling another one: a single blob_download
+    return _download_inner()
+
+
+@timed_stage("blob_download")
+def _download_inner():
+    return b""
+
+
+def test_repeated_stages_summed_and_nested_counted_once():
+    counts = {}
+
+    def handler(req):
+        for _ in range(3):
+            _download()
+        with stage("docx_parse"):
+            pass
+        mark_stage("docx_mutate")
+        counts.update({name: count for name, (_, count) in _current.get().stages.items()})
+        return func.HttpResponse("ok")
+
+    timings = _server_timing(_run(handler))
+
+    assert list(timings) == ["blob_download", "docx_parse", "docx_mutate", "total"]
+    assert counts == {"blob_download": 3, "docx_parse": 1, "docx_mutate": 1}
+
+
+def test_stages_outside_request_are_ignored():
+    with stage("docx_parse"):
+        mark_stage("docx_mutate")
+
+    assert _current.get() is None
+    assert _download() == b""
+
+
+def test_handler_exception_propagates():
+    def handler(req):
+        with stage("dataverse"):
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        _run(handler)
@@ -0,0 +1,111 @@
+"""
+Enregistrement des traces de requêtes (shared/trace_recorder.py): aucun
+dossier utilisateur, nom de fichier ni valeur saisie en clair dans les
+événements enregistrés
+"""
+
+import json
+from urllib.parse import quote
+
+import pytest
+
+from benchmarks.backends import http_request, overridden
+from DocumentProcessor.clean_quote import clean_quote
+from DocumentProcessor.get_sas_urls import get_sas_urls
+from DocumentProcessor.list_user_documents import list_created_documents
+from ProposalGenerator.set_customer_info import set_customer_info
+from shared import trace_recorder
+from shared.config import CONTAINER_DOCUMENTS, CONTAINER_DIAGNOSTICS, CONTAINER_TEMPLATES
+from shared.trace_recorder import TraceRecorder, pseudonym, recorded_handler
+
+USER_FOLDER = "Eric FER"
+DOCUMENT = "Devis Dupont SA.docx"
+# Valeurs personnelles envoyées par les requêtes: aucune ne doit être enregistrée
+PERSONAL_VALUES = [USER_FOLDER, "Eric", "Dupont", "claire.martin@example.com", "Claire Martin", "06 12 34 56 78", "secret-key"]
+
+
+@pytest.fixture
+def recorder(backends):
+    backends.blob_service.put(CONTAINER_TEMPLATES, f"{USER_FOLDER}/{DOCUMENT}", b"docx")
+    backends.blob_service.put(CONTAINER_DOCUMENTS, f"{USER_FOLDER}/{DOCUMENT}", b"docx")
+    recorder = TraceRecorder()
+    settings = {
+        "TRACE_RECORDING": "on", "TRACE_SALT": "test-salt", "TRACE_SAMPLE_RATE": 1.0,
+        "TRACE_FLUSH_EVENTS": 1000, "TRACE_FLUSH_SECONDS": 3600, "_trace_recorder_instance": recorder
+    }
+    with overridden({trace_recorder: settings}):
+        yield recorder
+    recorder.flush()
+
+
+def _record(handler, method, route, body=None, params=None):
+    recorded_handler(handler)(http_request(method, route, body, params))
+
+
+def _events(recorder):
+    with recorder._lock:
+        return list(recorder._events)
+
+
+def _record_session(recorder):
+    _record(list_created_documents, "GET", "document/list-user-documents", params={"user_folder": USER_FOLDER, "code": "secret-key"})
+    _record(get_sas_urls, "POST", "document/get-sas-urls", {
+        "file_paths": [f"{USER_FOLDER}/{DOCUMENT}", "general/Offre.docx"], "container": CONTAINER_DOCUMENTS, "check_exists": True
+    })
+    _record(clean_quote, "POST", "document/clean-quote", {"blob_path": f"{USER_FOLDER}/{DOCUMENT}", "user_folder": USER_FOLDER})
+    _record(set_customer_info, "POST", "proposal/set-customer-info", {
+        "user_folder": USER_FOLDER,
+        "customer_success": {"name": "Claire Martin", "tel": "06 12 34 56 78", "email": "claire.martin@example.com"}
+    })
+    return _events(recorder)
+
+
+def test_events_contain_no_personal_value(recorder):
+    events = _record_session(recorder)
+
+    assert len(events) == 4
+    text = json.dumps(events, ensure_ascii=False)
+    for value in PERSONAL_VALUES + [DOCUMENT, "Devis"]:
+        assert value not in text
+        assert quote(value) not in text
+
+
+def test_pseudonyms_are_stable_within_session(recorder):
+    events = _record_session(recorder)
+
+    folder = f"u-{pseudonym(USER_FOLDER)}"
+    path = f"{folder}/f-{pseudonym(DOCUMENT)}.docx"
+    assert {event["session"] for event in events} == {folder}
+    assert events[0]["params"] == {"object": {"user_folder": {"folder": folder}}}
+    assert events[1]["body"]["object"]["file_paths"]["list"] == [{"path": path}, {"path": "general/Offre.docx"}]
+    assert events[2]["body"]["object"]["blob_path"] == {"path": path}
+    # Blobs lus: même pseudonyme que dans le corps
+    assert {blob["blob"] for blob in events[2]["blobs"]} == {path}
+
+
+def test_free_text_kept_as_length_and_reference(recorder):
+    events = _record_session(recorder)
+
+    customer = events[3]["body"]["object"]["customer_success"]["object"]
+    assert customer["name"] == {"str": len("Claire Martin"), "ref": pseudonym("Claire Martin")[:8]}
+    assert events[1]["body"]["object"]["container"] == {"value": CONTAINER_DOCUMENTS}
+    assert events[1]["body"]["object"]["check_exists"] == {"value": True}
+
+
+def test_flushed_trace_blob_is_sanitized(backends, recorder):
+    _record_session(recorder)
+
+    assert recorder.flush() == 4
+
+    (name,) = backends.blob_service.names(CONTAINER_DIAGNOSTICS, "traces/")
+    data = backends.blob_service.get(CONTAINER_DIAGNOSTICS, name).decode("utf-8")
+    assert len(data.splitlines()) == 4
+    for value in PERSONAL_VALUES + [DOCUMENT]:
+        assert value not in data
+
+
+def test_recording_disabled_without_salt(backends, recorder):
+    with overridden({trace_recorder: {"TRACE_SALT": ""}}):
+        _record(list_created_documents, "GET", "document/list-user-documents", params={"user_folder": USER_FOLDER})
+
+    assert _events(recorder) == []